@@ -2,6 +2,8 @@
 Constants for Office Document Editor Tools
 """
 
+import os
+
 # Display settings
 MAX_PREVIEW_LENGTH = 80
 MAX_PREVIEW_LINES = 3
@@ -25,3 +27,9 @@ DEFAULT_LAYOUT_INDEX = 1
 # Excel settings
 MAX_ROWS_DISPLAY = 10
 MAX_COLS_DISPLAY = 5
+
+# Cache settings (analysis results keyed by file content hash; override with OFFICE_EDITOR_CACHE_DIR)
+CACHE_DIR = os.environ.get(
+    'OFFICE_EDITOR_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'office-editor')
+)
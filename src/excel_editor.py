@@ -6,14 +6,32 @@ Interactive Excel Editor
 支援透過自然語言指令修改 Excel 內容
 """
 
-from typing import Optional, List, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Callable, Iterable, Union
 import os
+import re
 import sys
+import csv
+import json
+import array
+import bisect
+import datetime
+import itertools
+import shutil
+import zipfile
+import tempfile
+import weakref
 import argparse
+from copy import copy
 
 from openpyxl import load_workbook, Workbook
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, range_boundaries
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.styleable import StyleableObject
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.cell.cell import Cell, MergedCell
+from openpyxl.formula.translate import Translator
+from openpyxl.worksheet.formula import ArrayFormula, DataTableFormula
 
 try:
     from tqdm import tqdm
@@ -21,6 +39,12 @@ try:
 except ImportError:
     HAS_TQDM = False
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 from .constants import (
     SUCCESS_SYMBOL,
     ERROR_SYMBOL,
@@ -28,20 +52,111 @@ from .constants import (
     MAX_ROWS_DISPLAY,
     MAX_COLS_DISPLAY
 )
+from lxml import etree
+
+from .xlsx_package import (
+    SHARED_STRINGS_RELTYPE,
+    WORKSHEET_RELTYPE,
+    STYLES_RELTYPE,
+    SI_TAG,
+    INLINE_STRING_MARKER,
+    find_workbook_part,
+    read_workbook_sheets,
+    read_sheet_metadata,
+    read_dimension,
+    scan_dimension,
+    read_window,
+    read_formula_cells,
+    iter_sheet_rows,
+    formula_text,
+    shared_string_text,
+    replace_shared_string,
+    part_contains,
+    references_shared_strings,
+    count_shared_string_references,
+    formulas_contain,
+    search_shared_strings,
+    iter_text_matches,
+    rewrite_package,
+    build_partial_package,
+    merge_partial_package,
+    can_append_raw,
+    write_formula_values,
+    update_rows,
+    add_worksheet,
+    iter_raw_rows,
+    read_sheet_tail,
+    merged_ranges,
+    hyperlink_rows,
+    row_format_attributes,
+    rewrite_sheet_rows,
+    append_rows as append_sheet_rows
+)
+from .formula_engine import FormulaEngine, FormulaError
+from .sheet_analytics import profile_rows, file_digest, read_cache, write_cache
+from .sheet_query import (
+    INDEX_KINDS,
+    Condition,
+    parse_where,
+    parse_order,
+    resolve_column,
+    run_query,
+    build_index,
+    index_lookup,
+    column_names,
+    match_key,
+    key_digest,
+    row_sort_key,
+)
+from .sheet_sort import DEFAULT_MEMORY_LIMIT, ExternalSorter
+from .sheet_io import DATA_FORMATS, DEFAULT_BATCH_ROWS, data_format, iter_data_rows, write_data_rows, create_workbook
+from .xlsx_compact import compact_package
+from .sheet_aggregate import DEFAULT_MAX_GROUPS, GroupAggregator, parse_aggregates, aggregate_label
 
 # Excel 相關常量
 EXCEL_EXTENSION = '.xlsx'
 DEFAULT_SHEET_NAME = 'Sheet1'
 
+# 工作表大小上限
+MAX_SHEET_ROWS = 1048576
+MAX_SHEET_COLS = 16384
+
+# 彙總結果寫入工作表時，回傳結果中保留的分組數
+AGGREGATE_PREVIEW_ROWS = 100
+
+# 可延後載入工作簿的 CLI 命令（唯讀，或能直接改寫封裝）
+LAZY_LOAD_COMMANDS = {
+    'list', 'view', 'find', 'replace', 'add-row', 'profile', 'query', 'index', 'join', 'aggregate', 'sort',
+    'dedupe', 'export', 'import', 'compact'
+}
+
+# 去除重複列時保留的一筆
+DEDUPE_KEEP = ('first', 'last')
+
+# 只作用於單一工作表的 CLI 命令：只解析該工作表，其他工作表原樣複製
+PARTIAL_LOAD_COMMANDS = {'view', 'replace', 'update-cell', 'update-range', 'set-format', 'set-formula'}
+
+# 公式儲存格的讀取方式：快取值（上次計算結果）、公式文字、兩者
+VALUE_MODES = ('cached', 'formula', 'both')
+
 
 class ExcelEditor:
     """Excel 編輯器類"""
     
-    def __init__(self, filepath: str) -> None:
+    def __init__(
+        self,
+        filepath: str,
+        read_only: bool = False,
+        sheets: Optional[Iterable[str]] = None
+    ) -> None:
         """初始化 Excel 編輯器
         
         Args:
             filepath: Excel 檔案路徑
+            read_only: 延後載入模式；唯讀操作以串流讀取，
+                需要修改儲存格時才升級為完整載入
+            sheets: 部分載入，只解析這些工作表；其他工作表保留原始部件，
+                儲存時直接複製，操作到時才載入。None 表示載入全部
             
         Raises:
             FileNotFoundError: 當檔案不存在時
@@ -54,79 +169,504 @@ class ExcelEditor:
         if not filepath.endswith(EXCEL_EXTENSION):
             raise ValueError(f"不支援的檔案格式，需要 {EXCEL_EXTENSION}: {filepath}")
         
+        self.filepath = filepath
+        self.read_only = read_only
+        self._wb: Optional[Workbook] = None
+        # 目前內容所在的檔案；直接改寫封裝的操作會產生暫存檔
+        self._source_path = filepath
+        self._pending_cleanup: Optional[weakref.finalize] = None
+        # 部分載入：未載入的工作表（空白佔位工作表）與其原始部件所在的檔案
+        self._partial_sheets = set(sheets) if sheets is not None else None
+        self._raw_worksheets: List[Tuple[Any, str]] = []
+        self._raw_source: Optional[str] = None
+        # 原始部件來源為暫存檔時（儲存後整理過的檔案與目前格式清單的索引不同）移除它
+        self._raw_cleanup: Optional[weakref.finalize] = None
+        # 公式計算引擎（第一次計算時建立），以及儲存時是否寫入計算結果
+        self._engine: Optional[FormulaEngine] = None
+        self._write_formula_values = False
+        # 公式儲存格的公式與快取值 {工作表: {(行, 列): (公式, 快取值)}}，
+        # 需要時才從仍保有快取值的檔案讀取，每個工作表只讀取一次
+        self._formula_cells: Dict[str, Dict[Tuple[int, int], Tuple[str, Any]]] = {}
+        self._values_source = filepath
+        # 目前內容所在檔案的雜湊（(路徑, 修改時間, 大小), 雜湊），作為分析結果與索引的快取鍵
+        self._digest: Optional[Tuple[Tuple[str, int, int], str]] = None
+        
+        if read_only:
+            # 唯讀模式延後載入，只先確認是有效的 xlsx 封裝
+            if not zipfile.is_zipfile(filepath):
+                raise RuntimeError("無法開啟 Excel 檔案: 不是有效的 xlsx 檔案")
+        else:
+            self._wb = self._load_workbook(read_only=False)
+    
+    @property
+    def wb(self) -> Workbook:
+        """目前的工作簿（唯讀模式下首次存取時才載入）"""
+        if self._wb is None:
+            self._wb = self._load_workbook(self.read_only)
+        return self._wb
+    
+    def _load_workbook(self, read_only: bool) -> Workbook:
+        """載入工作簿
+        
+        Raises:
+            RuntimeError: 當無法開啟 Excel 檔案時
+        """
         try:
-            self.filepath = filepath
-            self.wb = load_workbook(filepath)
+            if not read_only and self._partial_sheets is not None:
+                return self._load_partial()
+            return load_workbook(self._source_path, read_only=read_only)
         except Exception as e:
             raise RuntimeError(f"無法開啟 Excel 檔案: {e}") from e
     
-    def save(self, output_path: Optional[str] = None) -> None:
+    def _load_partial(self) -> Workbook:
+        """只解析指定的工作表，其他工作表以空白工作表佔位"""
+        trimmed_path = self._new_pending_path()
+        try:
+            raw_sheets = build_partial_package(self._source_path, trimmed_path, self._partial_sheets)
+            wb = load_workbook(trimmed_path)
+        finally:
+            _remove_file(trimmed_path)
+        self._raw_worksheets = [(wb[name], path) for name, path in raw_sheets.items()]
+        self._release_raw_copy()
+        self._raw_source = self._source_path
+        return wb
+    
+    def _raw_sheet_parts(self) -> Dict[str, str]:
+        """目前未載入的工作表
+        
+        Returns:
+            Dict[str, str]: {工作表名稱: 原始部件在 _raw_source 中的路徑}
+        """
+        if self._wb is None:
+            return {}
+        worksheets = self._wb.worksheets
+        return {ws.title: path for ws, path in self._raw_worksheets if ws in worksheets}
+    
+    def _materialise(self, sheet_names: Optional[set] = None) -> None:
+        """載入尚未載入的工作表（保留目前的修改）
+        
+        Args:
+            sheet_names: 要載入的工作表名稱，None 表示全部
+        """
+        raw_sheets = self._raw_sheet_parts()
+        if not raw_sheets or (sheet_names is not None and not sheet_names & raw_sheets.keys()):
+            return
+        loaded = {ws.title for ws in self._wb.worksheets if ws.title not in raw_sheets}
+        pending_path = self._new_pending_path()
+        self._save_partial(pending_path, raw_sheets)
+        self._set_source(pending_path)
+        self._partial_sheets = None if sheet_names is None else loaded | sheet_names
+        self._raw_worksheets = []
+        self._wb = self._load_workbook(read_only=False)
+    
+    def _save_partial(self, save_path: str, raw_sheets: Dict[str, str]) -> None:
+        """儲存部分載入的工作簿：未載入的工作表直接複製原始部件"""
+        saved_path = self._new_pending_path()
+        merged_path = self._new_pending_path()
+        try:
+            self._wb.save(saved_path)
+            targets = merge_partial_package(saved_path, self._raw_source, merged_path, raw_sheets)
+            if os.path.exists(save_path):
+                shutil.copymode(save_path, merged_path)
+            shutil.move(merged_path, save_path)
+        finally:
+            _remove_file(saved_path)
+            _remove_file(merged_path)
+        self._release_raw_copy()
+        self._raw_source = save_path
+        self._raw_worksheets = [
+            (ws, targets[ws.title]) for ws, _ in self._raw_worksheets if ws.title in targets
+        ]
+    
+    def _release_raw_copy(self) -> None:
+        """移除作為原始部件來源的暫存檔"""
+        if self._raw_cleanup is not None:
+            self._raw_cleanup()
+            self._raw_cleanup = None
+    
+    def _ensure_writable(self) -> None:
+        """修改操作前確保工作簿為完整（可寫入）載入"""
+        if not self.read_only:
+            return
+        self._close_workbook()
+        self._wb = self._load_workbook(read_only=False)
+        self.read_only = False
+    
+    def _close_workbook(self) -> None:
+        """關閉唯讀模式下開啟的工作簿"""
+        if self._wb is not None:
+            self._wb.close()
+            self._wb = None
+        self._engine = None
+    
+    def _new_pending_path(self) -> str:
+        """建立直接改寫封裝用的暫存檔路徑"""
+        fd, path = tempfile.mkstemp(suffix=EXCEL_EXTENSION)
+        os.close(fd)
+        # mkstemp 只給擁有者讀寫權限，改為一般新檔案的權限
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(path, 0o666 & ~umask)
+        return path
+    
+    def _set_source(self, path: str) -> None:
+        """以改寫後的暫存檔作為目前內容，並移除前一個暫存檔"""
+        if self._values_source == self._source_path:
+            if self._wb is None or self.read_only:
+                # 直接改寫封裝的操作保留公式的快取值
+                self._values_source = path
+            elif self._pending_cleanup is not None:
+                self._keep_formula_cells(path)
+        self._close_workbook()
+        if self._pending_cleanup is not None:
+            self._pending_cleanup()
+        self._source_path = path
+        self._pending_cleanup = weakref.finalize(self, _remove_file, path)
+    
+    def save(
+        self,
+        output_path: Optional[str] = None,
+        compact: bool = False,
+        measure_load: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """儲存 Excel 檔案
         
         Args:
             output_path: 輸出路徑，None 表示覆蓋原檔案
+            compact: 儲存後整理共用字串表與儲存格格式（見 compact()）
+            measure_load: 整理時以 openpyxl 載入前後的檔案並記錄時間
+            
+        Returns:
+            Optional[Dict[str, Any]]: compact 時為整理結果（見 compact()），否則為 None
         """
         save_path = output_path or self.filepath
+        report = None
         try:
-            self.wb.save(save_path)
+            if self.read_only:
+                # 工作簿未載入：直接複製目前內容（原檔或改寫後的暫存檔）
+                if os.path.abspath(save_path) != os.path.abspath(self._source_path):
+                    self._close_workbook()
+                    if self._pending_cleanup is not None:
+                        # 暫存檔直接移到目標位置，不再複製一次（保留目標檔的權限）
+                        if os.path.exists(save_path):
+                            shutil.copymode(save_path, self._source_path)
+                        shutil.move(self._source_path, save_path)
+                        self._pending_cleanup.detach()
+                        self._pending_cleanup = None
+                        if self._values_source == self._source_path:
+                            self._values_source = save_path
+                        self._source_path = save_path
+                    else:
+                        shutil.copyfile(self._source_path, save_path)
+            else:
+                if os.path.abspath(save_path) == os.path.abspath(self._values_source):
+                    self._keep_formula_cells(save_path)
+                raw_sheets = self._raw_sheet_parts()
+                if raw_sheets:
+                    # 未載入的工作表沿用原本的格式索引，不能整理格式清單
+                    self._save_partial(save_path, raw_sheets)
+                else:
+                    self._compact_cell_styles()
+                    self.wb.save(save_path)
+                if self._write_formula_values and self._engine is not None:
+                    self._save_formula_values(save_path)
+            if compact:
+                report = self._compact_saved(save_path, measure_load)
             print(f"{SUCCESS_SYMBOL} Excel 檔案已儲存: {save_path}")
+            if report is not None:
+                print(f"{SUCCESS_SYMBOL} 已整理: {_compaction_summary(report)}")
         except Exception as e:
             print(f"{ERROR_SYMBOL} 儲存失敗: {e}")
             raise
+        return report
+    
+    def compact(self, measure_load: bool = False) -> Optional[Dict[str, Any]]:
+        """整理共用字串表與儲存格格式
+        
+        移除沒有儲存格使用的共用字串與儲存格格式（cellXfs），合併內容相同的項目，
+        並串流改寫工作表中的索引；工作表的其他內容與其他部件不變。
+        工作簿尚未載入時直接改寫目前內容，之後以 save() 儲存；
+        已載入時請使用 save(compact=True) 整理儲存的檔案。
+        
+        Args:
+            measure_load: 以 openpyxl 載入整理前後的檔案並記錄時間（需要完整載入兩次）
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'strings_before', 'strings_after', 'styles_before',
+                'styles_after', 'size_before', 'size_after'}，measure_load 時另有
+                'load_seconds_before' 與 'load_seconds_after'；失敗時為 None
+        """
+        if not self.read_only:
+            print(f"{ERROR_SYMBOL} 工作簿已載入，請在儲存時整理: save(compact=True)")
+            return None
+        
+        pending = self._new_pending_path()
+        try:
+            self._close_workbook()
+            report = compact_package(self._source_path, pending, measure_load)
+        except (ValueError, OSError, zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+            _remove_file(pending)
+            print(f"{ERROR_SYMBOL} 整理失敗: {e}")
+            return None
+        self._set_source(pending)
+        print(f"{SUCCESS_SYMBOL} 已整理: {_compaction_summary(report)}")
+        return report
+    
+    def _compact_saved(self, path: str, measure_load: bool) -> Dict[str, Any]:
+        """整理剛儲存的檔案並取代它"""
+        pending = self._new_pending_path()
+        try:
+            if self.read_only:
+                self._close_workbook()
+            report = compact_package(path, pending, measure_load)
+            shutil.copymode(path, pending)
+            if self._raw_sheet_parts() and self._raw_source == path:
+                # 未載入的工作表之後仍與目前的格式清單合併，保留整理前的檔案作為其原始部件來源
+                raw_copy = self._new_pending_path()
+                shutil.move(path, raw_copy)
+                self._raw_source = raw_copy
+                self._raw_cleanup = weakref.finalize(self, _remove_file, raw_copy)
+            shutil.move(pending, path)
+        finally:
+            _remove_file(pending)
+        return report
     
     def list_sheets(self) -> None:
         """列出所有工作表及基本資訊"""
-        print(f"\n=== Excel 檔案結構 (共 {len(self.wb.sheetnames)} 個工作表) ===\n")
+        sheets = self._sheet_metadata()
+        print(f"\n=== Excel 檔案結構 (共 {len(sheets)} 個工作表) ===\n")
         
-        for i, sheet_name in enumerate(self.wb.sheetnames, 1):
-            ws = self.wb[sheet_name]
-            active_mark = " [活動]" if ws == self.wb.active else ""
-            print(f"[工作表 {i}] {sheet_name}{active_mark}")
-            print(f"  行數: {ws.max_row}, 列數: {ws.max_column}")
+        for i, sheet in enumerate(sheets, 1):
+            active_mark = " [活動]" if sheet['active'] else ""
+            hidden_mark = " [隱藏]" if sheet['state'] != 'visible' else ""
+            print(f"[工作表 {i}] {sheet['name']}{active_mark}{hidden_mark}")
+            print(f"  行數: {sheet['max_row']}, 列數: {sheet['max_column']}")
             print()
     
-    def view_sheet(self, sheet_name: Optional[str] = None, max_rows: int = MAX_ROWS_DISPLAY) -> None:
+    def _sheet_metadata(self) -> List[Dict[str, Any]]:
+        """取得所有工作表的名稱、狀態與尺寸
+        
+        工作簿尚未載入時直接讀取 workbook.xml 與各工作表的 dimension 紀錄，
+        不需要載入工作簿。
+        
+        Returns:
+            List[Dict[str, Any]]: [{'name', 'state', 'max_row', 'max_column', 'active'}]
+        """
+        if self._wb is None:
+            return read_sheet_metadata(self._source_path)
+        
+        # 未載入的工作表從原始部件取得尺寸
+        raw_sizes = {}
+        raw_sheets = self._raw_sheet_parts()
+        if raw_sheets:
+            with zipfile.ZipFile(self._raw_source) as zf:
+                raw_sizes = {
+                    name: read_dimension(zf, path) or scan_dimension(zf, path)
+                    for name, path in raw_sheets.items()
+                }
+        
+        metadata = []
+        for ws in self.wb.worksheets:
+            max_row, max_col = raw_sizes.get(ws.title) or self._sheet_size(ws)
+            metadata.append({
+                'name': ws.title,
+                'state': ws.sheet_state,
+                'max_row': max_row,
+                'max_column': max_col,
+                'active': ws == self.wb.active,
+            })
+        return metadata
+    
+    def view_sheet(
+        self,
+        sheet_name: Optional[str] = None,
+        max_rows: int = MAX_ROWS_DISPLAY,
+        cell_range: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        max_cols: int = MAX_COLS_DISPLAY,
+        as_json: bool = False,
+        values: str = 'formula'
+    ) -> Optional[Dict[str, Any]]:
         """查看工作表內容
         
+        只讀取要顯示的視窗。工作簿尚未載入時直接串流讀取工作表 XML，
+        略過視窗之前的資料，因此查看任何位置的成本大致相同；
+        公式與快取值在同一次讀取中取得。
+        
         Args:
             sheet_name: 工作表名稱，None 表示活動工作表
-            max_rows: 最大顯示行數
+            max_rows: 未指定 limit 時的最大顯示行數
+            cell_range: 查看範圍（如 'B500000:H500050'、'A:C'、'10:20'），None 表示從 A1 開始
+            offset: 略過視窗開頭的行數（分頁用）
+            limit: 最多顯示的行數，None 表示 max_rows（有指定範圍時為整個範圍）
+            max_cols: 未指定範圍時的最大顯示列數
+            as_json: 以 JSON 輸出（供 AI Agent 使用）
+            values: 公式儲存格的值：'formula' 公式、'cached' 快取值（上次計算結果）、
+                'both' {'formula': 公式, 'value': 快取值}
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'range', 'max_row', 'max_column', 'columns', 'rows'}，
+                失敗時為 None
         """
-        if sheet_name:
-            if not self._validate_sheet_name(sheet_name):
-                return
-            ws = self.wb[sheet_name]
-        else:
-            ws = self.wb.active
-            sheet_name = ws.title
+        if not self._validate_value_mode(values):
+            return None
+        if sheet_name and not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
         
-        print(f"\n=== 工作表: {sheet_name} ===\n")
+        raw_source = self._source_path
+        if self._wb is not None:
+            # 未載入的工作表直接讀取原始部件
+            sheet_name = sheet_name or self.wb.active.title
+            raw_source = self._raw_source if sheet_name in self._raw_sheet_parts() else None
+        
+        try:
+            if raw_source is not None:
+                with zipfile.ZipFile(raw_source) as zf:
+                    if self._wb is None:
+                        sheet_name, sheet_path = self._worksheet_part(zf, sheet_name)
+                    else:
+                        sheet_path = self._raw_sheet_parts()[sheet_name]
+                    max_row, max_col = read_dimension(zf, sheet_path) or scan_dimension(zf, sheet_path)
+                    window = self._view_window(
+                        max_row, max_col, cell_range, offset, limit, max_rows, max_cols
+                    )
+                    cached = {} if values != 'formula' else None
+                    cells = read_window(zf, sheet_path, *window, cached_values=cached)
+                for (row, col), value in (cached or {}).items():
+                    formula = cells[row][col]
+                    cells[row][col] = value if values == 'cached' else {
+                        'formula': formula_text(formula), 'value': value
+                    }
+                min_row, last_row, min_col, last_col = window
+                rows = [
+                    [cells.get(row, {}).get(col) for col in range(min_col, last_col + 1)]
+                    for row in range(min_row, last_row + 1)
+                ]
+            else:
+                ws = self.wb[sheet_name]
+                max_row, max_col = self._sheet_size(ws)
+                window = self._view_window(
+                    max_row, max_col, cell_range, offset, limit, max_rows, max_cols
+                )
+                min_row, last_row, min_col, last_col = window
+                rows = [
+                    list(values) for values in ws.iter_rows(
+                        min_row=min_row, max_row=last_row,
+                        min_col=min_col, max_col=last_col,
+                        values_only=True
+                    )
+                ] if last_row >= min_row and last_col >= min_col else []
+                if values != 'formula':
+                    rows = [
+                        [
+                            self._formula_result(sheet_name, row, col, value, values)
+                            for col, value in enumerate(row_values, min_col)
+                        ]
+                        for row, row_values in enumerate(rows, min_row)
+                    ]
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        
+        columns = [get_column_letter(col) for col in range(min_col, last_col + 1)]
+        result = {
+            'sheet': sheet_name,
+            'range': f"{columns[0]}{min_row}:{columns[-1]}{last_row}" if rows and columns else None,
+            'max_row': max_row,
+            'max_column': max_col,
+            'columns': columns,
+            'rows': [
+                {'row': row, 'values': [json_value(value) for value in values]}
+                for row, values in enumerate(rows, min_row)
+            ],
+        }
+        
+        if as_json:
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+            return result
         
-        # 顯示前幾行
-        rows_to_show = min(max_rows, ws.max_row)
-        cols_to_show = min(MAX_COLS_DISPLAY, ws.max_column)
+        print(f"\n=== 工作表: {sheet_name} ===\n")
         
         # 顯示標頭
-        headers = []
-        for col in range(1, cols_to_show + 1):
-            headers.append(get_column_letter(col))
-        print("   " + "  ".join(f"{h:>8}" for h in headers))
-        print("   " + "-" * (10 * len(headers)))
-        
-        # 顯示資料
-        for row in range(1, rows_to_show + 1):
+        width = max(2, len(str(last_row)))
+        print(" " * (width + 1) + "  ".join(f"{h:>8}" for h in columns))
+        print(" " * (width + 1) + "-" * (10 * len(columns)))
+        
+        # 顯示資料（'both' 時表格顯示快取值，公式另外列出）
+        formulas = []
+        for row, row_values in enumerate(rows, min_row):
             row_data = []
-            for col in range(1, cols_to_show + 1):
-                cell_value = ws.cell(row, col).value
-                if cell_value is None:
-                    cell_value = ""
-                row_data.append(str(cell_value)[:8])
-            print(f"{row:2} " + "  ".join(f"{val:>8}" for val in row_data))
-        
-        if ws.max_row > max_rows:
-            print(f"\n... 還有 {ws.max_row - max_rows} 行未顯示")
-        if ws.max_column > MAX_COLS_DISPLAY:
-            print(f"... 還有 {ws.max_column - MAX_COLS_DISPLAY} 列未顯示")
+            for col, value in enumerate(row_values, min_col):
+                if isinstance(value, dict):
+                    formulas.append((f"{get_column_letter(col)}{row}", value))
+                    value = value['value']
+                row_data.append("" if value is None else str(value)[:8])
+            print(f"{row:{width}} " + "  ".join(f"{val:>8}" for val in row_data))
+        
+        if max_row > last_row:
+            print(f"\n... 還有 {max_row - last_row} 行未顯示")
+        if max_col > last_col:
+            print(f"... 還有 {max_col - last_col} 列未顯示")
+        
+        if formulas:
+            print("\n公式:")
+            for cell_ref, value in formulas[:20]:
+                print(f"  {cell_ref}: {value['formula']} → {value['value']}")
+            if len(formulas) > 20:
+                print(f"  ... 還有 {len(formulas) - 20} 個公式未顯示")
+        
+        return result
+    
+    @staticmethod
+    def _view_window(
+        max_row: int,
+        max_col: int,
+        cell_range: Optional[str],
+        offset: int,
+        limit: Optional[int],
+        max_rows: int,
+        max_cols: int
+    ) -> Tuple[int, int, int, int]:
+        """計算要顯示的視窗
+        
+        Returns:
+            Tuple[int, int, int, int]: (起始行, 結束行, 起始列, 結束列)
+            
+        Raises:
+            ValueError: 範圍格式無效時
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset 與 limit 不能為負數")
+        
+        if cell_range:
+            try:
+                min_col, min_row, last_col, last_row = range_boundaries(cell_range.upper())
+            except (ValueError, TypeError):
+                raise ValueError(f"無效的範圍: {cell_range}")
+            min_row, last_row = min_row or 1, last_row or max_row
+            min_col, last_col = min_col or 1, last_col or max_col
+        else:
+            min_row, last_row = 1, max_row
+            min_col, last_col = 1, min(max_cols, max_col)
+            if limit is None:
+                limit = max_rows
+        
+        min_row += offset
+        if limit is not None:
+            last_row = min(last_row, min_row + limit - 1)
+        return min_row, min(last_row, max_row), min_col, min(last_col, max_col)
+    
+    def _worksheet_part(self, zf: zipfile.ZipFile, sheet_name: Optional[str]) -> Tuple[str, str]:
+        """取得工作表名稱與其 XML 部件路徑，None 表示活動工作表"""
+        sheets, active_index = read_workbook_sheets(zf)
+        if sheet_name is None:
+            sheet = sheets[active_index] if active_index < len(sheets) else sheets[0]
+        else:
+            sheet = next(sheet for sheet in sheets if sheet['name'] == sheet_name)
+        if sheet['type'] != WORKSHEET_RELTYPE:
+            raise ValueError(f"「{sheet['name']}」不是一般工作表")
+        return sheet['name'], sheet['path']
     
     def replace_text(
         self, 
@@ -136,21 +676,50 @@ class ExcelEditor:
     ) -> int:
         """替換文字
         
+        工作簿尚未載入時（read_only 模式）直接改寫共用字串表；
+        遇到行內字串、公式中含有要替換的文字，或指定工作表的字串也被其他工作表引用時，
+        改為逐格替換。
+        兩種方式都回傳被替換的儲存格數。
+        
         Args:
             old_text: 要替換的文字
             new_text: 新文字
             sheet_name: 指定工作表名稱，None 表示所有工作表
             
         Returns:
-            int: 實際替換的次數
+            int: 被替換的儲存格數
         """
         if not old_text:
             print(f"{ERROR_SYMBOL} 要替換的文字不能為空")
             return 0
         
+        if sheet_name and not self._validate_sheet_name(sheet_name):
+            return 0
+        
+        replaced_count = None
+        if self.read_only:
+            replaced_count = self._replace_shared_strings(old_text, new_text, sheet_name)
+        if replaced_count is None:
+            replaced_count = self._replace_cells(old_text, new_text, sheet_name)
+        
+        if replaced_count > 0:
+            scope = f"工作表 {sheet_name}" if sheet_name else "所有工作表"
+            print(f"{SUCCESS_SYMBOL} 在{scope}中替換了 {replaced_count} 個儲存格的「{old_text}」→「{new_text}」")
+        else:
+            print(f"{ERROR_SYMBOL} 找不到「{old_text}」")
+        
+        return replaced_count
+    
+    def _replace_cells(self, old_text: str, new_text: str, sheet_name: Optional[str]) -> int:
+        """載入工作簿並逐格替換文字
+        
+        Returns:
+            int: 替換的儲存格數
+        """
+        self._ensure_writable()
+        self._materialise({sheet_name} if sheet_name else None)
+        
         if sheet_name:
-            if not self._validate_sheet_name(sheet_name):
-                return 0
             sheets_to_process = [self.wb[sheet_name]]
         else:
             sheets_to_process = [self.wb[name] for name in self.wb.sheetnames]
@@ -169,14 +738,71 @@ class ExcelEditor:
                         cell.value = cell.value.replace(old_text, new_text)
                         replaced_count += 1
         
-        if replaced_count > 0:
-            scope = f"工作表 {sheet_name}" if sheet_name else "所有工作表"
-            print(f"{SUCCESS_SYMBOL} 在{scope}中替換了 {replaced_count} 處「{old_text}」→「{new_text}」")
-        else:
-            print(f"{ERROR_SYMBOL} 找不到「{old_text}」")
-        
         return replaced_count
     
+    def _replace_shared_strings(
+        self,
+        old_text: str,
+        new_text: str,
+        sheet_name: Optional[str]
+    ) -> Optional[int]:
+        """直接改寫共用字串表替換文字，不載入工作簿也不改動工作表 XML
+        
+        Returns:
+            Optional[int]: 引用被替換字串的儲存格數；需要改為逐格替換時為 None
+        """
+        with zipfile.ZipFile(self._source_path) as zf:
+            sheets, _ = read_workbook_sheets(zf)
+            worksheets = [
+                sheet for sheet in sheets
+                if sheet['type'] == WORKSHEET_RELTYPE and sheet['path'] in zf.NameToInfo
+            ]
+            targets = [sheet for sheet in worksheets if sheet_name in (None, sheet['name'])]
+            
+            # 行內字串與公式文字不在共用字串表中
+            if any(part_contains(zf, sheet['path'], INLINE_STRING_MARKER) for sheet in targets):
+                return None
+            if any(formulas_contain(zf, sheet['path'], old_text) for sheet in targets):
+                return None
+            
+            sst_path = find_workbook_part(zf, SHARED_STRINGS_RELTYPE)
+            if sst_path is None:
+                return 0
+            
+            root = etree.fromstring(zf.read(sst_path))
+            entries = root.findall(SI_TAG)
+            matched = [
+                index for index, si in enumerate(entries)
+                if old_text in shared_string_text(si)
+            ]
+            if not matched:
+                return 0
+            
+            # 只替換單一工作表時，被其他工作表共用的字串必須拆開
+            indices = set(matched)
+            if sheet_name:
+                if any(
+                    references_shared_strings(zf, sheet['path'], indices)
+                    for sheet in worksheets if sheet not in targets
+                ):
+                    return None
+            
+            # 與逐格替換相同，回傳儲存格數；沒有儲存格引用的字串不必改寫
+            cells = sum(
+                count_shared_string_references(zf, sheet['path'], indices) for sheet in targets
+            )
+            if not cells:
+                return 0
+            
+            for index in matched:
+                replace_shared_string(entries[index], old_text, new_text)
+            data = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+        
+        pending_path = self._new_pending_path()
+        rewrite_package(self._source_path, pending_path, {sst_path: data})
+        self._set_source(pending_path)
+        return cells
+    
     def update_cell(self, sheet_name: str, cell_ref: str, value: Any) -> bool:
         """更新儲存格值
         
@@ -188,13 +814,17 @@ class ExcelEditor:
         Returns:
             bool: 是否更新成功
         """
+        self._ensure_writable()
+        
         if not self._validate_sheet_name(sheet_name):
             return False
         
         try:
             ws = self.wb[sheet_name]
-            old_value = ws[cell_ref].value
-            ws[cell_ref] = value
+            cell = ws[cell_ref]
+            old_value = cell.value
+            cell.value = value
+            self._track_edit(sheet_name, cell.row, cell.column, cell.value)
             print(f"{SUCCESS_SYMBOL} 已更新 {sheet_name}!{cell_ref}")
             print(f"  舊值: {old_value}")
             print(f"  新值: {value}")
@@ -203,6 +833,82 @@ class ExcelEditor:
             print(f"{ERROR_SYMBOL} 更新失敗: {e}")
             return False
     
+    def update_range(
+        self,
+        sheet_name: str,
+        top_left: str,
+        rows: Any,
+        columns: Optional[int] = None
+    ) -> int:
+        """批次寫入矩形範圍
+        
+        直接寫入儲存格值，不逐格輸出訊息；已存在的儲存格保留原有格式。
+        
+        Args:
+            sheet_name: 工作表名稱
+            top_left: 左上角儲存格參照 (如 A1)
+            rows: 二維資料，可為列表、迭代器（逐行產生）、array.array、memoryview 或 NumPy 陣列
+            columns: 一維緩衝區（array.array、一維 memoryview / NumPy 陣列）每行的列數，
+                None 表示整個緩衝區為一行
+            
+        Returns:
+            int: 寫入的儲存格數量（發生錯誤時為錯誤前已寫入的數量）
+        """
+        self._ensure_writable()
+        
+        if not self._validate_sheet_name(sheet_name):
+            return 0
+        
+        try:
+            min_col, min_row, _, _ = range_boundaries(top_left.upper())
+            if min_col is None or min_row is None:
+                raise ValueError
+        except (ValueError, TypeError):
+            print(f"{ERROR_SYMBOL} 無效的儲存格參照: {top_left}")
+            return 0
+        
+        ws = self.wb[sheet_name]
+        cells = ws._cells
+        engine = self._engine
+        count = 0
+        last_row, last_col = min_row - 1, min_col - 1
+        
+        try:
+            for row, values in enumerate(_iter_range_rows(rows, columns), min_row):
+                if row > MAX_SHEET_ROWS:
+                    raise ValueError(f"超出工作表最大行數 {MAX_SHEET_ROWS}")
+                col = min_col - 1
+                for col, value in enumerate(values, min_col):
+                    if col > MAX_SHEET_COLS:
+                        count += col - min_col
+                        raise ValueError(f"超出工作表最大列數 {MAX_SHEET_COLS}")
+                    cell = cells.get((row, col))
+                    if cell is None:
+                        cell = cells[(row, col)] = Cell(ws, row=row, column=col, value=value)
+                    elif isinstance(cell, MergedCell):
+                        count += col - min_col
+                        raise ValueError(f"{get_column_letter(col)}{row} 位於合併儲存格內，不能寫入")
+                    else:
+                        cell.value = value
+                    if engine is not None:
+                        engine.set_cell(sheet_name, row, col, cell.value)
+                count += col - min_col + 1
+                last_row, last_col = row, max(last_col, col)
+        except Exception as e:
+            print(f"{ERROR_SYMBOL} 範圍寫入失敗（已寫入 {count} 個儲存格）: {e}")
+            return count
+        finally:
+            ws._current_row = max(ws._current_row, last_row)
+        
+        if count:
+            print(
+                f"{SUCCESS_SYMBOL} 已寫入 {sheet_name}!{get_column_letter(min_col)}{min_row}:"
+                f"{get_column_letter(last_col)}{last_row}（{count} 個儲存格）"
+            )
+        else:
+            print(f"{WARNING_SYMBOL} 沒有要寫入的資料")
+        return count
+    
     def add_row(
         self, 
         sheet_name: str, 
@@ -211,6 +917,8 @@ class ExcelEditor:
     ) -> bool:
         """新增行
         
+        唯讀模式下在最後新增時直接改寫工作表 XML，不載入工作簿。
+        
         Args:
             sheet_name: 工作表名稱
             data: 行資料列表
@@ -219,93 +927,1517 @@ class ExcelEditor:
         Returns:
             bool: 是否新增成功
         """
+        if position is None and self.read_only:
+            if not self._validate_sheet_name(sheet_name):
+                return False
+            row_num = self._append_rows_raw(sheet_name, [list(data)])
+            if row_num is not None:
+                print(f"{SUCCESS_SYMBOL} 已在 {sheet_name} 最後新增一行（第 {row_num} 行）")
+                return True
+        
+        self._ensure_writable()
+        
         if not self._validate_sheet_name(sheet_name):
             return False
         
+        if position is not None:
+            self._materialise()
         ws = self.wb[sheet_name]
         
         if position is None:
             # 在最後新增
             row_num = ws.max_row + 1
             for col, value in enumerate(data, 1):
-                ws.cell(row_num, col, value)
+                self._track_edit(sheet_name, row_num, col, ws.cell(row_num, col, value).value)
             print(f"{SUCCESS_SYMBOL} 已在 {sheet_name} 最後新增一行（第 {row_num} 行）")
         else:
             # 插入到指定位置
-            ws.insert_rows(position)
-            for col, value in enumerate(data, 1):
-                ws.cell(position, col, value)
+            self._insert_rows(ws, position, [list(data)])
             print(f"{SUCCESS_SYMBOL} 已在 {sheet_name} 第 {position} 行插入資料")
         
-        return True
+        return True
+    
+    def append_rows(self, sheet_name: str, rows: Any) -> int:
+        """在工作表最後一次新增多行
+        
+        唯讀模式下只串流改寫該工作表的 XML 一次，其他部件原樣複製；
+        值包含需要樣式的型別（如日期）時改為載入工作簿寫入。
+        
+        Args:
+            sheet_name: 工作表名稱
+            rows: 資料列（每個元素為一行的值）
+            
+        Returns:
+            int: 新增的行數
+        """
+        if not self._validate_sheet_name(sheet_name):
+            return 0
+        
+        rows = [list(values) for values in rows]
+        if not rows:
+            print(f"{WARNING_SYMBOL} 沒有要新增的資料")
+            return 0
+        
+        first_row = self._append_rows_raw(sheet_name, rows) if self.read_only else None
+        if first_row is None:
+            self._ensure_writable()
+            self._materialise({sheet_name})
+            ws = self.wb[sheet_name]
+            first_row = ws.max_row + 1
+            for row, values in enumerate(rows, first_row):
+                for col, value in enumerate(values, 1):
+                    self._track_edit(sheet_name, row, col, ws.cell(row, col, value).value)
+        
+        last_row = first_row + len(rows) - 1
+        span = f"{first_row}-{last_row}" if last_row > first_row else f"{first_row}"
+        print(f"{SUCCESS_SYMBOL} 已在 {sheet_name} 最後新增 {len(rows)} 行（第 {span} 行）")
+        return len(rows)
+    
+    def _append_rows_raw(self, sheet_name: str, rows: List[List[Any]]) -> Optional[int]:
+        """直接改寫工作表 XML 新增資料列
+        
+        Returns:
+            Optional[int]: 第一個新增列的行號；需要改為載入工作簿時為 None
+        """
+        if not all(can_append_raw(value) for values in rows for value in values):
+            return None
+        
+        with zipfile.ZipFile(self._source_path) as zf:
+            _, sheet_path = self._worksheet_part(zf, sheet_name)
+        
+        pending_path = self._new_pending_path()
+        try:
+            first_row = append_sheet_rows(self._source_path, pending_path, sheet_path, rows)
+        except Exception:
+            _remove_file(pending_path)
+            raise
+        self._set_source(pending_path)
+        return first_row
+    
+    def delete_row(self, sheet_name: str, row_number: int) -> bool:
+        """刪除行
+        
+        Args:
+            sheet_name: 工作表名稱
+            row_number: 行號
+            
+        Returns:
+            bool: 是否刪除成功
+        """
+        self._ensure_writable()
+        
+        if not self._validate_sheet_name(sheet_name):
+            return False
+        
+        # 行號變動會調整所有工作表中的公式參照
+        self._materialise()
+        ws = self.wb[sheet_name]
+        
+        if row_number < 1 or row_number > ws.max_row:
+            print(f"{ERROR_SYMBOL} 行號 {row_number} 超出範圍（1-{ws.max_row}）")
+            return False
+        
+        self._delete_rows(ws, [row_number])
+        print(f"{SUCCESS_SYMBOL} 已刪除 {sheet_name} 第 {row_number} 行")
+        return True
+    
+    def delete_rows_where(
+        self,
+        sheet_name: str,
+        rows: Union[Callable[[Tuple[Any, ...]], bool], Iterable[int]]
+    ) -> int:
+        """一次刪除多行
+        
+        先算出最終的行號對應，每個保留的儲存格只搬移一次；
+        合併儲存格範圍與公式中的參照（含其他工作表指向此工作表的參照）一併調整，
+        指向被刪除行的參照改為 #REF!。
+        
+        Args:
+            sheet_name: 工作表名稱
+            rows: 判斷函數（接收該行的值 tuple，回傳 True 表示刪除）或要刪除的行號
+            
+        Returns:
+            int: 刪除的行數
+        """
+        self._ensure_writable()
+        
+        if not self._validate_sheet_name(sheet_name):
+            return 0
+        
+        self._materialise()
+        ws = self.wb[sheet_name]
+        
+        if callable(rows):
+            deleted = [
+                row for row, values in enumerate(ws.iter_rows(values_only=True), 1)
+                if rows(values)
+            ]
+        else:
+            deleted = sorted(set(rows))
+            max_row = ws.max_row
+            invalid = [row for row in deleted if row < 1 or row > max_row]
+            if invalid:
+                print(f"{ERROR_SYMBOL} 行號 {invalid[0]} 超出範圍（1-{max_row}）")
+                return 0
+        
+        if not deleted:
+            print(f"{WARNING_SYMBOL} 沒有符合條件的行")
+            return 0
+        
+        self._delete_rows(ws, deleted)
+        print(f"{SUCCESS_SYMBOL} 已刪除 {sheet_name} 的 {len(deleted)} 行")
+        return len(deleted)
+    
+    def dedupe(
+        self,
+        sheet_name: str,
+        key_columns: Any = None,
+        keep: str = 'first',
+        header: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """移除鍵欄位重複的列（與 Excel 的「移除重複項」相同）
+        
+        只走訪工作表一次，每個鍵只保留固定長度的摘要（blake2b），不保留整列的值。
+        鍵的比較與 query() 的 = 相同：文字不分大小寫，1 與 1.0 相同；鍵欄位全部空白的列不處理。
+        唯讀模式下工作表沒有公式與合併儲存格、其他部件也沒有參照此工作表時，
+        只串流重寫工作表 XML 一次；否則載入工作簿刪除，一併調整公式參照與合併範圍。
+        
+        Args:
+            sheet_name: 工作表名稱
+            key_columns: 鍵欄位（名稱或欄位字母），如 "客戶" 或 ["客戶", "日期"]；None 表示整列
+            keep: 保留第一筆（'first'）或最後一筆（'last'）
+            header: 第一列為欄位名稱（不參與比較）
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'rows'（比較的列數）, 'removed', 'kept'}，失敗時為 None
+        """
+        if keep not in DEDUPE_KEEP:
+            print(f"{ERROR_SYMBOL} keep 必須是 {' 或 '.join(DEDUPE_KEEP)}")
+            return None
+        if not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
+        if isinstance(key_columns, str):
+            key_columns = [key_columns]
+        
+        rows = self._iter_rows(sheet_name)
+        try:
+            names = next(rows, (None, []))[1] if header else []
+            columns = [resolve_column(column, names) for column in key_columns] if key_columns else None
+            seen: Dict[bytes, int] = {}
+            deleted: List[int] = []
+            count = 0
+            for row, values in rows:
+                digest = key_digest(values, columns)
+                if digest is None:
+                    continue
+                count += 1
+                previous = seen.get(digest)
+                if previous is None:
+                    seen[digest] = row
+                elif keep == 'first':
+                    deleted.append(row)
+                else:
+                    deleted.append(previous)
+                    seen[digest] = row
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        finally:
+            rows.close()
+        
+        result = {'sheet': sheet_name, 'rows': count, 'removed': len(deleted), 'kept': count - len(deleted)}
+        if not deleted:
+            print(f"{WARNING_SYMBOL} {sheet_name} 沒有重複的列")
+            return result
+        
+        deleted.sort()
+        if not (self.read_only and self._delete_rows_raw(sheet_name, deleted)):
+            self._ensure_writable()
+            self._materialise()
+            self._delete_rows(self.wb[sheet_name], deleted)
+        print(f"{SUCCESS_SYMBOL} 已移除 {sheet_name} 的 {len(deleted)} 列重複資料（保留 {result['kept']} 列）")
+        return result
+    
+    def _delete_rows_raw(self, sheet_name: str, deleted: List[int]) -> bool:
+        """直接重寫工作表 XML 刪除已排序的行號
+        
+        只在行號變動不影響其他內容時使用：工作表沒有公式、合併儲存格與批註，
+        其他部件（其他工作表的公式、圖表、已定義名稱）也沒有參照此工作表。
+        
+        Returns:
+            bool: 是否已刪除，False 表示需要載入工作簿刪除
+        """
+        deleted_set = set(deleted)
+        
+        def row_map(row: int) -> Optional[int]:
+            if row in deleted_set:
+                return None
+            return row - bisect.bisect_left(deleted, row)
+        
+        with zipfile.ZipFile(self._source_path) as zf:
+            _, sheet_path = self._worksheet_part(zf, sheet_name)
+            tail = read_sheet_tail(zf, sheet_path)
+            if merged_ranges(tail) or b'legacyDrawing' in tail:
+                return False
+            if part_contains(zf, sheet_path, b'<f') or part_contains(zf, sheet_path, b':f'):
+                return False
+            
+            # 公式與圖表中參照此工作表的形式：名稱!A1 或 '名稱'!A1
+            # （單引號重複、XML 跳脫，非 ASCII 字元可能寫成字元參照）
+            name = sheet_name.replace("'", "''").replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            needles = {
+                encoded + suffix
+                for encoded in (
+                    name.encode('utf-8'),
+                    name.encode('ascii', 'xmlcharrefreplace'),
+                    ''.join(char if ord(char) < 128 else f'&#x{ord(char):x};' for char in name).encode('ascii'),
+                )
+                for suffix in (b'!', b"'!")
+            }
+            skipped = {
+                sheet_path, find_workbook_part(zf, SHARED_STRINGS_RELTYPE), find_workbook_part(zf, STYLES_RELTYPE)
+            }
+            for info in zf.infolist():
+                if (info.filename.startswith('xl/') and info.filename.endswith('.xml')
+                        and info.filename not in skipped
+                        and any(part_contains(zf, info.filename, needle) for needle in needles)):
+                    return False
+            
+            dimension = read_dimension(zf, sheet_path)
+            pending_path = self._new_pending_path()
+            try:
+                rewrite_sheet_rows(
+                    self._source_path, pending_path, sheet_path,
+                    ((row, row_map(row), data) for row, _, data in iter_raw_rows(zf, sheet_path)
+                     if row not in deleted_set),
+                    {}, None, row_map, dimension[0] - len(deleted) if dimension else None
+                )
+            except Exception:
+                _remove_file(pending_path)
+                raise
+        self._set_source(pending_path)
+        return True
+    
+    def insert_rows_bulk(self, sheet_name: str, position: int, rows: Iterable[Iterable[Any]]) -> int:
+        """在指定位置一次插入多行資料
+        
+        下方的儲存格只搬移一次，合併儲存格範圍與公式參照一併調整。
+        
+        Args:
+            sheet_name: 工作表名稱
+            position: 插入位置（行號），原本此行及以下的資料往下移
+            rows: 要插入的資料列
+            
+        Returns:
+            int: 插入的行數
+        """
+        self._ensure_writable()
+        
+        if not self._validate_sheet_name(sheet_name):
+            return 0
+        
+        if position < 1:
+            print(f"{ERROR_SYMBOL} 無效的插入位置: {position}")
+            return 0
+        
+        rows = [list(values) for values in rows]
+        if not rows:
+            print(f"{WARNING_SYMBOL} 沒有要插入的資料")
+            return 0
+        
+        self._materialise()
+        self._insert_rows(self.wb[sheet_name], position, rows)
+        print(f"{SUCCESS_SYMBOL} 已在 {sheet_name} 第 {position} 行插入 {len(rows)} 行")
+        return len(rows)
+    
+    def _delete_rows(self, ws, deleted: List[int]) -> None:
+        """刪除已排序的行號，並調整儲存格、行高、合併範圍與公式"""
+        deleted_set = set(deleted)
+        
+        def row_map(row: int) -> Optional[int]:
+            if row in deleted_set:
+                return None
+            return row - bisect.bisect_left(deleted, row)
+        
+        def range_map(min_row: int, max_row: int) -> Optional[Tuple[int, int]]:
+            before = bisect.bisect_left(deleted, min_row)
+            removed = bisect.bisect_right(deleted, max_row) - before
+            size = max_row - min_row + 1 - removed
+            if size <= 0:
+                return None
+            return min_row - before, min_row - before + size - 1
+        
+        self._remap_rows(ws, row_map, range_map)
+    
+    def _insert_rows(self, ws, position: int, rows: List[List[Any]]) -> None:
+        """在 position 插入資料列，並調整儲存格、行高、合併範圍與公式"""
+        count = len(rows)
+        
+        def row_map(row: int) -> int:
+            return row + count if row >= position else row
+        
+        def range_map(min_row: int, max_row: int) -> Tuple[int, int]:
+            return row_map(min_row), max_row + count if max_row >= position else max_row
+        
+        self._remap_rows(ws, row_map, range_map)
+        
+        cells = ws._cells
+        for row, values in enumerate(rows, position):
+            for col, value in enumerate(values, 1):
+                if value is not None:
+                    cells[(row, col)] = Cell(ws, row=row, column=col, value=value)
+        ws._current_row = max(ws._current_row, position + count - 1)
+    
+    def _remap_rows(
+        self,
+        ws,
+        row_map: Callable[[int], Optional[int]],
+        range_map: Callable[[int, int], Optional[Tuple[int, int]]]
+    ) -> None:
+        """依行號對應一次搬移工作表的所有儲存格
+        
+        Args:
+            ws: 工作表
+            row_map: 舊行號 -> 新行號，None 表示刪除
+            range_map: 舊行號範圍 -> 新範圍，None 表示整個範圍被刪除
+        """
+        cells = {}
+        for (row, col), cell in ws._cells.items():
+            new_row = row_map(row)
+            if new_row is None:
+                continue
+            if new_row != row:
+                cell.row = new_row
+                if cell.hyperlink is not None:
+                    cell.hyperlink.ref = cell.coordinate
+            cells[(new_row, col)] = cell
+        ws._cells = cells
+        ws._current_row = max((row for row, _ in cells), default=0)
+        
+        dimensions = list(ws.row_dimensions.items())
+        ws.row_dimensions.clear()
+        for row, dimension in dimensions:
+            new_row = row_map(row)
+            if new_row is not None:
+                dimension.index = new_row
+                ws.row_dimensions[new_row] = dimension
+        
+        for merged in list(ws.merged_cells.ranges):
+            new_rows = range_map(merged.min_row, merged.max_row)
+            ws.merged_cells.remove(merged)
+            if new_rows is None:
+                continue
+            merged.min_row, merged.max_row = new_rows
+            if merged.min_row < merged.max_row or merged.min_col < merged.max_col:
+                ws.merged_cells.add(merged)
+            # 原本的左上角被刪除時，新的左上角不能是合併儲存格
+            self._unmerge_cell(ws, merged.min_row, merged.min_col)
+        
+        # 儲存格位置改變，計算引擎需要重建；公式的快取值跟著搬移，
+        # 公式依相同規則改寫，之後才能與儲存格的公式比對
+        self._engine = None
+        self._load_formula_cells()
+        for name, formula_cells in self._formula_cells.items():
+            own = name == ws.title
+            moved = {}
+            for (row, col), (formula, cached) in formula_cells.items():
+                new_row = row_map(row) if own else row
+                if new_row is not None:
+                    formula = _shift_formula_rows(formula, ws.title, own, row_map, range_map)
+                    moved[(new_row, col)] = (formula, cached)
+            self._formula_cells[name] = moved
+        for sheet in self.wb.worksheets:
+            own = sheet is ws
+            for cell in sheet._cells.values():
+                if cell.data_type == 'f' and isinstance(cell.value, str):
+                    cell.value = _shift_formula_rows(cell.value, ws.title, own, row_map, range_map)
+    
+    @staticmethod
+    def _unmerge_cell(ws, row: int, col: int) -> None:
+        """將合併儲存格（MergedCell）換回一般儲存格"""
+        if isinstance(ws._cells.get((row, col)), MergedCell):
+            ws._cells[(row, col)] = Cell(ws, row=row, column=col)
+    
+    def find_cells(
+        self, 
+        search_text: str, 
+        sheet_name: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        values: str = 'formula'
+    ) -> List[Tuple[str, str, Any]]:
+        """搜尋包含特定文字的儲存格
+        
+        Args:
+            search_text: 搜尋文字
+            sheet_name: 工作表名稱，None 表示所有工作表
+            limit: 最多回傳的結果數，None 表示全部
+            offset: 略過前幾個結果（分頁用）
+            values: 公式儲存格比對的內容：'formula' 公式、'cached' 快取值、'both' 兩者
+            
+        Returns:
+            List[Tuple[str, str, Any]]: [(工作表名, 儲存格參照, 值)]
+        """
+        if not search_text:
+            print(f"{ERROR_SYMBOL} 搜尋文字不能為空")
+            return []
+        
+        if not self._validate_value_mode(values):
+            return []
+        
+        if sheet_name and not self._validate_sheet_name(sheet_name):
+            return []
+        
+        results = list(self.iter_find_cells(search_text, sheet_name, offset, limit, values))
+        
+        if results:
+            print(f"\n{SUCCESS_SYMBOL} 找到 {len(results)} 個符合的儲存格:\n")
+            for ws_name, cell_ref, value in results[:20]:  # 只顯示前 20 個
+                if isinstance(value, dict):
+                    value = f"{value['formula']} → {value['value']}"
+                print(f"  {ws_name}!{cell_ref}: {value}")
+            if len(results) > 20:
+                print(f"\n  ... 還有 {len(results) - 20} 個結果未顯示")
+        else:
+            print(f"{ERROR_SYMBOL} 找不到包含「{search_text}」的儲存格")
+        
+        return results
+    
+    def iter_find_cells(
+        self,
+        search_text: str,
+        sheet_name: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        values: str = 'formula'
+    ) -> Iterator[Tuple[str, str, Any]]:
+        """逐一產出包含特定文字的儲存格（延遲計算，可分頁）
+        
+        工作簿尚未載入時先在共用字串表中找出符合的字串索引，
+        再串流讀取工作表 XML，只比對引用這些索引的儲存格。
+        
+        Args:
+            search_text: 搜尋文字
+            sheet_name: 工作表名稱，None 表示所有工作表
+            offset: 略過前幾個結果
+            limit: 最多產出的結果數，None 表示全部
+            values: 公式儲存格比對的內容：'formula' 公式、'cached' 快取值、
+                'both' 兩者（值為 {'formula': 公式, 'value': 快取值}）
+            
+        Returns:
+            Iterator[Tuple[str, str, Any]]: (工作表名, 儲存格參照, 值) 的迭代器
+        """
+        if not search_text or (sheet_name and sheet_name not in self._sheet_names()):
+            return iter(())
+        
+        if self._wb is None:
+            matches = self._iter_find_raw(search_text, sheet_name, values)
+        else:
+            self._materialise({sheet_name} if sheet_name else None)
+            matches = self._iter_find_loaded(search_text, sheet_name, values)
+        
+        stop = None if limit is None else offset + limit
+        return itertools.islice(matches, offset, stop)
+    
+    def _iter_find_raw(
+        self,
+        search_text: str,
+        sheet_name: Optional[str],
+        values: str
+    ) -> Iterator[Tuple[str, str, Any]]:
+        """不載入工作簿，以共用字串索引串流搜尋"""
+        with zipfile.ZipFile(self._source_path) as zf:
+            shared_matches = search_shared_strings(zf, search_text)
+            sheets, _ = read_workbook_sheets(zf)
+            for sheet in sheets:
+                if sheet['type'] != WORKSHEET_RELTYPE or sheet['path'] not in zf.NameToInfo:
+                    continue
+                if sheet_name not in (None, sheet['name']):
+                    continue
+                matches = iter_text_matches(zf, sheet['path'], search_text, shared_matches, values)
+                for cell_ref, value in matches:
+                    yield sheet['name'], cell_ref, value
+    
+    def _iter_find_loaded(
+        self,
+        search_text: str,
+        sheet_name: Optional[str],
+        values: str
+    ) -> Iterator[Tuple[str, str, Any]]:
+        """在已載入的工作簿中逐格搜尋"""
+        worksheets = [self.wb[sheet_name]] if sheet_name else self.wb.worksheets
+        for ws in worksheets:
+            for row, row_values in enumerate(ws.iter_rows(values_only=True), 1):
+                for col, value in enumerate(row_values, 1):
+                    if values != 'formula' and formula_text(value) is not None:
+                        value = self._formula_result(ws.title, row, col, value, values)
+                        texts = [value['formula'], value['value']] if values == 'both' else [value]
+                        if any(
+                            isinstance(text, (str, FormulaError)) and search_text in str(text)
+                            for text in texts
+                        ):
+                            yield ws.title, f"{get_column_letter(col)}{row}", value
+                    elif value and isinstance(value, str) and search_text in value:
+                        yield ws.title, f"{get_column_letter(col)}{row}", value
+    
+    def profile_sheet(
+        self,
+        sheet_name: Optional[str] = None,
+        top_k: int = 5,
+        header: bool = True,
+        as_json: bool = False,
+        use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """串流計算工作表每個欄位的統計
+        
+        只走訪工作表一次，每個欄位的狀態大小固定：類型分布、空白數、數值的
+        最小 / 最大 / 總和 / 平均、日期範圍、不重複值數（HyperLogLog 估計）
+        與熱門值（SpaceSaving 估計）。公式儲存格以快取值統計。
+        工作簿未載入時結果依檔案內容雜湊快取，同一個檔案再次分析不需重新讀取。
+        
+        Args:
+            sheet_name: 工作表名稱，None 表示活動工作表
+            top_k: 每個欄位列出的熱門值數量
+            header: 第一列為欄位名稱
+            as_json: 以 JSON 輸出（供 AI Agent 使用）
+            use_cache: 使用與寫入快取
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'rows', 'header_row', 'columns'}，失敗時為 None
+        """
+        if top_k < 0:
+            print(f"{ERROR_SYMBOL} top_k 不能為負數")
+            return None
+        if sheet_name and not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
+        
+        try:
+            sheet_name = sheet_name or self._active_sheet_name()
+            # 只有內容與檔案相同（未載入修改）時才能依檔案雜湊快取
+            cacheable = use_cache and (self._wb is None or self.read_only)
+            params = {'sheet': sheet_name, 'top_k': top_k, 'header': header}
+            digest = self._source_digest() if cacheable else None
+            result = read_cache('profile', digest, params) if cacheable else None
+            if result is None:
+                result = {'sheet': sheet_name, **profile_rows(self._iter_rows(sheet_name), header, top_k)}
+                if cacheable:
+                    write_cache('profile', digest, params, result)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        
+        if as_json:
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+            return result
+        
+        print(f"\n=== 工作表: {sheet_name}（{result['rows']} 行資料）===\n")
+        for column in result['columns']:
+            name = f" {column['name']}" if column['name'] is not None else ""
+            types = ", ".join(f"{kind} {count}" for kind, count in column['types'].items())
+            print(f"[{column['column']}]{name}")
+            print(f"  類型: {types or '無'}  空白: {column['nulls']}  不重複: ~{column['distinct']}")
+            if column['sum'] is not None:
+                print(f"  最小: {column['min']}  最大: {column['max']}  "
+                      f"平均: {column['mean']:.4g}  總和: {column['sum']}")
+            if column['first_date'] is not None:
+                print(f"  日期: {column['first_date']} ~ {column['last_date']}")
+            if column['top']:
+                top = ", ".join(f"{str(item['value'])[:20]} ({item['count']})" for item in column['top'])
+                print(f"  常見值: {top}")
+        return result
+    
+    def query(
+        self,
+        sheet_name: Optional[str] = None,
+        where: Any = None,
+        select: Optional[List[str]] = None,
+        order_by: Any = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        header: bool = True,
+        output_sheet: Optional[str] = None,
+        as_json: bool = False,
+        use_index: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """查詢符合條件的列
+        
+        串流走訪工作表，第一列為欄位名稱（欄位也可用字母指定，如 "C"）。
+        條件欄位已用 create_index() 建立索引時只解析索引找到的列。
+        公式儲存格以快取值比較。
+        
+        Args:
+            sheet_name: 工作表名稱，None 表示活動工作表
+            where: 條件（AND），如 "地區 = APAC and 金額 > 10000"、
+                [["地區", "=", "APAC"], ["金額", ">", 10000]] 或 {"地區": "APAC"}；
+                運算子: =, !=, >, >=, <, <=, contains, in
+            select: 要回傳的欄位，None 表示全部
+            order_by: 排序欄位，如 "金額 desc" 或 ["地區", "-金額"]
+            limit: 最多回傳的列數，None 表示全部
+            offset: 略過前幾個結果（分頁用）
+            header: 第一列為欄位名稱
+            output_sheet: 將結果（含標題列）寫入這個新工作表
+            as_json: 以 JSON 輸出（供 AI Agent 使用）
+            use_index: 使用已建立的索引
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'columns', 'rows', 'row_numbers', 'count',
+                'truncated'（還有更多符合的列）, 'indexes'（使用索引的欄位）}，失敗時為 None
+        """
+        if (limit is not None and limit < 0) or offset < 0:
+            print(f"{ERROR_SYMBOL} limit 與 offset 不能為負數")
+            return None
+        if sheet_name and not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
+        if output_sheet and output_sheet in self._sheet_names():
+            print(f"{ERROR_SYMBOL} 工作表「{output_sheet}」已存在")
+            return None
+        
+        rows = None
+        try:
+            sheet_name = sheet_name or self._active_sheet_name()
+            conditions = parse_where(where)
+            order = parse_order(order_by)
+            row_filter, indexes = (
+                self._index_candidates(sheet_name, conditions, header) if use_index else (None, [])
+            )
+            rows = self._iter_rows(sheet_name, row_filter=row_filter)
+            names: List[Any] = []
+            if header:
+                names = next(rows, (None, []))[1]
+            compiled = [
+                Condition(column, resolve_column(column, names), op, value)
+                for column, op, value in conditions
+            ]
+            columns = [resolve_column(column, names) for column in select] if select else None
+            order_columns = [(resolve_column(column, names), descending) for column, descending in order]
+            results, truncated = run_query(rows, compiled, columns, order_columns, limit, offset)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        finally:
+            if rows is not None:
+                rows.close()
+        
+        if columns is None:
+            width = max([len(names)] + [len(values) for _, values in results])
+            columns = list(range(width))
+            results = [(row, values + [None] * (width - len(values))) for row, values in results]
+        result = {
+            'sheet': sheet_name,
+            'columns': column_names(names, columns),
+            'rows': [values for _, values in results],
+            'row_numbers': [row for row, _ in results],
+            'count': len(results),
+            'truncated': truncated,
+            'indexes': indexes,
+        }
+        
+        if output_sheet:
+            records = [result['columns']] if header else []
+            output_rows = itertools.chain(records, result['rows'])
+            if self.read_only:
+                if not self._add_sheet_raw(output_sheet, output_rows):
+                    return None
+            else:
+                if not self.add_sheet(output_sheet):
+                    return None
+                ws = self.wb[output_sheet]
+                for row, values in enumerate(output_rows, 1):
+                    for col, value in enumerate(values, 1):
+                        if value is not None:
+                            cell = ws.cell(row, col, value)
+                            if cell.data_type == 'f':
+                                cell.data_type = 's'  # 查詢結果是靜態值
+                            self._track_edit(output_sheet, row, col, cell.value)
+        
+        if as_json:
+            print(json.dumps(json_value(result), ensure_ascii=False, indent=2))
+            return result
+        
+        more = "（還有更多結果）" if truncated else ""
+        if not results:
+            print(f"{WARNING_SYMBOL} {sheet_name} 沒有符合條件的列")
+        else:
+            print(f"\n{SUCCESS_SYMBOL} {sheet_name} 找到 {len(results)} 列{more}:\n")
+            print(f"  行號 | {' | '.join(result['columns'])}")
+            for row, values in results[:20]:  # 只顯示前 20 列
+                print(f"  {row} | {' | '.join('' if value is None else str(value) for value in values)}")
+            if len(results) > 20:
+                print(f"\n  ... 還有 {len(results) - 20} 列未顯示")
+        if output_sheet:
+            print(f"{SUCCESS_SYMBOL} 已將結果寫入工作表: {output_sheet}")
+        return result
+    
+    def create_index(
+        self,
+        sheet_name: str,
+        column: str,
+        kind: str = 'hash',
+        header: bool = True
+    ) -> bool:
+        """為欄位建立索引，供之後的 query() 直接找出符合的列
+        
+        索引依檔案內容雜湊儲存在 constants.CACHE_DIR，以已儲存的檔案內容建立；
+        檔案改變後索引自動失效（不會使用過期的索引）。
+        
+        Args:
+            sheet_name: 工作表名稱
+            column: 欄位名稱（標題列的值）或欄位字母
+            kind: 'hash'（= 與 in）或 'sorted'（另外支援 >、>=、<、<=）
+            header: 第一列為欄位名稱
+            
+        Returns:
+            bool: 是否建立成功
+        """
+        if kind not in INDEX_KINDS:
+            print(f"{ERROR_SYMBOL} 不支援的索引類型: {kind}（可用: {', '.join(INDEX_KINDS)}）")
+            return False
+        if not self._validate_sheet_name(sheet_name, materialise=False):
+            return False
+        
+        try:
+            digest = self._source_digest()
+            with zipfile.ZipFile(self._source_path) as zf:
+                _, sheet_path = self._worksheet_part(zf, sheet_name)
+                rows = iter_sheet_rows(zf, sheet_path)
+                header_row, names = next(rows, (None, [])) if header else (None, [])
+                col = resolve_column(column, names)
+                index = build_index(rows, col, kind)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return False
+        
+        index['header_row'] = header_row
+        letter = get_column_letter(col + 1)
+        write_cache('index', digest, self._index_params(sheet_name, letter, kind, header), index)
+        write_cache('header', digest, {'sheet': sheet_name}, {
+            'header_row': header_row,
+            'names': [None if name is None else str(name) for name in names],
+        })
+        print(f"{SUCCESS_SYMBOL} 已建立 {sheet_name}!{letter} 的 {kind} 索引"
+              f"（{index['rows']} 行、{index['keys']} 個不重複值）")
+        return True
+    
+    def _index_candidates(
+        self,
+        sheet_name: str,
+        conditions: List[Tuple[str, str, Any]],
+        header: bool
+    ) -> Tuple[Optional[set], List[str]]:
+        """以已建立的索引找出可能符合所有條件的行號
+        
+        Returns:
+            Tuple[Optional[set], List[str]]: (要讀取的行號（含標題列），使用索引的欄位)；
+                沒有可用的索引時為 (None, [])
+        """
+        # 索引依檔案內容建立，只有內容與檔案相同（未載入修改）時才能使用
+        if not conditions or not (self._wb is None or self.read_only):
+            return None, []
+        
+        digest = self._source_digest()
+        names: List[Any] = []
+        if header:
+            stored = read_cache('header', digest, {'sheet': sheet_name})
+            if stored is None:
+                return None, []
+            names = stored['names']
+        
+        candidates: Optional[set] = None
+        used = []
+        header_row = None
+        for column, op, value in conditions:
+            try:
+                letter = get_column_letter(resolve_column(column, names) + 1)
+            except ValueError:
+                continue
+            for kind in INDEX_KINDS:
+                index = read_cache('index', digest, self._index_params(sheet_name, letter, kind, header))
+                rows = index_lookup(index, op, value) if index is not None else None
+                if rows is not None:
+                    break
+            if rows is None:
+                continue
+            candidates = rows if candidates is None else candidates & rows
+            header_row = index['header_row']
+            used.append(column)
+        
+        if candidates is None:
+            return None, []
+        if header_row is not None:
+            candidates.add(header_row)
+        return candidates, used
+    
+    @staticmethod
+    def _index_params(sheet_name: str, column: str, kind: str, header: bool) -> Dict[str, Any]:
+        return {'sheet': sheet_name, 'column': column, 'kind': kind, 'header': header}
+    
+    def _source_digest(self) -> str:
+        """目前內容所在檔案的雜湊（檔案未改變時沿用上次的結果）"""
+        stat = os.stat(self._source_path)
+        key = (self._source_path, stat.st_mtime_ns, stat.st_size)
+        if self._digest is None or self._digest[0] != key:
+            self._digest = (key, file_digest(self._source_path))
+        return self._digest[1]
+    
+    def join(
+        self,
+        sheet_name: str,
+        key_column: str,
+        lookup_sheet: str,
+        lookup_key: str,
+        columns: List[str],
+        lookup_file: Optional[str] = None,
+        target_column: Optional[str] = None,
+        header: bool = True,
+        max_unmatched: int = 100
+    ) -> Optional[Dict[str, Any]]:
+        """以查詢表的鍵欄位查找對應的值，以靜態值寫入目標工作表（取代大量 VLOOKUP 公式）
+        
+        先走訪查詢表一次建立雜湊表，再走訪目標工作表一次寫入，時間為 O(n + m)。
+        鍵的比較與 VLOOKUP 的完全比對相同：文字不分大小寫，數字與文字不相等；
+        查詢表中重複的鍵使用第一個。唯讀模式下只串流改寫目標工作表的 XML 一次，
+        值包含需要樣式的型別（如日期）時改為載入工作簿寫入。
+        
+        Args:
+            sheet_name: 目標工作表名稱
+            key_column: 目標工作表的鍵欄位（名稱或欄位字母）
+            lookup_sheet: 查詢表的工作表名稱
+            lookup_key: 查詢表的鍵欄位（名稱或欄位字母）
+            columns: 要帶入的查詢表欄位
+            lookup_file: 查詢表所在的 xlsx，None 表示同一個檔案
+            target_column: 寫入的第一欄（如 "F"），None 表示使用範圍右邊的第一欄
+            header: 兩個工作表的第一列都是欄位名稱（帶入的欄位名稱寫入目標工作表的標題列）
+            max_unmatched: 最多回報幾個找不到的鍵
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'columns'（寫入的欄位字母）, 'rows'（有鍵的列數）,
+                'matched', 'unmatched', 'unmatched_keys'}，失敗時為 None
+        """
+        if not columns:
+            print(f"{ERROR_SYMBOL} 沒有要帶入的欄位")
+            return None
+        if not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
+        
+        try:
+            lookup_editor = ExcelEditor(lookup_file, read_only=True) if lookup_file else self
+            if not lookup_editor._validate_sheet_name(lookup_sheet, materialise=False):
+                return None
+            
+            # 查詢表：鍵 -> 要帶入的值
+            lookup_rows = lookup_editor._iter_rows(lookup_sheet)
+            lookup_names = next(lookup_rows, (None, []))[1] if header else []
+            lookup_index = resolve_column(lookup_key, lookup_names)
+            value_indexes = [resolve_column(column, lookup_names) for column in columns]
+            table: Dict[Tuple[str, Any], List[Any]] = {}
+            for _, values in lookup_rows:
+                key = match_key(values[lookup_index] if lookup_index < len(values) else None)
+                if key is not None and key not in table:
+                    table[key] = [values[index] if index < len(values) else None for index in value_indexes]
+            
+            target_rows = self._iter_rows(sheet_name)
+            header_row, names = next(target_rows, (None, [])) if header else (None, [])
+            target_rows.close()
+            key_index = resolve_column(key_column, names)
+            first_col = (
+                resolve_column(target_column, []) + 1 if target_column
+                else self._sheet_width(sheet_name) + 1
+            )
+        except (ValueError, FileNotFoundError, RuntimeError) as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        
+        new_columns = list(range(first_col, first_col + len(columns)))
+        titles = column_names(lookup_names, value_indexes) if header else []
+        stats = {'rows': 0, 'matched': 0, 'unmatched': 0}
+        unmatched_keys: Dict[Tuple[str, Any], Any] = {}
+        
+        def lookup(row: int, values: List[Any]) -> Optional[Dict[int, Any]]:
+            if row == header_row:
+                return dict(zip(new_columns, titles))
+            value = values[key_index] if key_index < len(values) else None
+            key = match_key(value)
+            if key is None:
+                return None
+            stats['rows'] += 1
+            found = table.get(key)
+            if found is None:
+                stats['unmatched'] += 1
+                if len(unmatched_keys) < max_unmatched:
+                    unmatched_keys.setdefault(key, value)
+                return None
+            stats['matched'] += 1
+            return {col: item for col, item in zip(new_columns, found) if item is not None}
+        
+        raw = self.read_only and all(
+            can_append_raw(value) for value in itertools.chain(titles, *table.values())
+        )
+        if raw:
+            self._join_raw(sheet_name, lookup, new_columns[-1])
+        else:
+            self._ensure_writable()
+            self._materialise({sheet_name})
+            ws = self.wb[sheet_name]
+            for row, values in self._iter_rows(sheet_name):
+                for col, value in (lookup(row, values) or {}).items():
+                    cell = ws.cell(row, col)
+                    cell.value = value
+                    if cell.data_type == 'f':
+                        cell.data_type = 's'  # 帶入的是靜態值
+                    self._track_edit(sheet_name, row, col, cell.value)
+        
+        result = {
+            'sheet': sheet_name,
+            'columns': [get_column_letter(col) for col in new_columns],
+            **stats,
+            'unmatched_keys': list(unmatched_keys.values()),
+        }
+        print(
+            f"{SUCCESS_SYMBOL} 已在 {sheet_name} 的 {result['columns'][0]}-{result['columns'][-1]} 欄"
+            f"帶入 {stats['matched']}/{stats['rows']} 列的值"
+        )
+        if stats['unmatched']:
+            sample = ", ".join(str(key) for key in result['unmatched_keys'][:10])
+            print(f"{WARNING_SYMBOL} {stats['unmatched']} 列找不到對應的鍵: {sample}")
+        return result
+    
+    def _join_raw(
+        self,
+        sheet_name: str,
+        update: Callable[[int, List[Any]], Optional[Dict[int, Any]]],
+        max_col: int
+    ) -> None:
+        """直接改寫工作表 XML 寫入查找的值"""
+        with zipfile.ZipFile(self._source_path) as zf:
+            _, sheet_path = self._worksheet_part(zf, sheet_name)
+        
+        pending_path = self._new_pending_path()
+        try:
+            update_rows(self._source_path, pending_path, sheet_path, update, max_col)
+        except Exception:
+            _remove_file(pending_path)
+            raise
+        self._set_source(pending_path)
+    
+    def aggregate(
+        self,
+        sheet_name: Optional[str] = None,
+        group_by: Any = None,
+        aggregates: Any = None,
+        where: Any = None,
+        header: bool = True,
+        output_sheet: Optional[str] = None,
+        as_json: bool = False,
+        max_groups: int = DEFAULT_MAX_GROUPS
+    ) -> Optional[Dict[str, Any]]:
+        """依欄位分組彙總（sum、count、mean、min、max、distinct）
+        
+        串流走訪工作表一次，每個分組的狀態大小固定（distinct 超過一定數量後改為估計值）；
+        分組數超過 max_groups 時將已排序的分組寫入暫存檔，最後合併，記憶體用量有上限。
+        分組與樞紐分析表相同：文字不分大小寫，空白自成一組；結果依分組值排序。
+        唯讀模式下結果直接串流寫成新的工作表部件，不載入工作簿。
+        
+        Args:
+            sheet_name: 工作表名稱，None 表示活動工作表
+            group_by: 分組欄位（名稱或欄位字母），如 "地區" 或 ["地區", "產品"]；
+                None 表示全部為一組
+            aggregates: 彙總，如 "sum(金額), count, distinct(客戶)"、
+                [["sum", "金額"], ["count", None]] 或 {"金額": ["sum", "mean"]}；None 表示 count
+            where: 只彙總符合條件的列（格式同 query()）
+            header: 第一列為欄位名稱
+            output_sheet: 將結果（含標題列）寫入這個新工作表
+            as_json: 以 JSON 輸出（供 AI Agent 使用）
+            max_groups: 記憶體中最多保留的分組數
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'columns', 'rows', 'groups'（分組數）,
+                'source_rows'（彙總的列數）, 'spilled'（寫入暫存檔的次數）}，失敗時為 None；
+                寫入 output_sheet 時 rows 只包含前 AGGREGATE_PREVIEW_ROWS 組
+        """
+        if max_groups < 1:
+            print(f"{ERROR_SYMBOL} max_groups 必須大於 0")
+            return None
+        if sheet_name and not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
+        if output_sheet and output_sheet in self._sheet_names():
+            print(f"{ERROR_SYMBOL} 工作表「{output_sheet}」已存在")
+            return None
+        
+        rows = None
+        try:
+            sheet_name = sheet_name or self._active_sheet_name()
+            if isinstance(group_by, str):
+                group_by = [group_by]
+            group_by = list(group_by or [])
+            metrics = parse_aggregates(aggregates)
+            conditions = parse_where(where)
+            rows = self._iter_rows(sheet_name)
+            names: List[Any] = next(rows, (None, []))[1] if header else []
+            aggregator = GroupAggregator(
+                [resolve_column(column, names) for column in group_by],
+                [(function, None if column is None else resolve_column(column, names))
+                 for function, column in metrics],
+                [Condition(column, resolve_column(column, names), op, value)
+                 for column, op, value in conditions],
+                max_groups
+            )
+            for _, values in rows:
+                aggregator.add(values)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        finally:
+            if rows is not None:
+                rows.close()
+        
+        columns = column_names(names, aggregator.group_columns) + [
+            aggregate_label(function, column) for function, column in metrics
+        ]
+        preview: List[List[Any]] = []
+        groups = 0
+        
+        def results() -> Iterator[List[Any]]:
+            nonlocal groups
+            for values in aggregator.results():
+                groups += 1
+                if not output_sheet or len(preview) < AGGREGATE_PREVIEW_ROWS:
+                    preview.append(values)
+                yield values
+        
+        if output_sheet:
+            output_rows = itertools.chain([columns], results())
+            if self.read_only:
+                if not self._add_sheet_raw(output_sheet, output_rows):
+                    aggregator.close()
+                    return None
+            else:
+                if not self.add_sheet(output_sheet):
+                    aggregator.close()
+                    return None
+                ws = self.wb[output_sheet]
+                for row, values in enumerate(output_rows, 1):
+                    for col, value in enumerate(values, 1):
+                        if value is not None:
+                            cell = ws.cell(row, col, value)
+                            if cell.data_type == 'f':
+                                cell.data_type = 's'  # 彙總結果是靜態值
+                            self._track_edit(output_sheet, row, col, cell.value)
+        else:
+            for _ in results():
+                pass
+        
+        result = {
+            'sheet': sheet_name,
+            'columns': columns,
+            'rows': preview,
+            'groups': groups,
+            'source_rows': aggregator.rows,
+            'spilled': aggregator.spilled,
+        }
+        
+        if as_json:
+            print(json.dumps(json_value(result), ensure_ascii=False, indent=2))
+            return result
+        
+        print(f"\n{SUCCESS_SYMBOL} {sheet_name} 彙總 {aggregator.rows} 列為 {groups} 組:\n")
+        print(f"  {' | '.join(columns)}")
+        for values in preview[:20]:  # 只顯示前 20 組
+            print(f"  {' | '.join('' if value is None else str(value) for value in values)}")
+        if groups > 20:
+            print(f"\n  ... 還有 {groups - 20} 組未顯示")
+        if output_sheet:
+            print(f"{SUCCESS_SYMBOL} 已將結果寫入工作表: {output_sheet}")
+        return result
+    
+    def _add_sheet_raw(self, sheet_name: str, rows: Iterable[List[Any]]) -> bool:
+        """直接在封裝中新增工作表並串流寫入資料列"""
+        pending_path = self._new_pending_path()
+        try:
+            add_worksheet(self._source_path, pending_path, sheet_name, rows)
+        except ValueError as e:
+            _remove_file(pending_path)
+            print(f"{ERROR_SYMBOL} {e}")
+            return False
+        except Exception:
+            _remove_file(pending_path)
+            raise
+        self._set_source(pending_path)
+        return True
+    
+    def export_sheet(
+        self,
+        sheet_name: str,
+        output_path: str,
+        fmt: Optional[str] = None,
+        header: bool = True,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        delimiter: str = ','
+    ) -> Optional[Dict[str, Any]]:
+        """將工作表串流匯出為 CSV 或 Parquet
+        
+        唯讀模式下直接串流讀取工作表 XML，以固定大小的批次寫出，記憶體用量與行數無關。
+        公式儲存格輸出快取值；中間的空白列輸出為空白列，每列補齊到工作表的欄數。
+        
+        Args:
+            sheet_name: 工作表名稱
+            output_path: 輸出路徑（.csv 或 .parquet）
+            fmt: 'csv' 或 'parquet'，None 表示依副檔名
+            header: 第一列為欄位名稱（Parquet 的欄位名稱；否則使用欄位字母）
+            batch_rows: 每批寫入的列數
+            delimiter: CSV 的分隔字元
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'path', 'format', 'rows'（資料列數）, 'columns'}，失敗時為 None
+        """
+        if batch_rows < 1:
+            print(f"{ERROR_SYMBOL} batch_rows 必須大於 0")
+            return None
+        if not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
+        
+        try:
+            fmt = data_format(output_path, fmt)
+            width = self._sheet_width(sheet_name)
+            
+            def padded_rows() -> Iterator[List[Any]]:
+                previous = None
+                for row, values in self._iter_rows(sheet_name):
+                    if previous is not None:
+                        for _ in range(row - previous - 1):
+                            yield [None] * width
+                    previous = row
+                    yield values + [None] * (width - len(values))
+            
+            rows = write_data_rows(output_path, padded_rows(), fmt, header, batch_rows, delimiter)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        
+        print(f"{SUCCESS_SYMBOL} 已將 {sheet_name} 的 {rows} 列匯出為 {fmt.upper()}: {output_path}")
+        return {'sheet': sheet_name, 'path': output_path, 'format': fmt, 'rows': rows, 'columns': width}
+    
+    def import_sheet(
+        self,
+        input_path: str,
+        sheet_name: Optional[str] = None,
+        fmt: Optional[str] = None,
+        infer_types: bool = False,
+        header: bool = True,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        delimiter: str = ','
+    ) -> Optional[Dict[str, Any]]:
+        """將 CSV 或 Parquet 串流匯入為新的工作表
+        
+        唯讀模式下直接在封裝中串流寫入新的工作表部件，不載入工作簿，記憶體用量與行數無關。
+        值一律寫成靜態值（以 = 開頭的文字不會變成公式）。
+        
+        Args:
+            input_path: 資料檔路徑（.csv 或 .parquet）
+            sheet_name: 新工作表名稱，None 表示使用資料檔名稱
+            fmt: 'csv' 或 'parquet'，None 表示依副檔名
+            infer_types: CSV 的文字推斷為數字、布林值與日期（預設全部為文字）
+            header: CSV 的第一列為欄位名稱（不推斷型別）
+            batch_rows: Parquet 每批讀取的列數
+            delimiter: CSV 的分隔字元
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'path', 'format', 'rows'（寫入的列數，含欄位名稱）}，失敗時為 None
+        """
+        if batch_rows < 1:
+            print(f"{ERROR_SYMBOL} batch_rows 必須大於 0")
+            return None
+        if not os.path.exists(input_path):
+            print(f"{ERROR_SYMBOL} 檔案不存在: {input_path}")
+            return None
+        try:
+            fmt = data_format(input_path, fmt)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        sheet_name = sheet_name or os.path.splitext(os.path.basename(input_path))[0][:31]
+        if sheet_name in self._sheet_names():
+            print(f"{ERROR_SYMBOL} 工作表「{sheet_name}」已存在")
+            return None
+        
+        count = 0
+        
+        def counted_rows() -> Iterator[List[Any]]:
+            nonlocal count
+            for values in iter_data_rows(input_path, fmt, infer_types, header, batch_rows, delimiter):
+                count += 1
+                yield values
+        
+        if self.read_only:
+            if not self._add_sheet_raw(sheet_name, counted_rows()):
+                return None
+        else:
+            if not self.add_sheet(sheet_name):
+                return None
+            ws = self.wb[sheet_name]
+            for row, values in enumerate(counted_rows(), 1):
+                for col, value in enumerate(values, 1):
+                    if value is not None:
+                        cell = ws.cell(row, col, value)
+                        if cell.data_type == 'f':
+                            cell.data_type = 's'  # 匯入的是靜態值
+                        self._track_edit(sheet_name, row, col, cell.value)
+        
+        print(f"{SUCCESS_SYMBOL} 已從 {input_path} 匯入 {count} 列到工作表: {sheet_name}")
+        return {'sheet': sheet_name, 'path': input_path, 'format': fmt, 'rows': count}
+    
+    def sort_sheet(
+        self,
+        sheet_name: str,
+        keys: Any,
+        header: bool = True,
+        keep_row_styles: bool = False,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT
+    ) -> Optional[Dict[str, Any]]:
+        """依欄位排序工作表的資料列（與 Excel 的「排序」相同）
+        
+        排序是穩定的，比較規則同 query() 的 order_by：數字在文字之前、文字不分大小寫、
+        空白永遠在最後。儲存格的值、樣式與超連結跟著列搬移，公式的相對參照依新位置平移；
+        資料列依序重新編號（中間的空白列移到最後）。批註、條件式格式與其他工作表的參照不變。
+        唯讀模式下使用外部排序：超過記憶體預算的列排序後寫入暫存檔，最後 k 路合併，
+        並只以一次循序寫入重寫工作表 XML，不載入工作簿。
+        
+        Args:
+            sheet_name: 工作表名稱
+            keys: 排序欄位（名稱或欄位字母），如 "金額 desc" 或 ["地區", "-金額"]（格式同 query() 的 order_by）
+            header: 第一列為欄位名稱（不參與排序）
+            keep_row_styles: 列高、列樣式等列格式跟著列搬移；False 時列格式留在原位置
+            memory_limit: 唯讀模式下記憶體中累積的列大小上限（位元組）
+            
+        Returns:
+            Optional[Dict[str, Any]]: {'sheet', 'rows'（排序的列數）, 'spilled'（寫入暫存檔的次數）}，
+                失敗時為 None
+        """
+        if memory_limit < 1:
+            print(f"{ERROR_SYMBOL} memory_limit 必須大於 0")
+            return None
+        if not self._validate_sheet_name(sheet_name, materialise=False):
+            return None
+        
+        try:
+            order = parse_order(keys)
+            if not order:
+                raise ValueError("沒有排序欄位")
+            if self.read_only:
+                result = self._sort_raw(sheet_name, order, header, keep_row_styles, memory_limit)
+            else:
+                self._ensure_writable()
+                self._materialise({sheet_name})
+                result = self._sort_loaded(self.wb[sheet_name], order, header, keep_row_styles)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+        
+        columns = ", ".join(f"{column} desc" if descending else column for column, descending in order)
+        print(f"{SUCCESS_SYMBOL} 已依 {columns} 排序 {sheet_name} 的 {result['rows']} 列")
+        return result
+    
+    def _sort_raw(
+        self,
+        sheet_name: str,
+        order: List[Tuple[str, bool]],
+        header: bool,
+        keep_row_styles: bool,
+        memory_limit: int
+    ) -> Dict[str, Any]:
+        """外部排序後直接重寫工作表 XML"""
+        shared_formulas: Dict[str, Any] = {}
+        with zipfile.ZipFile(self._source_path) as zf:
+            _, sheet_path = self._worksheet_part(zf, sheet_name)
+            tail = read_sheet_tail(zf, sheet_path)
+            rows = iter_raw_rows(zf, sheet_path, shared_formulas)
+            header_rows: List[Tuple[int, int, bytes]] = []
+            names: List[Any] = []
+            first = next(rows, None)
+            if header and first is not None:
+                header_rows.append((first[0], first[0], first[2]))
+                names = first[1]
+                first = next(rows, None)
+            if first is None:
+                rows.close()
+                return {'sheet': sheet_name, 'rows': 0, 'spilled': 0}
+            
+            first_data_row = first[0]
+            if any(max_row >= first_data_row for _, _, _, max_row in merged_ranges(tail)):
+                rows.close()
+                raise ValueError("資料列中有合併儲存格，無法排序")
+            sorter = ExternalSorter(
+                row_sort_key([(resolve_column(column, names), descending) for column, descending in order]),
+                memory_limit
+            )
+            row_attributes: Optional[Dict[int, Dict[str, str]]] = None if keep_row_styles else {}
+            try:
+                for position, (row, values, data) in enumerate(itertools.chain([first], rows), first_data_row):
+                    sorter.add(values, (row, data), len(data))
+                    if row_attributes is not None:
+                        attributes = row_format_attributes(data)
+                        if attributes:
+                            row_attributes[position] = attributes
+            except Exception:
+                sorter.close()
+                raise
+        
+        linked_rows = hyperlink_rows(tail)
+        moved: Dict[int, Optional[int]] = {}
+        
+        def sorted_rows() -> Iterator[Tuple[int, int, bytes]]:
+            yield from header_rows
+            for new_row, (row, data) in enumerate(sorter, first_data_row):
+                if row in linked_rows:
+                    moved[row] = new_row
+                yield row, new_row, data
+        
+        last_row = first_data_row + sorter.count - 1
+        pending_path = self._new_pending_path()
+        try:
+            rewrite_sheet_rows(
+                self._source_path, pending_path, sheet_path, sorted_rows(), shared_formulas,
+                row_attributes, lambda row: moved.get(row, row), last_row
+            )
+        except Exception:
+            sorter.close()
+            _remove_file(pending_path)
+            raise
+        self._set_source(pending_path)
+        return {'sheet': sheet_name, 'rows': sorter.count, 'spilled': sorter.spilled}
     
-    def delete_row(self, sheet_name: str, row_number: int) -> bool:
-        """刪除行
+    def _sort_loaded(
+        self,
+        ws,
+        order: List[Tuple[str, bool]],
+        header: bool,
+        keep_row_styles: bool
+    ) -> Dict[str, Any]:
+        """排序已載入的工作表：一次搬移所有儲存格"""
+        sheet_name = ws.title
+        rows = sorted({row for row, _ in ws._cells} | set(ws.row_dimensions))
+        header_row = rows[0] if header and rows else None
+        if header:
+            rows = rows[1:]
+        if not rows:
+            return {'sheet': sheet_name, 'rows': 0, 'spilled': 0}
+        if any(merged.max_row >= rows[0] for merged in ws.merged_cells.ranges):
+            raise ValueError("資料列中有合併儲存格，無法排序")
+        for (row, _), cell in ws._cells.items():
+            if row < rows[0] or cell.data_type != 'f':
+                continue
+            if isinstance(cell.value, DataTableFormula):
+                raise ValueError(f"{cell.coordinate} 的資料表公式無法搬移")
+            if isinstance(cell.value, ArrayFormula):
+                _, min_row, _, max_row = range_boundaries(cell.value.ref)
+                if min_row != max_row:
+                    raise ValueError(f"{cell.coordinate} 的陣列公式跨越多列，無法搬移")
         
-        Args:
-            sheet_name: 工作表名稱
-            row_number: 行號
-            
-        Returns:
-            bool: 是否刪除成功
-        """
-        if not self._validate_sheet_name(sheet_name):
-            return False
+        values = dict(self._iter_rows(sheet_name))
+        names = values.get(header_row, [])
+        key = row_sort_key([(resolve_column(column, names), descending) for column, descending in order])
+        ordered = sorted(rows, key=lambda row: key(values.get(row, [])))
+        row_map = {row: new_row for new_row, row in enumerate(ordered, rows[0])}
         
-        ws = self.wb[sheet_name]
+        self._load_formula_cells([sheet_name])
+        cells = {}
+        for (row, col), cell in ws._cells.items():
+            new_row = row_map.get(row, row)
+            if new_row != row:
+                old_ref = cell.coordinate
+                cell.row = new_row
+                if cell.hyperlink is not None:
+                    cell.hyperlink.ref = cell.coordinate
+                if cell.data_type == 'f':
+                    cell.value = _move_formula(cell.value, old_ref, cell.coordinate)
+            cells[(new_row, col)] = cell
+        ws._cells = cells
+        ws._current_row = max((row for row, _ in cells), default=0)
         
-        if row_number < 1 or row_number > ws.max_row:
-            print(f"{ERROR_SYMBOL} 行號 {row_number} 超出範圍（1-{ws.max_row}）")
-            return False
+        if keep_row_styles:
+            dimensions = list(ws.row_dimensions.items())
+            ws.row_dimensions.clear()
+            for row, dimension in dimensions:
+                dimension.index = row_map.get(row, row)
+                ws.row_dimensions[dimension.index] = dimension
         
-        ws.delete_rows(row_number)
-        print(f"{SUCCESS_SYMBOL} 已刪除 {sheet_name} 第 {row_number} 行")
-        return True
+        # 儲存格位置改變，計算引擎需要重建；公式的快取值跟著搬移
+        self._engine = None
+        formula_cells = {}
+        for (row, col), (formula, cached) in self._formula_cells[sheet_name].items():
+            new_row = row_map.get(row, row)
+            if new_row != row:
+                formula = _move_formula(formula, f'{get_column_letter(col)}{row}', f'{get_column_letter(col)}{new_row}')
+            formula_cells[(new_row, col)] = (formula, cached)
+        self._formula_cells[sheet_name] = formula_cells
+        return {'sheet': sheet_name, 'rows': len(rows), 'spilled': 0}
     
-    def find_cells(
-        self, 
-        search_text: str, 
-        sheet_name: Optional[str] = None
-    ) -> List[Tuple[str, str, Any]]:
-        """搜尋包含特定文字的儲存格
+    def _sheet_width(self, sheet_name: str) -> int:
+        """工作表使用範圍的欄數"""
+        if self._wb is not None and not self.read_only and sheet_name not in self._raw_sheet_parts():
+            return self.wb[sheet_name].max_column
+        raw_source = self._raw_source if self._wb is not None and not self.read_only else self._source_path
+        with zipfile.ZipFile(raw_source) as zf:
+            _, sheet_path = self._worksheet_part(zf, sheet_name)
+            dimension = read_dimension(zf, sheet_path) or scan_dimension(zf, sheet_path)
+        return dimension[1]
+    
+    def _iter_rows(
+        self,
+        sheet_name: str,
+        values: str = 'cached',
+        row_filter: Optional[set] = None
+    ) -> Iterator[Tuple[int, List[Any]]]:
+        """逐列產出工作表的值
+        
+        工作簿（或該工作表）未載入時直接串流讀取工作表 XML，不建立儲存格物件。
         
         Args:
-            search_text: 搜尋文字
-            sheet_name: 工作表名稱，None 表示所有工作表
+            sheet_name: 工作表名稱
+            values: 公式儲存格的值（'cached'、'formula'、'both'）
+            row_filter: 只產出這些行，None 表示全部
             
-        Returns:
-            List[Tuple[str, str, Any]]: [(工作表名, 儲存格參照, 值)]
+        Yields:
+            Tuple[int, List[Any]]: (行號, 值)；只產出有值的列，不含列尾的空白儲存格
+            
+        Raises:
+            ValueError: 不是一般工作表時
         """
-        if not search_text:
-            print(f"{ERROR_SYMBOL} 搜尋文字不能為空")
-            return []
-        
-        if sheet_name:
-            if not self._validate_sheet_name(sheet_name):
-                return []
-            sheets_to_search = [(sheet_name, self.wb[sheet_name])]
-        else:
-            sheets_to_search = [(name, self.wb[name]) for name in self.wb.sheetnames]
-        
-        results = []
-        
-        for ws_name, ws in sheets_to_search:
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str) and search_text in cell.value:
-                        results.append((ws_name, cell.coordinate, cell.value))
+        raw_source, sheet_path = self._source_path, None
+        if self._wb is not None and not self.read_only:
+            raw_sheets = self._raw_sheet_parts()
+            raw_source, sheet_path = self._raw_source, raw_sheets.get(sheet_name)
+            if sheet_path is None:
+                raw_source = None
         
-        if results:
-            print(f"\n{SUCCESS_SYMBOL} 找到 {len(results)} 個符合的儲存格:\n")
-            for ws_name, cell_ref, value in results[:20]:  # 只顯示前 20 個
-                print(f"  {ws_name}!{cell_ref}: {value}")
-            if len(results) > 20:
-                print(f"\n  ... 還有 {len(results) - 20} 個結果未顯示")
-        else:
-            print(f"{ERROR_SYMBOL} 找不到包含「{search_text}」的儲存格")
+        if raw_source is not None:
+            with zipfile.ZipFile(raw_source) as zf:
+                if sheet_path is None:
+                    _, sheet_path = self._worksheet_part(zf, sheet_name)
+                yield from iter_sheet_rows(zf, sheet_path, values, row_filter)
+            return
         
-        return results
-
+        ws = self.wb[sheet_name]
+        for row, row_values in enumerate(ws.iter_rows(values_only=True), 1):
+            if row_filter is not None and row not in row_filter:
+                continue
+            row_values = list(row_values)
+            if values != 'formula':
+                row_values = [
+                    self._formula_result(sheet_name, row, col, value, values)
+                    for col, value in enumerate(row_values, 1)
+                ]
+            while row_values and row_values[-1] is None:
+                row_values.pop()
+            if row_values:
+                yield row, row_values
+    
+    def _active_sheet_name(self) -> str:
+        """活動工作表名稱（工作簿尚未載入時直接讀取 workbook.xml）"""
+        if self._wb is None:
+            with zipfile.ZipFile(self._source_path) as zf:
+                return self._worksheet_part(zf, None)[0]
+        return self.wb.active.title
+    
     def add_sheet(self, sheet_name: str, position: Optional[int] = None) -> bool:
         """新增工作表
         
@@ -316,6 +2448,8 @@ class ExcelEditor:
         Returns:
             bool: 是否成功新增
         """
+        self._ensure_writable()
+        
         if sheet_name in self.wb.sheetnames:
             print(f"{ERROR_SYMBOL} 工作表「{sheet_name}」已存在")
             return False
@@ -325,6 +2459,9 @@ class ExcelEditor:
                 self.wb.create_sheet(sheet_name)
             else:
                 self.wb.create_sheet(sheet_name, position)
+            if self._engine is not None:
+                self._engine.add_sheet(sheet_name)
+            self._formula_cells[sheet_name] = {}
             
             print(f"{SUCCESS_SYMBOL} 已新增工作表: {sheet_name}")
             return True
@@ -341,7 +2478,9 @@ class ExcelEditor:
         Returns:
             bool: 是否成功刪除
         """
-        if not self._validate_sheet_name(sheet_name):
+        self._ensure_writable()
+        
+        if not self._validate_sheet_name(sheet_name, materialise=False):
             return False
         
         if len(self.wb.sheetnames) == 1:
@@ -350,6 +2489,8 @@ class ExcelEditor:
         
         try:
             del self.wb[sheet_name]
+            self._engine = None
+            self._formula_cells.pop(sheet_name, None)
             print(f"{SUCCESS_SYMBOL} 已刪除工作表: {sheet_name}")
             return True
         except Exception as e:
@@ -360,52 +2501,89 @@ class ExcelEditor:
         self,
         sheet_name: str,
         cell_ref: str,
-        bold: bool = False,
-        font_size: int = 11,
+        bold: Optional[bool] = None,
+        font_size: Optional[int] = None,
         bg_color: Optional[str] = None,
-        alignment: Optional[str] = None
+        alignment: Optional[str] = None,
+        number_format: Optional[str] = None,
+        style: Optional[str] = None
     ) -> bool:
-        """設定儲存格格式
+        """設定儲存格或範圍的格式
+        
+        範圍內的儲存格一次設定完成：每種原有格式只計算一次新格式，其餘儲存格共用結果，
+        因此樣式表只增加實際不同的格式。整列（如 3:5）或整欄（如 B:D）時設定列 / 欄的
+        預設格式並更新其中已有的儲存格，不建立空白儲存格。
         
         Args:
             sheet_name: 工作表名稱
-            cell_ref: 儲存格參照 (如 A1)
-            bold: 是否粗體
-            font_size: 字體大小
+            cell_ref: 儲存格或範圍 (如 A1、A1:H100000、3:5、B:D)
+            bold: 是否粗體，None 表示不變
+            font_size: 字體大小，None 表示不變
             bg_color: 背景顏色 (16進位，如 'FFFF00' 為黃色)
             alignment: 對齊方式 ('left', 'center', 'right')
+            number_format: 數字格式 (如 '#,##0.00'、'yyyy-mm-dd')
+            style: 具名樣式（如 'Good'、'Currency' 或活頁簿中已定義的樣式），先套用再套用其他設定
             
         Returns:
             bool: 是否成功設定
         """
+        self._ensure_writable()
+        
         if not self._validate_sheet_name(sheet_name):
             return False
         
+        # 格式物件每次呼叫只建立一次，由所有儲存格共用
+        changes: List[Tuple[str, Any]] = []
+        if style is not None:
+            changes.append(('style', style))
+        if bold is not None or font_size is not None:
+            changes.append(('font', lambda font: _font_with(font, bold, font_size)))
+        if bg_color:
+            changes.append(('fill', PatternFill(
+                start_color=bg_color,
+                end_color=bg_color,
+                fill_type="solid"
+            )))
+        if alignment:
+            changes.append(('alignment', lambda current: _alignment_with(current, alignment)))
+        if number_format is not None:
+            changes.append(('number_format', number_format))
+        
         try:
-            ws = self.wb[sheet_name]
-            cell = ws[cell_ref]
-            
-            # 設定字體
-            cell.font = Font(bold=bold, size=font_size)
-            
-            # 設定背景色
-            if bg_color:
-                cell.fill = PatternFill(
-                    start_color=bg_color,
-                    end_color=bg_color,
-                    fill_type="solid"
-                )
-            
-            # 設定對齊
-            if alignment:
-                cell.alignment = Alignment(horizontal=alignment)
-            
-            print(f"{SUCCESS_SYMBOL} 已設定 {sheet_name}!{cell_ref} 的格式")
+            cells, styles = _format_cells(self.wb[sheet_name], cell_ref, changes)
+            if cells == 1:
+                print(f"{SUCCESS_SYMBOL} 已設定 {sheet_name}!{cell_ref} 的格式")
+            else:
+                print(f"{SUCCESS_SYMBOL} 已設定 {sheet_name}!{cell_ref} 的格式（{cells} 個儲存格，{styles} 種格式）")
             return True
         except Exception as e:
             print(f"{ERROR_SYMBOL} 設定格式失敗: {e}")
             return False
     
+    def _compact_cell_styles(self) -> int:
+        """移除沒有儲存格、列或欄使用的儲存格格式（cellXfs）
+        
+        儲存格記錄的是格式本身，寫出時才對應到索引，因此只需重建格式清單。
+        
+        Returns:
+            int: 移除的格式數
+        """
+        used = set()
+        for ws in self._wb.worksheets:
+            for obj in itertools.chain(
+                ws._cells.values(), ws.row_dimensions.values(), ws.column_dimensions.values()
+            ):
+                if obj._style is not None:
+                    used.add(obj._style)
+        
+        styles = self._wb._cell_styles
+        # 第一個格式是預設格式，一律保留
+        kept = [styles[0]] + [style for style in styles[1:] if style in used]
+        removed = len(styles) - len(kept)
+        if removed:
+            self._wb._cell_styles = IndexedList(kept)
+        return removed
+    
     def set_formula(
         self,
         sheet_name: str,
@@ -422,32 +2600,470 @@ class ExcelEditor:
         Returns:
             bool: 是否成功設定
         """
+        self._ensure_writable()
+        
         if not self._validate_sheet_name(sheet_name):
             return False
         
         try:
-            ws = self.wb[sheet_name]
-            ws[cell_ref] = formula
+            cell = self.wb[sheet_name][cell_ref]
+            cell.value = formula
+            self._track_edit(sheet_name, cell.row, cell.column, cell.value)
             print(f"{SUCCESS_SYMBOL} 已設定公式: {cell_ref} = {formula}")
             return True
         except Exception as e:
             print(f"{ERROR_SYMBOL} 設定公式失敗: {e}")
             return False
     
-    def _validate_sheet_name(self, sheet_name: str) -> bool:
+    def recalculate(self, full: bool = False, write_values: bool = False) -> int:
+        """計算工作簿中的公式
+        
+        第一次呼叫時建立儲存格相依圖並計算所有公式；之後只重新計算
+        透過編輯器修改的儲存格所影響的公式。
+        
+        Args:
+            full: 重新計算所有公式（直接修改 wb 中的儲存格後使用）
+            write_values: 儲存時將計算結果寫入公式的快取值，
+                讓不會重新計算的程式（如 openpyxl data_only=True）也能讀到結果
+            
+        Returns:
+            int: 計算的公式數
+        """
+        count = self._recalculate(full)
+        if write_values:
+            self._write_formula_values = True
+        
+        print(f"{SUCCESS_SYMBOL} 已計算 {count} 個公式")
+        if self._engine.unsupported:
+            print(f"{WARNING_SYMBOL} 有 {len(self._engine.unsupported)} 個陣列公式不支援，未計算")
+        return count
+    
+    def get_calculated_value(self, sheet_name: str, cell_ref: str) -> Any:
+        """取得儲存格的值，公式儲存格回傳計算結果（錯誤為 FormulaError）
+        
+        Args:
+            sheet_name: 工作表名稱
+            cell_ref: 儲存格參照 (如 A1)
+            
+        Returns:
+            Any: 儲存格的值；工作表或參照無效時為 None
+        """
+        self._ensure_writable()
+        
+        if not self._validate_sheet_name(sheet_name):
+            return None
+        
+        if self._engine is None or self._engine.dirty:
+            self._recalculate()
+        try:
+            return self._engine.get_value(sheet_name, cell_ref)
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return None
+    
+    def _recalculate(self, full: bool = False) -> int:
+        """建立（或沿用）計算引擎並重新計算"""
+        self._ensure_writable()
+        self._materialise()
+        if self._engine is None:
+            self._engine = FormulaEngine(self.wb)
+        return self._engine.recalculate(full)
+    
+    def _track_edit(self, sheet_name: str, row: int, col: int, value: Any) -> None:
+        """通知計算引擎儲存格已修改"""
+        if self._engine is not None:
+            self._engine.set_cell(sheet_name, row, col, value)
+    
+    def _save_formula_values(self, save_path: str) -> None:
+        """將公式計算結果寫入已儲存檔案的快取值"""
+        if self._engine.dirty:
+            self._engine.recalculate()
+        pending_path = self._new_pending_path()
+        try:
+            write_formula_values(save_path, pending_path, self._engine.formula_values())
+            shutil.copymode(save_path, pending_path)
+            shutil.move(pending_path, save_path)
+        finally:
+            _remove_file(pending_path)
+    
+    def _formula_result(self, sheet_name: str, row: int, col: int, value: Any, values: str) -> Any:
+        """依讀取方式取得已載入儲存格的值
+        
+        快取值只在儲存格的公式與檔案中相同時有效（修改過的公式沒有快取值）；
+        已建立計算引擎時以計算結果為準。
+        """
+        formula = formula_text(value)
+        if values == 'formula' or formula is None:
+            return value
+        key = (sheet_name, row, col)
+        if self._engine is not None and self._engine.dirty:
+            self._engine.recalculate()
+        if self._engine is not None and key in self._engine.values:
+            cached = self._engine.values[key]
+        else:
+            stored = self._sheet_formula_cells(sheet_name).get((row, col))
+            cached = stored[1] if stored is not None and stored[0] == formula else None
+        return cached if values == 'cached' else {'formula': formula, 'value': cached}
+    
+    def _sheet_formula_cells(self, sheet_name: str) -> Dict[Tuple[int, int], Tuple[str, Any]]:
+        """工作表中公式儲存格的公式與快取值（第一次使用時讀取）"""
+        if sheet_name not in self._formula_cells:
+            self._load_formula_cells([sheet_name])
+        return self._formula_cells[sheet_name]
+    
+    def _load_formula_cells(self, sheet_names: Optional[Iterable[str]] = None) -> None:
+        """從保有快取值的檔案讀取工作表的公式儲存格，已讀取的略過
+        
+        Args:
+            sheet_names: 工作表名稱，None 表示全部
+        """
+        names = set(self._sheet_names() if sheet_names is None else sheet_names)
+        names -= self._formula_cells.keys()
+        if not names:
+            return
+        with zipfile.ZipFile(self._values_source) as zf:
+            sheets, _ = read_workbook_sheets(zf)
+            for sheet in sheets:
+                if (sheet['name'] in names and sheet['type'] == WORKSHEET_RELTYPE
+                        and sheet['path'] in zf.NameToInfo):
+                    self._formula_cells[sheet['name']] = read_formula_cells(zf, sheet['path'])
+        for name in names:
+            self._formula_cells.setdefault(name, {})
+    
+    def _keep_formula_cells(self, path: str) -> None:
+        """保有快取值的檔案即將被覆蓋或移除，之後改由 path 提供
+        
+        openpyxl 寫出的工作表不含快取值，先讀取已載入工作表的公式儲存格；
+        未載入的工作表原樣複製到 path，仍可之後再讀取。
+        """
+        raw_sheets = self._raw_sheet_parts()
+        self._load_formula_cells(ws.title for ws in self.wb.worksheets if ws.title not in raw_sheets)
+        self._values_source = path
+    
+    @staticmethod
+    def _validate_value_mode(values: str) -> bool:
+        """檢查公式儲存格的讀取方式"""
+        if values not in VALUE_MODES:
+            print(f"{ERROR_SYMBOL} 無效的讀取方式: {values}（可用: {', '.join(VALUE_MODES)}）")
+            return False
+        return True
+    
+    @staticmethod
+    def _sheet_size(ws) -> Tuple[int, int]:
+        """取得工作表的行數與列數
+        
+        唯讀模式下尺寸來自工作表的 dimension 紀錄，缺少時才串流掃描一次。
+        
+        Returns:
+            Tuple[int, int]: (行數, 列數)
+        """
+        if ws.max_row is None or ws.max_column is None:
+            ws.calculate_dimension(force=True)
+        return ws.max_row or 0, ws.max_column or 0
+    
+    def _validate_sheet_name(self, sheet_name: str, materialise: bool = True) -> bool:
         """驗證工作表名稱是否存在
         
         Args:
             sheet_name: 工作表名稱
+            materialise: 部分載入時，工作表尚未載入則先載入
             
         Returns:
             bool: 是否存在
         """
-        if sheet_name not in self.wb.sheetnames:
+        sheetnames = self._sheet_names()
+        if sheet_name not in sheetnames:
             print(f"{ERROR_SYMBOL} 工作表「{sheet_name}」不存在")
-            print(f"可用的工作表: {', '.join(self.wb.sheetnames)}")
+            print(f"可用的工作表: {', '.join(sheetnames)}")
             return False
+        if materialise:
+            self._materialise({sheet_name})
         return True
+    
+    def _sheet_names(self) -> List[str]:
+        """取得所有工作表名稱（工作簿尚未載入時直接讀取 workbook.xml）"""
+        if self._wb is None:
+            with zipfile.ZipFile(self._source_path) as zf:
+                sheets, _ = read_workbook_sheets(zf)
+            return [sheet['name'] for sheet in sheets]
+        return self.wb.sheetnames
+
+
+def json_value(value: Any) -> Any:
+    """轉換為可輸出 JSON 的值（日期時間使用 ISO 格式）"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_value(item) for item in value]
+    return str(value)
+
+
+def _iter_range_rows(rows: Any, columns: Optional[int] = None) -> Iterator[Any]:
+    """將各種二維資料來源轉為逐行的值序列
+    
+    緩衝區與 NumPy 陣列以 tolist() 一次轉為 Python 值，避免逐元素轉換。
+    """
+    if columns is not None and columns < 1:
+        raise ValueError("columns 必須大於 0")
+    
+    flat = False
+    if HAS_NUMPY and isinstance(rows, np.ndarray):
+        flat = rows.ndim <= 1
+        rows = rows.tolist()
+    elif isinstance(rows, (array.array, memoryview)):
+        flat = isinstance(rows, array.array) or rows.ndim <= 1
+        rows = rows.tolist()
+    
+    if flat:
+        if columns is None:
+            yield rows
+        else:
+            for start in range(0, len(rows), columns):
+                yield rows[start:start + columns]
+        return
+    
+    for row in rows:
+        if isinstance(row, (str, bytes)):
+            # 字串也可迭代，不檢查會被當成一行逐字元寫入
+            raise TypeError("每一行必須是值的序列；單行資料請寫成 [[值, ...]]")
+        yield row.tolist() if hasattr(row, 'tolist') else row
+
+
+# 公式中的字串常數（原樣保留）或儲存格參照（可加工作表名稱；不含跨多工作表的參照）
+_FORMULA_REFERENCE = re.compile(
+    r'"(?:[^"]|"")*"'
+    r"|(?<![\w.$'!:])((?:'(?:[^']|'')+'|[^\W\d][\w.]*)!)?"
+    r'(\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?|\$?\d+:\$?\d+)(?![\w(!:])'
+)
+_CELL_REFERENCE = re.compile(r'^(\$?[A-Za-z]{1,3})(\$?)(\d+)$')
+_ROW_REFERENCE = re.compile(r'^(\$?)(\d+)$')
+
+
+def _shift_formula_rows(
+    formula: str,
+    sheet_name: str,
+    own_sheet: bool,
+    row_map: Callable[[int], Optional[int]],
+    range_map: Callable[[int, int], Optional[Tuple[int, int]]]
+) -> str:
+    """調整公式中指向 sheet_name 的儲存格參照行號
+    
+    支援 A1、$A$1、A1:B5、3:5 與加上工作表名稱的參照；名稱、表格與跨多工作表的參照保持不變。
+    指向被刪除行的參照改為 #REF!。
+    
+    Args:
+        formula: "=" 開頭的公式
+        sheet_name: 行號變動的工作表名稱
+        own_sheet: 公式是否位於該工作表（決定未指定工作表的參照是否調整）
+    """
+    def replace(match):
+        sheet, ref = match.groups()
+        if ref is None:
+            return match.group(0)
+        if sheet is None:
+            if not own_sheet:
+                return ref
+        elif sheet[:-1].strip("'").replace("''", "'") != sheet_name:
+            return match.group(0)
+        return (sheet or '') + _shift_reference(ref, row_map, range_map)
+    
+    return _FORMULA_REFERENCE.sub(replace, formula)
+
+
+def _shift_reference(
+    ref: str,
+    row_map: Callable[[int], Optional[int]],
+    range_map: Callable[[int, int], Optional[Tuple[int, int]]]
+) -> str:
+    """調整單一參照（儲存格、儲存格範圍或整行範圍）的行號"""
+    parts = ref.split(':')
+    if len(parts) == 1:
+        cell = _CELL_REFERENCE.match(ref)
+        if not cell:
+            return ref
+        row = row_map(int(cell.group(3)))
+        return "#REF!" if row is None else f"{cell.group(1)}{cell.group(2)}{row}"
+    
+    if len(parts) != 2:
+        return ref
+    first, last = (_CELL_REFERENCE.match(part) for part in parts)
+    if first and last:
+        groups = (first.groups(), last.groups())
+    else:
+        first, last = (_ROW_REFERENCE.match(part) for part in parts)
+        if not (first and last):
+            return ref
+        groups = (('',) + first.groups(), ('',) + last.groups())
+    
+    (col1, abs1, row1), (col2, abs2, row2) = groups
+    rows = range_map(min(int(row1), int(row2)), max(int(row1), int(row2)))
+    if rows is None:
+        return "#REF!"
+    return f"{col1}{abs1}{rows[0]}:{col2}{abs2}{rows[1]}"
+
+
+def _move_formula(formula: Any, old_ref: str, new_ref: str) -> Any:
+    """將公式從 old_ref 搬到 new_ref，相對參照依新位置平移"""
+    if isinstance(formula, ArrayFormula):
+        min_col, _, max_col, _ = range_boundaries(formula.ref)
+        row = new_ref.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+        ref = f'{get_column_letter(min_col)}{row}'
+        if max_col != min_col:
+            ref += f':{get_column_letter(max_col)}{row}'
+        return ArrayFormula(ref, _move_formula(formula.text, old_ref, new_ref))
+    if isinstance(formula, str) and formula.startswith('='):
+        return Translator(formula, old_ref).translate_formula(new_ref)
+    return formula
+
+
+def _compaction_summary(report: Dict[str, Any]) -> str:
+    """整理結果的說明文字"""
+    text = (
+        f"共用字串 {report['strings_before']} → {report['strings_after']}，"
+        f"儲存格格式 {report['styles_before']} → {report['styles_after']}，"
+        f"檔案大小 {_size_text(report['size_before'])} → {_size_text(report['size_after'])}"
+    )
+    if 'load_seconds_before' in report:
+        text += f"，載入時間 {report['load_seconds_before']:.2f} 秒 → {report['load_seconds_after']:.2f} 秒"
+    return text
+
+
+def _size_text(size: int) -> str:
+    """檔案大小的文字（KB / MB）"""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+def _format_cells(ws, cell_ref: str, changes: List[Tuple[str, Any]]) -> Tuple[int, int]:
+    """依序套用格式變更到儲存格、整列或整欄
+    
+    新格式依原有格式快取：範圍內有幾種原有格式就只計算幾次，
+    其餘儲存格直接複製結果。
+    
+    Args:
+        ws: 工作表
+        cell_ref: 儲存格或範圍 (如 A1、A1:H100000、3:5、B:D)
+        changes: [(屬性, 新值或「目前值 -> 新值」的函數)]
+    
+    Returns:
+        Tuple[int, int]: (設定的儲存格數, 不同的新格式數)
+    
+    Raises:
+        ValueError: 範圍無效或具名樣式不存在時
+    """
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(cell_ref.upper())
+    except (ValueError, TypeError):
+        raise ValueError(f"無效的範圍: {cell_ref}")
+    
+    interned: Dict[Tuple[int, ...], StyleArray] = {}
+    
+    def restyle(obj) -> None:
+        key = tuple(obj._style) if obj._style is not None else ()
+        style = interned.get(key)
+        if style is None:
+            scratch = StyleableObject(ws, obj._style)
+            for name, value in changes:
+                setattr(scratch, name, value(getattr(scratch, name)) if callable(value) else value)
+            style = interned[key] = scratch._style or StyleArray()
+        obj._style = StyleArray(style)
+    
+    cells = 0
+    if min_col is None or min_row is None:
+        # 整列或整欄：設定預設格式，只更新已有的儲存格
+        if min_col is None:
+            for row in range(min_row, max_row + 1):
+                restyle(ws.row_dimensions[row])
+        else:
+            _split_column_dimensions(ws, min_col, max_col)
+            for col in range(min_col, max_col + 1):
+                restyle(ws.column_dimensions[get_column_letter(col)])
+        for (row, col), cell in ws._cells.items():
+            if (min_row is None or min_row <= row <= max_row) and (
+                    min_col is None or min_col <= col <= max_col):
+                restyle(cell)
+                cells += 1
+    else:
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                restyle(ws.cell(row, col))
+        cells = (max_row - min_row + 1) * (max_col - min_col + 1)
+    return cells, len(set(interned.values()))
+
+
+def _split_column_dimensions(ws, min_col: int, max_col: int) -> None:
+    """拆開與指定欄位部分重疊的欄寬群組（<col min max>），讓指定的欄位各自設定"""
+    for dim in list(ws.column_dimensions.values()):
+        dim.reindex()
+        if dim.min == dim.max or dim.max < min_col or dim.min > max_col:
+            continue
+        del ws.column_dimensions[dim.index]
+        pieces = [(dim.min, min_col - 1), (max_col + 1, dim.max)]
+        pieces += [(col, col) for col in range(max(dim.min, min_col), min(dim.max, max_col) + 1)]
+        for start, end in pieces:
+            if start <= end:
+                piece = copy(dim)
+                piece.index = get_column_letter(start)
+                piece.min, piece.max = start, end
+                ws.column_dimensions[piece.index] = piece
+
+
+def _font_with(font: Font, bold: Optional[bool], size: Optional[int]) -> Font:
+    """複製字型並修改粗體與大小"""
+    font = copy(font)
+    if bold is not None:
+        font.b = bold
+    if size is not None:
+        font.sz = size
+    return font
+
+
+def _alignment_with(current: Alignment, horizontal: str) -> Alignment:
+    """複製對齊方式並修改水平對齊"""
+    current = copy(current)
+    current.horizontal = horizontal
+    return current
+
+
+def _parse_row_spec(spec: str) -> List[int]:
+    """解析行號清單（如 "3,5,10-20"）"""
+    rows = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+                if start > end:
+                    raise ValueError
+                rows.update(range(start, end + 1))
+            else:
+                rows.add(int(part))
+        except ValueError:
+            raise ValueError(f"無效的行號範圍: {part}")
+    return sorted(rows)
+
+
+def _read_range_file(path: str) -> Iterator[List[Any]]:
+    """逐行讀取範圍資料檔（.csv 或 JSON 二維陣列）"""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f)
+    else:
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def _remove_file(path: str) -> None:
+    """移除暫存檔（若存在）"""
+    if os.path.exists(path):
+        os.remove(path)
 
 
 def main() -> None:
@@ -463,19 +3079,92 @@ def main() -> None:
   # 查看工作表
   python excel_editor.py data.xlsx view Sheet1
   
+  # 查看指定範圍（JSON 輸出）
+  python excel_editor.py data.xlsx view Sheet1 --range B500000:H500050 --json
+  
+  # 同時查看公式與上次計算的結果
+  python excel_editor.py data.xlsx view Sheet1 --values both
+  
   # 替換文字
   python excel_editor.py data.xlsx replace "舊值" "新值"
   
   # 更新儲存格
   python excel_editor.py data.xlsx update-cell Sheet1 A1 "新值"
   
+  # 批次寫入範圍（CSV 或 JSON 二維陣列）
+  python excel_editor.py data.xlsx update-range Sheet1 A2 data.csv
+  
+  # 設定格式（只解析 Sheet1，其他工作表原樣保留）
+  python excel_editor.py data.xlsx set-format Sheet1 A1 --bold --bg-color FFFF00
+  
+  # 一次設定整個範圍或整欄的格式（相同的格式只記錄一次）
+  python excel_editor.py data.xlsx set-format Sheet1 A2:H100000 --number-format "#,##0.00"
+  python excel_editor.py data.xlsx set-format Sheet1 1:1 --style "Headline 1"
+  
+  # 設定公式
+  python excel_editor.py data.xlsx set-formula Sheet1 C1 "=SUM(A1:B1)"
+  
+  # 在最後新增一行（不載入工作簿，直接改寫工作表）
+  python excel_editor.py data.xlsx add-row Sheet1 "值1" "值2"
+  
+  # 一次刪除多行（合併範圍與公式參照一併調整）
+  python excel_editor.py data.xlsx delete-rows Sheet1 "3,5,10-20"
+  
+  # 在第 5 行一次插入多行（CSV 或 JSON 二維陣列）
+  python excel_editor.py data.xlsx insert-rows Sheet1 5 rows.csv
+  
+  # 計算公式並顯示結果（--write 將結果寫入檔案）
+  python excel_editor.py data.xlsx calc Sheet1 C1 C2 --write
+  
   # 搜尋儲存格
   python excel_editor.py data.xlsx find "關鍵字"
+  
+  # 每個欄位的統計（類型、空白、範圍、不重複值、熱門值）
+  python excel_editor.py data.xlsx profile Sheet1 --top 3 --json
+  
+  # 查詢符合條件的列（依金額遞減，前 10 列）
+  python excel_editor.py data.xlsx query Sheet1 --where "地區 = APAC and 金額 > 10000" --order-by "金額 desc" --limit 10
+  
+  # 為常用的查詢欄位建立索引（sorted 索引也支援大小比較）
+  python excel_editor.py data.xlsx index Sheet1 地區
+  
+  # 以「客戶」表的「編號」查找，將「名稱」「地區」以靜態值寫入（取代 VLOOKUP）
+  python excel_editor.py orders.xlsx join 訂單 客戶編號 客戶 編號 名稱 地區 --lookup-file customers.xlsx
+  
+  # 依地區、產品分組彙總，結果寫入新工作表「彙總」
+  python excel_editor.py data.xlsx aggregate Sheet1 --group-by 地區 產品 --agg "sum(金額)" "mean(金額)" count --into 彙總
+  
+  # 依金額遞減、日期遞增排序（外部排序，不載入工作簿）
+  python excel_editor.py --output sorted.xlsx data.xlsx sort Sheet1 "金額 desc" 日期 --memory-mb 512
+  
+  # 移除「客戶」「日期」重複的列，保留最後一筆
+  python excel_editor.py data.xlsx dedupe Sheet1 --columns 客戶 日期 --keep last
+  
+  # 將工作表串流匯出為 CSV / Parquet（Parquet 需要 pyarrow）
+  python excel_editor.py data.xlsx export Sheet1 sheet1.csv
+  python excel_editor.py data.xlsx export Sheet1 sheet1.parquet --batch-rows 50000
+  
+  # 將 CSV 匯入為新工作表（檔案不存在時建立新活頁簿），推斷數字與日期
+  python excel_editor.py data.xlsx import orders.csv --sheet 訂單 --infer-types
+  
+  # 整理共用字串表與儲存格格式，並比較整理前後的載入時間
+  python excel_editor.py data.xlsx compact --measure
+  
+  # 修改後儲存時一併整理
+  python excel_editor.py --compact data.xlsx dedupe Sheet1 --columns 客戶
+  
+  # 分頁搜尋（第 21-40 個結果）
+  python excel_editor.py data.xlsx find "關鍵字" --offset 20 --limit 20
+  
+  # 搜尋公式的計算結果
+  python excel_editor.py data.xlsx find "#DIV/0!" --values cached
         '''
     )
     
     parser.add_argument('file', help='Excel 檔案路徑')
     parser.add_argument('--output', '-o', help='輸出檔案路徑（不指定則覆蓋原檔案）')
+    parser.add_argument('--compact', action='store_true',
+                        help='儲存後整理共用字串表與儲存格格式（移除沒有使用與重複的項目）')
     
     subparsers = parser.add_subparsers(dest='command', help='編輯命令')
     
@@ -486,6 +3175,13 @@ def main() -> None:
     view_parser = subparsers.add_parser('view', help='查看工作表內容')
     view_parser.add_argument('sheet', nargs='?', help='工作表名稱（不指定則為活動工作表）')
     view_parser.add_argument('--max-rows', type=int, default=MAX_ROWS_DISPLAY, help='最大顯示行數')
+    view_parser.add_argument('--range', dest='cell_range', help='查看範圍（如 B500000:H500050）')
+    view_parser.add_argument('--offset', type=int, default=0, help='略過開頭的行數（分頁用）')
+    view_parser.add_argument('--limit', type=int, help='最多顯示的行數')
+    view_parser.add_argument('--max-cols', type=int, default=MAX_COLS_DISPLAY, help='最大顯示列數')
+    view_parser.add_argument('--json', action='store_true', help='以 JSON 輸出')
+    view_parser.add_argument('--values', choices=VALUE_MODES, default='formula',
+                             help='公式儲存格顯示公式、快取值或兩者（預設公式）')
     
     # replace: 替換文字
     replace_parser = subparsers.add_parser('replace', help='替換文字')
@@ -499,6 +3195,29 @@ def main() -> None:
     update_parser.add_argument('cell', help='儲存格參照 (如 A1)')
     update_parser.add_argument('value', help='新值')
     
+    # update-range: 批次寫入範圍
+    range_parser = subparsers.add_parser('update-range', help='批次寫入範圍')
+    range_parser.add_argument('sheet', help='工作表名稱')
+    range_parser.add_argument('cell', help='左上角儲存格參照 (如 A1)')
+    range_parser.add_argument('data_file', help='資料檔（.csv 或 JSON 二維陣列）')
+    
+    # set-format: 設定儲存格格式
+    format_parser = subparsers.add_parser('set-format', help='設定儲存格格式')
+    format_parser.add_argument('sheet', help='工作表名稱')
+    format_parser.add_argument('cell', help='儲存格或範圍 (如 A1、A1:H100000、3:5、B:D)')
+    format_parser.add_argument('--bold', action='store_true', default=None, help='粗體')
+    format_parser.add_argument('--font-size', type=int, help='字體大小')
+    format_parser.add_argument('--bg-color', help='背景顏色（16 進位，如 FFFF00）')
+    format_parser.add_argument('--align', choices=['left', 'center', 'right'], help='對齊方式')
+    format_parser.add_argument('--number-format', help="數字格式（如 '#,##0.00'）")
+    format_parser.add_argument('--style', help='具名樣式（如 Good、Currency）')
+    
+    # set-formula: 設定公式
+    formula_parser = subparsers.add_parser('set-formula', help='設定儲存格公式')
+    formula_parser.add_argument('sheet', help='工作表名稱')
+    formula_parser.add_argument('cell', help='儲存格參照 (如 A1)')
+    formula_parser.add_argument('formula', help='公式（如 "=SUM(A1:A10)"）')
+    
     # add-row: 新增行
     addrow_parser = subparsers.add_parser('add-row', help='新增行')
     addrow_parser.add_argument('sheet', help='工作表名稱')
@@ -510,10 +3229,121 @@ def main() -> None:
     delrow_parser.add_argument('sheet', help='工作表名稱')
     delrow_parser.add_argument('row', type=int, help='行號')
     
+    # delete-rows: 一次刪除多行
+    delrows_parser = subparsers.add_parser('delete-rows', help='一次刪除多行')
+    delrows_parser.add_argument('sheet', help='工作表名稱')
+    delrows_parser.add_argument('rows', help='行號清單（如 "3,5,10-20"）')
+    
+    # insert-rows: 一次插入多行
+    insrows_parser = subparsers.add_parser('insert-rows', help='一次插入多行')
+    insrows_parser.add_argument('sheet', help='工作表名稱')
+    insrows_parser.add_argument('position', type=int, help='插入位置（行號）')
+    insrows_parser.add_argument('data_file', help='資料檔（.csv 或 JSON 二維陣列）')
+    
+    # calc: 計算公式
+    calc_parser = subparsers.add_parser('calc', help='計算公式')
+    calc_parser.add_argument('sheet', nargs='?', help='工作表名稱')
+    calc_parser.add_argument('cells', nargs='*', help='要顯示結果的儲存格（如 C1 C2）')
+    calc_parser.add_argument('--write', action='store_true', help='將計算結果寫入檔案（公式的快取值）')
+    
+    # profile: 欄位統計
+    profile_parser = subparsers.add_parser('profile', help='串流計算每個欄位的統計')
+    profile_parser.add_argument('sheet', nargs='?', help='工作表名稱（不指定則為活動工作表）')
+    profile_parser.add_argument('--top', type=int, default=5, help='每個欄位列出的熱門值數量')
+    profile_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱')
+    profile_parser.add_argument('--no-cache', action='store_true', help='不使用快取的結果')
+    profile_parser.add_argument('--json', action='store_true', help='以 JSON 輸出')
+    
+    # query: 查詢符合條件的列
+    query_parser = subparsers.add_parser('query', help='查詢符合條件的列')
+    query_parser.add_argument('sheet', nargs='?', help='工作表名稱（不指定則為活動工作表）')
+    query_parser.add_argument('--where', help='條件（如 "地區 = APAC and 金額 > 10000"）')
+    query_parser.add_argument('--select', nargs='+', help='要回傳的欄位')
+    query_parser.add_argument('--order-by', nargs='+', help='排序欄位（如 "金額 desc"）')
+    query_parser.add_argument('--limit', type=int, help='最多回傳的列數')
+    query_parser.add_argument('--offset', type=int, default=0, help='略過前幾個結果（分頁用）')
+    query_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱')
+    query_parser.add_argument('--into', help='將結果寫入這個新工作表')
+    query_parser.add_argument('--json', action='store_true', help='以 JSON 輸出')
+    
+    # index: 建立欄位索引
+    index_parser = subparsers.add_parser('index', help='為欄位建立查詢索引')
+    index_parser.add_argument('sheet', help='工作表名稱')
+    index_parser.add_argument('column', help='欄位名稱或欄位字母')
+    index_parser.add_argument('--kind', choices=INDEX_KINDS, default='hash', help='索引類型（預設 hash）')
+    index_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱')
+    
+    # join: 查找並寫入靜態值
+    join_parser = subparsers.add_parser('join', help='以鍵欄位查找另一個工作表的值並寫入')
+    join_parser.add_argument('sheet', help='目標工作表名稱')
+    join_parser.add_argument('key', help='目標工作表的鍵欄位')
+    join_parser.add_argument('lookup_sheet', help='查詢表的工作表名稱')
+    join_parser.add_argument('lookup_key', help='查詢表的鍵欄位')
+    join_parser.add_argument('columns', nargs='+', help='要帶入的查詢表欄位')
+    join_parser.add_argument('--lookup-file', help='查詢表所在的 xlsx（不指定則為同一個檔案）')
+    join_parser.add_argument('--target-column', help='寫入的第一欄（不指定則為範圍右邊的第一欄）')
+    join_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱')
+    
+    # aggregate: 分組彙總
+    aggregate_parser = subparsers.add_parser('aggregate', help='依欄位分組彙總')
+    aggregate_parser.add_argument('sheet', nargs='?', help='工作表名稱（不指定則為活動工作表）')
+    aggregate_parser.add_argument('--group-by', nargs='+', help='分組欄位（不指定則全部為一組）')
+    aggregate_parser.add_argument('--agg', nargs='+',
+                                  help='彙總（sum、count、mean、min、max、distinct，如 "sum(金額)"，預設 count）')
+    aggregate_parser.add_argument('--where', help='只彙總符合條件的列（如 "年度 = 2024"）')
+    aggregate_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱')
+    aggregate_parser.add_argument('--into', help='將結果寫入這個新工作表')
+    aggregate_parser.add_argument('--max-groups', type=int, default=DEFAULT_MAX_GROUPS,
+                                  help='記憶體中最多保留的分組數，超過時寫入暫存檔')
+    aggregate_parser.add_argument('--json', action='store_true', help='以 JSON 輸出')
+    
+    # sort: 排序資料列
+    sort_parser = subparsers.add_parser('sort', help='依欄位排序工作表的資料列')
+    sort_parser.add_argument('sheet', help='工作表名稱')
+    sort_parser.add_argument('keys', nargs='+', help='排序欄位（名稱或欄位字母，如 "金額 desc" 或 -金額）')
+    sort_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱（一併排序）')
+    sort_parser.add_argument('--keep-row-styles', action='store_true', help='列高、列樣式跟著列搬移')
+    sort_parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_LIMIT // (1024 * 1024),
+                             help='排序時記憶體中累積的資料上限（MB），超過時寫入暫存檔')
+    
+    # dedupe: 移除重複列
+    dedupe_parser = subparsers.add_parser('dedupe', help='移除鍵欄位重複的列')
+    dedupe_parser.add_argument('sheet', help='工作表名稱')
+    dedupe_parser.add_argument('--columns', nargs='+', help='鍵欄位（名稱或欄位字母，不指定則比較整列）')
+    dedupe_parser.add_argument('--keep', choices=DEDUPE_KEEP, default='first', help='保留第一筆或最後一筆')
+    dedupe_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱（一併比較）')
+    
+    # export: 匯出 CSV / Parquet
+    export_parser = subparsers.add_parser('export', help='將工作表匯出為 CSV 或 Parquet')
+    export_parser.add_argument('sheet', help='工作表名稱')
+    export_parser.add_argument('data_file', help='輸出檔（.csv 或 .parquet）')
+    export_parser.add_argument('--format', choices=DATA_FORMATS, help='資料格式（不指定則依副檔名）')
+    export_parser.add_argument('--no-header', action='store_true', help='第一列不是欄位名稱')
+    export_parser.add_argument('--delimiter', default=',', help='CSV 的分隔字元')
+    export_parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='每批寫入的列數')
+    
+    # import: 匯入 CSV / Parquet
+    import_parser = subparsers.add_parser('import', help='將 CSV 或 Parquet 匯入為新工作表')
+    import_parser.add_argument('data_file', help='資料檔（.csv 或 .parquet）')
+    import_parser.add_argument('--sheet', help='新工作表名稱（不指定則使用資料檔名稱）')
+    import_parser.add_argument('--format', choices=DATA_FORMATS, help='資料格式（不指定則依副檔名）')
+    import_parser.add_argument('--infer-types', action='store_true', help='CSV 的文字推斷為數字、布林值與日期')
+    import_parser.add_argument('--no-header', action='store_true', help='CSV 的第一列不是欄位名稱')
+    import_parser.add_argument('--delimiter', default=',', help='CSV 的分隔字元')
+    import_parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='Parquet 每批讀取的列數')
+    
+    # compact: 整理共用字串表與儲存格格式
+    compact_parser = subparsers.add_parser('compact', help='移除沒有使用與重複的共用字串及儲存格格式')
+    compact_parser.add_argument('--measure', action='store_true', help='比較整理前後以 openpyxl 載入的時間')
+    
     # find: 搜尋儲存格
     find_parser = subparsers.add_parser('find', help='搜尋儲存格')
     find_parser.add_argument('text', help='搜尋文字')
     find_parser.add_argument('--sheet', help='指定工作表名稱（不指定則全部）')
+    find_parser.add_argument('--limit', type=int, help='最多顯示的結果數')
+    find_parser.add_argument('--offset', type=int, default=0, help='略過前幾個結果（分頁用）')
+    find_parser.add_argument('--values', choices=VALUE_MODES, default='formula',
+                             help='公式儲存格比對公式、快取值或兩者（預設公式）')
     
     args = parser.parse_args()
     
@@ -521,9 +3351,29 @@ def main() -> None:
         parser.print_help()
         return
     
-    # 載入 Excel 檔案
+    if args.command == 'import' and not os.path.exists(args.file):
+        # 匯入到新活頁簿：以 openpyxl 的 write-only 模式逐列寫出
+        try:
+            if not args.file.endswith(EXCEL_EXTENSION):
+                raise ValueError(f"不支援的檔案格式，需要 {EXCEL_EXTENSION}: {args.file}")
+            sheet_name = args.sheet or os.path.splitext(os.path.basename(args.data_file))[0][:31]
+            rows = create_workbook(args.output or args.file, sheet_name, iter_data_rows(
+                args.data_file, args.format, args.infer_types, not args.no_header, args.batch_rows,
+                args.delimiter
+            ))
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            sys.exit(1)
+        print(f"{SUCCESS_SYMBOL} 已從 {args.data_file} 匯入 {rows} 列到新活頁簿: {args.output or args.file}")
+        return
+    
+    # 載入 Excel 檔案（唯讀命令以串流模式開啟，單一工作表命令只解析該工作表）
+    read_only = args.command in LAZY_LOAD_COMMANDS
+    sheets = None
+    if args.command in PARTIAL_LOAD_COMMANDS and args.sheet:
+        sheets = [args.sheet]
     try:
-        editor = ExcelEditor(args.file)
+        editor = ExcelEditor(args.file, read_only=read_only, sheets=sheets)
     except (FileNotFoundError, ValueError, RuntimeError) as e:
         print(f"{ERROR_SYMBOL} {e}")
         sys.exit(1)
@@ -535,7 +3385,10 @@ def main() -> None:
             return
         
         elif args.command == 'view':
-            editor.view_sheet(args.sheet, args.max_rows)
+            editor.view_sheet(
+                args.sheet, args.max_rows, args.cell_range,
+                args.offset, args.limit, args.max_cols, args.json, args.values
+            )
             return
         
         elif args.command == 'replace':
@@ -544,18 +3397,110 @@ def main() -> None:
         elif args.command == 'update-cell':
             editor.update_cell(args.sheet, args.cell, args.value)
         
+        elif args.command == 'update-range':
+            editor.update_range(args.sheet, args.cell, _read_range_file(args.data_file))
+        
+        elif args.command == 'set-format':
+            editor.set_cell_format(
+                args.sheet, args.cell, args.bold, args.font_size, args.bg_color, args.align,
+                args.number_format, args.style
+            )
+        
+        elif args.command == 'set-formula':
+            editor.set_formula(args.sheet, args.cell, args.formula)
+        
         elif args.command == 'add-row':
             editor.add_row(args.sheet, args.data, args.position)
         
         elif args.command == 'delete-row':
             editor.delete_row(args.sheet, args.row)
         
+        elif args.command == 'delete-rows':
+            editor.delete_rows_where(args.sheet, _parse_row_spec(args.rows))
+        
+        elif args.command == 'insert-rows':
+            editor.insert_rows_bulk(args.sheet, args.position, _read_range_file(args.data_file))
+        
+        elif args.command == 'calc':
+            editor.recalculate(write_values=args.write)
+            if args.sheet:
+                for cell_ref in args.cells:
+                    value = editor.get_calculated_value(args.sheet, cell_ref)
+                    print(f"  {args.sheet}!{cell_ref} = {value}")
+            if not args.write:
+                return
+        
         elif args.command == 'find':
-            editor.find_cells(args.text, args.sheet)
+            editor.find_cells(args.text, args.sheet, args.limit, args.offset, args.values)
+            return
+        
+        elif args.command == 'profile':
+            editor.profile_sheet(
+                args.sheet, args.top, not args.no_header, args.json, not args.no_cache
+            )
+            return
+        
+        elif args.command == 'query':
+            result = editor.query(
+                args.sheet, args.where, args.select, args.order_by, args.limit, args.offset,
+                not args.no_header, args.into, args.json
+            )
+            if result is None or not args.into:
+                return
+        
+        elif args.command == 'join':
+            result = editor.join(
+                args.sheet, args.key, args.lookup_sheet, args.lookup_key, args.columns,
+                args.lookup_file, args.target_column, not args.no_header
+            )
+            if result is None:
+                return
+        
+        elif args.command == 'aggregate':
+            result = editor.aggregate(
+                args.sheet, args.group_by, args.agg, args.where, not args.no_header,
+                args.into, args.json, args.max_groups
+            )
+            if result is None or not args.into:
+                return
+        
+        elif args.command == 'sort':
+            result = editor.sort_sheet(
+                args.sheet, args.keys, not args.no_header, args.keep_row_styles,
+                args.memory_mb * 1024 * 1024
+            )
+            if result is None:
+                return
+        
+        elif args.command == 'dedupe':
+            result = editor.dedupe(args.sheet, args.columns, args.keep, not args.no_header)
+            if result is None or not result['removed']:
+                return
+        
+        elif args.command == 'export':
+            editor.export_sheet(
+                args.sheet, args.data_file, args.format, not args.no_header, args.batch_rows, args.delimiter
+            )
+            return
+        
+        elif args.command == 'import':
+            result = editor.import_sheet(
+                args.data_file, args.sheet, args.format, args.infer_types, not args.no_header,
+                args.batch_rows, args.delimiter
+            )
+            if result is None:
+                return
+        
+        elif args.command == 'index':
+            editor.create_index(args.sheet, args.column, args.kind, not args.no_header)
+            return
+        
+        elif args.command == 'compact':
+            editor.save(args.output, compact=True, measure_load=args.measure)
             return
         
         # 儲存
-        editor.save(args.output)
+        editor.save(args.output, compact=args.compact)
         
     except Exception as e:
         print(f"{ERROR_SYMBOL} 操作失敗: {e}")
@@ -0,0 +1,1476 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Formula Engine
+在本機計算 Excel 公式，不需要開啟 Excel
+
+公式解析為語法樹後編譯成 Python 閉包；依儲存格參照建立相依圖，
+修改輸入後只重新計算受影響的公式。
+"""
+
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Callable, Set
+import re
+import math
+import datetime
+from decimal import Decimal, ROUND_HALF_UP, ROUND_UP, ROUND_DOWN
+from collections import defaultdict
+
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.datetime import to_excel, from_excel
+
+# 工作表大小上限（整欄、整列參照的範圍）
+MAX_SHEET_ROWS = 1048576
+MAX_SHEET_COLS = 16384
+
+# 跨越這麼多列以上的範圍不按列建立索引，改放在整張工作表的索引中
+WIDE_RANGE_COLUMNS = 64
+
+ERROR_CODES = ('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A')
+
+
+class FormulaError(Exception):
+    """Excel 錯誤值（如 #DIV/0!、#N/A）；計算中以例外傳遞，結果中作為儲存格的值"""
+
+    def __init__(self, code: str) -> None:
+        super().__init__(code)
+        self.code = code
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, FormulaError) and other.code == self.code
+
+    def __hash__(self) -> int:
+        return hash(self.code)
+
+    def __str__(self) -> str:
+        return self.code
+
+    def __repr__(self) -> str:
+        return f"FormulaError({self.code!r})"
+
+
+# 公式詞法單元（公式字串不含開頭的 "="）
+_TOKEN = re.compile(
+    r"\s+"
+    r'|(?P<str>"(?:[^"]|"")*")'
+    r'|(?P<err>#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A))'
+    r"|(?P<ref>(?:(?:'(?:[^']|'')+'|[^\W\d][\w.]*)!)?"
+    r'(?:\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?'
+    r'|\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}|\$?\d+:\$?\d+))(?![\w(!])'
+    r'|(?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)'
+    r'|(?P<func>[^\W\d][\w.]*)\s*\('
+    r'|(?P<name>[^\W\d][\w.]*)'
+    r'|(?P<op><>|<=|>=|[-+*/^&=<>%])'
+    r'|(?P<lparen>\()|(?P<rparen>\))|(?P<sep>,)'
+)
+
+# 運算子優先順序（數字越大越先計算）；Excel 的負號優先於 ^
+_BINARY_PRECEDENCE = {
+    '=': 10, '<>': 10, '<': 10, '>': 10, '<=': 10, '>=': 10,
+    '&': 20,
+    '+': 30, '-': 30,
+    '*': 40, '/': 40,
+    '^': 50,
+}
+_PREFIX_PRECEDENCE = 60
+_PERCENT_PRECEDENCE = 70
+
+
+def tokenize(formula: str) -> List[Tuple[str, str]]:
+    """將公式拆為詞法單元
+
+    Args:
+        formula: 公式（可含開頭的 "="）
+
+    Returns:
+        List[Tuple[str, str]]: [(類型, 文字)]
+
+    Raises:
+        ValueError: 公式含無法辨識的字元時
+    """
+    text = formula[1:] if formula.startswith('=') else formula
+    tokens = []
+    position = 0
+    for match in _TOKEN.finditer(text):
+        if match.start() != position:
+            break
+        position = match.end()
+        kind = match.lastgroup
+        if kind:
+            tokens.append((kind, match.group(kind)))
+    if position != len(text):
+        raise ValueError(f"無法解析公式: {formula}")
+    return tokens
+
+
+class _Parser:
+    """以運算子優先順序解析詞法單元為語法樹（tuple）"""
+
+    def __init__(self, tokens: List[Tuple[str, str]], formula: str) -> None:
+        self.tokens = tokens
+        self.formula = formula
+        self.position = 0
+
+    def parse(self) -> tuple:
+        if not self.tokens:
+            raise ValueError(f"空白公式: {self.formula}")
+        node = self.expression(0)
+        if self.position != len(self.tokens):
+            raise ValueError(f"無法解析公式: {self.formula}")
+        return node
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def next(self) -> Tuple[str, str]:
+        if self.position >= len(self.tokens):
+            raise ValueError(f"公式不完整: {self.formula}")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expression(self, precedence: int) -> tuple:
+        left = self.prefix()
+        while True:
+            kind, text = self.peek()
+            if kind != 'op':
+                return left
+            if text == '%':
+                if _PERCENT_PRECEDENCE <= precedence:
+                    return left
+                self.position += 1
+                left = ('percent', left)
+                continue
+            operator_precedence = _BINARY_PRECEDENCE[text]
+            if operator_precedence <= precedence:
+                return left
+            self.position += 1
+            left = ('binary', text, left, self.expression(operator_precedence))
+
+    def prefix(self) -> tuple:
+        kind, text = self.next()
+        if kind == 'num':
+            value = float(text)
+            return ('value', int(value) if value.is_integer() and 'e' not in text.lower() else value)
+        if kind == 'str':
+            return ('value', text[1:-1].replace('""', '"'))
+        if kind == 'err':
+            return ('value', FormulaError(text))
+        if kind == 'ref':
+            return ('ref', text)
+        if kind == 'name':
+            upper = text.upper()
+            if upper in ('TRUE', 'FALSE'):
+                return ('value', upper == 'TRUE')
+            # 不支援已定義名稱
+            return ('value', FormulaError('#NAME?'))
+        if kind == 'func':
+            return ('call', text.upper(), self.arguments())
+        if kind == 'lparen':
+            node = self.expression(0)
+            if self.next()[0] != 'rparen':
+                raise ValueError(f"括號不成對: {self.formula}")
+            return node
+        if kind == 'op' and text in ('-', '+'):
+            operand = self.expression(_PREFIX_PRECEDENCE)
+            return ('negate', operand) if text == '-' else operand
+        raise ValueError(f"無法解析公式: {self.formula}")
+
+    def arguments(self) -> List[tuple]:
+        arguments = []
+        if self.peek()[0] == 'rparen':
+            self.position += 1
+            return arguments
+        while True:
+            if self.peek()[0] in ('sep', 'rparen'):
+                # 省略的參數（如 IF(A1,,1)）
+                arguments.append(('value', None))
+            else:
+                arguments.append(self.expression(0))
+            kind, _ = self.next()
+            if kind == 'rparen':
+                return arguments
+            if kind != 'sep':
+                raise ValueError(f"函數參數錯誤: {self.formula}")
+
+
+def parse_formula(formula: str) -> tuple:
+    """解析公式為語法樹
+
+    Raises:
+        ValueError: 公式語法錯誤時
+    """
+    return _Parser(tokenize(formula), formula).parse()
+
+
+class CellRange:
+    """公式中的範圍參照在計算時的值"""
+
+    __slots__ = ('values', 'sheet', 'min_row', 'min_col', 'max_row', 'max_col')
+
+    def __init__(self, values: Dict, sheet: str, min_row: int, min_col: int, max_row: int, max_col: int) -> None:
+        self.values = values
+        self.sheet = sheet
+        self.min_row, self.min_col = min_row, min_col
+        self.max_row, self.max_col = max_row, max_col
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.max_row - self.min_row + 1, self.max_col - self.min_col + 1
+
+    def rows(self) -> List[List[Any]]:
+        get, sheet = self.values.get, self.sheet
+        return [
+            [get((sheet, row, col)) for col in range(self.min_col, self.max_col + 1)]
+            for row in range(self.min_row, self.max_row + 1)
+        ]
+
+    def __iter__(self) -> Iterator[Any]:
+        get, sheet = self.values.get, self.sheet
+        columns = range(self.min_col, self.max_col + 1)
+        for row in range(self.min_row, self.max_row + 1):
+            for col in columns:
+                yield get((sheet, row, col))
+
+    def cell(self, row: int, col: int) -> Any:
+        """範圍內第 row 行、第 col 列（從 1 開始）的值"""
+        return self.values.get((self.sheet, self.min_row + row - 1, self.min_col + col - 1))
+
+    def line(self) -> List[Any]:
+        """一維範圍（單行或單列）的值"""
+        if self.min_row == self.max_row:
+            return [self.cell(1, col) for col in range(1, self.max_col - self.min_col + 2)]
+        if self.min_col == self.max_col:
+            return [self.cell(row, 1) for row in range(1, self.max_row - self.min_row + 2)]
+        raise FormulaError('#N/A')
+
+
+class _Formula:
+    """已編譯的公式與其參照"""
+
+    __slots__ = ('text', 'function', 'cells', 'ranges', 'volatile')
+
+    def __init__(self, text, function, cells, ranges, volatile):
+        self.text = text
+        self.function = function
+        self.cells = cells
+        self.ranges = ranges
+        self.volatile = volatile
+
+
+class FormulaEngine:
+    """Excel 公式計算引擎
+
+    儲存格以 (工作表名稱, 行, 列) 為鍵。公式以 "=" 開頭的字串設定；
+    recalculate() 只計算自上次計算後受修改影響的公式。
+    """
+
+    def __init__(self, workbook=None) -> None:
+        """初始化計算引擎
+
+        Args:
+            workbook: openpyxl 工作簿，None 表示空白
+        """
+        self.values: Dict[Tuple[str, int, int], Any] = {}
+        self.unsupported: List[Tuple[str, int, int]] = []
+        self._formulas: Dict[Tuple[str, int, int], _Formula] = {}
+        self._sheets: Dict[str, str] = {}                # 小寫名稱 -> 名稱
+        self._extent: Dict[str, List[int]] = {}          # 名稱 -> [最大行, 最大列]
+        self._cell_dependents: Dict[Tuple[str, int, int], Set] = defaultdict(set)
+        self._range_dependents: Dict[Tuple[str, Optional[int]], Dict] = defaultdict(dict)
+        self._dirty: Set[Tuple[str, int, int]] = set()
+        self._volatile: Set[Tuple[str, int, int]] = set()
+        if workbook is not None:
+            self.load_workbook(workbook)
+
+    def load_workbook(self, workbook) -> None:
+        """載入 openpyxl 工作簿的所有值與公式（之後需呼叫 recalculate()）"""
+        # 先登記所有工作表，公式才能參照排在後面的工作表
+        for ws in workbook.worksheets:
+            self.add_sheet(ws.title)
+        for ws in workbook.worksheets:
+            for (row, col), cell in ws._cells.items():
+                value = cell.value
+                if value is None:
+                    continue
+                if cell.data_type == 'f' and not isinstance(value, str):
+                    # 陣列公式、運算列表不支援
+                    self.unsupported.append((ws.title, row, col))
+                    continue
+                self._set(ws.title, row, col, value)
+
+    def add_sheet(self, sheet_name: str) -> None:
+        """登記工作表（公式中指向不存在的工作表時為 #REF!）"""
+        self._sheets[sheet_name.lower()] = sheet_name
+        self._extent.setdefault(sheet_name, [0, 0])
+
+    def set_value(self, sheet_name: str, cell_ref: str, value: Any) -> None:
+        """設定儲存格的值或公式（"=" 開頭的字串）
+
+        Raises:
+            ValueError: 儲存格參照或公式語法錯誤時
+        """
+        row, col = _parse_cell(cell_ref)
+        if sheet_name.lower() not in self._sheets:
+            self.add_sheet(sheet_name)
+        self._set(self._sheets[sheet_name.lower()], row, col, value)
+
+    def set_cell(self, sheet_name: str, row: int, col: int, value: Any) -> None:
+        """以行列號設定儲存格（批次寫入用）"""
+        if sheet_name.lower() not in self._sheets:
+            self.add_sheet(sheet_name)
+        self._set(self._sheets[sheet_name.lower()], row, col, value)
+
+    def get_value(self, sheet_name: str, cell_ref: str) -> Any:
+        """取得儲存格的值（公式為計算結果，錯誤為 FormulaError）"""
+        row, col = _parse_cell(cell_ref)
+        sheet = self._sheets.get(sheet_name.lower(), sheet_name)
+        return self.values.get((sheet, row, col))
+
+    def get_formula(self, sheet_name: str, cell_ref: str) -> Optional[str]:
+        """取得儲存格的公式，非公式儲存格為 None"""
+        row, col = _parse_cell(cell_ref)
+        formula = self._formulas.get((self._sheets.get(sheet_name.lower(), sheet_name), row, col))
+        return formula.text if formula else None
+
+    def evaluate(self, formula: str, sheet_name: str) -> Any:
+        """在指定工作表的環境下計算公式，不寫入任何儲存格"""
+        compiled = self._compile(formula, self._sheets.get(sheet_name.lower(), sheet_name))
+        return self._run(compiled.function)
+
+    @property
+    def dirty(self) -> int:
+        """等待重新計算的修改數"""
+        return len(self._dirty)
+
+    def formula_values(self) -> Dict[str, Dict[Tuple[int, int], Any]]:
+        """所有公式儲存格的計算結果
+
+        Returns:
+            Dict[str, Dict[Tuple[int, int], Any]]: {工作表名稱: {(行, 列): 值}}
+        """
+        results: Dict[str, Dict[Tuple[int, int], Any]] = defaultdict(dict)
+        for sheet, row, col in self._formulas:
+            results[sheet][(row, col)] = self.values.get((sheet, row, col))
+        return dict(results)
+
+    def recalculate(self, full: bool = False) -> int:
+        """重新計算公式
+
+        從修改過的儲存格沿相依圖找出受影響的公式，依拓樸順序計算；
+        循環參照中的公式結果為 0（與 Excel 相同）。
+
+        Args:
+            full: 重新計算所有公式
+
+        Returns:
+            int: 計算的公式數
+        """
+        if full:
+            self._dirty.update(self._formulas)
+        pending = list(self._dirty | self._volatile)
+        self._dirty.clear()
+
+        # 受影響的子圖：每條邊都從已找到的節點出發
+        seen = set(pending)
+        edges: Dict[Tuple[str, int, int], Set] = {}
+        indegree: Dict[Tuple[str, int, int], int] = defaultdict(int)
+        while pending:
+            key = pending.pop()
+            dependents = self._dependents(key)
+            edges[key] = dependents
+            for dependent in dependents:
+                indegree[dependent] += 1
+                if dependent not in seen:
+                    seen.add(dependent)
+                    pending.append(dependent)
+
+        ready = [key for key in seen if not indegree[key]]
+        evaluated = 0
+        formulas, values = self._formulas, self.values
+        while ready:
+            key = ready.pop()
+            formula = formulas.get(key)
+            if formula is not None:
+                values[key] = self._run(formula.function)
+                evaluated += 1
+            for dependent in edges[key]:
+                indegree[dependent] -= 1
+                if not indegree[dependent]:
+                    ready.append(dependent)
+
+        for key in seen:
+            if indegree[key] and key in formulas:
+                values[key] = 0
+                evaluated += 1
+        return evaluated
+
+    # ---- 內部實作 ----
+
+    def _set(self, sheet: str, row: int, col: int, value: Any) -> None:
+        key = (sheet, row, col)
+        extent = self._extent[sheet]
+        if row > extent[0]:
+            extent[0] = row
+        if col > extent[1]:
+            extent[1] = col
+
+        old = self._formulas.pop(key, None)
+        if old is not None:
+            self._unlink(key, old)
+
+        if isinstance(value, str) and value.startswith('=') and len(value) > 1:
+            try:
+                formula = self._compile(value, sheet)
+            except ValueError:
+                formula = _Formula(value, _constant(FormulaError('#NAME?')), [], [], False)
+            self._formulas[key] = formula
+            self._link(key, formula)
+            self.values.pop(key, None)
+        elif value is None:
+            self.values.pop(key, None)
+        else:
+            self.values[key] = _cell_value(value)
+        self._dirty.add(key)
+
+    def _link(self, key, formula: _Formula) -> None:
+        for cell in formula.cells:
+            self._cell_dependents[cell].add(key)
+        for sheet, min_row, min_col, max_row, max_col in formula.ranges:
+            for bucket in self._range_buckets(sheet, min_col, max_col):
+                self._range_dependents[bucket].setdefault(key, []).append(
+                    (min_row, min_col, max_row, max_col)
+                )
+        if formula.volatile:
+            self._volatile.add(key)
+
+    def _unlink(self, key, formula: _Formula) -> None:
+        for cell in formula.cells:
+            self._cell_dependents[cell].discard(key)
+        for sheet, _, min_col, _, max_col in formula.ranges:
+            for bucket in self._range_buckets(sheet, min_col, max_col):
+                self._range_dependents[bucket].pop(key, None)
+        self._volatile.discard(key)
+
+    @staticmethod
+    def _range_buckets(sheet: str, min_col: int, max_col: int) -> List[Tuple[str, Optional[int]]]:
+        if max_col - min_col >= WIDE_RANGE_COLUMNS:
+            return [(sheet, None)]
+        return [(sheet, col) for col in range(min_col, max_col + 1)]
+
+    def _dependents(self, key: Tuple[str, int, int]) -> Set:
+        sheet, row, col = key
+        dependents = set(self._cell_dependents.get(key, ()))
+        for bucket in ((sheet, col), (sheet, None)):
+            for dependent, ranges in self._range_dependents.get(bucket, {}).items():
+                for min_row, min_col, max_row, max_col in ranges:
+                    if min_row <= row <= max_row and min_col <= col <= max_col:
+                        dependents.add(dependent)
+                        break
+        return dependents
+
+    def _run(self, function: Callable[[], Any]) -> Any:
+        try:
+            value = function()
+            if isinstance(value, CellRange):
+                value = _scalar(value)
+        except FormulaError as e:
+            return e
+        except (ValueError, TypeError, OverflowError):
+            return FormulaError('#VALUE!')
+        except (ZeroDivisionError,):
+            return FormulaError('#DIV/0!')
+        if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+            return FormulaError('#NUM!')
+        return value
+
+    def _compile(self, text: str, sheet: str) -> _Formula:
+        tree = parse_formula(text)
+        cells, ranges = [], []
+        volatile = [False]
+        function = self._compile_node(tree, sheet, cells, ranges, volatile)
+        return _Formula(text, function, cells, ranges, volatile[0])
+
+    def _compile_node(self, node: tuple, sheet: str, cells: list, ranges: list, volatile: list) -> Callable:
+        kind = node[0]
+        if kind == 'value':
+            return _constant(node[1])
+
+        if kind == 'ref':
+            return self._compile_reference(node[1], sheet, cells, ranges)
+
+        compile_child = lambda child: self._compile_node(child, sheet, cells, ranges, volatile)
+
+        if kind == 'negate':
+            operand = compile_child(node[1])
+            return lambda: -_number(_scalar(operand()))
+
+        if kind == 'percent':
+            operand = compile_child(node[1])
+            return lambda: _number(_scalar(operand())) / 100
+
+        if kind == 'binary':
+            operator = _OPERATORS[node[1]]
+            left, right = compile_child(node[2]), compile_child(node[3])
+            return lambda: operator(_scalar(left()), _scalar(right()))
+
+        # 函數參數中的單一儲存格視為參照（如 SUM(A1) 忽略文字）
+        name = node[1]
+        arguments = [
+            self._compile_reference(child[1], sheet, cells, ranges, as_range=True)
+            if child[0] == 'ref' else compile_child(child)
+            for child in node[2]
+        ]
+        if name in _VOLATILE_FUNCTIONS:
+            volatile[0] = True
+        special = _LAZY_FUNCTIONS.get(name)
+        if special is not None:
+            return lambda: special(arguments)
+        function = _FUNCTIONS.get(name)
+        if function is None:
+            return _constant(FormulaError('#NAME?'))
+        return lambda: function(*[argument() for argument in arguments])
+
+    def _compile_reference(
+        self,
+        text: str,
+        sheet: str,
+        cells: list,
+        ranges: list,
+        as_range: bool = False
+    ) -> Callable:
+        if '!' in text:
+            prefix, text = text.rsplit('!', 1)
+            name = prefix[1:-1].replace("''", "'") if prefix.startswith("'") else prefix
+            target = self._sheets.get(name.lower())
+            if target is None:
+                return _constant(FormulaError('#REF!'))
+        else:
+            target = sheet
+
+        min_col, min_row, max_col, max_row = _boundaries(text)
+        values = self.values
+        if ':' not in text:
+            key = (target, min_row, min_col)
+            cells.append(key)
+            if as_range:
+                return lambda: CellRange(values, target, min_row, min_col, min_row, min_col)
+
+            def read_cell():
+                value = values.get(key)
+                if isinstance(value, FormulaError):
+                    raise FormulaError(value.code)
+                return value
+            return read_cell
+
+        # 整欄（A:A）或整列（1:3）參照以工作表目前的範圍為界
+        extent = self._extent.setdefault(target, [0, 0])
+        open_rows, open_cols = min_row is None, min_col is None
+        min_row, max_row = min_row or 1, max_row or MAX_SHEET_ROWS
+        min_col, max_col = min_col or 1, max_col or MAX_SHEET_COLS
+        ranges.append((target, min_row, min_col, max_row, max_col))
+
+        def read_range():
+            last_row = min(max_row, extent[0]) if open_rows else max_row
+            last_col = min(max_col, extent[1]) if open_cols else max_col
+            return CellRange(values, target, min_row, min_col, last_row, last_col)
+        return read_range
+
+
+def _parse_cell(cell_ref: str) -> Tuple[int, int]:
+    """解析儲存格參照為 (行, 列)"""
+    bounds = _boundaries(cell_ref) if _REFERENCE.fullmatch(cell_ref) else None
+    if bounds is None:
+        raise ValueError(f"無效的儲存格參照: {cell_ref}")
+    min_col, min_row, max_col, max_row = bounds
+    if min_row is None or min_col is None or (min_row, min_col) != (max_row, max_col):
+        raise ValueError(f"無效的儲存格參照: {cell_ref}")
+    return min_row, min_col
+
+
+def _boundaries(text: str) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]:
+    """解析參照（A1、A1:B2、A:C、1:3）為 (最小列, 最小行, 最大列, 最大行)
+
+    比 openpyxl 的 range_boundaries 快，公式大量載入時使用；整欄或整列的缺少部分為 None。
+    """
+    first_col, first_row, last_col, last_row = _REFERENCE.fullmatch(text).groups()
+    if last_col is None and last_row is None:
+        last_col, last_row = first_col, first_row
+    min_col, max_col = _column_index(first_col), _column_index(last_col)
+    min_row = int(first_row) if first_row else None
+    max_row = int(last_row) if last_row else None
+    if min_col is not None and max_col is not None and min_col > max_col:
+        min_col, max_col = max_col, min_col
+    if min_row is not None and max_row is not None and min_row > max_row:
+        min_row, max_row = max_row, min_row
+    return min_col, min_row, max_col, max_row
+
+
+_REFERENCE = re.compile(r'\$?([A-Za-z]{1,3})?\$?(\d+)?(?::\$?([A-Za-z]{1,3})?\$?(\d+)?)?')
+_COLUMN_INDEX: Dict[str, int] = {}
+
+
+def _column_index(letters: Optional[str]) -> Optional[int]:
+    if letters is None:
+        return None
+    index = _COLUMN_INDEX.get(letters)
+    if index is None:
+        index = _COLUMN_INDEX[letters] = column_index_from_string(letters.upper())
+    return index
+
+
+def _constant(value: Any) -> Callable[[], Any]:
+    if isinstance(value, FormulaError):
+        code = value.code
+
+        def error():
+            raise FormulaError(code)
+        return error
+    return lambda: value
+
+
+def _cell_value(value: Any) -> Any:
+    """轉換儲存格值為計算用的值（日期時間轉為序列值）"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+        return to_excel(value)
+    if isinstance(value, str) and value in ERROR_CODES:
+        return FormulaError(value)
+    if isinstance(value, (bool, int, float, str, FormulaError)):
+        return value
+    return str(value)
+
+
+# ---- 型別轉換 ----
+
+def _scalar(value: Any) -> Any:
+    """範圍在需要單一值的地方只允許單一儲存格"""
+    if isinstance(value, CellRange):
+        if value.shape != (1, 1):
+            raise FormulaError('#VALUE!')
+        value = value.cell(1, 1)
+    if isinstance(value, FormulaError):
+        raise FormulaError(value.code)
+    return value
+
+
+def _number(value: Any) -> Any:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            raise FormulaError('#VALUE!')
+        return int(number) if number.is_integer() and '.' not in value and 'e' not in value.lower() else number
+    if isinstance(value, FormulaError):
+        raise FormulaError(value.code)
+    raise FormulaError('#VALUE!')
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return f'{value:.15g}'
+    if isinstance(value, FormulaError):
+        raise FormulaError(value.code)
+    return str(value)
+
+
+def _boolean(value: Any) -> bool:
+    if isinstance(value, str):
+        upper = value.upper()
+        if upper in ('TRUE', 'FALSE'):
+            return upper == 'TRUE'
+        raise FormulaError('#VALUE!')
+    return bool(_number(value))
+
+
+def _integer(value: Any) -> int:
+    return int(math.floor(_number(_scalar(value))))
+
+
+_TYPE_RANK = {bool: 2, str: 1}
+
+
+def _compare(left: Any, right: Any) -> int:
+    """Excel 比較：數字 < 文字 < 邏輯值，文字不分大小寫，空白視為對方型別的空值"""
+    if left is None:
+        left = '' if isinstance(right, str) else False if isinstance(right, bool) else 0
+    if right is None:
+        right = '' if isinstance(left, str) else False if isinstance(left, bool) else 0
+    left_rank, right_rank = _TYPE_RANK.get(type(left), 0), _TYPE_RANK.get(type(right), 0)
+    if left_rank != right_rank:
+        return -1 if left_rank < right_rank else 1
+    if left_rank == 1:
+        left, right = left.lower(), right.lower()
+    return (left > right) - (left < right)
+
+
+def _divide(left: Any, right: Any) -> Any:
+    divisor = _number(right)
+    if divisor == 0:
+        raise FormulaError('#DIV/0!')
+    return _number(left) / divisor
+
+
+def _power(left: Any, right: Any) -> Any:
+    base, exponent = _number(left), _number(right)
+    if base == 0 and exponent < 0:
+        raise FormulaError('#DIV/0!')
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise FormulaError('#NUM!')
+    return result
+
+
+_OPERATORS = {
+    '+': lambda a, b: _number(a) + _number(b),
+    '-': lambda a, b: _number(a) - _number(b),
+    '*': lambda a, b: _number(a) * _number(b),
+    '/': _divide,
+    '^': _power,
+    '&': lambda a, b: _text(a) + _text(b),
+    '=': lambda a, b: _compare(a, b) == 0,
+    '<>': lambda a, b: _compare(a, b) != 0,
+    '<': lambda a, b: _compare(a, b) < 0,
+    '>': lambda a, b: _compare(a, b) > 0,
+    '<=': lambda a, b: _compare(a, b) <= 0,
+    '>=': lambda a, b: _compare(a, b) >= 0,
+}
+
+
+# ---- 函數 ----
+
+def _iter_numbers(arguments: tuple) -> Iterator[Any]:
+    """數值彙總函數的參數：範圍中只取數字，直接參數會轉換型別"""
+    for argument in arguments:
+        if isinstance(argument, CellRange):
+            for value in argument:
+                if isinstance(value, FormulaError):
+                    raise FormulaError(value.code)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield value
+        elif argument is not None:
+            yield _number(argument)
+
+
+def _flatten(arguments: tuple) -> Iterator[Any]:
+    for argument in arguments:
+        if isinstance(argument, CellRange):
+            yield from argument
+        else:
+            yield argument
+
+
+def _sum(*arguments):
+    return sum(_iter_numbers(arguments))
+
+
+def _average(*arguments):
+    numbers = list(_iter_numbers(arguments))
+    if not numbers:
+        raise FormulaError('#DIV/0!')
+    return sum(numbers) / len(numbers)
+
+
+def _min(*arguments):
+    return min(_iter_numbers(arguments), default=0)
+
+
+def _max(*arguments):
+    return max(_iter_numbers(arguments), default=0)
+
+
+def _product(*arguments):
+    result = 1
+    for number in _iter_numbers(arguments):
+        result *= number
+    return result
+
+
+def _count(*arguments):
+    count = 0
+    for value in _flatten(arguments):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            count += 1
+    return count
+
+
+def _counta(*arguments):
+    return sum(1 for value in _flatten(arguments) if value is not None)
+
+
+def _countblank(cells):
+    return sum(1 for value in cells if value is None or value == '')
+
+
+def _sumproduct(*arguments):
+    arrays = [argument if isinstance(argument, CellRange) else None for argument in arguments]
+    if None in arrays:
+        raise FormulaError('#VALUE!')
+    if len({array.shape for array in arrays}) != 1:
+        raise FormulaError('#VALUE!')
+    total = 0
+    for values in zip(*arrays):
+        product = 1
+        for value in values:
+            if isinstance(value, FormulaError):
+                raise FormulaError(value.code)
+            product *= value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+        total += product
+    return total
+
+
+def _criteria(criteria: Any) -> Callable[[Any], bool]:
+    """COUNTIF/SUMIF 類函數的條件（如 ">5"、"<>完成"、"A*"）"""
+    criteria = _scalar(criteria)
+    if not isinstance(criteria, str):
+        return lambda value: value is not None and not isinstance(value, str) and _compare(value, criteria) == 0
+
+    for operator in ('<>', '<=', '>=', '=', '<', '>'):
+        if criteria.startswith(operator):
+            operand = criteria[len(operator):]
+            break
+    else:
+        operator, operand = '=', criteria
+
+    try:
+        target: Any = float(operand)
+    except ValueError:
+        target = operand
+
+    if isinstance(target, str) and operator in ('=', '<>') and any(ch in target for ch in '*?'):
+        pattern = re.compile(
+            ''.join('.*' if ch == '*' else '.' if ch == '?' else re.escape(ch) for ch in target),
+            re.IGNORECASE | re.DOTALL
+        )
+        matches = lambda value: isinstance(value, str) and pattern.fullmatch(value) is not None
+        return matches if operator == '=' else (lambda value: not matches(value))
+
+    if operand == '':
+        if operator == '=':
+            return lambda value: value is None or value == ''
+        if operator == '<>':
+            return lambda value: value is not None and value != ''
+
+    compare = _OPERATORS[operator]
+    numeric = isinstance(target, float)
+
+    def matches(value):
+        if isinstance(value, FormulaError) or value is None:
+            return operator == '<>'
+        if numeric != (isinstance(value, (int, float)) and not isinstance(value, bool)):
+            return operator == '<>'
+        return compare(value, target)
+    return matches
+
+
+def _criteria_ranges(arguments: tuple) -> Tuple[List[Tuple[CellRange, Callable]], Tuple[int, int]]:
+    pairs = []
+    for index in range(0, len(arguments), 2):
+        cells = arguments[index]
+        if not isinstance(cells, CellRange):
+            raise FormulaError('#VALUE!')
+        pairs.append((cells, _criteria(arguments[index + 1])))
+    shapes = {cells.shape for cells, _ in pairs}
+    if len(shapes) != 1:
+        raise FormulaError('#VALUE!')
+    return pairs, shapes.pop()
+
+
+def _matching_positions(arguments: tuple) -> Iterator[int]:
+    if not arguments or len(arguments) % 2:
+        raise FormulaError('#VALUE!')
+    pairs, _ = _criteria_ranges(arguments)
+    columns = [list(cells) for cells, _ in pairs]
+    tests = [test for _, test in pairs]
+    for index, values in enumerate(zip(*columns)):
+        if all(test(value) for test, value in zip(tests, values)):
+            yield index
+
+
+def _sum_at(cells: CellRange, positions: Iterator[int]) -> Any:
+    values = list(cells)
+    total = 0
+    for index in positions:
+        if index < len(values):
+            value = values[index]
+            if isinstance(value, FormulaError):
+                raise FormulaError(value.code)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                total += value
+    return total
+
+
+def _countif(cells, criteria):
+    return sum(1 for _ in _matching_positions((cells, criteria)))
+
+
+def _countifs(*arguments):
+    return sum(1 for _ in _matching_positions(arguments))
+
+
+def _sumif(cells, criteria, sum_cells=None):
+    return _sum_at(sum_cells if sum_cells is not None else cells, _matching_positions((cells, criteria)))
+
+
+def _sumifs(sum_cells, *arguments):
+    return _sum_at(sum_cells, _matching_positions(arguments))
+
+
+def _averageif(cells, criteria, average_cells=None):
+    positions = list(_matching_positions((cells, criteria)))
+    values = list(average_cells if average_cells is not None else cells)
+    numbers = [
+        values[index] for index in positions
+        if index < len(values) and isinstance(values[index], (int, float)) and not isinstance(values[index], bool)
+    ]
+    if not numbers:
+        raise FormulaError('#DIV/0!')
+    return sum(numbers) / len(numbers)
+
+
+def _round_decimal(value, digits, rounding):
+    number = _number(_scalar(value))
+    digits = _integer(digits)
+    quantum = Decimal(1).scaleb(-digits)
+    result = float(Decimal(repr(float(number))).quantize(quantum, rounding=rounding))
+    return int(result) if digits <= 0 else result
+
+
+def _round(value, digits=0):
+    return _round_decimal(value, digits, ROUND_HALF_UP)
+
+
+def _roundup(value, digits=0):
+    return _round_decimal(value, digits, ROUND_UP)
+
+
+def _rounddown(value, digits=0):
+    return _round_decimal(value, digits, ROUND_DOWN)
+
+
+def _mod(number, divisor):
+    divisor = _number(_scalar(divisor))
+    if divisor == 0:
+        raise FormulaError('#DIV/0!')
+    return _number(_scalar(number)) % divisor
+
+
+def _sqrt(value):
+    number = _number(_scalar(value))
+    if number < 0:
+        raise FormulaError('#NUM!')
+    return math.sqrt(number)
+
+
+def _and(*arguments):
+    values = [value for value in _flatten(arguments) if value is not None and not (
+        isinstance(value, str) and value.upper() not in ('TRUE', 'FALSE'))]
+    if not values:
+        raise FormulaError('#VALUE!')
+    return all(_boolean(value) for value in values)
+
+
+def _or(*arguments):
+    values = [value for value in _flatten(arguments) if value is not None and not (
+        isinstance(value, str) and value.upper() not in ('TRUE', 'FALSE'))]
+    if not values:
+        raise FormulaError('#VALUE!')
+    return any(_boolean(value) for value in values)
+
+
+def _if(arguments):
+    if len(arguments) not in (2, 3):
+        raise FormulaError('#VALUE!')
+    if _boolean(_scalar(arguments[0]())):
+        return arguments[1]()
+    return arguments[2]() if len(arguments) == 3 else False
+
+
+def _iferror(arguments, codes=None):
+    if len(arguments) != 2:
+        raise FormulaError('#VALUE!')
+    try:
+        return _scalar(arguments[0]())
+    except FormulaError as e:
+        if codes is not None and e.code not in codes:
+            raise
+        return arguments[1]()
+
+
+def _ifna(arguments):
+    return _iferror(arguments, ('#N/A',))
+
+
+def _choose(arguments):
+    if len(arguments) < 2:
+        raise FormulaError('#VALUE!')
+    index = _integer(arguments[0]())
+    if not 1 <= index < len(arguments):
+        raise FormulaError('#VALUE!')
+    return arguments[index]()
+
+
+def _is_error(arguments, codes=None):
+    if len(arguments) != 1:
+        raise FormulaError('#VALUE!')
+    try:
+        _scalar(arguments[0]())
+    except FormulaError as e:
+        return codes is None or e.code in codes
+    return False
+
+
+def _isna(arguments):
+    return _is_error(arguments, ('#N/A',))
+
+
+def _na():
+    raise FormulaError('#N/A')
+
+
+# 查詢函數
+
+def _values_equal(left: Any, right: Any) -> bool:
+    if isinstance(left, FormulaError) or isinstance(right, FormulaError):
+        return False
+    return _compare(left, right) == 0
+
+
+def _lookup_position(value: Any, candidates: List[Any], match_type: int) -> int:
+    """在一維值中找出位置（從 0 開始），match_type 與 MATCH 相同"""
+    value = _scalar(value)
+    if match_type == 0:
+        if isinstance(value, str) and any(ch in value for ch in '*?'):
+            test = _criteria('=' + value)
+            matches = (index for index, candidate in enumerate(candidates) if test(candidate))
+        else:
+            matches = (index for index, candidate in enumerate(candidates) if _values_equal(candidate, value))
+        position = next(matches, None)
+        if position is None:
+            raise FormulaError('#N/A')
+        return position
+
+    # 近似比對：資料已排序，以二分搜尋找出最後一個 <= value（或 >= value）的位置
+    low, high = 0, len(candidates)
+    direction = 1 if match_type > 0 else -1
+    while low < high:
+        middle = (low + high) // 2
+        candidate = candidates[middle]
+        if candidate is None or isinstance(candidate, FormulaError) or direction * _compare(candidate, value) <= 0:
+            low = middle + 1
+        else:
+            high = middle
+    if low == 0:
+        raise FormulaError('#N/A')
+    return low - 1
+
+
+def _vlookup(value, table, column, approximate=True):
+    if not isinstance(table, CellRange):
+        raise FormulaError('#VALUE!')
+    column = _integer(column)
+    rows, columns = table.shape
+    if not 1 <= column <= columns:
+        raise FormulaError('#REF!')
+    keys = [table.cell(row, 1) for row in range(1, rows + 1)]
+    position = _lookup_position(value, keys, 1 if _boolean(_scalar(approximate)) else 0)
+    return table.cell(position + 1, column)
+
+
+def _hlookup(value, table, row, approximate=True):
+    if not isinstance(table, CellRange):
+        raise FormulaError('#VALUE!')
+    row = _integer(row)
+    rows, columns = table.shape
+    if not 1 <= row <= rows:
+        raise FormulaError('#REF!')
+    keys = [table.cell(1, col) for col in range(1, columns + 1)]
+    position = _lookup_position(value, keys, 1 if _boolean(_scalar(approximate)) else 0)
+    return table.cell(row, position + 1)
+
+
+def _match(value, cells, match_type=1):
+    if not isinstance(cells, CellRange):
+        raise FormulaError('#N/A')
+    return _lookup_position(value, cells.line(), _integer(match_type)) + 1
+
+
+def _index(cells, row, column=None):
+    if not isinstance(cells, CellRange):
+        raise FormulaError('#VALUE!')
+    rows, columns = cells.shape
+    row = _integer(row)
+    column = 1 if column is None else _integer(column)
+    if rows == 1 and column == 1 and row > 1:
+        # 單行範圍只給一個索引時為欄位位置
+        row, column = 1, row
+    if not (1 <= row <= rows and 1 <= column <= columns):
+        raise FormulaError('#REF!')
+    return cells.cell(row, column)
+
+
+def _xlookup(value, lookup_cells, return_cells, if_not_found=None, match_mode=0, search_mode=1):
+    if not isinstance(lookup_cells, CellRange) or not isinstance(return_cells, CellRange):
+        raise FormulaError('#VALUE!')
+    keys = lookup_cells.line()
+    match_mode, search_mode = _integer(match_mode), _integer(search_mode)
+    indices = range(len(keys)) if search_mode >= 0 else range(len(keys) - 1, -1, -1)
+    value = _scalar(value)
+
+    position = None
+    if match_mode == 2:
+        test = _criteria('=' + _text(value))
+        position = next((index for index in indices if test(keys[index])), None)
+    elif match_mode == 0:
+        position = next((index for index in indices if _values_equal(keys[index], value)), None)
+    elif match_mode in (-1, 1):
+        best = None
+        for index in indices:
+            key = keys[index]
+            if key is None or isinstance(key, FormulaError):
+                continue
+            order = _compare(key, value)
+            if order == 0:
+                best = index
+                break
+            if order * match_mode > 0 and (best is None or match_mode * _compare(key, keys[best]) < 0):
+                best = index
+        position = best
+    else:
+        raise FormulaError('#VALUE!')
+
+    if position is None:
+        if if_not_found is not None:
+            return if_not_found
+        raise FormulaError('#N/A')
+
+    rows, columns = lookup_cells.shape
+    if columns == 1:
+        if return_cells.shape[0] != rows:
+            raise FormulaError('#VALUE!')
+        return return_cells.cell(position + 1, 1)
+    if return_cells.shape[1] != columns:
+        raise FormulaError('#VALUE!')
+    return return_cells.cell(1, position + 1)
+
+
+# 文字函數
+
+def _left(text, count=1):
+    count = _integer(count)
+    if count < 0:
+        raise FormulaError('#VALUE!')
+    return _text(_scalar(text))[:count]
+
+
+def _right(text, count=1):
+    count = _integer(count)
+    if count < 0:
+        raise FormulaError('#VALUE!')
+    text = _text(_scalar(text))
+    return text[len(text) - count:] if count else ''
+
+
+def _mid(text, start, count):
+    start, count = _integer(start), _integer(count)
+    if start < 1 or count < 0:
+        raise FormulaError('#VALUE!')
+    return _text(_scalar(text))[start - 1:start - 1 + count]
+
+
+def _substitute(text, old, new, instance=None):
+    text, old, new = _text(_scalar(text)), _text(_scalar(old)), _text(_scalar(new))
+    if not old:
+        return text
+    if instance is None:
+        return text.replace(old, new)
+    instance = _integer(instance)
+    if instance < 1:
+        raise FormulaError('#VALUE!')
+    position = -1
+    for _ in range(instance):
+        position = text.find(old, position + 1)
+        if position < 0:
+            return text
+    return text[:position] + new + text[position + len(old):]
+
+
+def _replace(text, start, count, new):
+    text = _text(_scalar(text))
+    start, count = _integer(start), _integer(count)
+    if start < 1 or count < 0:
+        raise FormulaError('#VALUE!')
+    return text[:start - 1] + _text(_scalar(new)) + text[start - 1 + count:]
+
+
+def _find(needle, text, start=1, ignore_case=False):
+    needle, text, start = _text(_scalar(needle)), _text(_scalar(text)), _integer(start)
+    if start < 1 or start > len(text) + 1:
+        raise FormulaError('#VALUE!')
+    if ignore_case:
+        needle, text = needle.lower(), text.lower()
+    position = text.find(needle, start - 1)
+    if position < 0:
+        raise FormulaError('#VALUE!')
+    return position + 1
+
+
+def _search(needle, text, start=1):
+    return _find(needle, text, start, ignore_case=True)
+
+
+def _concat(*arguments):
+    return ''.join(_text(value) for value in _flatten(arguments))
+
+
+def _concatenate(*arguments):
+    return ''.join(_text(_scalar(argument)) for argument in arguments)
+
+
+def _textjoin(delimiter, ignore_empty, *arguments):
+    delimiter, ignore_empty = _text(_scalar(delimiter)), _boolean(_scalar(ignore_empty))
+    texts = [_text(value) for value in _flatten(arguments)]
+    if ignore_empty:
+        texts = [text for text in texts if text]
+    return delimiter.join(texts)
+
+
+def _value(text):
+    text = _scalar(text)
+    if isinstance(text, str):
+        cleaned = text.strip().replace(',', '')
+        if cleaned.endswith('%'):
+            return _number(cleaned[:-1]) / 100
+        return _number(cleaned)
+    return _number(text)
+
+
+_DATE_TOKEN = re.compile(r'yyyy|yy|mmmm|mmm|mm|m|dddd|ddd|dd|d|hh|h|ss|s|AM/PM', re.IGNORECASE)
+
+
+def _format_text(value, pattern):
+    """TEXT 函數：支援常見的數字（0、#,##0.00、0%）與日期（yyyy-mm-dd hh:mm）格式"""
+    value, pattern = _scalar(value), _text(_scalar(pattern))
+    if isinstance(value, str):
+        try:
+            value = _number(value)
+        except FormulaError:
+            return value
+    number = _number(value)
+
+    if re.search(r'[yd]|h|s', pattern, re.IGNORECASE):
+        moment = from_excel(number)
+        if isinstance(moment, datetime.time):
+            moment = datetime.datetime.combine(datetime.date(1899, 12, 30), moment)
+        has_time = re.search(r'[hs]', pattern, re.IGNORECASE) is not None
+
+        def date_part(match):
+            token = match.group(0).lower()
+            if token in ('mm', 'm') and has_time and re.search(r'h[^ymd]*$', pattern[:match.start()], re.IGNORECASE):
+                return f'{moment.minute:02d}' if token == 'mm' else str(moment.minute)
+            return {
+                'yyyy': f'{moment.year:04d}', 'yy': f'{moment.year % 100:02d}',
+                'mmmm': moment.strftime('%B'), 'mmm': moment.strftime('%b'),
+                'mm': f'{moment.month:02d}', 'm': str(moment.month),
+                'dddd': moment.strftime('%A'), 'ddd': moment.strftime('%a'),
+                'dd': f'{moment.day:02d}', 'd': str(moment.day),
+                'hh': f'{moment.hour:02d}', 'h': str(moment.hour),
+                'ss': f'{moment.second:02d}', 's': str(moment.second),
+                'am/pm': 'AM' if moment.hour < 12 else 'PM',
+            }[token]
+        return _DATE_TOKEN.sub(date_part, pattern)
+
+    match = re.fullmatch(r'([^0#]*)([#,]*0*)(?:\.(0+))?(%?)(.*)', pattern)
+    if not match or not (match.group(2) or match.group(3)):
+        return _text(number)
+    prefix, integer_part, decimals, percent, suffix = match.groups()
+    if percent:
+        number *= 100
+    digits = len(decimals or '')
+    rounded = float(Decimal(repr(float(number))).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+    grouping = ',' if ',' in integer_part else ''
+    return f'{prefix}{rounded:{grouping}.{digits}f}{percent}{suffix}'
+
+
+# 日期函數
+
+def _date(year, month, day):
+    year, month, day = _integer(year), _integer(month), _integer(day)
+    if 0 <= year < 1900:
+        year += 1900
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    try:
+        base = datetime.date(year, month, 1)
+    except ValueError:
+        raise FormulaError('#NUM!')
+    return int(to_excel(base)) + day - 1
+
+
+def _to_date(serial) -> datetime.datetime:
+    number = _number(_scalar(serial))
+    if number < 0:
+        raise FormulaError('#NUM!')
+    moment = from_excel(number)
+    if isinstance(moment, datetime.time):
+        # 0 到 1 之間只有時間，日期為 1900-01-00
+        return datetime.datetime(1900, 1, 1, moment.hour, moment.minute, moment.second)
+    if isinstance(moment, datetime.date) and not isinstance(moment, datetime.datetime):
+        moment = datetime.datetime.combine(moment, datetime.time())
+    return moment
+
+
+def _year(serial):
+    return _to_date(serial).year
+
+
+def _month(serial):
+    return _to_date(serial).month
+
+
+def _day(serial):
+    return 0 if _number(_scalar(serial)) < 1 else _to_date(serial).day
+
+
+def _weekday(serial, return_type=1):
+    weekday = _to_date(serial).weekday()        # 星期一 = 0
+    return_type = _integer(return_type)
+    if return_type == 1:
+        return (weekday + 1) % 7 + 1           # 星期日 = 1
+    if return_type == 2:
+        return weekday + 1                     # 星期一 = 1
+    if return_type == 3:
+        return weekday                         # 星期一 = 0
+    raise FormulaError('#NUM!')
+
+
+def _add_months(serial, months, end_of_month):
+    moment = _to_date(serial)
+    months = _integer(months)
+    index = moment.year * 12 + moment.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    last_day = (datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)).day
+    day = last_day if end_of_month else min(moment.day, last_day)
+    return int(to_excel(datetime.date(year, month, day)))
+
+
+def _edate(serial, months):
+    return _add_months(serial, months, False)
+
+
+def _eomonth(serial, months):
+    return _add_months(serial, months, True)
+
+
+def _today():
+    return int(to_excel(datetime.date.today()))
+
+
+def _now():
+    return to_excel(datetime.datetime.now())
+
+
+def _single(function):
+    """單一值參數的函數：範圍先轉為單一值"""
+    return lambda *arguments: function(*[_scalar(argument) for argument in arguments])
+
+
+_FUNCTIONS: Dict[str, Callable] = {
+    # 數學與統計
+    'SUM': _sum,
+    'AVERAGE': _average,
+    'MIN': _min,
+    'MAX': _max,
+    'PRODUCT': _product,
+    'COUNT': _count,
+    'COUNTA': _counta,
+    'COUNTBLANK': _countblank,
+    'SUMPRODUCT': _sumproduct,
+    'COUNTIF': _countif,
+    'COUNTIFS': _countifs,
+    'SUMIF': _sumif,
+    'SUMIFS': _sumifs,
+    'AVERAGEIF': _averageif,
+    'ROUND': _round,
+    'ROUNDUP': _roundup,
+    'ROUNDDOWN': _rounddown,
+    'INT': lambda value: _integer(value),
+    'ABS': _single(lambda value: abs(_number(value))),
+    'MOD': _mod,
+    'POWER': _single(_power),
+    'SQRT': _sqrt,
+    # 邏輯與資訊
+    'AND': _and,
+    'OR': _or,
+    'NOT': _single(lambda value: not _boolean(value)),
+    'TRUE': lambda: True,
+    'FALSE': lambda: False,
+    'NA': _na,
+    'ISBLANK': lambda value: (value.cell(1, 1) if isinstance(value, CellRange) else value) is None,
+    'ISNUMBER': _single(lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)),
+    'ISTEXT': _single(lambda value: isinstance(value, str)),
+    # 查詢與參照
+    'VLOOKUP': _vlookup,
+    'HLOOKUP': _hlookup,
+    'XLOOKUP': _xlookup,
+    'MATCH': _match,
+    'INDEX': _index,
+    # 文字
+    'LEFT': _left,
+    'RIGHT': _right,
+    'MID': _mid,
+    'LEN': _single(lambda text: len(_text(text))),
+    'UPPER': _single(lambda text: _text(text).upper()),
+    'LOWER': _single(lambda text: _text(text).lower()),
+    'PROPER': _single(lambda text: _text(text).title()),
+    'TRIM': _single(lambda text: re.sub(' +', ' ', _text(text).strip(' '))),
+    'SUBSTITUTE': _substitute,
+    'REPLACE': _replace,
+    'FIND': _find,
+    'SEARCH': _search,
+    'CONCAT': _concat,
+    'CONCATENATE': _concatenate,
+    'TEXTJOIN': _textjoin,
+    'VALUE': _value,
+    'TEXT': _format_text,
+    # 日期
+    'DATE': _date,
+    'YEAR': _year,
+    'MONTH': _month,
+    'DAY': _day,
+    'WEEKDAY': _weekday,
+    'EDATE': _edate,
+    'EOMONTH': _eomonth,
+    'TODAY': _today,
+    'NOW': _now,
+}
+
+# 參數延後計算的函數（未採用的分支不計算，錯誤可被攔截）
+_LAZY_FUNCTIONS: Dict[str, Callable] = {
+    'IF': _if,
+    'IFERROR': _iferror,
+    'IFNA': _ifna,
+    'CHOOSE': _choose,
+    'ISERROR': _is_error,
+    'ISNA': _isna,
+}
+
+_VOLATILE_FUNCTIONS = {'TODAY', 'NOW'}
+
+
+def supported_functions() -> List[str]:
+    """支援的函數名稱"""
+    return sorted(set(_FUNCTIONS) | set(_LAZY_FUNCTIONS))
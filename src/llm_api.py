@@ -9,12 +9,15 @@ LLM-Friendly API Layer
 
 from typing import Dict, Any, Optional, List, Union
 from pathlib import Path
+import io
 import json
 import os
+import contextlib
 
 from .word_editor import WordEditor
 from .ppt_editor import PPTEditor
-from .excel_editor import ExcelEditor
+from .excel_editor import ExcelEditor, json_value
+from .sheet_io import data_format, iter_data_rows, create_workbook
 from .batch_processor import BatchProcessor
 
 
@@ -213,6 +216,720 @@ def insert_table(file_path: str, rows: int, cols: int,
         )
 
 
+def update_range(file_path: str, sheet_name: str, top_left: str, rows: Any,
+                output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    批次寫入 Excel 範圍（僅支援 Excel）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱
+        top_left: 左上角儲存格參照（如 "A2"）
+        rows: 二維資料（列表、迭代器、array 緩衝區或 NumPy 陣列）
+        output_path: 輸出路徑
+    
+    Returns:
+        統一格式的結果字典，result 為 {"cells": int}
+    
+    Example:
+        >>> result = update_range("data.xlsx", "Sheet1", "A2", [[1, "A"], [2, "B"]])
+    """
+    try:
+        editor, file_type = OfficeAPI._get_editor(file_path)
+        
+        if not isinstance(editor, ExcelEditor):
+            raise ValueError("只有 Excel 檔案支援範圍寫入")
+        
+        count = editor.update_range(sheet_name, top_left, rows)
+        
+        if count:
+            editor.save(output_path or file_path)
+            return OfficeAPI._create_response(
+                success=True,
+                operation="update_range",
+                file_type=file_type,
+                result={"cells": count},
+                message=f"成功寫入 {count} 個儲存格"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="update_range",
+                file_type=file_type,
+                error="範圍寫入失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="update_range",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def read_sheet(file_path: str, sheet_name: Optional[str] = None,
+              cell_range: Optional[str] = None, values: str = 'formula',
+              offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    讀取 Excel 工作表的儲存格（僅支援 Excel，不載入整個工作簿）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱，None 表示活動工作表
+        cell_range: 讀取範圍（如 "A1:D20"），None 表示從 A1 開始
+        values: 公式儲存格的值："formula" 公式、"cached" 上次計算的結果、
+                "both" {"formula": 公式, "value": 結果}
+        offset: 略過範圍開頭的行數（分頁用）
+        limit: 最多讀取的行數
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "range", "max_row", "max_column", "columns", "rows"}
+    
+    Example:
+        >>> result = read_sheet("data.xlsx", "Sheet1", "A1:C10", values="both")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援讀取工作表")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            view = editor.view_sheet(
+                sheet_name, cell_range=cell_range, offset=offset, limit=limit,
+                as_json=True, values=values
+            )
+        
+        if view is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="read_sheet",
+                file_type="xlsx",
+                result=view,
+                message=f"讀取 {len(view['rows'])} 行"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="read_sheet",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "讀取失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="read_sheet",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def find_cells(file_path: str, search_text: str, sheet_name: Optional[str] = None,
+               values: str = 'formula', offset: int = 0,
+               limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    搜尋包含文字的 Excel 儲存格（僅支援 Excel，不載入整個工作簿）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        search_text: 搜尋文字
+        sheet_name: 工作表名稱，None 表示所有工作表
+        values: 公式儲存格比對的內容："formula" 公式、"cached" 上次計算的結果、"both" 兩者
+        offset: 略過前幾個結果（分頁用）
+        limit: 最多回傳的結果數
+    
+    Returns:
+        統一格式的結果字典，result 為 {"matches": [{"sheet", "cell", "value"}]}
+    
+    Example:
+        >>> result = find_cells("data.xlsx", "#DIV/0!", values="cached")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援儲存格搜尋")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            matches = editor.find_cells(search_text, sheet_name, limit, offset, values)
+        
+        return OfficeAPI._create_response(
+            success=True,
+            operation="find_cells",
+            file_type="xlsx",
+            result={"matches": [
+                {"sheet": sheet, "cell": cell_ref, "value": json_value(value)}
+                for sheet, cell_ref, value in matches
+            ]},
+            message=f"找到 {len(matches)} 個符合的儲存格"
+        )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="find_cells",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def profile_sheet(file_path: str, sheet_name: Optional[str] = None,
+                  top_k: int = 5, header: bool = True) -> Dict[str, Any]:
+    """
+    取得 Excel 工作表每個欄位的統計摘要（僅支援 Excel，串流讀取一次，結果依檔案內容快取）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱，None 表示活動工作表
+        top_k: 每個欄位列出的熱門值數量
+        header: 第一列為欄位名稱
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "rows", "header_row", "columns"}；
+        每個欄位含 count、nulls、types、min、max、sum、mean、first_date、last_date、
+        distinct（估計值）與 top（[{"value", "count"}]）
+    
+    Example:
+        >>> result = profile_sheet("sales.xlsx", "2024")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援欄位統計")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            profile = editor.profile_sheet(sheet_name, top_k, header)
+        
+        if profile is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="profile_sheet",
+                file_type="xlsx",
+                result=profile,
+                message=f"統計 {profile['rows']} 行、{len(profile['columns'])} 個欄位"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="profile_sheet",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "統計失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="profile_sheet",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def query_sheet(file_path: str, sheet_name: Optional[str] = None, where: Any = None,
+                select: Optional[List[str]] = None, order_by: Any = None,
+                limit: Optional[int] = 100, offset: int = 0, header: bool = True,
+                output_sheet: Optional[str] = None,
+                output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    查詢 Excel 工作表中符合條件的列（僅支援 Excel，串流讀取，已建立索引的欄位直接查索引）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱，None 表示活動工作表
+        where: 條件（AND），如 "地區 = APAC and 金額 > 10000"、
+               [["地區", "=", "APAC"], ["金額", ">", 10000]] 或 {"地區": "APAC"}；
+               運算子: =, !=, >, >=, <, <=, contains, in（文字不分大小寫）
+        select: 要回傳的欄位名稱（或欄位字母），None 表示全部
+        order_by: 排序欄位，如 "金額 desc" 或 ["地區", "-金額"]
+        limit: 最多回傳的列數（預設 100），None 表示全部
+        offset: 略過前幾個結果（分頁用）
+        header: 第一列為欄位名稱
+        output_sheet: 將結果寫入這個新工作表並儲存
+        output_path: 寫入結果時的輸出路徑
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "columns", "rows", "row_numbers", "count",
+        "truncated", "indexes"}
+    
+    Example:
+        >>> result = query_sheet("sales.xlsx", "2024", where="地區 = APAC and 金額 > 10000",
+        ...                      order_by="金額 desc", limit=10)
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援查詢")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = editor.query(
+                sheet_name, where, select, order_by, limit, offset, header, output_sheet
+            )
+            if result is not None and output_sheet:
+                editor.save(output_path or file_path)
+        
+        if result is not None:
+            more = "，還有更多結果" if result['truncated'] else ""
+            return OfficeAPI._create_response(
+                success=True,
+                operation="query_sheet",
+                file_type="xlsx",
+                result=json_value(result),
+                message=f"找到 {result['count']} 列{more}"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="query_sheet",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "查詢失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="query_sheet",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def create_index(file_path: str, sheet_name: str, column: str, kind: str = 'hash',
+                 header: bool = True) -> Dict[str, Any]:
+    """
+    為 Excel 欄位建立查詢索引（依檔案內容快取，檔案改變後自動失效）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱
+        column: 欄位名稱（或欄位字母）
+        kind: "hash"（=、in）或 "sorted"（另外支援 >、>=、<、<=）
+        header: 第一列為欄位名稱
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "column", "kind"}
+    
+    Example:
+        >>> result = create_index("sales.xlsx", "2024", "金額", kind="sorted")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援建立索引")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            success = editor.create_index(sheet_name, column, kind, header)
+        
+        if success:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="create_index",
+                file_type="xlsx",
+                result={"sheet": sheet_name, "column": column, "kind": kind},
+                message=output.getvalue().strip()
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="create_index",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "建立索引失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="create_index",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def join_sheets(file_path: str, sheet_name: str, key_column: str, lookup_sheet: str,
+                lookup_key: str, columns: List[str], lookup_file: Optional[str] = None,
+                target_column: Optional[str] = None, header: bool = True,
+                output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    以鍵欄位查找另一個工作表（可在另一個 xlsx）的值，以靜態值寫入目標工作表（取代大量 VLOOKUP）
+    
+    Args:
+        file_path: 目標 Excel 檔案路徑
+        sheet_name: 目標工作表名稱
+        key_column: 目標工作表的鍵欄位（名稱或欄位字母）
+        lookup_sheet: 查詢表的工作表名稱
+        lookup_key: 查詢表的鍵欄位（名稱或欄位字母）
+        columns: 要帶入的查詢表欄位
+        lookup_file: 查詢表所在的 xlsx，None 表示同一個檔案
+        target_column: 寫入的第一欄（如 "F"），None 表示使用範圍右邊的第一欄
+        header: 兩個工作表的第一列都是欄位名稱
+        output_path: 輸出路徑
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "columns", "rows", "matched", "unmatched",
+        "unmatched_keys"}
+    
+    Example:
+        >>> result = join_sheets("orders.xlsx", "訂單", "客戶編號", "客戶", "編號", ["名稱", "地區"],
+        ...                      lookup_file="customers.xlsx")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援查找寫入")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = editor.join(
+                sheet_name, key_column, lookup_sheet, lookup_key, columns,
+                lookup_file, target_column, header
+            )
+            if result is not None:
+                editor.save(output_path or file_path)
+        
+        if result is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="join_sheets",
+                file_type="xlsx",
+                result=json_value(result),
+                message=f"帶入 {result['matched']}/{result['rows']} 列的值，"
+                        f"{result['unmatched']} 列找不到對應的鍵"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="join_sheets",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "查找寫入失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="join_sheets",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def aggregate_sheet(file_path: str, sheet_name: Optional[str] = None, group_by: Any = None,
+                    aggregates: Any = None, where: Any = None, header: bool = True,
+                    output_sheet: Optional[str] = None,
+                    output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    依欄位分組彙總 Excel 工作表（僅支援 Excel，串流讀取，分組很多時使用暫存檔）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱，None 表示活動工作表
+        group_by: 分組欄位名稱（或欄位字母），如 "地區" 或 ["地區", "產品"]；None 表示全部為一組
+        aggregates: 彙總（sum、count、mean、min、max、distinct），如 "sum(金額), count"、
+                    [["sum", "金額"], ["distinct", "客戶"]] 或 {"金額": ["sum", "mean"]}；預設 count
+        where: 只彙總符合條件的列（格式同 query_sheet）
+        header: 第一列為欄位名稱
+        output_sheet: 將結果寫入這個新工作表並儲存
+        output_path: 寫入結果時的輸出路徑
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "columns", "rows", "groups", "source_rows", "spilled"}；
+        寫入 output_sheet 時 rows 只包含前 100 組
+    
+    Example:
+        >>> result = aggregate_sheet("sales.xlsx", "2024", group_by=["地區"],
+        ...                          aggregates="sum(金額), count", output_sheet="彙總")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援彙總")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = editor.aggregate(sheet_name, group_by, aggregates, where, header, output_sheet)
+            if result is not None and output_sheet:
+                editor.save(output_path or file_path)
+        
+        if result is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="aggregate_sheet",
+                file_type="xlsx",
+                result=json_value(result),
+                message=f"彙總 {result['source_rows']} 列為 {result['groups']} 組"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="aggregate_sheet",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "彙總失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="aggregate_sheet",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def sort_sheet(file_path: str, sheet_name: str, keys: Any, header: bool = True,
+               keep_row_styles: bool = False, output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    依欄位排序 Excel 工作表的資料列（僅支援 Excel，外部排序，不載入工作簿）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱
+        keys: 排序欄位名稱（或欄位字母），如 "金額 desc" 或 ["地區", "-金額"]
+        header: 第一列為欄位名稱（不參與排序）
+        keep_row_styles: 列高、列樣式跟著列搬移（預設留在原位置）
+        output_path: 輸出路徑，None 表示覆蓋原檔
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "rows", "spilled"}
+    
+    Example:
+        >>> result = sort_sheet("sales.xlsx", "2024", ["地區", "金額 desc"])
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援排序")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = editor.sort_sheet(sheet_name, keys, header, keep_row_styles)
+            if result is not None:
+                editor.save(output_path or file_path)
+        
+        if result is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="sort_sheet",
+                file_type="xlsx",
+                result=result,
+                message=f"已排序 {result['rows']} 列"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="sort_sheet",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "排序失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="sort_sheet",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def dedupe_rows(file_path: str, sheet_name: str, key_columns: Any = None, keep: str = "first",
+                header: bool = True, output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    移除 Excel 工作表中鍵欄位重複的列（僅支援 Excel，一次完成，不需要逐列刪除）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱
+        key_columns: 鍵欄位名稱（或欄位字母），如 "客戶" 或 ["客戶", "日期"]；None 表示整列
+        keep: 保留第一筆（"first"）或最後一筆（"last"）
+        header: 第一列為欄位名稱
+        output_path: 輸出路徑，None 表示覆蓋原檔
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "rows", "removed", "kept"}
+    
+    Example:
+        >>> result = dedupe_rows("customers.xlsx", "名單", ["電話"], keep="last")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援移除重複列")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = editor.dedupe(sheet_name, key_columns, keep, header)
+            if result is not None and (result['removed'] or output_path):
+                editor.save(output_path or file_path)
+        
+        if result is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="dedupe_rows",
+                file_type="xlsx",
+                result=result,
+                message=f"移除 {result['removed']} 列重複資料，保留 {result['kept']} 列"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="dedupe_rows",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "移除重複列失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="dedupe_rows",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def export_sheet(file_path: str, sheet_name: str, output_path: str, fmt: Optional[str] = None,
+                 header: bool = True, delimiter: str = ",") -> Dict[str, Any]:
+    """
+    將 Excel 工作表串流匯出為 CSV 或 Parquet（Parquet 需要 pyarrow）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        sheet_name: 工作表名稱
+        output_path: 輸出路徑（.csv 或 .parquet）
+        fmt: "csv" 或 "parquet"，None 表示依副檔名
+        header: 第一列為欄位名稱
+        delimiter: CSV 的分隔字元
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "path", "format", "rows", "columns"}
+    
+    Example:
+        >>> result = export_sheet("sales.xlsx", "2024", "sales_2024.parquet")
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援匯出")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = editor.export_sheet(sheet_name, output_path, fmt, header, delimiter=delimiter)
+        
+        if result is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="export_sheet",
+                file_type="xlsx",
+                result=result,
+                message=f"已匯出 {result['rows']} 列到 {output_path}"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="export_sheet",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "匯出失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="export_sheet",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def import_data(file_path: str, input_path: str, sheet_name: Optional[str] = None,
+                fmt: Optional[str] = None, infer_types: bool = False, header: bool = True,
+                delimiter: str = ",", output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    將 CSV 或 Parquet 串流匯入為 Excel 的新工作表（檔案不存在時建立新活頁簿）
+    
+    Args:
+        file_path: Excel 檔案路徑
+        input_path: 資料檔路徑（.csv 或 .parquet）
+        sheet_name: 新工作表名稱，None 表示使用資料檔名稱
+        fmt: "csv" 或 "parquet"，None 表示依副檔名
+        infer_types: CSV 的文字推斷為數字、布林值與日期（預設全部為文字）
+        header: CSV 的第一列為欄位名稱（不推斷型別）
+        delimiter: CSV 的分隔字元
+        output_path: 輸出路徑，None 表示覆蓋原檔
+    
+    Returns:
+        統一格式的結果字典，result 為 {"sheet", "path", "format", "rows"}
+    
+    Example:
+        >>> result = import_data("report.xlsx", "orders.csv", "訂單", infer_types=True)
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援匯入")
+        
+        if not os.path.exists(file_path):
+            fmt = data_format(input_path, fmt)
+            sheet_name = sheet_name or Path(input_path).stem[:31]
+            rows = create_workbook(output_path or file_path, sheet_name, iter_data_rows(
+                input_path, fmt, infer_types, header, delimiter=delimiter
+            ))
+            result = {"sheet": sheet_name, "path": input_path, "format": fmt, "rows": rows}
+        else:
+            editor = ExcelEditor(file_path, read_only=True)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                result = editor.import_sheet(input_path, sheet_name, fmt, infer_types, header,
+                                             delimiter=delimiter)
+                if result is not None:
+                    editor.save(output_path or file_path)
+        
+        if result is not None:
+            return OfficeAPI._create_response(
+                success=True,
+                operation="import_data",
+                file_type="xlsx",
+                result=result,
+                message=f"已匯入 {result['rows']} 列到工作表 {result['sheet']}"
+            )
+        else:
+            return OfficeAPI._create_response(
+                success=False,
+                operation="import_data",
+                file_type="xlsx",
+                error=output.getvalue().strip() or "匯入失敗"
+            )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="import_data",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
+def compact_workbook(file_path: str, output_path: Optional[str] = None,
+                     measure_load: bool = False) -> Dict[str, Any]:
+    """
+    整理 Excel 的共用字串表與儲存格格式：移除沒有使用的項目並合併重複的項目
+    
+    Args:
+        file_path: Excel 檔案路徑
+        output_path: 輸出路徑，None 表示覆蓋原檔
+        measure_load: 比較整理前後以 openpyxl 載入的時間（需要完整載入兩次）
+    
+    Returns:
+        統一格式的結果字典，result 為 {"strings_before", "strings_after", "styles_before",
+        "styles_after", "size_before", "size_after"}（measure_load 時另有載入時間）
+    
+    Example:
+        >>> result = compact_workbook("report.xlsx", measure_load=True)
+    """
+    try:
+        if Path(file_path).suffix.lower() != '.xlsx':
+            raise ValueError("只有 Excel 檔案支援整理")
+        
+        editor = ExcelEditor(file_path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = editor.save(output_path or file_path, compact=True, measure_load=measure_load)
+        
+        saved = result['size_before'] - result['size_after']
+        return OfficeAPI._create_response(
+            success=True,
+            operation="compact_workbook",
+            file_type="xlsx",
+            result=result,
+            message=(
+                f"共用字串 {result['strings_before']} → {result['strings_after']}，"
+                f"儲存格格式 {result['styles_before']} → {result['styles_after']}，節省 {saved} 位元組"
+            )
+        )
+    except Exception as e:
+        return OfficeAPI._create_response(
+            success=False,
+            operation="compact_workbook",
+            file_type="unknown",
+            error=str(e)
+        )
+
+
 def batch_replace(pattern: str, old_text: str, new_text: str,
                  recursive: bool = False, output_dir: Optional[str] = None,
                  backup: bool = False) -> Dict[str, Any]:
@@ -264,7 +981,11 @@ def execute_command(command: str, **kwargs) -> Dict[str, Any]:
     通用命令執行接口
     
     Args:
-        command: 命令名稱 ("replace_text", "add_image", "insert_table", "batch_replace")
+        command: 命令名稱 ("replace_text", "add_image", "insert_table", "update_range",
+                 "read_sheet", "find_cells", "profile_sheet", "query_sheet", "create_index",
+                 "join_sheets", "aggregate_sheet", "sort_sheet", "dedupe_rows",
+                 "export_sheet", "import_data", "compact_workbook",
+                 "batch_replace")
         **kwargs: 命令參數
     
     Returns:
@@ -280,6 +1001,19 @@ def execute_command(command: str, **kwargs) -> Dict[str, Any]:
         "replace_text": replace_text,
         "add_image": add_image,
         "insert_table": insert_table,
+        "update_range": update_range,
+        "read_sheet": read_sheet,
+        "find_cells": find_cells,
+        "profile_sheet": profile_sheet,
+        "query_sheet": query_sheet,
+        "create_index": create_index,
+        "join_sheets": join_sheets,
+        "aggregate_sheet": aggregate_sheet,
+        "sort_sheet": sort_sheet,
+        "dedupe_rows": dedupe_rows,
+        "export_sheet": export_sheet,
+        "import_data": import_data,
+        "compact_workbook": compact_workbook,
         "batch_replace": batch_replace,
     }
     
@@ -361,6 +1095,19 @@ __all__ = [
     'replace_text',
     'add_image',
     'insert_table',
+    'update_range',
+    'read_sheet',
+    'find_cells',
+    'profile_sheet',
+    'query_sheet',
+    'create_index',
+    'join_sheets',
+    'aggregate_sheet',
+    'sort_sheet',
+    'dedupe_rows',
+    'export_sheet',
+    'import_data',
+    'compact_workbook',
     'batch_replace',
     'execute_command',
     'execute_json',
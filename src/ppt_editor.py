@@ -6,15 +6,25 @@ Interactive PowerPoint Editor
 支援透過自然語言指令修改 PPT 內容
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Set, Any, Iterable, Iterator, Tuple, Callable
 import os
+import re
 import sys
+import json
+import zipfile
+import posixpath
 import argparse
 
+from lxml import etree
 from pptx import Presentation
 from pptx.util import Inches, Pt, Cm
-from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.shapes import MSO_SHAPE, MSO_SHAPE_TYPE, PP_PLACEHOLDER
 from pptx.dml.color import RGBColor
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT, RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.package import Part, XmlPart, PartFactory, _Relationship
+from pptx.opc.packuri import PackURI
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.parts.slide import SlidePart
 
 from .constants import (
     MAX_CONTENT_PREVIEW,
@@ -27,6 +37,80 @@ from .constants import (
     DEFAULT_LAYOUT_INDEX
 )
 
+# 複製投影片時直接共用（不複製內容）的關聯類型
+SHARED_RELTYPES = frozenset({
+    RT.SLIDE_LAYOUT,
+    RT.SLIDE,
+    RT.IMAGE,
+    RT.MEDIA,
+    RT.VIDEO,
+    RT.AUDIO,
+})
+
+# 複製投影片時不帶過去的關聯類型（備忘稿屬於原投影片）
+SKIPPED_RELTYPES = frozenset({
+    RT.NOTES_SLIDE,
+})
+
+# 由 XML 以 r:id / r:embed 等屬性明確引用的關聯類型，
+# 儲存時若 XML 已不再引用即視為孤立關聯並移除
+PRUNABLE_RELTYPES = frozenset({
+    RT.IMAGE,
+    RT.MEDIA,
+    RT.VIDEO,
+    RT.AUDIO,
+    RT.CHART,
+    RT.CHART_USER_SHAPES,
+    RT.OLE_OBJECT,
+    RT.PACKAGE,
+    RT.HYPERLINK,
+    RT.DIAGRAM_DATA,
+    RT.DIAGRAM_LAYOUT,
+    RT.DIAGRAM_QUICK_STYLE,
+    RT.DIAGRAM_COLORS,
+})
+
+# 以超連結（r:id）引用投影片的 part；備忘稿指向投影片的關聯是隱含的，
+# XML 中沒有引用，只有這些 part 的投影片關聯可以依 r:id 判斷是否孤立
+SLIDE_LINK_CONTENT_TYPES = frozenset({
+    CT.PML_SLIDE,
+    CT.PML_SLIDE_LAYOUT,
+    CT.PML_SLIDE_MASTER,
+})
+
+# 批次建立投影片時視為內文區的版面配置預留位置類型
+BODY_PLACEHOLDER_TYPES = frozenset({
+    PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.OBJECT,
+})
+
+R_NAMESPACE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_REFERENCED_RIDS = etree.XPath(f'//@*[namespace-uri()="{R_NAMESPACE}"]')
+_RID_NUMBER = re.compile(r'rId(\d+)$')
+
+# 唯讀快速路徑直接解析 XML 時使用的命名空間與標籤
+PML_NAMESPACES = {
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'r': R_NAMESPACE,
+}
+SP_TAG = f"{{{PML_NAMESPACES['p']}}}sp"
+SHAPE_TAGS = frozenset(
+    f"{{{PML_NAMESPACES['p']}}}{tag}"
+    for tag in ('sp', 'grpSp', 'graphicFrame', 'cxnSp', 'pic', 'contentPart')
+)
+BR_TAG = f"{{{PML_NAMESPACES['a']}}}br"
+TEXT_RUN_TAGS = frozenset({f"{{{PML_NAMESPACES['a']}}}r", f"{{{PML_NAMESPACES['a']}}}fld"})
+_PH_ELEMENT = etree.XPath('./*[1]/p:nvPr/p:ph', namespaces=PML_NAMESPACES)
+
+# 字型正規化時處理的文字屬性元素
+_RUN_PROPERTIES = etree.XPath(
+    './/a:rPr | .//a:endParaRPr | .//a:defRPr', namespaces=PML_NAMESPACES
+)
+LATIN_FOLLOWING_SIBLINGS = frozenset({
+    'ea', 'cs', 'sym', 'hlinkClick', 'hlinkMouseOver', 'rtl', 'extLst'
+})
+
 
 class PPTEditor:
     """PowerPoint 編輯器類"""
@@ -51,37 +135,91 @@ class PPTEditor:
         try:
             self.filepath = filepath
             self.prs = Presentation(filepath)
+            self._loaded_parts = set(self.prs.part.package.iter_parts())
         except Exception as e:
             raise RuntimeError(f"無法開啟簡報: {e}") from e
     
-    def save(self, output_path: Optional[str] = None) -> None:
+    def save(self, output_path: Optional[str] = None, collect_garbage: bool = True) -> None:
         """儲存簡報
         
         Args:
             output_path: 輸出路徑，None 表示覆蓋原檔案
+            collect_garbage: 儲存前是否移除已無法從簡報根節點到達的 part
         """
         save_path = output_path or self.filepath
         try:
+            if collect_garbage:
+                reclaimed = self.collect_garbage()
+                if reclaimed > 0:
+                    print(f"{SUCCESS_SYMBOL} 已清除孤立內容，節省 {reclaimed:,} bytes")
             self.prs.save(save_path)
             print(f"{SUCCESS_SYMBOL} 簡報已儲存: {save_path}")
         except Exception as e:
             print(f"{ERROR_SYMBOL} 儲存失敗: {e}")
             raise
     
+    def collect_garbage(self) -> int:
+        """移除孤立的關聯與 part
+        
+        從套件根節點走訪關聯圖，途中移除 XML 已不再引用的圖片、媒體、
+        圖表、超連結等關聯；走訪不到的 part（例如已刪除投影片的備忘稿
+        與圖片）在儲存時便不會再寫出。
+        
+        Returns:
+            int: 回收的位元組數（相對於開啟後曾存在的 part）
+        """
+        package = self.prs.part.package
+        before = self._loaded_parts | set(package.iter_parts())
+        reachable = self._prune_unreachable(package)
+        
+        reclaimed = sum(len(part.blob) for part in before - reachable)
+        self._loaded_parts = reachable
+        return reclaimed
+    
+    def _prune_unreachable(self, package) -> Set[Part]:
+        """走訪關聯圖並移除未被 XML 引用的關聯
+        
+        Args:
+            package: 簡報套件
+            
+        Returns:
+            Set[Part]: 移除後仍可到達的 part
+        """
+        reachable: Set[Part] = set()
+        pending = [rel.target_part for rel in package._rels.values() if not rel.is_external]
+        
+        while pending:
+            part = pending.pop()
+            if part in reachable:
+                continue
+            reachable.add(part)
+            
+            if isinstance(part, XmlPart):
+                referenced = set(_REFERENCED_RIDS(part._element))
+                prunable = PRUNABLE_RELTYPES
+                if part.content_type in SLIDE_LINK_CONTENT_TYPES:
+                    prunable = prunable | {RT.SLIDE}
+                orphaned = [
+                    rId for rId, rel in part.rels.items()
+                    if rel.reltype in prunable and rId not in referenced
+                ]
+                for rId in orphaned:
+                    part.rels.pop(rId)
+            
+            pending.extend(
+                rel.target_part for rel in part.rels.values() if not rel.is_external
+            )
+        
+        return reachable
+    
     def list_slides(self) -> None:
         """列出所有投影片的標題和內容概要"""
-        print(f"\n=== 簡報結構 (共 {len(self.prs.slides)} 張投影片) ===\n")
+        _print_slide_list_header(len(self.prs.slides))
         
         for i, slide in enumerate(self.prs.slides, 1):
-            title = self._get_slide_title(slide)
-            print(f"[投影片 {i}] {title if title else '(無標題)'}")
-            
-            # 列出內容摘要
-            content_preview = self._get_slide_content_preview(slide)
-            if content_preview:
-                for line in content_preview[:MAX_PREVIEW_LINES]:
-                    print(f"  • {line[:MAX_CONTENT_PREVIEW]}...")
-            print()
+            _print_slide_summary(
+                i, self._get_slide_title(slide), self._get_slide_content_preview(slide)
+            )
     
     def _get_slide_title(self, slide) -> Optional[str]:
         """取得投影片標題
@@ -281,6 +419,285 @@ class PPTEditor:
         print(f"{SUCCESS_SYMBOL} 已新增投影片 {slide_num}: {title}")
         return slide
     
+    def duplicate_slide(self, slide_number: int, count: int = 1) -> bool:
+        """複製投影片
+        
+        只序列化一次來源投影片的 XML，每份複本以新的 part 載入，並沿用
+        原本的 rId 指向共用的版面配置、圖片與媒體 part，不重複儲存內容。
+        圖表等其他內嵌 part 則為每份複本各自複製一份。
+        新投影片會依序添加到簡報最後。
+        
+        Args:
+            slide_number: 要複製的投影片編號（從 1 開始）
+            count: 複製份數
+            
+        Returns:
+            bool: 是否成功複製
+        """
+        if not self._validate_slide_number(slide_number):
+            return False
+        
+        if count < 1:
+            print(f"{ERROR_SYMBOL} 複製份數必須大於 0")
+            return False
+        
+        try:
+            source_part = self.prs.slides[slide_number - 1].part
+            source_blob = source_part.blob
+            next_partname = self._partname_allocator()
+            sldIdLst = self.prs.slides._sldIdLst
+            
+            for _ in range(count):
+                new_part = self._clone_part(source_part, source_blob, next_partname, {})
+                rId = self.prs.part.relate_to(new_part, RT.SLIDE)
+                sldIdLst.add_sldId(rId)
+            
+            total = len(self.prs.slides)
+            first = total - count + 1
+            target = f"投影片 {first}" if count == 1 else f"投影片 {first}-{total}"
+            print(f"{SUCCESS_SYMBOL} 已複製投影片 {slide_number} → {target}")
+            return True
+        except Exception as e:
+            print(f"{ERROR_SYMBOL} 複製投影片失敗: {e}")
+            return False
+    
+    def _clone_part(
+        self,
+        part: Part,
+        blob: bytes,
+        next_partname: Callable[[PackURI], PackURI],
+        cloned: Dict[Part, Part]
+    ) -> Part:
+        """以 blob 建立 part 的複本，並保留原本的 rId
+        
+        Args:
+            part: 來源 part
+            blob: 來源 part 的內容
+            next_partname: 產生新 partname 的函數
+            cloned: 本次複製中已複製過的 part 對應表
+            
+        Returns:
+            Part: 新的 part
+        """
+        clone = PartFactory(next_partname(part.partname), part.content_type, part.package, blob)
+        cloned[part] = clone
+        base_uri = clone.partname.baseURI
+        
+        for rId, rel in part.rels.items():
+            if rel.reltype in SKIPPED_RELTYPES:
+                continue
+            
+            if rel.is_external:
+                clone.rels._rels[rId] = _Relationship(
+                    base_uri, rId, rel.reltype, RTM.EXTERNAL, rel.target_ref
+                )
+                continue
+            
+            target = rel.target_part
+            if rel.reltype not in SHARED_RELTYPES:
+                target = cloned.get(target) or self._clone_part(
+                    target, target.blob, next_partname, cloned
+                )
+            clone.rels._rels[rId] = _Relationship(
+                base_uri, rId, rel.reltype, RTM.INTERNAL, target
+            )
+        
+        return clone
+    
+    def _partname_allocator(self) -> Callable[[PackURI], PackURI]:
+        """建立 partname 配置函數
+        
+        只掃描一次套件中已使用的 partname，之後依各自的命名樣板遞增配號，
+        避免每新增一個 part 就重新走訪整個套件。
+        
+        Returns:
+            Callable[[PackURI], PackURI]: 傳入來源 partname，回傳同類型的新 partname
+        """
+        used = {str(part.partname) for part in self.prs.part.package.iter_parts()}
+        counters: Dict[str, int] = {}
+        
+        def allocate(partname: PackURI) -> PackURI:
+            match = re.match(r'^(.*?)(\d*)(\.[^./]+)$', str(partname))
+            tmpl = f"{match.group(1)}%d{match.group(3)}" if match else f"{partname}%d"
+            n = counters.get(tmpl, 1)
+            while tmpl % n in used:
+                n += 1
+            counters[tmpl] = n + 1
+            used.add(tmpl % n)
+            return PackURI(tmpl % n)
+        
+        return allocate
+    
+    def add_slides(self, specs: Iterable[Dict[str, Any]]) -> int:
+        """批次新增投影片
+        
+        逐一消耗 specs（可為產生器）。每種版面配置只在第一次使用時解析一次：
+        複製預留位置後序列化成空白投影片樣板，並記下標題／內文預留位置；
+        之後的投影片直接由樣板載入，並以遞增的 rId / 投影片 id 加入簡報，
+        避免逐張查詢既有關聯。同一張圖片只建立一個圖片 part，且不逐張輸出訊息。
+        不是物件、版面配置不是整數，或是 iter_jsonl 無法解析的行（SpecError）
+        計為無效並略過。
+        
+        每個 spec 可包含:
+            layout: 版面配置索引（預設 DEFAULT_LAYOUT_INDEX，超出範圍時也使用預設值）
+            title: 標題文字
+            bullets: 內文項目列表，項目可為字串或 [文字, 層級]
+            table: 二維列表，第一列通常為表頭
+            image: 圖片路徑，或 {"path", "left_cm", "top_cm", "width_cm"}
+        
+        Args:
+            specs: 投影片規格的可迭代物件
+            
+        Returns:
+            int: 實際新增的投影片數量
+        """
+        layouts = list(self.prs.slide_layouts)
+        package = self.prs.part.package
+        prs_rels = self.prs.part.rels
+        sldIdLst = self.prs.slides._sldIdLst
+        next_id = max([255] + [sldId.id for sldId in sldIdLst]) + 1
+        next_rid = max(
+            [0] + [int(m.group(1)) for m in map(_RID_NUMBER.match, prs_rels.keys()) if m]
+        ) + 1
+        next_partname = self._partname_allocator()
+        slide_partname = PackURI('/ppt/slides/slide1.xml')
+        
+        prototypes: Dict[int, Tuple[bytes, Optional[int], Optional[int]]] = {}
+        image_parts: Dict[str, Any] = {}
+        added = 0
+        skipped = 0
+        
+        for number, spec in enumerate(specs, 1):
+            try:
+                if isinstance(spec, SpecError):
+                    raise spec
+                if not isinstance(spec, dict):
+                    raise ValueError("規格必須是 JSON 物件")
+                layout_index = int(spec.get('layout', DEFAULT_LAYOUT_INDEX))
+                if not 0 <= layout_index < len(layouts):
+                    layout_index = DEFAULT_LAYOUT_INDEX
+                layout = layouts[layout_index]
+                
+                if layout_index not in prototypes:
+                    prototypes[layout_index] = self._slide_prototype(layout)
+                blob, title_idx, body_idx = prototypes[layout_index]
+                
+                slide_part = SlidePart.load(next_partname(slide_partname), CT.PML_SLIDE, package, blob)
+                slide_part.relate_to(layout.part, RT.SLIDE_LAYOUT)
+                self._fill_slide_from_spec(slide_part.slide, spec, title_idx, body_idx, image_parts)
+            except Exception as e:
+                skipped += 1
+                print(f"{WARNING_SYMBOL} 第 {number} 筆規格建立失敗: {e}")
+                continue
+            
+            # 新 part 不可能已有關聯，直接配發下一個 rId，不逐張掃描既有關聯
+            rId = f'rId{next_rid}'
+            prs_rels._rels[rId] = _Relationship(
+                prs_rels._base_uri, rId, RT.SLIDE, RTM.INTERNAL, slide_part
+            )
+            sldIdLst._add_sldId(id=next_id, rId=rId)
+            next_id += 1
+            next_rid += 1
+            added += 1
+        
+        print(f"{SUCCESS_SYMBOL} 已批次新增 {added} 張投影片（共 {len(self.prs.slides)} 張）")
+        if skipped:
+            print(f"{WARNING_SYMBOL} 略過 {skipped} 筆無效規格")
+        return added
+    
+    def _slide_prototype(self, layout) -> Tuple[bytes, Optional[int], Optional[int]]:
+        """建立版面配置的空白投影片樣板
+        
+        Args:
+            layout: 版面配置物件
+            
+        Returns:
+            Tuple[bytes, Optional[int], Optional[int]]: (投影片 XML, 標題 idx, 內文 idx)，
+            預留位置不存在時 idx 為 None
+        """
+        # 暫存 part 不與簡報建立關聯，因此不會被儲存
+        scratch = SlidePart.new(PackURI('/ppt/slides/prototype.xml'), self.prs.part.package, layout.part)
+        scratch.slide.shapes.clone_layout_placeholders(layout)
+        
+        title_idx = None
+        body_idx = None
+        for placeholder in layout.placeholders:
+            ph_format = placeholder.placeholder_format
+            if ph_format.idx == 0:
+                title_idx = 0
+            elif body_idx is None and ph_format.type in BODY_PLACEHOLDER_TYPES:
+                body_idx = ph_format.idx
+        return scratch.blob, title_idx, body_idx
+    
+    def _fill_slide_from_spec(
+        self,
+        slide,
+        spec: Dict[str, Any],
+        title_idx: Optional[int],
+        body_idx: Optional[int],
+        image_parts: Dict[str, Any]
+    ) -> None:
+        """依規格填入投影片內容
+        
+        Args:
+            slide: 新增的投影片物件
+            spec: 投影片規格
+            title_idx: 標題預留位置 idx
+            body_idx: 內文預留位置 idx
+            image_parts: 圖片路徑 → 圖片 part 的快取
+        """
+        placeholders = {ph.placeholder_format.idx: ph for ph in slide.placeholders}
+        
+        title = spec.get('title')
+        if title is not None and title_idx in placeholders:
+            placeholders[title_idx].text_frame.text = str(title)
+        
+        body = placeholders.get(body_idx)
+        bullets = spec.get('bullets')
+        if bullets and body is not None:
+            text_frame = body.text_frame
+            for i, item in enumerate(bullets):
+                text, level = (item[0], item[1]) if isinstance(item, (list, tuple)) else (item, 0)
+                paragraph = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
+                paragraph.text = str(text)
+                paragraph.level = int(level)
+        
+        table_data = spec.get('table')
+        if table_data:
+            if body is not None and not bullets:
+                # 表格取代空白的內文區
+                left, top, width, height = body.left, body.top, body.width, body.height
+                body.element.getparent().remove(body.element)
+            else:
+                left, top, width, height = Cm(2), Cm(5), Cm(20), Cm(8)
+            
+            n_rows = len(table_data)
+            n_cols = max(len(row) for row in table_data)
+            table = slide.shapes.add_table(n_rows, n_cols, left, top, width, height).table
+            for r, row in enumerate(table_data):
+                for c, value in enumerate(row):
+                    table.cell(r, c).text = '' if value is None else str(value)
+        
+        image = spec.get('image')
+        if image:
+            if isinstance(image, str):
+                image = {'path': image}
+            path = image['path']
+            if path in image_parts:
+                image_part = image_parts[path]
+                rId = slide.part.relate_to(image_part, RT.IMAGE)
+            else:
+                image_part, rId = slide.part.get_or_add_image_part(path)
+                image_parts[path] = image_part
+            slide.shapes._add_pic_from_image_part(
+                image_part,
+                rId,
+                Cm(image.get('left_cm', 2.0)),
+                Cm(image.get('top_cm', 5.0)),
+                Cm(image.get('width_cm', 10.0)),
+                None
+            )
+    
     def set_font(
         self, 
         slide_number: int, 
@@ -316,6 +733,98 @@ class PPTEditor:
         print(f"{SUCCESS_SYMBOL} 投影片 {slide_number} 已更新字體: {font_name}{size_info}")
         return True
     
+    def normalize_fonts(
+        self,
+        font_name: str,
+        font_size: Optional[int] = None,
+        slides: Optional[str] = None
+    ) -> bool:
+        """統一整份簡報的字體
+        
+        在佈景主題中一次改寫主要／次要字型，並讓母片文字樣式與預設文字樣式
+        參照佈景主題字型（指定大小時一併改寫各層級的 sz）；版面配置與範圍內
+        投影片上與之衝突的逐段字型／大小覆寫則在同一次走訪中移除，讓文字
+        直接繼承母片設定，不會像 set_font 那樣在每個 run 寫入屬性。
+        
+        Args:
+            font_name: 字體名稱
+            font_size: 字體大小（pt），None 表示不變更大小
+            slides: 要清除覆寫的投影片範圍（如 "1-5,8"），None 表示全部
+            
+        Returns:
+            bool: 是否設定成功
+        """
+        try:
+            slide_numbers = parse_slide_range(slides, len(self.prs.slides))
+        except ValueError as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            return False
+        
+        sz = str(font_size * 100) if font_size else None
+        
+        try:
+            # 先找出所有佈景主題，缺少佈景主題時不會只改了一部分母片
+            masters = [
+                (master, master.part.part_related_by(RT.THEME))
+                for master in self.prs.slide_masters
+            ]
+            
+            themes = set()
+            for master, theme_part in masters:
+                if theme_part not in themes:
+                    self._set_theme_fonts(theme_part, font_name)
+                    themes.add(theme_part)
+                
+                for style in master.element.iterfind('p:txStyles/*', PML_NAMESPACES):
+                    theme_font = '+mj-lt' if style.tag.endswith('}titleStyle') else '+mn-lt'
+                    for defRPr in style.iterfind('*/a:defRPr', PML_NAMESPACES):
+                        _set_default_run_font(defRPr, theme_font, sz)
+                _strip_font_overrides(master.element, sz is not None)
+                
+                for layout in master.slide_layouts:
+                    _strip_font_overrides(layout.element, sz is not None)
+            
+            default_style = self.prs.part._element.find('p:defaultTextStyle', PML_NAMESPACES)
+            if default_style is not None:
+                for defRPr in default_style.iterfind('*/a:defRPr', PML_NAMESPACES):
+                    _set_default_run_font(defRPr, '+mn-lt', sz)
+            
+            stripped = 0
+            for number in slide_numbers:
+                stripped += _strip_font_overrides(self.prs.slides[number - 1].element, sz is not None)
+        except KeyError:
+            print(f"{ERROR_SYMBOL} 統一字體失敗: 母片缺少佈景主題")
+            return False
+        except Exception as e:
+            print(f"{ERROR_SYMBOL} 統一字體失敗: {e}")
+            return False
+        
+        size_info = f" ({font_size}pt)" if font_size else ""
+        scope = f"投影片 {slides}" if slides else "所有投影片"
+        print(f"{SUCCESS_SYMBOL} 已將簡報字體統一為: {font_name}{size_info}")
+        print(f"  已清除{scope}中 {stripped} 處字型覆寫")
+        return True
+    
+    def _set_theme_fonts(self, theme_part: Part, font_name: str) -> None:
+        """改寫佈景主題的主要／次要拉丁字型
+        
+        Args:
+            theme_part: 佈景主題 part
+            font_name: 字體名稱
+        """
+        is_xml_part = isinstance(theme_part, XmlPart)
+        theme = theme_part._element if is_xml_part else etree.fromstring(theme_part.blob)
+        
+        for latin in theme.iterfind(
+            'a:themeElements/a:fontScheme/*/a:latin', PML_NAMESPACES
+        ):
+            latin.set('typeface', font_name)
+        
+        if not is_xml_part:
+            theme_part.blob = etree.tostring(
+                theme, xml_declaration=True, encoding='UTF-8', standalone=True
+            )
+    
     def get_slide_info(self, slide_number: int) -> None:
         """取得投影片詳細資訊
         
@@ -326,19 +835,14 @@ class PPTEditor:
             return
         
         slide = self.prs.slides[slide_number - 1]
-        title = self._get_slide_title(slide)
-        
-        print(f"\n=== 投影片 {slide_number} 詳細資訊 ===")
-        print(f"標題: {title if title else '(無標題)'}")
-        print(f"形狀數量: {len(slide.shapes)}")
-        print(f"\n內容:")
-        
-        for i, shape in enumerate(slide.shapes, 1):
-            if hasattr(shape, "text") and shape.text:
-                print(f"\n[形狀 {i}] {shape.shape_type}")
-                print(shape.text[:MAX_TEXT_DISPLAY])
-                if len(shape.text) > MAX_TEXT_DISPLAY:
-                    print("...")
+        text_shapes = [
+            (i, shape.shape_type, shape.text)
+            for i, shape in enumerate(slide.shapes, 1)
+            if hasattr(shape, "text") and shape.text
+        ]
+        _print_slide_details(
+            slide_number, self._get_slide_title(slide), len(slide.shapes), text_shapes
+        )
     
     def _validate_slide_number(self, slide_number: int) -> bool:
         """驗證投影片編號是否有效
@@ -355,6 +859,311 @@ class PPTEditor:
         return True
 
 
+class PPTReader:
+    """PowerPoint 唯讀快速檢視器
+    
+    不建立 python-pptx 的 Presentation，直接開啟 zip 讀取
+    ppt/presentation.xml 取得投影片順序，只在需要時才解析個別投影片 XML。
+    list_slides / get_slide_info 的輸出與 PPTEditor 相同。
+    """
+    
+    def __init__(self, filepath: str) -> None:
+        """初始化唯讀檢視器
+        
+        Args:
+            filepath: PowerPoint 檔案路徑
+            
+        Raises:
+            FileNotFoundError: 當檔案不存在時
+            ValueError: 當檔案格式不支援時
+            RuntimeError: 當無法開啟簡報時
+        """
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"檔案不存在: {filepath}")
+        
+        if not filepath.endswith(PPT_EXTENSION):
+            raise ValueError(f"不支援的檔案格式，需要 {PPT_EXTENSION}: {filepath}")
+        
+        try:
+            self.filepath = filepath
+            self._zip = zipfile.ZipFile(filepath)
+            self._slide_paths = self._read_slide_paths()
+        except Exception as e:
+            raise RuntimeError(f"無法開啟簡報: {e}") from e
+    
+    def close(self) -> None:
+        """關閉檔案"""
+        self._zip.close()
+    
+    def __enter__(self) -> 'PPTReader':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def list_slides(self) -> None:
+        """列出所有投影片的標題和內容概要"""
+        _print_slide_list_header(len(self._slide_paths))
+        
+        for i in range(1, len(self._slide_paths) + 1):
+            title_elm, _, text_shapes = self._read_slide(i)
+            preview = []
+            for _, elm, text in text_shapes:
+                if elm is not title_elm:
+                    lines = text.strip().split('\n')
+                    preview.extend([line for line in lines if line.strip()])
+                if len(preview) >= MAX_PREVIEW_LINES:
+                    break
+            _print_slide_summary(i, self._shape_text(title_elm), preview)
+    
+    def get_slide_info(self, slide_number: int) -> None:
+        """取得投影片詳細資訊（只解析該張投影片）
+        
+        Args:
+            slide_number: 投影片編號 (從1開始)
+        """
+        total = len(self._slide_paths)
+        if slide_number < 1 or slide_number > total:
+            print(f"{ERROR_SYMBOL} 投影片編號 {slide_number} 不存在（有效範圍: 1-{total}）")
+            return
+        
+        title_elm, shape_count, text_shapes = self._read_slide(slide_number)
+        _print_slide_details(
+            slide_number,
+            self._shape_text(title_elm),
+            shape_count,
+            [(i, self._shape_type(elm), text) for i, elm, text in text_shapes]
+        )
+    
+    def _read_slide_paths(self) -> List[str]:
+        """依 sldIdLst 順序取得投影片在 zip 中的路徑"""
+        presentation = etree.fromstring(self._zip.read('ppt/presentation.xml'))
+        rels = etree.fromstring(self._zip.read('ppt/_rels/presentation.xml.rels'))
+        targets = {
+            rel.get('Id'): posixpath.normpath(posixpath.join('ppt', rel.get('Target')))
+            for rel in rels
+            if rel.get('TargetMode') != 'External'
+        }
+        names = set(self._zip.namelist())
+        rIds = presentation.xpath(
+            './p:sldIdLst/p:sldId/@r:id', namespaces=PML_NAMESPACES
+        )
+        return [targets[rId].lstrip('/') for rId in rIds if targets.get(rId, '').lstrip('/') in names]
+    
+    def _read_slide(self, slide_number: int):
+        """解析單張投影片
+        
+        Args:
+            slide_number: 投影片編號 (從1開始)
+            
+        Returns:
+            (標題元素或 None, 形狀數量, [(形狀序號, 元素, 文字)])，列表只包含有文字的形狀
+        """
+        root = etree.fromstring(self._zip.read(self._slide_paths[slide_number - 1]))
+        sp_tree = root.find('p:cSld/p:spTree', PML_NAMESPACES)
+        shape_elements = [] if sp_tree is None else [
+            elm for elm in sp_tree if elm.tag in SHAPE_TAGS
+        ]
+        
+        title_elm = None
+        text_shapes = []
+        for i, elm in enumerate(shape_elements, 1):
+            ph = _PH_ELEMENT(elm)
+            if title_elm is None and ph and int(ph[0].get('idx', 0)) == 0:
+                title_elm = elm
+            if elm.tag == SP_TAG:
+                text = self._shape_text(elm)
+                if text:
+                    text_shapes.append((i, elm, text))
+        return title_elm, len(shape_elements), text_shapes
+    
+    @staticmethod
+    def _shape_text(elm) -> Optional[str]:
+        """取得形狀文字，與 python-pptx 的 shape.text 相同（段落以換行分隔，換行符號為 \\v）"""
+        if elm is None:
+            return None
+        if elm.tag != SP_TAG:
+            return ''
+        paragraphs = []
+        for p in elm.iterfind('p:txBody/a:p', PML_NAMESPACES):
+            parts = []
+            for child in p:
+                if child.tag == BR_TAG:
+                    parts.append('\v')
+                elif child.tag in TEXT_RUN_TAGS:
+                    t = child.find('a:t', PML_NAMESPACES)
+                    parts.append((t.text if t is not None else None) or '')
+            paragraphs.append(''.join(parts))
+        return '\n'.join(paragraphs)
+    
+    @staticmethod
+    def _shape_type(elm) -> MSO_SHAPE_TYPE:
+        """依 XML 判斷 p:sp 形狀類型，規則與 python-pptx 的 Shape.shape_type 相同"""
+        if _PH_ELEMENT(elm):
+            return MSO_SHAPE_TYPE.PLACEHOLDER
+        if elm.find('p:spPr/a:custGeom', PML_NAMESPACES) is not None:
+            return MSO_SHAPE_TYPE.FREEFORM
+        cNvSpPr = elm.find('p:nvSpPr/p:cNvSpPr', PML_NAMESPACES)
+        if cNvSpPr is not None and cNvSpPr.get('txBox') in ('1', 'true'):
+            return MSO_SHAPE_TYPE.TEXT_BOX
+        return MSO_SHAPE_TYPE.AUTO_SHAPE
+
+
+def _print_slide_list_header(slide_count: int) -> None:
+    """輸出投影片列表標頭"""
+    print(f"\n=== 簡報結構 (共 {slide_count} 張投影片) ===\n")
+
+
+def _print_slide_summary(number: int, title: Optional[str], content_preview: List[str]) -> None:
+    """輸出單張投影片的標題與內容概要
+    
+    Args:
+        number: 投影片編號
+        title: 標題文字
+        content_preview: 內容行列表
+    """
+    print(f"[投影片 {number}] {title if title else '(無標題)'}")
+    
+    # 列出內容摘要
+    if content_preview:
+        for line in content_preview[:MAX_PREVIEW_LINES]:
+            print(f"  • {line[:MAX_CONTENT_PREVIEW]}...")
+    print()
+
+
+def _print_slide_details(
+    number: int,
+    title: Optional[str],
+    shape_count: int,
+    text_shapes: List[Tuple[int, Any, str]]
+) -> None:
+    """輸出單張投影片的詳細資訊
+    
+    Args:
+        number: 投影片編號
+        title: 標題文字
+        shape_count: 形狀數量
+        text_shapes: [(形狀序號, 形狀類型, 文字)]
+    """
+    print(f"\n=== 投影片 {number} 詳細資訊 ===")
+    print(f"標題: {title if title else '(無標題)'}")
+    print(f"形狀數量: {shape_count}")
+    print(f"\n內容:")
+    
+    for i, shape_type, text in text_shapes:
+        print(f"\n[形狀 {i}] {shape_type}")
+        print(text[:MAX_TEXT_DISPLAY])
+        if len(text) > MAX_TEXT_DISPLAY:
+            print("...")
+
+
+def parse_slide_range(spec: Optional[str], total: int) -> List[int]:
+    """解析投影片範圍字串
+    
+    Args:
+        spec: 範圍字串，如 "1-5,8"；None 表示全部
+        total: 投影片總數
+        
+    Returns:
+        List[int]: 排序後的投影片編號
+        
+    Raises:
+        ValueError: 當範圍格式錯誤或超出有效範圍時
+    """
+    if not spec:
+        return list(range(1, total + 1))
+    
+    numbers = set()
+    for part in spec.split(','):
+        part = part.strip()
+        match = re.fullmatch(r'(\d+)(?:\s*-\s*(\d+))?', part)
+        if not match or int(match.group(1)) > int(match.group(2) or match.group(1)):
+            raise ValueError(f"無效的投影片範圍: {part}")
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        if start < 1 or end > total:
+            raise ValueError(f"投影片範圍 {part} 不存在（有效範圍: 1-{total}）")
+        numbers.update(range(start, end + 1))
+    return sorted(numbers)
+
+
+def _set_default_run_font(defRPr, typeface: str, sz: Optional[str]) -> None:
+    """讓預設文字屬性參照佈景主題字型
+    
+    Args:
+        defRPr: a:defRPr 元素
+        typeface: 佈景主題字型參照（+mj-lt 或 +mn-lt）
+        sz: 字體大小（百分之一 pt），None 表示不變更
+    """
+    if sz is not None:
+        defRPr.set('sz', sz)
+    
+    latin = defRPr.find('a:latin', PML_NAMESPACES)
+    if latin is None:
+        latin = etree.Element(f"{{{PML_NAMESPACES['a']}}}latin")
+        # a:latin 必須位於 a:ea / a:cs / a:sym / 超連結 / extLst 之前
+        following = [
+            child for child in defRPr
+            if etree.QName(child).localname in LATIN_FOLLOWING_SIBLINGS
+        ]
+        if following:
+            following[0].addprevious(latin)
+        else:
+            defRPr.append(latin)
+    latin.set('typeface', typeface)
+
+
+def _strip_font_overrides(element, strip_size: bool) -> int:
+    """移除元素內文字的拉丁字型（及大小）覆寫
+    
+    Args:
+        element: 投影片、版面配置或母片的根元素
+        strip_size: 是否一併移除 sz 屬性
+        
+    Returns:
+        int: 移除的覆寫數量
+    """
+    stripped = 0
+    sp_tree = element.find('p:cSld/p:spTree', PML_NAMESPACES)
+    if sp_tree is None:
+        return 0
+    
+    for props in _RUN_PROPERTIES(sp_tree):
+        latin = props.find('a:latin', PML_NAMESPACES)
+        if latin is not None:
+            props.remove(latin)
+            stripped += 1
+        if strip_size and props.get('sz') is not None:
+            del props.attrib['sz']
+            stripped += 1
+    return stripped
+
+
+class SpecError(ValueError):
+    """無法解析的規格行；由 iter_jsonl 產出而不拋出，add_slides 將其計為無效規格"""
+
+
+def iter_jsonl(path: str) -> Iterator[Any]:
+    """逐行讀取 JSONL 檔案
+    
+    Args:
+        path: JSONL 檔案路徑
+        
+    Yields:
+        Any: 每一行解析後的物件（略過空白行）；無法解析的行產出 SpecError，
+            讓呼叫端略過該行並繼續處理
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield SpecError(f"第 {line_number} 行不是有效的 JSON: {e.msg}")
+
+
 def main() -> None:
     """主函數"""
     parser = argparse.ArgumentParser(
@@ -374,8 +1183,17 @@ def main() -> None:
   # 新增投影片
   python ppt_editor.py presentation.pptx add-slide "新投影片標題"
   
+  # 由 JSONL 規格檔批次新增投影片
+  python ppt_editor.py presentation.pptx add-slides slides.jsonl
+  
   # 刪除投影片
   python ppt_editor.py presentation.pptx delete-slide 5
+  
+  # 整份簡報統一字體
+  python ppt_editor.py presentation.pptx normalize-fonts "Noto Sans" --size 20
+  
+  # 複製投影片 2 共 10 份
+  python ppt_editor.py presentation.pptx duplicate-slide 2 --count 10
         '''
     )
     
@@ -409,6 +1227,10 @@ def main() -> None:
     addslide_parser.add_argument('--layout', type=int, default=DEFAULT_LAYOUT_INDEX, 
                                 help='版面配置索引（預設1）')
     
+    # add-slides: 批次新增投影片
+    addslides_parser = subparsers.add_parser('add-slides', help='由 JSONL 規格檔批次新增投影片')
+    addslides_parser.add_argument('specs', help='JSONL 檔案路徑（每行一張投影片的規格）')
+    
     # delete-slide: 刪除投影片
     delete_parser = subparsers.add_parser('delete-slide', help='刪除投影片')
     delete_parser.add_argument('slide', type=int, help='投影片編號')
@@ -417,6 +1239,17 @@ def main() -> None:
     info_parser = subparsers.add_parser('info', help='查看投影片詳細資訊')
     info_parser.add_argument('slide', type=int, help='投影片編號')
     
+    # normalize-fonts: 統一整份簡報字體
+    normalize_parser = subparsers.add_parser('normalize-fonts', help='統一整份簡報字體（改寫佈景主題與母片）')
+    normalize_parser.add_argument('font', help='字體名稱')
+    normalize_parser.add_argument('--size', type=int, help='字體大小（pt）')
+    normalize_parser.add_argument('--slides', help='清除覆寫的投影片範圍，如 1-5,8（不指定則全部）')
+    
+    # duplicate-slide: 複製投影片
+    duplicate_parser = subparsers.add_parser('duplicate-slide', help='複製投影片')
+    duplicate_parser.add_argument('slide', type=int, help='投影片編號')
+    duplicate_parser.add_argument('--count', type=int, default=1, help='複製份數（預設1）')
+    
     # set-font: 設定字體
     font_parser = subparsers.add_parser('set-font', help='設定投影片字體')
     font_parser.add_argument('slide', type=int, help='投影片編號')
@@ -429,6 +1262,19 @@ def main() -> None:
         parser.print_help()
         return
     
+    # 唯讀命令直接讀取 XML，不載入整份簡報
+    if args.command in ('list', 'info'):
+        try:
+            with PPTReader(args.file) as reader:
+                if args.command == 'list':
+                    reader.list_slides()
+                else:
+                    reader.get_slide_info(args.slide)
+        except (FileNotFoundError, ValueError, RuntimeError) as e:
+            print(f"{ERROR_SYMBOL} {e}")
+            sys.exit(1)
+        return
+    
     # 載入簡報
     try:
         editor = PPTEditor(args.file)
@@ -438,11 +1284,7 @@ def main() -> None:
     
     # 執行命令
     try:
-        if args.command == 'list':
-            editor.list_slides()
-            return
-        
-        elif args.command == 'replace':
+        if args.command == 'replace':
             editor.replace_text(args.old, args.new, args.slide)
         
         elif args.command == 'update-title':
@@ -454,16 +1296,21 @@ def main() -> None:
         elif args.command == 'add-slide':
             editor.add_slide(args.title, args.layout)
         
+        elif args.command == 'add-slides':
+            editor.add_slides(iter_jsonl(args.specs))
+        
         elif args.command == 'delete-slide':
             editor.delete_slide(args.slide)
         
-        elif args.command == 'info':
-            editor.get_slide_info(args.slide)
-            return
+        elif args.command == 'duplicate-slide':
+            editor.duplicate_slide(args.slide, args.count)
         
         elif args.command == 'set-font':
             editor.set_font(args.slide, args.font, args.size)
         
+        elif args.command == 'normalize-fonts':
+            editor.normalize_fonts(args.font, args.size, args.slides)
+        
         # 儲存
         editor.save(args.output)
         
@@ -134,39 +134,6 @@ def add_shape(self, slide_number: int, shape_type: str = 'rectangle',
         print(f"{ERROR_SYMBOL} 添加形狀失敗: {e}")
         return False
 
-def duplicate_slide(self, slide_number: int) -> bool:
-    """複製投影片
-    
-    Args:
-        slide_number: 要複製的投影片編號（從 1 開始）
-        
-    Returns:
-        bool: 是否成功複製
-    """
-    if not self._validate_slide_number(slide_number):
-        return False
-    
-    try:
-        import copy
-        source_slide = self.prs.slides[slide_number - 1]
-        
-        # 使用相同的版面配置創建新投影片
-        blank_slide_layout = source_slide.slide_layout
-        new_slide = self.prs.slides.add_slide(blank_slide_layout)
-        
-        # 複製所有形狀
-        for shape in source_slide.shapes:
-            el = shape.element
-            newel = copy.deepcopy(el)
-            new_slide.shapes._spTree.insert_element_before(newel, 'p:extLst')
-        
-        new_number = len(self.prs.slides)
-        print(f"{SUCCESS_SYMBOL} 已複製投影片 {slide_number} → 投影片 {new_number}")
-        return True
-    except Exception as e:
-        print(f"{ERROR_SYMBOL} 複製投影片失敗: {e}")
-        return False
-
 def set_background_color(self, slide_number: int, color: tuple) -> bool:
     """設定投影片背景顏色
     
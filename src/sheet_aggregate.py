@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sheet Aggregate
+工作表分組彙總：依一或多個欄位分組，計算 sum、count、mean、min、max 與不重複值數
+
+資料只走訪一次，每個分組的狀態大小固定；分組數超過上限時將已排序的分組寫入暫存檔，
+最後合併所有暫存檔，記憶體用量與行數及分組數無關。
+分組與樞紐分析表相同：文字不分大小寫，1 與 1.0 相同，空白自成一組。
+"""
+
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Iterator
+import re
+import datetime
+
+from .sheet_analytics import HyperLogLog, value_type, value_hash
+from .sheet_query import Condition, match_key, sort_value
+from .spill_runs import SpillRuns
+
+# 支援的彙總函數
+AGGREGATES = ('sum', 'count', 'mean', 'min', 'max', 'distinct')
+
+# 記憶體中最多保留的分組數，超過時寫入暫存檔
+DEFAULT_MAX_GROUPS = 100000
+
+# 不重複值數：每組先記錄確切的雜湊值，超過這個數量後改用 HyperLogLog 估計
+DISTINCT_EXACT_LIMIT = 256
+DISTINCT_PRECISION = 10
+
+_AGGREGATE_TEXT = re.compile(r'^\s*(\w+)\s*(?:\(\s*(.*?)\s*\))?\s*$')
+
+
+def parse_aggregates(aggregates: Any) -> List[Tuple[str, Optional[str]]]:
+    """解析彙總欄位
+
+    Args:
+        aggregates: "sum(金額), count, distinct(客戶)"、其清單、
+            [[函數, 欄位], ...] 或 {欄位: 函數或函數清單}；
+            count 不指定欄位（或為 *）時計算列數，指定欄位時計算非空白值
+
+    Returns:
+        List[Tuple[str, Optional[str]]]: [(函數, 欄位)]，欄位為 None 表示整列
+
+    Raises:
+        ValueError: 格式錯誤或不支援的函數時
+    """
+    if not aggregates:
+        return [('count', None)]
+    if isinstance(aggregates, dict):
+        items = [
+            (function, column)
+            for column, functions in aggregates.items()
+            for function in ([functions] if isinstance(functions, str) else functions)
+        ]
+    elif isinstance(aggregates, str):
+        items = [_parse_aggregate_text(text) for text in _split_top_level(aggregates)]
+    else:
+        items = []
+        for item in aggregates:
+            if isinstance(item, str):
+                items.extend(_parse_aggregate_text(text) for text in _split_top_level(item))
+            elif isinstance(item, (list, tuple)) and len(item) in (1, 2):
+                items.append((item[0], item[1] if len(item) == 2 else None))
+            else:
+                raise ValueError(f"彙總格式應為 [函數, 欄位]: {item!r}")
+
+    result = []
+    for function, column in items:
+        function = str(function).strip().lower()
+        if function not in AGGREGATES:
+            raise ValueError(f"不支援的彙總函數: {function}（可用: {', '.join(AGGREGATES)}）")
+        if column is not None and str(column).strip() in ('', '*'):
+            column = None
+        if column is None and function != 'count':
+            raise ValueError(f"{function} 需要指定欄位")
+        result.append((function, None if column is None else str(column)))
+    return result
+
+
+def _split_top_level(text: str) -> List[str]:
+    """以括號外的逗號分隔"""
+    parts, depth, start = [], 0, 0
+    for position, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:position])
+            start = position + 1
+    parts.append(text[start:])
+    return [part for part in parts if part.strip()]
+
+
+def _parse_aggregate_text(text: str) -> Tuple[str, Optional[str]]:
+    match = _AGGREGATE_TEXT.match(text)
+    if not match:
+        raise ValueError(f"無效的彙總: {text.strip()}（格式如 sum(金額)）")
+    return match.group(1), match.group(2)
+
+
+def aggregate_label(function: str, column: Optional[str]) -> str:
+    """結果的欄位名稱，如 sum(金額)、count"""
+    return function if column is None else f'{function}({column})'
+
+
+class GroupAggregator:
+    """串流分組彙總
+
+    每個分組保存 [第一次出現的分組值, 各彙總的狀態]；狀態可以合併，
+    因此分組可以分批寫入暫存檔，最後依分組鍵合併。
+    """
+
+    def __init__(
+        self,
+        group_columns: List[int],
+        metrics: List[Tuple[str, Optional[int]]],
+        conditions: Iterable[Condition] = (),
+        max_groups: int = DEFAULT_MAX_GROUPS
+    ) -> None:
+        """
+        Args:
+            group_columns: 分組欄位索引（從 0 開始），空清單表示全部為一組
+            metrics: [(函數, 欄位索引)]，欄位索引為 None 表示整列（count）
+            conditions: 只彙總符合所有條件的列
+            max_groups: 記憶體中最多保留的分組數
+        """
+        if max_groups < 1:
+            raise ValueError("max_groups 必須大於 0")
+        self.group_columns = group_columns
+        self.metrics = metrics
+        self.conditions = list(conditions)
+        self.max_groups = max_groups
+        self.rows = 0
+        self.spilled = 0
+        self._groups: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._runs = SpillRuns('aggregate-', combine=self._merge)
+
+    def add(self, values: List[Any]) -> None:
+        """加入一列"""
+        if self.conditions and not all(condition.matches(values) for condition in self.conditions):
+            return
+        self.rows += 1
+        width = len(values)
+        key = tuple(sort_value(values[index] if index < width else None) for index in self.group_columns)
+        group = self._groups.get(key)
+        if group is None:
+            if len(self._groups) >= self.max_groups:
+                self._spill()
+            group = self._groups[key] = [
+                [values[index] if index < width else None for index in self.group_columns]
+            ] + [_new_state(function) for function, _ in self.metrics]
+
+        for position, (function, index) in enumerate(self.metrics, 1):
+            if index is None:
+                group[position] += 1
+                continue
+            value = values[index] if index < width else None
+            if value is None or value == '':
+                continue
+            if function == 'count':
+                group[position] += 1
+            elif function in ('sum', 'mean'):
+                if value_type(value) == 'number':
+                    state = group[position]
+                    state[0] += value
+                    state[1] += 1
+            elif function in ('min', 'max'):
+                _add_extreme(group[position], value, function == 'max')
+            else:
+                group[position] = _add_distinct(group[position], value)
+
+    def results(self) -> Iterator[List[Any]]:
+        """依分組鍵排序產出 [分組值..., 彙總結果...]（產出完畢後移除暫存檔）"""
+        try:
+            if not self._runs:
+                if not self._groups and not self.group_columns:
+                    # 沒有分組欄位時即使沒有資料也產出一列（count 為 0）
+                    yield self._result([[]] + [_new_state(function) for function, _ in self.metrics])
+                for key in sorted(self._groups):
+                    yield self._result(self._groups[key])
+                return
+
+            self._spill()
+            for _, group in self._runs.merged():
+                yield self._result(group)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """移除暫存檔"""
+        self._runs.close()
+        self._groups = {}
+
+    def _spill(self) -> None:
+        """將記憶體中的分組依鍵排序寫入一個排序段"""
+        if not self._groups:
+            return
+        self._runs.write((key, self._groups[key]) for key in sorted(self._groups))
+        self._groups = {}
+        self.spilled += 1
+
+    def _merge(self, group: List[Any], other: List[Any]) -> List[Any]:
+        """將另一批相同分組的狀態併入 group 並傳回 group"""
+        for position, (function, index) in enumerate(self.metrics, 1):
+            state, other_state = group[position], other[position]
+            if function == 'count':
+                group[position] = state + other_state
+            elif function in ('sum', 'mean'):
+                state[0] += other_state[0]
+                state[1] += other_state[1]
+            elif function in ('min', 'max'):
+                for value in other_state:
+                    if value is not None:
+                        _add_extreme(state, value, function == 'max')
+            else:
+                group[position] = _merge_distinct(state, other_state)
+        return group
+
+    def _result(self, group: List[Any]) -> List[Any]:
+        row = list(group[0])
+        for position, (function, _) in enumerate(self.metrics, 1):
+            state = group[position]
+            if function == 'count':
+                row.append(state)
+            elif function == 'sum':
+                row.append(state[0] if state[1] else None)
+            elif function == 'mean':
+                row.append(state[0] / state[1] if state[1] else None)
+            elif function in ('min', 'max'):
+                # 與 Excel 的 MIN / MAX 相同只比較數字；欄位沒有數字時比較日期
+                row.append(state[0] if state[0] is not None else state[1])
+            else:
+                row.append(len(state) if isinstance(state, set) else state.count())
+        return row
+
+
+def _new_state(function: str) -> Any:
+    if function == 'count':
+        return 0
+    if function in ('sum', 'mean'):
+        return [0, 0]
+    if function in ('min', 'max'):
+        return [None, None]  # [數字, 日期]
+    return set()
+
+
+def _add_extreme(state: List[Any], value: Any, maximum: bool) -> None:
+    """更新最小 / 最大值（數字與日期分開比較，其他類型略過）"""
+    kind = value_type(value)
+    if kind == 'number':
+        slot = 0
+    elif kind == 'date' and isinstance(value, datetime.date):
+        slot = 1
+        if type(value) is datetime.date:
+            value = datetime.datetime.combine(value, datetime.time())
+    else:
+        return
+    current = state[slot]
+    if current is None or (value > current if maximum else value < current):
+        state[slot] = value
+
+
+def _add_distinct(state: Any, value: Any) -> Any:
+    """加入一個值到不重複值狀態（確切的雜湊集合，太大時改為 HyperLogLog）"""
+    hashed = value_hash(match_key(value))
+    if isinstance(state, set):
+        state.add(hashed)
+        if len(state) <= DISTINCT_EXACT_LIMIT:
+            return state
+        sketch = HyperLogLog(DISTINCT_PRECISION)
+        for item in state:
+            sketch.add(item)
+        return sketch
+    state.add(hashed)
+    return state
+
+
+def _merge_distinct(state: Any, other: Any) -> Any:
+    if isinstance(state, set) and isinstance(other, set):
+        state |= other
+        if len(state) <= DISTINCT_EXACT_LIMIT:
+            return state
+        other, state = state, HyperLogLog(DISTINCT_PRECISION)
+    elif isinstance(state, set):
+        state, other = other, state
+    if isinstance(other, set):
+        for item in other:
+            state.add(item)
+    else:
+        state.merge(other)
+    return state
+
@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sheet Analytics
+工作表串流分析：欄位統計、基數估計與熱門值
+
+所有計算都只走訪資料一次，每個欄位使用固定大小的狀態，記憶體用量與行數無關。
+"""
+
+from typing import Optional, List, Dict, Any, Tuple, Iterable
+import os
+import json
+import math
+import heapq
+import hashlib
+import datetime
+import tempfile
+
+from openpyxl.cell.cell import ERROR_CODES
+from openpyxl.utils import get_column_letter
+
+from . import constants
+
+# 快取格式版本；統計內容改變時遞增，舊快取自動失效
+CACHE_VERSION = 1
+
+# 讀取檔案計算雜湊的區塊大小
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+# HyperLogLog 暫存器數量為 2 ** 精度（12 → 4096 個，標準誤差約 1.6%）
+HLL_PRECISION = 12
+
+# SpaceSaving 追蹤的候選值數量為 top_k 的倍數（至少 SPACE_SAVING_MIN_CAPACITY 個）
+SPACE_SAVING_FACTOR = 10
+SPACE_SAVING_MIN_CAPACITY = 100
+
+# 儲存格值的類型
+VALUE_TYPES = ('number', 'text', 'bool', 'date', 'error')
+
+_TYPE_NAMES = {
+    bool: 'bool',
+    int: 'number',
+    float: 'number',
+    datetime.datetime: 'date',
+    datetime.date: 'date',
+    datetime.time: 'date',
+    datetime.timedelta: 'date',
+}
+
+_MASK64 = (1 << 64) - 1
+
+
+def value_type(value: Any) -> str:
+    """取得儲存格值的類型（VALUE_TYPES 之一）"""
+    kind = _TYPE_NAMES.get(type(value))
+    if kind is not None:
+        return kind
+    if isinstance(value, str):
+        return 'error' if value in ERROR_CODES else 'text'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+        return 'date'
+    return 'text'
+
+
+def value_key(value: Any) -> Tuple[str, Any]:
+    """取得比較用的值：型別不同的值不相等（True 與 1 不同），整數值的浮點數等於整數"""
+    kind = value_type(value)
+    if kind == 'number' and isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return kind, value
+
+
+def value_hash(key: Tuple[str, Any]) -> int:
+    """值的 64 位元雜湊（跨行程穩定，不受 PYTHONHASHSEED 影響）
+
+    數值以 Python 的數值雜湊（與型別無關、不隨機化）再經 splitmix64 打散，
+    其他值以 blake2b 計算。
+    """
+    kind, value = key
+    if kind == 'number':
+        mixed = (hash(value) + 0x9E3779B97F4A7C15) & _MASK64
+        mixed = ((mixed ^ (mixed >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        mixed = ((mixed ^ (mixed >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return mixed ^ (mixed >> 31)
+    text = value if kind in ('text', 'error') else repr(value)
+    digest = hashlib.blake2b(f'{kind}:{text}'.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HyperLogLog:
+    """HyperLogLog 基數估計，固定使用 2 ** precision 個位元組"""
+
+    def __init__(self, precision: int = HLL_PRECISION) -> None:
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self._shift = 64 - precision
+        self._mask = (1 << self._shift) - 1
+
+    def add(self, hashed: int) -> None:
+        """加入一個 64 位元雜湊值"""
+        index = hashed >> self._shift
+        rank = self._shift - (hashed & self._mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """合併另一個相同精度的估計（結果等於兩者所有值的估計）"""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """估計不重複值的數量"""
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # 小基數時以線性計數修正
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+
+class SpaceSaving:
+    """SpaceSaving 熱門值估計：只追蹤固定數量的候選值
+
+    候選值已滿時，新值取代目前次數最少的候選值並繼承其次數（記為誤差）；
+    出現次數超過 總數 / capacity 的值一定會被保留。
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        # (次數, 序號, 值) 的最小堆積；次數可能落後實際值，取出時再更新
+        self._heap: List[Tuple[int, int, Any]] = []
+        self._sequence = 0
+
+    def add(self, item: Any) -> None:
+        """加入一個值"""
+        counts = self.counts
+        if item in counts:
+            counts[item] += 1
+            return
+        if len(counts) < self.capacity:
+            counts[item] = 1
+            self.errors[item] = 0
+            self._push(1, item)
+            return
+
+        heap = self._heap
+        while True:
+            count, _, victim = heap[0]
+            if counts[victim] == count:
+                break
+            heapq.heapreplace(heap, (counts[victim], self._next(), victim))
+        heapq.heappop(heap)
+        del counts[victim]
+        del self.errors[victim]
+        counts[item] = count + 1
+        self.errors[item] = count
+        self._push(count + 1, item)
+
+    def top(self, k: int) -> List[Tuple[Any, int]]:
+        """確定出現次數最多的 k 個值
+
+        Returns:
+            List[Tuple[Any, int]]: [(值, 至少出現的次數)]，由多到少；
+                候選值從未滿過時為確切次數
+        """
+        errors = self.errors
+        return heapq.nlargest(
+            k,
+            ((item, count - errors[item]) for item, count in self.counts.items()),
+            key=lambda item: item[1]
+        )
+
+    def _push(self, count: int, item: Any) -> None:
+        heapq.heappush(self._heap, (count, self._next(), item))
+
+    def _next(self) -> int:
+        self._sequence += 1
+        return self._sequence
+
+
+class ColumnProfile:
+    """單一欄位的串流統計"""
+
+    def __init__(self, top_k: int) -> None:
+        self.top_k = top_k
+        self.count = 0
+        self.types = dict.fromkeys(VALUE_TYPES, 0)
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.total = 0
+        self.numbers = 0
+        self.first_date: Any = None
+        self.last_date: Any = None
+        self.distinct = HyperLogLog()
+        self.frequent = SpaceSaving(max(top_k * SPACE_SAVING_FACTOR, SPACE_SAVING_MIN_CAPACITY))
+
+    def add(self, value: Any) -> None:
+        """加入一個非空白值"""
+        key = value_key(value)
+        kind, value = key
+        self.count += 1
+        self.types[kind] += 1
+        if kind == 'number':
+            self.numbers += 1
+            self.total += value
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+        elif kind == 'date' and not isinstance(value, datetime.timedelta):
+            try:
+                if self.first_date is None or value < self.first_date:
+                    self.first_date = value
+                if self.last_date is None or value > self.last_date:
+                    self.last_date = value
+            except TypeError:
+                pass  # 日期與時間混合時不比較
+        self.distinct.add(value_hash(key))
+        self.frequent.add(key)
+
+    def result(self, rows: int) -> Dict[str, Any]:
+        """統計結果（可序列化為 JSON）
+
+        Args:
+            rows: 資料行數，用來計算空白數
+        """
+        return {
+            'count': self.count,
+            'nulls': rows - self.count,
+            'types': {kind: count for kind, count in self.types.items() if count},
+            'min': self.minimum,
+            'max': self.maximum,
+            'sum': self.total if self.numbers else None,
+            'mean': self.total / self.numbers if self.numbers else None,
+            'first_date': _json_scalar(self.first_date),
+            'last_date': _json_scalar(self.last_date),
+            'distinct': min(self.distinct.count(), self.count),
+            'top': [
+                {'value': _json_scalar(value), 'count': count}
+                for (_, value), count in self.frequent.top(self.top_k)
+            ],
+        }
+
+
+def profile_rows(
+    rows: Iterable[Tuple[int, List[Any]]],
+    header: bool = True,
+    top_k: int = 5
+) -> Dict[str, Any]:
+    """串流計算每個欄位的統計
+
+    Args:
+        rows: (行號, 值) 的迭代器，只包含有值的列
+        header: 第一列為欄位名稱
+        top_k: 每個欄位回傳的熱門值數量
+
+    Returns:
+        Dict[str, Any]: {'rows': 資料行數, 'header_row': 標題列行號,
+            'columns': [{'column', 'name', 'count', 'nulls', 'types', 'min', 'max', 'sum', 'mean',
+                         'first_date', 'last_date', 'distinct', 'top'}]}
+    """
+    rows = iter(rows)
+    names: List[Any] = []
+    header_row = None
+    if header:
+        first = next(rows, None)
+        if first is not None:
+            header_row, names = first
+
+    profiles: List[Optional[ColumnProfile]] = []
+    count = 0
+    for _, values in rows:
+        count += 1
+        if len(values) > len(profiles):
+            profiles.extend([None] * (len(values) - len(profiles)))
+        for index, value in enumerate(values):
+            if value is None or value == '':
+                continue
+            profile = profiles[index]
+            if profile is None:
+                profile = profiles[index] = ColumnProfile(top_k)
+            profile.add(value)
+
+    width = max(len(profiles), len(names))
+    columns = []
+    for index in range(width):
+        profile = profiles[index] if index < len(profiles) else None
+        stats = (profile or ColumnProfile(top_k)).result(count)
+        name = names[index] if index < len(names) else None
+        columns.append({
+            'column': get_column_letter(index + 1),
+            'name': None if name is None else str(name),
+            **stats,
+        })
+    return {'rows': count, 'header_row': header_row, 'columns': columns}
+
+
+def _json_scalar(value: Any) -> Any:
+    """轉換為可輸出 JSON 的值（日期時間使用 ISO 格式）"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    return value
+
+
+def file_digest(path: str) -> str:
+    """檔案內容的雜湊（作為分析結果的快取鍵）"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(kind: str, digest: str, params: Dict[str, Any]) -> str:
+    key = json.dumps([CACHE_VERSION, params], ensure_ascii=False, sort_keys=True)
+    suffix = hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(constants.CACHE_DIR, kind, f'{digest}-{suffix}.json')
+
+
+def read_cache(kind: str, digest: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """讀取快取的分析結果，不存在或損壞時為 None"""
+    try:
+        with open(_cache_path(kind, digest, params), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache(kind: str, digest: str, params: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """寫入分析結果快取（先寫暫存檔再改名，無法寫入時略過）"""
+    path = _cache_path(kind, digest, params)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
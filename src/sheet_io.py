@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sheet IO
+工作表與 CSV / Parquet 之間的串流匯入匯出
+
+資料以固定大小的批次讀寫，記憶體用量與行數無關。
+Parquet 需要安裝 pyarrow。
+"""
+
+from typing import Optional, List, Any, Iterable, Iterator
+import re
+import csv
+import json
+import decimal
+import datetime
+import itertools
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# 支援的資料格式
+DATA_FORMATS = ('csv', 'parquet')
+
+# 副檔名對應的資料格式
+_EXTENSIONS = {'.csv': 'csv', '.txt': 'csv', '.tsv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+
+# 每批讀寫的列數
+DEFAULT_BATCH_ROWS = 10000
+
+# 沒有時間部分的日期在新活頁簿中使用的格式
+DATE_FORMAT = 'yyyy-mm-dd'
+
+# CSV 的編碼（讀取時略過 BOM，寫出時加上 BOM 讓 Excel 以 UTF-8 開啟）
+CSV_ENCODING = 'utf-8-sig'
+
+_INTEGER = re.compile(r'^[+-]?\d+$')
+_FLOAT = re.compile(r'^[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?$')
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_ISO_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?$')
+
+# 整數超過這個位數時保留為文字（Excel 的數字只有 15 位有效數字，如身分證號、卡號）
+_MAX_INTEGER_DIGITS = 15
+
+
+def data_format(path: str, fmt: Optional[str] = None) -> str:
+    """決定資料檔的格式（fmt 或副檔名）
+
+    Raises:
+        ValueError: 不支援的格式，或 Parquet 但沒有安裝 pyarrow 時
+    """
+    if fmt is None:
+        suffix = path[path.rfind('.'):].lower() if '.' in path else ''
+        fmt = _EXTENSIONS.get(suffix)
+        if fmt is None:
+            raise ValueError(f"無法從副檔名判斷資料格式: {path}（可用: {', '.join(DATA_FORMATS)}）")
+    fmt = fmt.lower()
+    if fmt not in DATA_FORMATS:
+        raise ValueError(f"不支援的資料格式: {fmt}（可用: {', '.join(DATA_FORMATS)}）")
+    if fmt == 'parquet' and not HAS_PYARROW:
+        raise ValueError("Parquet 需要安裝 pyarrow: pip install pyarrow")
+    return fmt
+
+
+def infer_value(text: str) -> Any:
+    """推斷 CSV 文字的型別：數字、TRUE / FALSE、ISO 日期與時間，其他維持文字，空字串為 None"""
+    if text == '':
+        return None
+    stripped = text.strip()
+    if _INTEGER.match(stripped):
+        if len(stripped.lstrip('+-')) > _MAX_INTEGER_DIGITS or (
+                len(stripped.lstrip('+-')) > 1 and stripped.lstrip('+-').startswith('0')):
+            return text  # 前導 0 或超過 15 位（編號、電話）維持文字
+        return int(stripped)
+    if _FLOAT.match(stripped):
+        return float(stripped)
+    upper = stripped.upper()
+    if upper in ('TRUE', 'FALSE'):
+        return upper == 'TRUE'
+    try:
+        if _ISO_DATE.match(stripped):
+            return datetime.datetime.fromisoformat(stripped)
+        if _ISO_DATETIME.match(stripped):
+            return datetime.datetime.fromisoformat(stripped)
+    except ValueError:
+        pass
+    return text
+
+
+def iter_data_rows(
+    path: str,
+    fmt: Optional[str] = None,
+    infer_types: bool = False,
+    header: bool = True,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    delimiter: str = ','
+) -> Iterator[List[Any]]:
+    """逐列讀取 CSV 或 Parquet
+
+    Args:
+        path: 資料檔路徑
+        fmt: 'csv' 或 'parquet'，None 表示依副檔名
+        infer_types: CSV 的文字推斷為數字、布林值與日期（Parquet 本身有型別）
+        header: 第一列為欄位名稱（不推斷型別）；Parquet 永遠先產出欄位名稱
+        batch_rows: Parquet 每批讀取的列數
+        delimiter: CSV 的分隔字元
+
+    Yields:
+        List[Any]: 一列的值（空白為 None）
+    """
+    fmt = data_format(path, fmt)
+    if fmt == 'parquet':
+        parquet = pq.ParquetFile(path)
+        yield list(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=batch_rows):
+            columns = [[_sheet_value(value) for value in column.to_pylist()] for column in batch.columns]
+            yield from (list(values) for values in zip(*columns))
+        return
+
+    with open(path, newline='', encoding=CSV_ENCODING) as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        if header:
+            first = next(reader, None)
+            if first is None:
+                return
+            yield [value or None for value in first]
+        for values in reader:
+            if infer_types:
+                yield [infer_value(value) for value in values]
+            else:
+                yield [value or None for value in values]
+
+
+def write_data_rows(
+    path: str,
+    rows: Iterable[List[Any]],
+    fmt: Optional[str] = None,
+    header: bool = True,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    delimiter: str = ','
+) -> int:
+    """將列逐批寫入 CSV 或 Parquet
+
+    Args:
+        path: 輸出路徑
+        rows: 依序產出的列（第一列為欄位名稱時 header=True）
+        fmt: 'csv' 或 'parquet'，None 表示依副檔名
+        header: 第一列為欄位名稱；Parquet 沒有欄位名稱時使用欄位字母
+        batch_rows: 每批寫入的列數
+        delimiter: CSV 的分隔字元
+
+    Returns:
+        int: 寫入的資料列數（不含欄位名稱）
+
+    Raises:
+        ValueError: Parquet 欄位的值與前面的型別不同時
+    """
+    fmt = data_format(path, fmt)
+    rows = iter(rows)
+    if fmt == 'parquet':
+        return _write_parquet(path, rows, header, batch_rows)
+
+    count = 0
+    with open(path, 'w', newline='', encoding=CSV_ENCODING) as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        if header:
+            first = next(rows, None)
+            if first is None:
+                return 0
+            writer.writerow([csv_text(value) for value in first])
+        while True:
+            batch = [[csv_text(value) for value in values] for values in itertools.islice(rows, batch_rows)]
+            if not batch:
+                return count
+            writer.writerows(batch)
+            count += len(batch)
+
+
+def csv_text(value: Any) -> str:
+    """儲存格的值寫入 CSV 的文字（日期為 ISO 格式，布林值為 TRUE / FALSE）"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+        return value.date().isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _write_parquet(path: str, rows: Iterator[List[Any]], header: bool, batch_rows: int) -> int:
+    """逐批寫入 Parquet；欄位型別依第一批決定（數字一律為 double，型別混合或全部空白的欄位為文字）"""
+    names: List[str] = []
+    if header:
+        first = next(rows, None)
+        if first is None:
+            return 0
+        names = ['' if value is None else str(value) for value in first]
+
+    writer = None
+    schema = None
+    count = 0
+    try:
+        while True:
+            batch = list(itertools.islice(rows, batch_rows))
+            if not batch and writer is not None:
+                return count
+            width = max([len(names)] + [len(values) for values in batch])
+            columns = [
+                [values[index] if index < len(values) else None for values in batch]
+                for index in range(width)
+            ]
+            if schema is None:
+                names = _column_names(names, width)
+                schema = pa.schema([
+                    pa.field(name, _arrow_type(column)) for name, column in zip(names, columns)
+                ])
+                writer = pq.ParquetWriter(path, schema)
+            elif width > len(schema):
+                raise ValueError(f"第 {count + 1} 列之後的欄位數超過 {len(schema)} 欄，無法寫入 Parquet")
+
+            arrays = []
+            for field, column in zip(schema, columns + [[None] * len(batch)] * (len(schema) - width)):
+                try:
+                    arrays.append(pa.array(_arrow_values(column, field.type), type=field.type))
+                except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+                    raise ValueError(
+                        f"欄位「{field.name}」在第 {count + 1}-{count + len(batch)} 列有與前面型別不同的值，"
+                        f"無法寫入 Parquet（可改為匯出 CSV）"
+                    ) from None
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            count += len(batch)
+            if not batch:
+                return count
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _column_names(names: List[str], width: int) -> List[str]:
+    """Parquet 的欄位名稱：空白時使用欄位字母，重複時加上欄位字母"""
+    result: List[str] = []
+    for index in range(width):
+        name = names[index] if index < len(names) and names[index] else get_column_letter(index + 1)
+        if name in result:
+            name = f'{name}_{get_column_letter(index + 1)}'
+        result.append(name)
+    return result
+
+
+def _arrow_type(column: List[Any]) -> Any:
+    """依第一批的值決定 Parquet 欄位型別"""
+    values = [value for value in column if value is not None and value != '']
+    if not values:
+        return pa.string()
+    kinds = {_value_kind(value) for value in values}
+    if len(kinds) > 1:
+        return pa.string()
+    kind = kinds.pop()
+    if kind == 'number':
+        return pa.float64()  # Excel 的數字都是浮點數
+    if kind == 'bool':
+        return pa.bool_()
+    if kind == 'datetime':
+        return pa.timestamp('us')
+    if kind == 'date':
+        return pa.date32()
+    if kind == 'time':
+        return pa.time64('us')
+    if kind == 'duration':
+        return pa.duration('us')
+    return pa.string()
+
+
+def _value_kind(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, datetime.datetime):
+        return 'datetime'
+    if isinstance(value, datetime.date):
+        return 'date'
+    if isinstance(value, datetime.time):
+        return 'time'
+    if isinstance(value, datetime.timedelta):
+        return 'duration'
+    return 'text'
+
+
+def _arrow_values(column: List[Any], arrow_type: Any) -> List[Any]:
+    """轉換為欄位型別可接受的值（文字欄位的值一律轉為文字）"""
+    if arrow_type == pa.string():
+        return [None if value is None or value == '' else csv_text(value) for value in column]
+    if arrow_type == pa.float64():
+        return [None if value is None or value == '' else _number(value) for value in column]
+    return [None if value == '' else value for value in column]
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(value)
+    return float(value)
+
+
+def _sheet_value(value: Any) -> Any:
+    """Parquet 的值轉換為儲存格可接受的值"""
+    if value is None or isinstance(value, (str, bool, int, float, datetime.date,
+                                           datetime.time, datetime.timedelta)):
+        if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+            return value.replace(tzinfo=None)  # Excel 不支援時區
+        return value
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def create_workbook(path: str, sheet_name: str, rows: Iterable[List[Any]]) -> int:
+    """以 openpyxl 的 write-only 模式建立只有一個工作表的新活頁簿
+
+    逐列寫出，記憶體用量與行數無關；以 = 開頭的文字寫成文字，不會變成公式，
+    沒有時間部分的日期使用日期格式。
+
+    Returns:
+        int: 寫入的列數
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    count = 0
+    for values in rows:
+        cells = []
+        for value in values:
+            if isinstance(value, str) and value.startswith('='):
+                cell = WriteOnlyCell(ws, value)
+                cell.data_type = 's'
+                value = cell
+            elif isinstance(value, datetime.datetime) and value.time() == datetime.time():
+                cell = WriteOnlyCell(ws, value)
+                cell.number_format = DATE_FORMAT
+                value = cell
+            cells.append(value)
+        ws.append(cells)
+        count += 1
+    wb.save(path)
+    return count
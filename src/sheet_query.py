@@ -0,0 +1,523 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sheet Query
+工作表查詢：條件篩選、欄位選擇、排序，以及可重複使用的欄位索引
+
+條件比較與 Excel 篩選相同：文字不分大小寫，只有相同類型的值能比較大小
+（數字與數字、文字與文字、日期與日期），空白儲存格只符合 !=。
+"""
+
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Iterator, Set, Callable
+import re
+import bisect
+import heapq
+import hashlib
+import datetime
+import itertools
+
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+from .sheet_analytics import value_key
+
+# 支援的比較運算子（<> 視為 !=）
+OPERATORS = ('=', '!=', '>', '>=', '<', '<=', 'contains', 'in')
+
+# 索引類型：hash 支援 = 與 in；sorted 另外支援大小比較
+INDEX_KINDS = ('hash', 'sorted')
+
+# 多欄位鍵摘要的長度（位元組）；128 位元，不同鍵碰撞的機率可以忽略
+KEY_DIGEST_SIZE = 16
+
+# 排序時各類型的先後（與 Excel 相同：數字、文字、邏輯值、錯誤值，空白永遠在最後）
+_SORT_RANKS = {'number': 0, 'date': 1, 'text': 2, 'bool': 3}
+_BLANK_RANK = 9
+
+_MISSING = object()
+
+_COMPARE = {
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+}
+
+_TOKEN = re.compile(
+    r'\s*(?:'
+    r'(?P<string>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
+    r'|(?P<symbol>>=|<=|!=|<>|=|>|<|,|\(|\))'
+    r'|(?P<word>[^\s=<>!,()"\']+)'
+    r')'
+)
+_NUMBER = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$')
+_COLUMN_LETTERS = re.compile(r'^[A-Za-z]{1,3}$')
+
+
+def parse_where(where: Any) -> List[Tuple[str, str, Any]]:
+    """解析查詢條件（多個條件為 AND）
+
+    Args:
+        where: 條件字串（如 "地區 = APAC and 金額 > 10000"、"狀態 in (待辦, 進行中)"）、
+            [[欄位, 運算子, 值], ...] 或 {欄位: 值}（相等）
+
+    Returns:
+        List[Tuple[str, str, Any]]: [(欄位, 運算子, 值)]
+
+    Raises:
+        ValueError: 條件格式錯誤時
+    """
+    if where is None or where == '':
+        return []
+    if isinstance(where, dict):
+        return [(str(column), '=', value) for column, value in where.items()]
+    if isinstance(where, str):
+        return _parse_where_text(where)
+
+    conditions = []
+    for condition in where:
+        if not isinstance(condition, (list, tuple)) or len(condition) != 3:
+            raise ValueError(f"條件格式應為 [欄位, 運算子, 值]: {condition!r}")
+        column, op, value = condition
+        op = _normalise_operator(str(op))
+        if op == 'in' and not isinstance(value, (list, tuple)):
+            raise ValueError("in 的值必須是清單")
+        conditions.append((str(column), op, value))
+    return conditions
+
+
+def _normalise_operator(op: str) -> str:
+    op = op.strip().lower()
+    op = {'<>': '!=', '==': '='}.get(op, op)
+    if op not in OPERATORS:
+        raise ValueError(f"不支援的運算子: {op}（可用: {', '.join(OPERATORS)}）")
+    return op
+
+
+def _parse_where_text(text: str) -> List[Tuple[str, str, Any]]:
+    """解析條件字串：欄位名稱可含空白，含運算子字元的值需加引號"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"無法解析條件: {text[position:]}")
+        position = match.end()
+        if match.group('string'):
+            tokens.append(('string', _unquote(match.group('string'))))
+        elif match.group('symbol'):
+            tokens.append(('symbol', match.group('symbol')))
+        else:
+            tokens.append(('word', match.group('word')))
+
+    clauses: List[List[Tuple[str, str]]] = [[]]
+    for token in tokens:
+        if token[0] == 'word' and token[1].lower() == 'and':
+            clauses.append([])
+        else:
+            clauses[-1].append(token)
+
+    conditions = []
+    for clause in clauses:
+        split = next((
+            index for index, (kind, value) in enumerate(clause)
+            if (kind == 'symbol' and value not in ',()')
+            or (kind == 'word' and value.lower() in ('contains', 'in') and index > 0)
+        ), None)
+        if not split or split == len(clause) - 1:
+            raise ValueError(f"條件格式應為「欄位 運算子 值」: {' '.join(str(v) for _, v in clause)}")
+        column = ' '.join(str(value) for _, value in clause[:split])
+        op = _normalise_operator(clause[split][1])
+        operand = clause[split + 1:]
+        if op == 'in':
+            if operand[0] != ('symbol', '(') or operand[-1] != ('symbol', ')'):
+                raise ValueError(f"in 的值需以括號包住: {column}")
+            values = [[]]
+            for token in operand[1:-1]:
+                if token == ('symbol', ','):
+                    values.append([])
+                else:
+                    values[-1].append(token)
+            conditions.append((column, op, [_literal(tokens) for tokens in values if tokens]))
+        else:
+            conditions.append((column, op, _literal(operand)))
+    return conditions
+
+
+def _unquote(text: str) -> str:
+    return re.sub(r'\\(.)', r'\1', text[1:-1])
+
+
+def _literal(tokens: List[Tuple[str, str]]) -> Any:
+    """條件字串中的值：加引號為文字，否則依內容轉為數字、邏輯值或文字"""
+    if len(tokens) == 1 and tokens[0][0] == 'string':
+        return tokens[0][1]
+    text = ' '.join(value for _, value in tokens)
+    if _NUMBER.match(text):
+        number = float(text)
+        return int(number) if number.is_integer() and 'e' not in text.lower() else number
+    if text.upper() in ('TRUE', 'FALSE'):
+        return text.upper() == 'TRUE'
+    return text
+
+
+def _normalise(value: Any) -> Tuple[str, Any]:
+    """比較用的 (類型, 值)：文字與錯誤值不分大小寫，日期統一為 datetime"""
+    kind, value = value_key(value)
+    if kind in ('text', 'error'):
+        return 'text', value.casefold()
+    if kind == 'date' and type(value) is datetime.date:
+        return kind, datetime.datetime.combine(value, datetime.time())
+    return kind, value
+
+
+def match_key(value: Any) -> Optional[Tuple[str, Any]]:
+    """相等比較用的鍵（與條件的 = 相同：文字不分大小寫，1 與 1.0 相同），空白為 None"""
+    if value is None or value == '':
+        return None
+    return _normalise(value)
+
+
+def key_digest(values: List[Any], columns: Optional[List[int]] = None) -> Optional[bytes]:
+    """多欄位鍵的固定長度摘要（blake2b），各欄位的 match_key 相同時摘要相同
+
+    Args:
+        values: 一列的值
+        columns: 鍵欄位索引，None 表示整列
+
+    Returns:
+        Optional[bytes]: KEY_DIGEST_SIZE 位元組的摘要，所有鍵欄位都空白時為 None
+    """
+    if columns is None:
+        keys = [match_key(value) for value in values]
+        while keys and keys[-1] is None:
+            keys.pop()
+    else:
+        width = len(values)
+        keys = [match_key(values[index] if index < width else None) for index in columns]
+    if all(key is None for key in keys):
+        return None
+    return hashlib.blake2b(repr(keys).encode('utf-8'), digest_size=KEY_DIGEST_SIZE).digest()
+
+
+def _literal_forms(value: Any) -> Dict[str, Any]:
+    """條件值可以比較的形式 {類型: 值}；文字形式的數字與日期也能與數字、日期比較"""
+    kind, normalised = _normalise(value)
+    forms = {kind: normalised}
+    if isinstance(value, str):
+        text = value.strip()
+        if _NUMBER.match(text):
+            forms['number'] = value_key(float(text))[1]
+        elif _ISO_DATE.match(text):
+            try:
+                forms['date'] = datetime.datetime.fromisoformat(text)
+            except ValueError:
+                pass
+    return forms
+
+
+class Condition:
+    """已解析欄位的查詢條件"""
+
+    def __init__(self, column: str, index: int, op: str, value: Any) -> None:
+        self.column = column
+        self.index = index
+        self.op = op
+        self.value = value
+        if op == 'in':
+            self.forms = [_literal_forms(item) for item in value]
+        elif op == 'contains':
+            self.needle = str(value).casefold()
+        else:
+            self.forms = [_literal_forms(value)]
+
+    def matches(self, values: List[Any]) -> bool:
+        """判斷一列是否符合條件"""
+        value = values[self.index] if self.index < len(values) else None
+        if value is None or value == '':
+            return self.op == '!='
+        if self.op == 'contains':
+            text = value.casefold() if isinstance(value, str) else str(value).casefold()
+            return self.needle in text
+
+        kind, value = _normalise(value)
+        if self.op in ('=', 'in', '!='):
+            equal = any(forms.get(kind, _MISSING) == value for forms in self.forms)
+            return not equal if self.op == '!=' else equal
+        literal = self.forms[0].get(kind, _MISSING)
+        if literal is _MISSING:
+            return False
+        try:
+            return _COMPARE[self.op](value, literal)
+        except TypeError:
+            return False  # 日期與時間不比較
+
+
+def resolve_column(column: Any, names: List[Any]) -> int:
+    """欄位名稱（標題列的值，找不到時為欄位字母，如 "C"）轉為索引（從 0 開始）
+
+    Raises:
+        ValueError: 找不到欄位時
+    """
+    text = str(column)
+    for index, name in enumerate(names):
+        if name is not None and str(name) == text:
+            return index
+    if _COLUMN_LETTERS.match(text):
+        return column_index_from_string(text.upper()) - 1
+    raise ValueError(f"找不到欄位: {text}")
+
+
+def parse_order(order_by: Any) -> List[Tuple[str, bool]]:
+    """解析排序欄位
+
+    Args:
+        order_by: "金額 desc"、"-金額" 或其清單
+
+    Returns:
+        List[Tuple[str, bool]]: [(欄位, 是否遞減)]
+    """
+    if not order_by:
+        return []
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    order = []
+    for item in order_by:
+        text = str(item).strip()
+        descending = False
+        lower = text.lower()
+        if text.startswith('-'):
+            text, descending = text[1:].strip(), True
+        elif lower.endswith(' desc'):
+            text, descending = text[:-5].strip(), True
+        elif lower.endswith(' asc'):
+            text = text[:-4].strip()
+        if not text:
+            raise ValueError(f"無效的排序欄位: {item!r}")
+        order.append((text, descending))
+    return order
+
+
+def sort_value(value: Any) -> Tuple[int, Any]:
+    """排序與分組用的鍵 (類型順序, 值)：只有相同類型的值互相比較，空白排在最後"""
+    if value is None or value == '':
+        return _BLANK_RANK, 0
+    kind, value = _normalise(value)
+    if kind == 'date':
+        # datetime 依時間先後，時間與時間長度排在日期之後
+        if isinstance(value, datetime.datetime):
+            return 1, value.isoformat()
+        return 1, f'~{value}'
+    return _SORT_RANKS.get(kind, 4), value
+
+
+class _OrderKey:
+    """多欄位排序鍵：每個欄位可個別遞減，空白永遠排在最後"""
+
+    __slots__ = ('keys', 'descending')
+
+    def __init__(self, keys: List[Tuple[int, Any]], descending: List[bool]) -> None:
+        self.keys = keys
+        self.descending = descending
+
+    def __lt__(self, other: '_OrderKey') -> bool:
+        for a, b, descending in zip(self.keys, other.keys, self.descending):
+            if a == b:
+                continue
+            if a[0] == _BLANK_RANK or b[0] == _BLANK_RANK:
+                return b[0] == _BLANK_RANK
+            return a > b if descending else a < b
+        return False
+
+    def __eq__(self, other: object) -> bool:
+        # heapq.merge 以 == 判斷鍵是否相同，再依排序段的順序維持穩定排序
+        return isinstance(other, _OrderKey) and self.keys == other.keys
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def row_sort_key(order: List[Tuple[int, bool]]) -> Callable[[List[Any]], Any]:
+    """多欄位排序的鍵函數（產生的鍵可序列化，供外部排序寫入暫存檔）
+
+    Args:
+        order: [(欄位索引, 是否遞減)]
+
+    Returns:
+        Callable[[List[Any]], Any]: 一列的值 -> 排序鍵；全部遞增時為 tuple，否則為 _OrderKey
+    """
+    columns = [index for index, _ in order]
+    descending = [item[1] for item in order]
+
+    if not any(descending):
+        def key(values: List[Any]) -> Any:
+            width = len(values)
+            return tuple(sort_value(values[index] if index < width else None) for index in columns)
+        return key
+
+    def order_key(values: List[Any]) -> Any:
+        width = len(values)
+        return _OrderKey([sort_value(values[index] if index < width else None) for index in columns], descending)
+    return order_key
+
+
+def run_query(
+    rows: Iterable[Tuple[int, List[Any]]],
+    conditions: List[Condition],
+    columns: Optional[List[int]] = None,
+    order: Optional[List[Tuple[int, bool]]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> Tuple[List[Tuple[int, List[Any]]], bool]:
+    """篩選、排序並選取欄位
+
+    沒有排序時找到足夠的結果就停止讀取；有排序與 limit 時只保留前 offset + limit 筆。
+
+    Args:
+        rows: (行號, 值) 的迭代器（不含標題列）
+        conditions: 查詢條件（AND）
+        columns: 要回傳的欄位索引，None 表示整列
+        order: [(欄位索引, 是否遞減)]
+        limit: 最多回傳的筆數，None 表示全部
+        offset: 略過前幾筆
+
+    Returns:
+        Tuple[List[Tuple[int, List[Any]]], bool]: ([(行號, 值)], 是否還有更多符合的列)
+    """
+    matched = 0
+
+    def matching() -> Iterator[Tuple[int, List[Any]]]:
+        nonlocal matched
+        for row, values in rows:
+            if all(condition.matches(values) for condition in conditions):
+                matched += 1
+                yield row, values
+
+    stop = None if limit is None else offset + limit
+    if order:
+        row_key = row_sort_key(order)
+
+        def key(item: Tuple[int, List[Any]]) -> Any:
+            return row_key(item[1])
+
+        if stop is None:
+            results = sorted(matching(), key=key)
+        else:
+            results = heapq.nsmallest(stop, matching(), key=key)
+        results = results[offset:]
+        more = stop is not None and matched > stop
+    else:
+        results = list(itertools.islice(matching(), offset, None if stop is None else stop + 1))
+        more = stop is not None and len(results) > limit
+        results = results[:limit]
+
+    selected = []
+    for row, values in results:
+        if columns is not None:
+            values = [values[index] if index < len(values) else None for index in columns]
+        selected.append((row, values))
+    return selected, more
+
+
+def _index_entry(value: Any) -> Optional[Tuple[str, Any]]:
+    """索引中的 (類型, 可序列化為 JSON 的值)；空白不建立索引"""
+    if value is None or value == '':
+        return None
+    kind, value = _normalise(value)
+    if kind == 'date':
+        if not isinstance(value, datetime.datetime):
+            # 時間與時間長度只與相同類型比較，條件值不會是這些類型
+            return 'time', str(value)
+        return kind, value.isoformat()
+    return kind, value
+
+
+def _hash_key(kind: str, value: Any) -> str:
+    return f'{kind}:{value}'
+
+
+def build_index(rows: Iterable[Tuple[int, List[Any]]], column: int, kind: str = 'hash') -> Dict[str, Any]:
+    """建立欄位索引（可序列化為 JSON）
+
+    Args:
+        rows: (行號, 值) 的迭代器（不含標題列）
+        column: 欄位索引（從 0 開始）
+        kind: 'hash'（值 -> 行號）或 'sorted'（依類型排序的值與行號）
+
+    Returns:
+        Dict[str, Any]: {'kind', 'rows'（資料行數）, 'keys'（不重複值數）, 'entries'}
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"不支援的索引類型: {kind}（可用: {', '.join(INDEX_KINDS)}）")
+
+    count = 0
+    if kind == 'hash':
+        entries: Dict[str, Any] = {}
+        for row, values in rows:
+            count += 1
+            entry = _index_entry(values[column]) if column < len(values) else None
+            if entry is not None:
+                entries.setdefault(_hash_key(*entry), []).append(row)
+        keys = len(entries)
+    else:
+        pairs: Dict[str, List[Tuple[Any, int]]] = {}
+        for row, values in rows:
+            count += 1
+            entry = _index_entry(values[column]) if column < len(values) else None
+            if entry is not None:
+                pairs.setdefault(entry[0], []).append((entry[1], row))
+        entries = {}
+        keys = 0
+        for value_kind, items in pairs.items():
+            items.sort()
+            entries[value_kind] = {'values': [value for value, _ in items], 'rows': [row for _, row in items]}
+            keys += len(set(entries[value_kind]['values']))
+    return {'kind': kind, 'rows': count, 'keys': keys, 'entries': entries}
+
+
+def index_lookup(index: Dict[str, Any], op: str, value: Any) -> Optional[Set[int]]:
+    """以索引找出可能符合條件的行號
+
+    Returns:
+        Optional[Set[int]]: 行號集合；索引不支援此運算子時為 None
+    """
+    if op not in ('=', 'in') and (index['kind'] != 'sorted' or op not in _COMPARE):
+        return None
+
+    literals = value if op == 'in' else [value]
+    rows: Set[int] = set()
+    for literal in literals:
+        for kind, form in _literal_forms(literal).items():
+            if kind == 'date':
+                form = form.isoformat()
+            if index['kind'] == 'hash':
+                rows.update(index['entries'].get(_hash_key(kind, form), ()))
+                continue
+            entries = index['entries'].get(kind)
+            if entries is None:
+                continue
+            keys = entries['values']
+            try:
+                if op in ('=', 'in'):
+                    start, stop = bisect.bisect_left(keys, form), bisect.bisect_right(keys, form)
+                elif op == '>':
+                    start, stop = bisect.bisect_right(keys, form), len(keys)
+                elif op == '>=':
+                    start, stop = bisect.bisect_left(keys, form), len(keys)
+                elif op == '<':
+                    start, stop = 0, bisect.bisect_left(keys, form)
+                else:
+                    start, stop = 0, bisect.bisect_right(keys, form)
+            except TypeError:
+                continue
+            rows.update(entries['rows'][start:stop])
+    return rows
+
+
+def column_names(names: List[Any], columns: Iterable[int]) -> List[str]:
+    """結果的欄位名稱：標題列的值，沒有標題（或標題為空白）時為欄位字母"""
+    result = []
+    for index in columns:
+        name = names[index] if index < len(names) else None
+        result.append(get_column_letter(index + 1) if name is None or name == '' else str(name))
+    return result
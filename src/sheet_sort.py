@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sheet Sort
+外部排序：在固定的記憶體預算內排序任意多列
+
+資料先累積在記憶體中，超過預算時排序後寫入暫存檔（一個「排序段」），
+最後以 k 路合併依序產出。排序是穩定的：鍵相同的項目維持加入的順序。
+"""
+
+from typing import List, Any, Tuple, Callable, Iterator
+
+from .spill_runs import SpillRuns
+
+# 預設的記憶體預算（位元組）
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# 每個項目在記憶體中的額外開銷估計（tuple、排序鍵與 bytes 物件）
+ITEM_OVERHEAD = 200
+
+
+class ExternalSorter:
+    """穩定的外部排序
+
+    項目依 add() 的順序加入，以 key(values) 排序；排序鍵與項目須可序列化。
+    """
+
+    def __init__(
+        self,
+        key: Callable[[List[Any]], Any],
+        memory_limit: int = DEFAULT_MEMORY_LIMIT
+    ) -> None:
+        """
+        Args:
+            key: 一列的值 -> 排序鍵
+            memory_limit: 記憶體中累積的項目大小上限（位元組）
+        """
+        if memory_limit < 1:
+            raise ValueError("memory_limit 必須大於 0")
+        self.key = key
+        self.memory_limit = memory_limit
+        self.count = 0
+        self.spilled = 0
+        self._buffer: List[Tuple[Any, Any]] = []
+        self._size = 0
+        self._runs = SpillRuns('sort-')
+
+    def add(self, values: List[Any], item: Any, size: int) -> None:
+        """加入一個項目
+
+        Args:
+            values: 計算排序鍵的值
+            item: 排序後產出的項目
+            size: 項目的大小估計（位元組）
+        """
+        self._buffer.append((self.key(values), item))
+        self.count += 1
+        self._size += size + ITEM_OVERHEAD
+        if self._size >= self.memory_limit:
+            self._spill()
+
+    def __iter__(self) -> Iterator[Any]:
+        """依排序鍵產出項目（產出完畢後移除暫存檔）"""
+        try:
+            if not self._runs:
+                self._buffer.sort(key=_first)
+                for _, item in self._buffer:
+                    yield item
+                return
+
+            self._spill()
+            for _, item in self._runs.merged():
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """移除暫存檔"""
+        self._runs.close()
+        self._buffer = []
+        self._size = 0
+
+    def _spill(self) -> None:
+        """將記憶體中的項目排序後寫入一個排序段（排序段依寫入順序合併，維持穩定排序）"""
+        if not self._buffer:
+            return
+        self._buffer.sort(key=_first)
+        self._runs.write(self._buffer)
+        self._buffer = []
+        self._size = 0
+        self.spilled += 1
+
+
+def _first(entry: Tuple[Any, Any]) -> Any:
+    return entry[0]
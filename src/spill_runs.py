@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Spill Runs
+外部排序與分組彙總共用的排序段暫存檔
+
+每個排序段是依鍵排序、以 pickle 逐筆寫入的 (鍵, 值) 暫存檔。排序段以固定扇入數分層合併：
+同一層累積 MERGE_FAN_IN 個排序段時合併為上一層的一個排序段，因此每筆資料只被重寫
+log(排序段數) 次，合併時同時開啟的暫存檔數也不超過扇入數。
+"""
+
+from typing import Optional, List, Any, Tuple, Callable, Iterable, Iterator
+import os
+import heapq
+import pickle
+import shutil
+import tempfile
+
+# 合併時最多同時開啟的暫存檔數，也是每一層累積多少排序段後合併
+MERGE_FAN_IN = 64
+
+
+class SpillRuns:
+    """一組排序段暫存檔
+
+    合併時鍵相同的項目依排序段寫入的先後產出，因此合併結果是穩定的；
+    指定 combine 時鍵相同的值合併為一個（中間層的合併也會合併）。
+    """
+
+    def __init__(self, prefix: str, combine: Optional[Callable[[Any, Any], Any]] = None) -> None:
+        """
+        Args:
+            prefix: 暫存目錄名稱的前綴
+            combine: (值, 鍵相同的下一個值) -> 合併後的值，None 表示不合併
+        """
+        self.prefix = prefix
+        self.combine = combine
+        self.fan_in = MERGE_FAN_IN
+        # 第 n 層的排序段各由 fan_in ** n 個寫入的排序段合併而成；層數越高資料越早寫入
+        self._levels: List[List[str]] = []
+        self._directory: Optional[str] = None
+        self._files = 0
+
+    def __len__(self) -> int:
+        """目前的排序段數"""
+        return sum(len(level) for level in self._levels)
+
+    def write(self, entries: Iterable[Tuple[Any, Any]]) -> None:
+        """寫入一個排序段
+
+        Args:
+            entries: 依鍵排序的 (鍵, 值)
+        """
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix=self.prefix)
+        if not self._levels:
+            self._levels.append([])
+        self._levels[0].append(self._write_file(entries))
+
+        level = 0
+        while len(self._levels[level]) >= self.fan_in:
+            # 這一層滿了：合併為上一層的一個排序段
+            merged = self._write_file(self._merge(self._levels[level]))
+            self._remove(self._levels[level])
+            self._levels[level] = []
+            if level + 1 == len(self._levels):
+                self._levels.append([])
+            self._levels[level + 1].append(merged)
+            level += 1
+
+    def merged(self) -> Iterator[Tuple[Any, Any]]:
+        """依鍵合併所有排序段"""
+        runs = [path for level in reversed(self._levels) for path in level]
+        while len(runs) > self.fan_in:
+            # 各層剩餘的排序段合計仍可能超過扇入數，先合併最後（最小）的幾個
+            count = min(self.fan_in, len(runs) - self.fan_in + 1)
+            merged = self._write_file(self._merge(runs[-count:]))
+            self._remove(runs[-count:])
+            runs[-count:] = [merged]
+        self._levels = [runs]
+        return self._merge(runs)
+
+    def close(self) -> None:
+        """移除暫存檔"""
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+        self._levels = []
+
+    def _merge(self, paths: List[str]) -> Iterator[Tuple[Any, Any]]:
+        """依鍵合併排序段；heapq.merge 遇到相同的鍵時先取前面的排序段"""
+        entries = heapq.merge(*(_read_run(path) for path in paths), key=_first)
+        if self.combine is None:
+            return entries
+        return _combined(entries, self.combine)
+
+    def _write_file(self, entries: Iterable[Tuple[Any, Any]]) -> str:
+        """將項目寫入新的暫存檔"""
+        path = os.path.join(self._directory, f'run{self._files}.pickle')
+        self._files += 1
+        with open(path, 'wb') as f:
+            for entry in entries:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def _remove(paths: List[str]) -> None:
+        for path in paths:
+            os.remove(path)
+
+
+def _first(entry: Tuple[Any, Any]) -> Any:
+    return entry[0]
+
+
+def _combined(
+    entries: Iterator[Tuple[Any, Any]],
+    combine: Callable[[Any, Any], Any]
+) -> Iterator[Tuple[Any, Any]]:
+    """將相鄰且鍵相同的項目合併為一個"""
+    pending = False
+    current_key, current = None, None
+    for key, value in entries:
+        if pending and key == current_key:
+            current = combine(current, value)
+            continue
+        if pending:
+            yield current_key, current
+        current_key, current, pending = key, value, True
+    if pending:
+        yield current_key, current
+
+
+def _read_run(path: str) -> Iterator[Tuple[Any, Any]]:
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+XLSX Compact
+整理 xlsx 封裝：移除沒有使用的共用字串與儲存格格式（cellXfs），並合併重複的項目
+
+經過多次自動編輯的活頁簿會累積沒有儲存格使用的字串與大量重複的格式，
+讓 openpyxl 與 Excel 載入變慢。整理時先掃描所有工作表找出用到的索引，
+再串流改寫工作表中的索引一次；工作表 XML 的其他部分原樣保留，
+其他部件直接複製壓縮資料。
+"""
+
+from typing import Optional, List, Dict, Any, Tuple, Iterator, IO
+import os
+import re
+import time
+import hashlib
+import zipfile
+
+from lxml import etree
+from openpyxl import load_workbook
+
+from .xlsx_package import (
+    REL_NS,
+    SHARED_STRINGS_RELTYPE,
+    STYLES_RELTYPE,
+    CELL_XFS_TAG,
+    XF_TAG,
+    COPY_CHUNK_SIZE,
+    find_workbook_part,
+    read_workbook_sheets,
+    copy_member_raw,
+    iter_sheet_sections,
+)
+
+CHARTSHEET_RELTYPE = REL_NS + '/chartsheet'
+
+# 合併重複字串時使用的摘要長度（位元組）
+STRING_DIGEST_SIZE = 16
+
+# 含有修訂紀錄的活頁簿：修訂紀錄也以索引參照共用字串
+_REVISIONS_PREFIX = 'xl/revisions/'
+
+_SST_START = re.compile(rb'<([\w.-]+:)?sst\b[^>]*?(/?)>')
+# 儲存格、列與欄的開始標籤；儲存格之後緊接的 <v> 一併比對（共用字串的索引）
+_ELEMENT = re.compile(rb'<((?:[\w.-]+:)?)(c|row|col)\b([^>]*?)(/?)>(?:(\s*<\1v>\s*)(\d+)(\s*</\1v>))?')
+_STYLE_ATTRIBUTES = {
+    b'c': re.compile(rb'(?<![\w:.-])(s\s*=\s*["\'])(\d+)(["\'])'),
+    b'row': re.compile(rb'(?<![\w:.-])(s\s*=\s*["\'])(\d+)(["\'])'),
+    b'col': re.compile(rb'(?<![\w:.-])(style\s*=\s*["\'])(\d+)(["\'])'),
+}
+_SHARED_STRING_TYPE = re.compile(rb'(?<![\w:.-])t\s*=\s*["\']s["\']')
+_COUNT_ATTRIBUTES = re.compile(rb'(?<![\w:.-])(count|uniqueCount)(\s*=\s*["\'])\d*(["\'])')
+
+
+def compact_package(source_path: str, output_path: str, measure_load: bool = False) -> Dict[str, Any]:
+    """整理共用字串表與儲存格格式，寫入新檔案
+
+    沒有任何儲存格使用的共用字串與格式被移除，內容相同的項目合併為一個；
+    第一個格式是預設格式，一律保留在原位置。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 輸出 xlsx 路徑
+        measure_load: 以 openpyxl 實際載入前後的檔案並記錄時間（需要完整載入兩次）
+
+    Returns:
+        Dict[str, Any]: {'strings_before', 'strings_after', 'styles_before', 'styles_after',
+            'size_before', 'size_after'}；measure_load 時另有 'load_seconds_before' 與
+            'load_seconds_after'
+
+    Raises:
+        ValueError: 活頁簿含有修訂紀錄，或儲存格參照不存在的字串或格式時
+    """
+    with zipfile.ZipFile(source_path) as zin:
+        if any(name.startswith(_REVISIONS_PREFIX) for name in zin.NameToInfo):
+            raise ValueError("活頁簿含有修訂紀錄（共用活頁簿），無法整理")
+        sheets, _ = read_workbook_sheets(zin)
+        sheet_paths = [
+            sheet['path'] for sheet in sheets
+            if sheet['type'] != CHARTSHEET_RELTYPE and sheet['path'] in zin.NameToInfo
+        ]
+        sst_path = find_workbook_part(zin, SHARED_STRINGS_RELTYPE)
+        styles_path = find_workbook_part(zin, STYLES_RELTYPE)
+        if sst_path not in zin.NameToInfo:
+            sst_path = None
+        if styles_path not in zin.NameToInfo:
+            styles_path = None
+
+        # 第一次走訪：用到的格式與字串索引
+        used_styles, used_strings = {0}, set()
+        references = 0
+        for path in sheet_paths:
+            with zin.open(path) as stream:
+                for rewrite, data in _iter_sheet_pieces(stream, path):
+                    if rewrite:
+                        references += _scan(data, used_styles, used_strings)
+
+        string_map, kept_strings, strings_before = _string_mapping(zin, sst_path, used_strings)
+        style_map, styles_xml, styles_before, styles_after = _style_mapping(zin, styles_path, used_styles)
+
+        # 第二次走訪：改寫索引
+        remap_sheets = any(old != new for old, new in string_map.items()) or \
+            any(old != new for old, new in style_map.items())
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename == styles_path and styles_xml is not None:
+                    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                    new_info.compress_type = zipfile.ZIP_DEFLATED
+                    zout.writestr(new_info, styles_xml)
+                elif info.filename == sst_path:
+                    _write_part(zout, info, _compacted_strings(zin, info, kept_strings, references))
+                elif info.filename in sheet_paths and remap_sheets:
+                    _write_part(zout, info, _remapped_sheet(zin, info, style_map, string_map))
+                else:
+                    copy_member_raw(zin, zout, info)
+
+    report = {
+        'strings_before': strings_before,
+        'strings_after': len(kept_strings),
+        'styles_before': styles_before,
+        'styles_after': styles_after,
+        'size_before': os.path.getsize(source_path),
+        'size_after': os.path.getsize(output_path),
+    }
+    if measure_load:
+        report['load_seconds_before'] = load_seconds(source_path)
+        report['load_seconds_after'] = load_seconds(output_path)
+    return report
+
+
+def load_seconds(path: str) -> float:
+    """以 openpyxl 完整載入檔案所需的時間（秒）"""
+    start = time.perf_counter()
+    wb = load_workbook(path)
+    elapsed = time.perf_counter() - start
+    wb.close()
+    return elapsed
+
+
+def _iter_sheet_pieces(stream: IO[bytes], name: str) -> Iterator[Tuple[bool, bytes]]:
+    """將工作表 XML 切成可以獨立處理的片段
+
+    Yields:
+        Tuple[bool, bytes]: (是否含有儲存格、列或欄的開始標籤, 原始 XML)；
+            依序串接即為原本的內容
+    """
+    for kind, data in iter_sheet_sections(stream, name):
+        # <sheetData> 之前的部分含欄寬與欄格式 <cols>；</sheetData> 之後的部分不參照格式與字串索引
+        yield kind != 'tail', data
+
+
+def _scan(data: bytes, used_styles: set, used_strings: set) -> int:
+    """記錄片段中用到的格式與共用字串索引
+
+    Returns:
+        int: 共用字串儲存格數
+    """
+    references = 0
+    for match in _ELEMENT.finditer(data):
+        tag, attributes = match.group(2), match.group(3)
+        style = _STYLE_ATTRIBUTES[tag].search(attributes)
+        if style:
+            used_styles.add(int(style.group(2)))
+        if match.group(6) is not None and tag == b'c' and _SHARED_STRING_TYPE.search(attributes):
+            used_strings.add(int(match.group(6)))
+            references += 1
+    return references
+
+
+def _remap(data: bytes, style_map: Dict[int, int], string_map: Dict[int, int]) -> bytes:
+    """改寫片段中的格式與共用字串索引"""
+    def replace(match: Any) -> bytes:
+        tag, attributes = match.group(2), match.group(3)
+        attributes = _STYLE_ATTRIBUTES[tag].sub(
+            lambda style: style.group(1) + str(style_map[int(style.group(2))]).encode() + style.group(3),
+            attributes, count=1
+        )
+        value = match.group(6)
+        if value is not None and tag == b'c' and _SHARED_STRING_TYPE.search(attributes):
+            value = str(string_map[int(value)]).encode()
+        result = b'<' + match.group(1) + tag + attributes + match.group(4) + b'>'
+        if value is not None:
+            result += match.group(5) + value + match.group(7)
+        return result
+
+    return _ELEMENT.sub(replace, data)
+
+
+def _remapped_sheet(
+    zin: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    style_map: Dict[int, int],
+    string_map: Dict[int, int]
+) -> Iterator[bytes]:
+    with zin.open(info) as stream:
+        for rewrite, data in _iter_sheet_pieces(stream, info.filename):
+            yield _remap(data, style_map, string_map) if rewrite else data
+
+
+def _iter_shared_strings(stream: IO[bytes]) -> Iterator[Tuple[Optional[bytes], bytes]]:
+    """串流切分共用字串表
+
+    Yields:
+        Tuple[Optional[bytes], bytes]: 第一項為 (None, 開頭到 <sst> 開始標籤)，
+            接著每個 <si> 為 (b'si', 原始 XML)，最後為 (None, 其餘部分)
+    """
+    buffer = b''
+    while True:
+        chunk = stream.read(COPY_CHUNK_SIZE)
+        buffer += chunk
+        start = _SST_START.search(buffer)
+        if start:
+            break
+        if not chunk:
+            raise ValueError("共用字串表缺少 sst")
+    yield None, buffer[:start.end()]
+    buffer = buffer[start.end():]
+    if not start.group(2):
+        prefix = re.escape(start.group(1) or b'')
+        item = re.compile(rb'\s*(<' + prefix + rb'si\b(?:[^>]*?/>|.*?</' + prefix + rb'si>))', re.S)
+        position = 0
+        exhausted = False
+        while True:
+            match = item.match(buffer, position)
+            if match:
+                yield b'si', match.group(1)
+                position = match.end()
+                continue
+            if exhausted:
+                break
+            buffer = buffer[position:]
+            position = 0
+            chunk = stream.read(COPY_CHUNK_SIZE)
+            exhausted = not chunk
+            buffer += chunk
+        buffer = buffer[position:]
+    yield None, buffer + stream.read()
+
+
+def _string_mapping(
+    zin: zipfile.ZipFile,
+    sst_path: Optional[str],
+    used: set
+) -> Tuple[Dict[int, int], set, int]:
+    """計算共用字串的新索引：只保留用到的字串，內容相同的字串合併
+
+    Returns:
+        Tuple[Dict[int, int], set, int]: ({原索引: 新索引}, 要保留的原索引, 原本的字串數)
+    """
+    mapping: Dict[int, int] = {}
+    kept = set()
+    digests: Dict[bytes, int] = {}
+    count = 0
+    if sst_path is not None:
+        with zin.open(sst_path) as stream:
+            for kind, data in _iter_shared_strings(stream):
+                if kind is None:
+                    continue
+                if count in used:
+                    digest = hashlib.blake2b(data, digest_size=STRING_DIGEST_SIZE).digest()
+                    new_index = digests.get(digest)
+                    if new_index is None:
+                        new_index = digests[digest] = len(digests)
+                        kept.add(count)
+                    mapping[count] = new_index
+                count += 1
+    missing = used - mapping.keys()
+    if missing:
+        raise ValueError(f"儲存格參照不存在的共用字串: {min(missing)}")
+    return mapping, kept, count
+
+
+def _compacted_strings(
+    zin: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    kept: set,
+    references: int
+) -> Iterator[bytes]:
+    counts = {b'count': references, b'uniqueCount': len(kept)}
+    with zin.open(info) as stream:
+        pieces = _iter_shared_strings(stream)
+        _, head = next(pieces)
+        yield _COUNT_ATTRIBUTES.sub(
+            lambda match: match.group(1) + match.group(2) + str(counts[match.group(1)]).encode() + match.group(3),
+            head
+        )
+        index = 0
+        for kind, data in pieces:
+            if kind is None:
+                yield data
+                continue
+            if index in kept:
+                yield data
+            index += 1
+
+
+def _style_mapping(
+    zin: zipfile.ZipFile,
+    styles_path: Optional[str],
+    used: set
+) -> Tuple[Dict[int, int], Optional[bytes], int, int]:
+    """計算儲存格格式的新索引：只保留用到的格式，內容相同的格式合併
+
+    Returns:
+        Tuple[Dict[int, int], Optional[bytes], int, int]:
+            ({原索引: 新索引}, 新的 styles.xml（不變時為 None）, 原本的格式數, 整理後的格式數)
+    """
+    cell_xfs = None
+    if styles_path is not None:
+        root = etree.fromstring(zin.read(styles_path))
+        cell_xfs = root.find(CELL_XFS_TAG)
+    if cell_xfs is None:
+        if used - {0}:
+            raise ValueError("儲存格參照不存在的格式")
+        return {0: 0}, None, 0, 0
+
+    xfs: List[etree._Element] = list(cell_xfs.iterchildren(XF_TAG))
+    missing = [index for index in used if index >= max(len(xfs), 1)]
+    if missing:
+        raise ValueError(f"儲存格參照不存在的格式: {min(missing)}")
+
+    mapping: Dict[int, int] = {}
+    kept: List[etree._Element] = []
+    seen: Dict[bytes, int] = {}
+    for index in sorted(used):
+        if not xfs:
+            mapping[index] = 0
+            continue
+        # 以正規化的 XML 比較，屬性順序不同的相同格式也會合併
+        key = etree.tostring(xfs[index], method='c14n', with_tail=False)
+        if key not in seen:
+            seen[key] = len(kept)
+            kept.append(xfs[index])
+        mapping[index] = seen[key]
+
+    if len(kept) == len(xfs) and all(old == new for old, new in mapping.items()):
+        return mapping, None, len(xfs), len(xfs)
+    for xf in xfs:
+        cell_xfs.remove(xf)
+    for xf in kept:
+        xf.tail = None
+        cell_xfs.append(xf)
+    cell_xfs.set('count', str(len(kept)))
+    data = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+    return mapping, data, len(xfs), len(kept)
+
+
+def _write_part(
+    zout: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    pieces: Iterator[bytes]
+) -> None:
+    """串流寫入改寫後的部件"""
+    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    new_info.compress_type = zipfile.ZIP_DEFLATED
+    with zout.open(new_info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT // 2) as dst:
+        for data in pieces:
+            dst.write(data)
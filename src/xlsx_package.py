@@ -0,0 +1,2120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+XLSX Package Helpers
+直接讀取 xlsx 封裝中的 XML 部件，不經過 openpyxl 載入整個工作簿
+
+適用於只需要中繼資料（工作表名稱、狀態、尺寸）的快速路徑。
+"""
+
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Callable, Iterable, IO
+import re
+import copy
+import math
+import datetime
+import struct
+import posixpath
+import zipfile
+
+from lxml import etree
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils import range_boundaries, column_index_from_string, get_column_letter
+from openpyxl.utils.datetime import (
+    CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601, to_excel
+)
+from openpyxl.worksheet.formula import ArrayFormula, DataTableFormula
+
+from .formula_engine import FormulaError
+
+# OOXML 命名空間
+SHEET_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_DOCUMENT_RELTYPE = REL_NS + '/officeDocument'
+WORKSHEET_RELTYPE = REL_NS + '/worksheet'
+SHARED_STRINGS_RELTYPE = REL_NS + '/sharedStrings'
+STYLES_RELTYPE = REL_NS + '/styles'
+TABLE_RELTYPE = REL_NS + '/table'
+PIVOT_TABLE_RELTYPE = REL_NS + '/pivotTable'
+CONTENT_TYPES_PATH = '[Content_Types].xml'
+CONTENT_TYPES_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+SHARED_STRINGS_CONTENT_TYPE = (
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml'
+)
+WORKSHEET_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+STYLES_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml'
+
+SHEET_TAG = f'{{{SHEET_MAIN_NS}}}sheet'
+SHEETS_TAG = f'{{{SHEET_MAIN_NS}}}sheets'
+CELL_XFS_TAG = f'{{{SHEET_MAIN_NS}}}cellXfs'
+XF_TAG = f'{{{SHEET_MAIN_NS}}}xf'
+WORKBOOK_VIEW_TAG = f'{{{SHEET_MAIN_NS}}}workbookView'
+WORKBOOK_PR_TAG = f'{{{SHEET_MAIN_NS}}}workbookPr'
+DIMENSION_TAG = f'{{{SHEET_MAIN_NS}}}dimension'
+SHEET_DATA_TAG = f'{{{SHEET_MAIN_NS}}}sheetData'
+ROW_TAG = f'{{{SHEET_MAIN_NS}}}row'
+CELL_TAG = f'{{{SHEET_MAIN_NS}}}c'
+VALUE_TAG = f'{{{SHEET_MAIN_NS}}}v'
+FORMULA_TAG = f'{{{SHEET_MAIN_NS}}}f'
+INLINE_STRING_TAG = f'{{{SHEET_MAIN_NS}}}is'
+SI_TAG = f'{{{SHEET_MAIN_NS}}}si'
+TEXT_TAG = f'{{{SHEET_MAIN_NS}}}t'
+RUN_TAG = f'{{{SHEET_MAIN_NS}}}r'
+RELATIONSHIP_TAG = f'{{{PKG_REL_NS}}}Relationship'
+OVERRIDE_TAG = f'{{{CONTENT_TYPES_NS}}}Override'
+DEFAULT_TAG = f'{{{CONTENT_TYPES_NS}}}Default'
+R_ID_ATTR = f'{{{REL_NS}}}id'
+XML_SPACE_ATTR = '{http://www.w3.org/XML/1998/namespace}space'
+
+# 工作表 XML 中出現此標記代表有行內字串（不在共用字串表中）
+INLINE_STRING_MARKER = b'inlineStr'
+
+DEFAULT_WORKBOOK_PATH = 'xl/workbook.xml'
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 部分載入時代替未載入工作表的空白工作表
+STUB_WORKSHEET = f'<worksheet xmlns="{SHEET_MAIN_NS}"><sheetData/></worksheet>'.encode()
+
+# 新增工作表時沒有樣式部件的活頁簿使用的最小樣式表
+MINIMAL_STYLESHEET = (
+    f'<styleSheet xmlns="{SHEET_MAIN_NS}">'
+    '<fonts count="1"><font/></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="1"><xf xfId="0"/></cellXfs>'
+    '</styleSheet>'
+).encode()
+
+# 新增工作表中日期時間值使用的內建數字格式
+DATE_NUMBER_FORMATS = {
+    datetime.datetime: 22,   # m/d/yy h:mm
+    datetime.date: 14,       # m/d/yy（依地區設定顯示）
+    datetime.time: 21,       # h:mm:ss
+    datetime.timedelta: 46,  # [h]:mm:ss
+}
+
+# 新增工作表時每次寫入的列數
+NEW_SHEET_BATCH_ROWS = 1000
+
+# 改寫列順序時每次解析的列數
+REWRITE_BATCH_ROWS = 1000
+
+# <row> 上的格式屬性（列高、列樣式、隱藏與大綱）
+ROW_FORMAT_ATTRIBUTES = (
+    'ht', 'customHeight', 's', 'customFormat', 'hidden', 'outlineLevel', 'collapsed', 'thickTop', 'thickBot'
+)
+
+# 原始 XML 位元組層級的比對（只用於分塊與預先篩選，實際內容仍以 lxml 解析）
+_SHEET_DATA_START = re.compile(rb'<([\w.-]+:)?sheetData\b[^>]*?(/?)>')
+_NS_DECLARATION = re.compile(rb'xmlns(:[\w.-]+)?="[^"]*"')
+_ROW_WITHOUT_NUMBER = re.compile(rb'<(?:[\w.-]+:)?row\b(?![^>]*\br=)[^>]*>')
+_VALUE_NUMBER = re.compile(rb'v>\s*(\d+)\s*<')
+# 需要解析才能判斷文字值的儲存格：公式、行內字串、錯誤值、公式字串結果
+_FORMULA_HINT = re.compile(rb'f[\s>/]')
+_TEXT_TYPE_HINT = re.compile(rb't=["\'](?:inlineStr|e|str)["\']')
+# 共用公式的主儲存格（帶有 ref 屬性的 <f>）
+_FORMULA_REF_HINT = re.compile(rb'ref=')
+_ROW_NUMBER = re.compile(rb'\br=["\'](\d+)["\']')
+_ROW_START = re.compile(rb'<(?:[\w.-]+:)?row\b([^>]*)>')
+_ATTRIBUTE = re.compile(rb'([\w:.-]+)\s*=\s*["\']([^"\']*)["\']')
+_MERGE_CELL_REF = re.compile(rb'<(?:[\w.-]+:)?mergeCell\b[^>]*?\bref=["\']([^"\']*)["\']')
+_HYPERLINK = re.compile(
+    rb'<(?:[\w.-]+:)?hyperlink\b([^>]*?)\bref=(["\'])([^"\']*)\2([^>]*?)(/?)>(?(5)|.*?</(?:[\w.-]+:)?hyperlink>)',
+    re.DOTALL
+)
+_EMPTY_HYPERLINKS = re.compile(rb'<((?:[\w.-]+:)?)hyperlinks\b[^>]*>\s*</\1hyperlinks>')
+_INVALID_SHEET_NAME = re.compile(r'[\\*?:/\[\]]')
+_DIMENSION_REF = re.compile(rb'(<(?:[\w.-]+:)?dimension\b[^>]*?\bref=["\'])([^"\']*)(["\'])')
+
+
+def rels_path(part_path: str) -> str:
+    """取得部件對應的 .rels 路徑"""
+    directory, name = posixpath.split(part_path)
+    return posixpath.join(directory, '_rels', f'{name}.rels')
+
+
+def resolve_target(part_path: str, target: str) -> str:
+    """將關聯目標解析為封裝內的絕對路徑（不含開頭的 /）"""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part_path), target))
+
+
+def read_relationships(zf: zipfile.ZipFile, part_path: str) -> Dict[str, Tuple[str, str]]:
+    """讀取部件的關聯
+
+    Returns:
+        Dict[str, Tuple[str, str]]: {rId: (關聯類型, 目標路徑)}
+    """
+    try:
+        root = etree.fromstring(zf.read(rels_path(part_path)))
+    except KeyError:
+        return {}
+    rels = {}
+    for rel in root.iter(RELATIONSHIP_TAG):
+        if rel.get('TargetMode') == 'External':
+            continue
+        rels[rel.get('Id')] = (rel.get('Type'), resolve_target(part_path, rel.get('Target')))
+    return rels
+
+
+def find_workbook_path(zf: zipfile.ZipFile) -> str:
+    """從封裝根關聯找出 workbook.xml 的位置"""
+    for reltype, target in read_relationships(zf, '').values():
+        if reltype == OFFICE_DOCUMENT_RELTYPE:
+            return target
+    return DEFAULT_WORKBOOK_PATH
+
+
+def find_workbook_part(zf: zipfile.ZipFile, reltype: str) -> Optional[str]:
+    """找出 workbook.xml 以指定關聯類型連結的部件路徑"""
+    for part_reltype, target in read_relationships(zf, find_workbook_path(zf)).values():
+        if part_reltype == reltype and target in zf.NameToInfo:
+            return target
+    return None
+
+
+def read_workbook_sheets(zf: zipfile.ZipFile) -> Tuple[List[Dict[str, str]], int]:
+    """讀取 workbook.xml 中的工作表清單
+
+    Returns:
+        Tuple[List[Dict[str, str]], int]:
+            ([{'name', 'state', 'path', 'type'}], 活動工作表索引)，
+            索引與 openpyxl 相同，包含圖表工作表
+    """
+    workbook_path = find_workbook_path(zf)
+    rels = read_relationships(zf, workbook_path)
+    root = etree.fromstring(zf.read(workbook_path))
+
+    sheets = []
+    for sheet in root.iter(SHEET_TAG):
+        reltype, path = rels.get(sheet.get(R_ID_ATTR), (None, None))
+        sheets.append({
+            'name': sheet.get('name'),
+            'state': sheet.get('state', 'visible'),
+            'path': path,
+            'type': reltype,
+        })
+
+    active_index = 0
+    view = next(root.iter(WORKBOOK_VIEW_TAG), None)
+    if view is not None:
+        active_index = int(view.get('activeTab', 0))
+
+    return sheets, active_index
+
+
+def read_dimension(zf: zipfile.ZipFile, sheet_path: str) -> Optional[Tuple[int, int]]:
+    """讀取工作表開頭的 <dimension ref=...> 紀錄
+
+    讀到 dimension（或 sheetData 開始仍未出現）就停止解析，
+    不會讀取儲存格資料。
+
+    Returns:
+        Optional[Tuple[int, int]]: (行數, 列數)，沒有 dimension 紀錄時為 None
+    """
+    with zf.open(sheet_path) as stream:
+        for _, element in etree.iterparse(stream, events=('start',)):
+            if element.tag == DIMENSION_TAG:
+                ref = element.get('ref')
+                if not ref:
+                    return None
+                try:
+                    _, _, max_col, max_row = range_boundaries(ref)
+                except (ValueError, TypeError):
+                    return None
+                return max_row, max_col
+            if element.tag == SHEET_DATA_TAG:
+                return None
+    return None
+
+
+def iter_sheet_cells(
+    zf: zipfile.ZipFile,
+    sheet_path: str
+) -> Iterator[Tuple[int, int, etree._Element]]:
+    """串流逐一讀取工作表的 <c> 元素
+
+    每讀完一列就釋放該列的元素，記憶體用量與工作表大小無關。
+    呼叫端不應保留產出的元素。
+
+    Yields:
+        Tuple[int, int, etree._Element]: (行號, 欄號, <c> 元素)
+    """
+    row_index = 0
+    with zf.open(sheet_path) as stream:
+        for _, row in etree.iterparse(stream, events=('end',), tag=ROW_TAG):
+            row_index = int(row.get('r', row_index + 1))
+            col_index = 0
+            for cell in row.iterchildren(CELL_TAG):
+                ref = cell.get('r')
+                if ref:
+                    col_index = column_index_from_string(ref.rstrip('0123456789'))
+                else:
+                    col_index += 1
+                yield row_index, col_index, cell
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+
+def scan_dimension(zf: zipfile.ZipFile, sheet_path: str) -> Tuple[int, int]:
+    """串流掃描工作表的所有列，計算實際的行數與列數
+
+    Returns:
+        Tuple[int, int]: (行數, 列數)，空白工作表為 (1, 1)
+    """
+    max_row = max_col = 1
+    for row_index, col_index, _ in iter_sheet_cells(zf, sheet_path):
+        max_row = max(max_row, row_index)
+        max_col = max(max_col, col_index)
+    return max_row, max_col
+
+
+def read_sheet_metadata(filepath: str) -> List[Dict[str, Any]]:
+    """不載入工作簿，讀取每個工作表的名稱、狀態與尺寸（不含圖表工作表）
+
+    Returns:
+        List[Dict[str, Any]]: [{'name', 'state', 'max_row', 'max_column', 'active'}]
+    """
+    with zipfile.ZipFile(filepath) as zf:
+        sheets, active_index = read_workbook_sheets(zf)
+        metadata = []
+        for index, sheet in enumerate(sheets):
+            if sheet['type'] != WORKSHEET_RELTYPE:
+                continue
+            size = None
+            if sheet['path'] in zf.NameToInfo:
+                size = read_dimension(zf, sheet['path']) or scan_dimension(zf, sheet['path'])
+            max_row, max_col = size or (1, 1)
+            metadata.append({
+                'name': sheet['name'],
+                'state': sheet['state'],
+                'max_row': max_row,
+                'max_column': max_col,
+                'active': index == active_index,
+            })
+    return metadata
+
+
+def shared_string_text(si: etree._Element) -> str:
+    """取得共用字串項目的純文字（與 openpyxl 讀出的值相同，不含注音 rPh）"""
+    texts = si.findall(TEXT_TAG)
+    if not texts:
+        texts = [run.find(TEXT_TAG) for run in si.iterchildren(RUN_TAG)]
+    return ''.join(t.text or '' for t in texts if t is not None)
+
+
+def _set_text(t: etree._Element, text: str) -> None:
+    t.text = text
+    if text != text.strip():
+        t.set(XML_SPACE_ATTR, 'preserve')
+
+
+def replace_shared_string(si: etree._Element, old_text: str, new_text: str) -> None:
+    """替換共用字串項目中的文字
+
+    格式化文字（多個 run）若每處符合都落在單一 run 內則逐 run 替換以保留格式，
+    否則與 openpyxl 寫回儲存格相同，合併為純文字。
+    """
+    text = shared_string_text(si)
+    runs = [run.find(TEXT_TAG) for run in si.iterchildren(RUN_TAG)]
+    runs = [t for t in runs if t is not None]
+
+    if runs and not si.findall(TEXT_TAG):
+        if sum((t.text or '').count(old_text) for t in runs) == text.count(old_text):
+            for t in runs:
+                if t.text and old_text in t.text:
+                    _set_text(t, t.text.replace(old_text, new_text))
+            return
+
+    phonetics = [child for child in si if child.tag not in (TEXT_TAG, RUN_TAG)]
+    si.clear()
+    _set_text(etree.SubElement(si, TEXT_TAG), text.replace(old_text, new_text))
+    si.extend(phonetics)
+
+
+def part_contains(zf: zipfile.ZipFile, part_path: str, needle: bytes) -> bool:
+    """以區塊串流檢查部件內容是否包含指定位元組"""
+    overlap = b''
+    with zf.open(part_path) as stream:
+        while True:
+            chunk = stream.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                return False
+            if needle in overlap + chunk:
+                return True
+            overlap = chunk[-(len(needle) - 1):] if len(needle) > 1 else b''
+
+
+def references_shared_strings(zf: zipfile.ZipFile, sheet_path: str, indices: set) -> bool:
+    """檢查工作表是否有儲存格引用指定的共用字串索引"""
+    for _, _, cell in iter_sheet_cells(zf, sheet_path):
+        if cell.get('t') == 's':
+            value = cell.findtext(VALUE_TAG)
+            if value is not None and int(value) in indices:
+                return True
+    return False
+
+
+def count_shared_string_references(zf: zipfile.ZipFile, sheet_path: str, indices: set) -> int:
+    """計算工作表中引用指定共用字串索引的儲存格數"""
+    count = 0
+    for _, _, cell in iter_sheet_cells(zf, sheet_path):
+        if cell.get('t') == 's':
+            value = cell.findtext(VALUE_TAG)
+            if value is not None and int(value) in indices:
+                count += 1
+    return count
+
+
+def formulas_contain(zf: zipfile.ZipFile, sheet_path: str, text: str) -> bool:
+    """檢查工作表是否有公式文字包含指定文字
+
+    先以位元組比對略過不可能符合的工作表；引號可能被寫成實體參照，含引號時一律逐格檢查。
+    """
+    if '"' not in text and "'" not in text:
+        if not part_contains(zf, sheet_path, _escape(text).encode('utf-8')):
+            return False
+    for _, _, cell in iter_sheet_cells(zf, sheet_path):
+        formula = cell.findtext(FORMULA_TAG)
+        if formula and text in formula:
+            return True
+    return False
+
+
+def search_shared_strings(zf: zipfile.ZipFile, search_text: str) -> Dict[int, str]:
+    """在共用字串表中搜尋，建立符合項目的索引
+
+    Returns:
+        Dict[int, str]: {共用字串索引: 文字}，只包含含有搜尋文字的項目
+    """
+    sst_path = find_workbook_part(zf, SHARED_STRINGS_RELTYPE)
+    if sst_path is None:
+        return {}
+    matches = {}
+    with zf.open(sst_path) as stream:
+        index = 0
+        for _, si in etree.iterparse(stream, events=('end',), tag=SI_TAG):
+            text = shared_string_text(si)
+            if search_text in text:
+                matches[index] = text
+            index += 1
+            si.clear()
+    return matches
+
+
+def iter_sheet_sections(stream: IO[bytes], name: str) -> Iterator[Tuple[str, bytes]]:
+    """串流將工作表部件的 XML 切成 <sheetData> 之前、列區塊與 </sheetData> 之後
+
+    依序串接所有片段即為原本的內容。
+
+    Args:
+        stream: 工作表部件的串流
+        name: 部件路徑（用於錯誤訊息）
+
+    Yields:
+        Tuple[str, bytes]: 依序為 ('head', <sheetData> 之前的部分)、
+            ('start', <sheetData> 開始標籤，可能是 <sheetData/>)、
+            零或多個 ('rows', 只包含完整 <row> 元素的區塊)、
+            ('end', </sheetData> 結束標籤，<sheetData/> 時為 b'')，
+            以及一或多個 ('tail', 之後的部分)
+
+    Raises:
+        ValueError: 缺少 sheetData 或 XML 不完整時
+    """
+    buffer = b''
+    while True:
+        chunk = stream.read(COPY_CHUNK_SIZE)
+        buffer += chunk
+        start = _SHEET_DATA_START.search(buffer)
+        if start:
+            break
+        if not chunk:
+            raise ValueError(f"工作表缺少 sheetData: {name}")
+
+    yield 'head', buffer[:start.start()]
+    yield 'start', start.group(0)
+    buffer = buffer[start.end():]
+    if start.group(2):
+        yield 'end', b''
+    else:
+        prefix = start.group(1) or b''
+        row_end = b'</' + prefix + b'row>'
+        sheet_data_end = b'</' + prefix + b'sheetData>'
+        while True:
+            end = buffer.find(sheet_data_end)
+            if end >= 0:
+                if buffer[:end]:
+                    yield 'rows', buffer[:end]
+                yield 'end', sheet_data_end
+                buffer = buffer[end + len(sheet_data_end):]
+                break
+            cut = buffer.rfind(row_end)
+            if cut >= 0:
+                cut += len(row_end)
+                yield 'rows', buffer[:cut]
+                buffer = buffer[cut:]
+            chunk = stream.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                raise ValueError(f"工作表 XML 不完整: {name}")
+            buffer += chunk
+
+    yield 'tail', buffer
+    while True:
+        chunk = stream.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield 'tail', chunk
+
+
+def _sheet_data_prefix(start_tag: bytes) -> bytes:
+    """<sheetData> 開始標籤的元素前綴（如 b'x:'，無則為 b''）"""
+    return _SHEET_DATA_START.match(start_tag).group(1) or b''
+
+
+def _namespace_declarations(data: bytes) -> bytes:
+    """XML 片段中宣告的命名空間（同一前綴以最後的宣告為準）"""
+    declarations = {}
+    for match in _NS_DECLARATION.finditer(data):
+        declarations[match.group(1)] = match.group(0)
+    return b' '.join(declarations.values())
+
+
+def iter_row_chunks(zf: zipfile.ZipFile, sheet_path: str) -> Iterator[Tuple[bytes, bytes, bytes]]:
+    """以整列為單位，分塊串流讀取 <sheetData> 內的原始 XML
+
+    缺少 sheetData 或 XML 不完整時只產出已讀到的完整區塊。
+
+    Yields:
+        Tuple[bytes, bytes, bytes]:
+            (命名空間宣告, 元素前綴（如 b'x:'，無則為 b''）, 只包含完整 <row> 元素的位元組區塊)
+    """
+    with zf.open(sheet_path) as stream:
+        head = b''
+        try:
+            for kind, data in iter_sheet_sections(stream, sheet_path):
+                if kind == 'head':
+                    head = data
+                elif kind == 'start':
+                    namespaces = _namespace_declarations(head + data)
+                    prefix = _sheet_data_prefix(data)
+                elif kind == 'rows':
+                    if data.strip():
+                        yield namespaces, prefix, data
+                elif kind == 'end':
+                    return
+        except ValueError:
+            return
+
+
+def iter_text_matches(
+    zf: zipfile.ZipFile,
+    sheet_path: str,
+    search_text: str,
+    shared_matches: Dict[int, str],
+    values: str = 'formula'
+) -> Iterator[Tuple[str, Any]]:
+    """串流搜尋工作表中文字值包含搜尋文字的儲存格
+
+    共用字串儲存格只比對索引（由 search_shared_strings 預先算好）。
+    先以位元組比對找出可能符合的列（<v> 為符合的索引、公式、行內字串或錯誤值），
+    只以 lxml 解析這些列；預先篩選寧可多選，結果仍以解析後的內容判斷。
+    公式儲存格依 values 比對：'formula' 比對公式（與 openpyxl 相同為 "=..." 文字），
+    'cached' 比對文字型的快取值，'both' 兩者皆比對。
+
+    Yields:
+        Tuple[str, Any]: (儲存格參照, 值)；'both' 時公式儲存格的值為
+            {'formula': 公式, 'value': 快取值}
+    """
+    index_values = {str(index).encode() for index in shared_matches}
+    formats = read_cell_formats(zf) if values == 'both' else None
+
+    shared_formulas: Dict[str, Translator] = {}
+    row_index = 0
+    for namespaces, prefix, chunk in iter_row_chunks(zf, sheet_path):
+        # 列缺少 r 屬性時行號只能依序推算，整塊解析
+        if _ROW_WITHOUT_NUMBER.search(chunk):
+            fragments = [chunk]
+        else:
+            positions = [
+                match.start() for match in _VALUE_NUMBER.finditer(chunk)
+                if match.group(1) in index_values
+            ] if index_values else []
+            positions.extend(match.start() for match in _FORMULA_HINT.finditer(chunk))
+            positions.extend(match.start() for match in _TEXT_TYPE_HINT.finditer(chunk))
+            fragments = _candidate_rows(chunk, sorted(positions), prefix)
+
+        for fragment in fragments:
+            rows = etree.fromstring(b'<rows ' + namespaces + b'>' + fragment + b'</rows>')
+            for row in rows.iterchildren(ROW_TAG):
+                row_index = int(row.get('r', row_index + 1))
+                col_index = 0
+                for cell in row.iterchildren(CELL_TAG):
+                    ref = cell.get('r')
+                    if ref:
+                        col_index = column_index_from_string(ref.rstrip('0123456789'))
+                    else:
+                        col_index += 1
+                    coordinate = f'{get_column_letter(col_index)}{row_index}'
+                    formula = cell.find(FORMULA_TAG)
+                    if formula is None:
+                        text = _cell_text(cell, shared_matches)
+                        if text and search_text in text:
+                            yield coordinate, text
+                        continue
+
+                    value = formula_value(formula, coordinate, shared_formulas)
+                    value = value if isinstance(value, str) else None
+                    cached = cell.findtext(VALUE_TAG) if cell.get('t') in ('e', 'str') else None
+                    if values == 'formula':
+                        if value and search_text in value:
+                            yield coordinate, value
+                    elif values == 'cached':
+                        if cached and search_text in cached:
+                            yield coordinate, cached
+                    elif (value and search_text in value) or (cached and search_text in cached):
+                        yield coordinate, {
+                            'formula': value,
+                            'value': _convert_value(cell, {}, *formats),
+                        }
+
+
+def _candidate_rows(chunk: bytes, positions: List[int], prefix: bytes) -> Iterator[bytes]:
+    """依序產出包含指定位置（已排序）的完整 <row> 元素，每列只產出一次"""
+    row_open = b'<' + prefix + b'row'
+    row_close = b'</' + prefix + b'row>'
+    end = 0
+    for position in positions:
+        if position < end:
+            continue
+        begin = chunk.rfind(row_open, 0, position)
+        end = chunk.find(row_close, position) + len(row_close)
+        yield chunk[begin:end]
+
+
+def _cell_text(cell: etree._Element, shared_matches: Dict[int, str]) -> Optional[str]:
+    """取得非公式儲存格的文字值（共用字串只查詢符合的索引）"""
+    cell_type = cell.get('t', 'n')
+    if cell_type == 's':
+        value = cell.findtext(VALUE_TAG)
+        return shared_matches.get(int(value)) if value is not None else None
+    if cell_type == 'inlineStr':
+        inline = cell.find(INLINE_STRING_TAG)
+        return shared_string_text(inline) if inline is not None else None
+    if cell_type in ('e', 'str'):
+        return cell.findtext(VALUE_TAG)
+    return None
+
+
+def formula_value(
+    formula: etree._Element,
+    coordinate: str,
+    shared_formulas: Dict[str, Translator]
+) -> Any:
+    """取得儲存格的公式值（與 openpyxl 讀取結果相同）
+
+    一般公式為 "=..." 文字；共用公式依主儲存格位置平移；
+    陣列與資料表公式為 openpyxl 的 ArrayFormula / DataTableFormula。
+    """
+    formula_type = formula.get('t')
+    value = f'={formula.text or ""}'
+    if formula_type == 'array':
+        return ArrayFormula(ref=formula.get('ref'), text=value)
+    if formula_type == 'dataTable':
+        return DataTableFormula(**formula.attrib)
+    if formula_type == 'shared':
+        shared_index = formula.get('si')
+        if shared_index in shared_formulas:
+            return shared_formulas[shared_index].translate_formula(coordinate)
+        if value != '=':
+            shared_formulas[shared_index] = Translator(value, coordinate)
+    return value
+
+
+def formula_text(value: Any) -> Optional[str]:
+    """取得公式值的文字（"=..."），不是公式時為 None
+
+    陣列公式為其公式文字，資料表公式以 Excel 顯示的 =TABLE(列輸入,欄輸入) 表示。
+    """
+    if isinstance(value, ArrayFormula):
+        return value.text
+    if isinstance(value, DataTableFormula):
+        return f'=TABLE({value.r1 or ""},{value.r2 or ""})'
+    if isinstance(value, str) and value.startswith('='):
+        return value
+    return None
+
+
+def read_cell_formats(zf: zipfile.ZipFile) -> Tuple[set, set, Any]:
+    """讀取判斷日期值所需的樣式與日期系統
+
+    Returns:
+        Tuple[set, set, datetime]: (日期格式的樣式索引, 時間長度格式的樣式索引, 日期起點)
+    """
+    date_formats, timedelta_formats = set(), set()
+    styles_path = find_workbook_part(zf, STYLES_RELTYPE)
+    if styles_path is not None:
+        stylesheet = Stylesheet.from_tree(etree.fromstring(zf.read(styles_path)))
+        date_formats, timedelta_formats = stylesheet.date_formats, stylesheet.timedelta_formats
+
+    epoch = CALENDAR_WINDOWS_1900
+    root = etree.fromstring(zf.read(find_workbook_path(zf)))
+    properties = next(root.iter(WORKBOOK_PR_TAG), None)
+    if properties is not None and properties.get('date1904') in ('1', 'true'):
+        epoch = CALENDAR_MAC_1904
+    return date_formats, timedelta_formats, epoch
+
+
+def read_shared_strings(zf: zipfile.ZipFile, indices: set) -> Dict[int, str]:
+    """只讀取指定索引的共用字串，讀到最大索引即停止
+
+    Returns:
+        Dict[int, str]: {共用字串索引: 文字}
+    """
+    sst_path = find_workbook_part(zf, SHARED_STRINGS_RELTYPE)
+    if sst_path is None or not indices:
+        return {}
+    last = max(indices)
+    strings = {}
+    with zf.open(sst_path) as stream:
+        for index, (_, si) in enumerate(etree.iterparse(stream, events=('end',), tag=SI_TAG)):
+            if index in indices:
+                strings[index] = shared_string_text(si)
+            si.clear()
+            if index >= last:
+                break
+    return strings
+
+
+def read_all_shared_strings(zf: zipfile.ZipFile) -> Dict[int, str]:
+    """讀取整個共用字串表
+
+    Returns:
+        Dict[int, str]: {共用字串索引: 文字}
+    """
+    sst_path = find_workbook_part(zf, SHARED_STRINGS_RELTYPE)
+    if sst_path is None:
+        return {}
+    strings = {}
+    with zf.open(sst_path) as stream:
+        for index, (_, si) in enumerate(etree.iterparse(stream, events=('end',), tag=SI_TAG)):
+            strings[index] = shared_string_text(si)
+            si.clear()
+    return strings
+
+
+def _number(value: str) -> Any:
+    """與 openpyxl 相同的數值轉換"""
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+
+def read_window(
+    zf: zipfile.ZipFile,
+    sheet_path: str,
+    min_row: int,
+    max_row: int,
+    min_col: int,
+    max_col: int,
+    cached_values: Optional[Dict[Tuple[int, int], Any]] = None
+) -> Dict[int, Dict[int, Any]]:
+    """讀取工作表中指定範圍的儲存格值
+
+    以整列區塊串流讀取，區塊最後一列仍在範圍之前時直接略過不解析
+    （只找出其中共用公式的主儲存格），超過範圍即停止讀取。
+    因此讀取任何位置的視窗，成本約為解壓縮到該位置，而不是解析之前所有儲存格。
+    值的型別與 openpyxl（非 data_only）讀出的相同。
+
+    Args:
+        cached_values: 提供時在同一次讀取中填入範圍內公式儲存格的快取值
+            （與 openpyxl data_only=True 讀出的相同），{(行號, 欄號): 值}
+
+    Returns:
+        Dict[int, Dict[int, Any]]: {行號: {欄號: 值}}，只包含有資料的儲存格
+    """
+    shared_formulas: Dict[str, Translator] = {}
+    values: Dict[int, Dict[int, Any]] = {}
+    cells: List[Tuple[int, int, etree._Element]] = []
+    row_index = 0
+
+    for namespaces, prefix, chunk in iter_row_chunks(zf, sheet_path):
+        if not _ROW_WITHOUT_NUMBER.search(chunk):
+            first = _ROW_NUMBER.search(chunk, chunk.find(b'<' + prefix + b'row'))
+            if first and int(first.group(1)) > max_row:
+                break
+            last = _ROW_NUMBER.search(chunk, chunk.rfind(b'<' + prefix + b'row'))
+            if last and int(last.group(1)) < min_row:
+                positions = [match.start() for match in _FORMULA_REF_HINT.finditer(chunk)]
+                for fragment in _candidate_rows(chunk, positions, prefix):
+                    _register_shared_formulas(
+                        etree.fromstring(b'<rows ' + namespaces + b'>' + fragment + b'</rows>'),
+                        shared_formulas
+                    )
+                row_index = int(last.group(1))
+                continue
+
+        rows = etree.fromstring(b'<rows ' + namespaces + b'>' + chunk + b'</rows>')
+        for row in rows.iterchildren(ROW_TAG):
+            row_index = int(row.get('r', row_index + 1))
+            if row_index > max_row:
+                break
+            col_index = 0
+            for cell in row.iterchildren(CELL_TAG):
+                ref = cell.get('r')
+                if ref:
+                    col_index = column_index_from_string(ref.rstrip('0123456789'))
+                else:
+                    col_index += 1
+                in_window = row_index >= min_row and min_col <= col_index <= max_col
+                formula = cell.find(FORMULA_TAG)
+                if formula is not None and (in_window or formula.text):
+                    # 範圍外的共用公式也要登記主儲存格，順序與 openpyxl 相同
+                    coordinate = f'{get_column_letter(col_index)}{row_index}'
+                    value = formula_value(formula, coordinate, shared_formulas)
+                    if in_window:
+                        values.setdefault(row_index, {})[col_index] = value
+                        if cached_values is not None:
+                            cells.append((row_index, col_index, cell))
+                elif in_window:
+                    cells.append((row_index, col_index, cell))
+        if row_index > max_row:
+            break
+
+    # 只讀取範圍內引用到的共用字串
+    shared_indices = {
+        int(cell.findtext(VALUE_TAG)) for _, _, cell in cells
+        if cell.get('t') == 's' and cell.findtext(VALUE_TAG)
+    }
+    shared_strings = read_shared_strings(zf, shared_indices)
+    date_formats, timedelta_formats, epoch = read_cell_formats(zf)
+
+    for row_index, col_index, cell in cells:
+        value = _convert_value(cell, shared_strings, date_formats, timedelta_formats, epoch)
+        if cell.find(FORMULA_TAG) is not None:
+            cached_values[(row_index, col_index)] = value
+        elif value is not None:
+            values.setdefault(row_index, {})[col_index] = value
+    return values
+
+
+def read_formula_cells(zf: zipfile.ZipFile, sheet_path: str) -> Dict[Tuple[int, int], Tuple[str, Any]]:
+    """一次讀取工作表中所有公式儲存格的公式與快取值
+
+    只解析含有公式的列（位元組預先篩選），結果只保存公式儲存格，
+    不需要為了快取值再以 data_only=True 載入一次工作簿。
+
+    Returns:
+        Dict[Tuple[int, int], Tuple[str, Any]]: {(行號, 欄號): (公式文字, 快取值)}
+    """
+    shared_formulas: Dict[str, Translator] = {}
+    cells: List[Tuple[int, int, str, etree._Element]] = []
+    row_index = 0
+    for namespaces, prefix, chunk in iter_row_chunks(zf, sheet_path):
+        if _ROW_WITHOUT_NUMBER.search(chunk):
+            fragments = [chunk]
+        else:
+            positions = [match.start() for match in _FORMULA_HINT.finditer(chunk)]
+            fragments = _candidate_rows(chunk, positions, prefix)
+
+        for fragment in fragments:
+            rows = etree.fromstring(b'<rows ' + namespaces + b'>' + fragment + b'</rows>')
+            for row in rows.iterchildren(ROW_TAG):
+                row_index = int(row.get('r', row_index + 1))
+                col_index = 0
+                for cell in row.iterchildren(CELL_TAG):
+                    ref = cell.get('r')
+                    col_index = column_index_from_string(ref.rstrip('0123456789')) if ref else col_index + 1
+                    formula = cell.find(FORMULA_TAG)
+                    if formula is None:
+                        continue
+                    coordinate = f'{get_column_letter(col_index)}{row_index}'
+                    text = formula_text(formula_value(formula, coordinate, shared_formulas))
+                    cells.append((row_index, col_index, text, cell))
+
+    shared_strings = read_shared_strings(zf, {
+        int(cell.findtext(VALUE_TAG)) for _, _, _, cell in cells
+        if cell.get('t') == 's' and cell.findtext(VALUE_TAG)
+    })
+    formats = read_cell_formats(zf)
+    return {
+        (row_index, col_index): (text, _convert_value(cell, shared_strings, *formats))
+        for row_index, col_index, text, cell in cells
+    }
+
+
+class RowReader:
+    """將 <row> 元素轉為值的清單（共用字串表與儲存格格式只讀取一次）
+
+    公式儲存格依 values 為快取值（'cached'，與 openpyxl data_only=True 相同）、
+    公式（'formula'）或 {'formula': 公式, 'value': 快取值}（'both'）。
+    """
+
+    def __init__(self, zf: zipfile.ZipFile, values: str = 'cached') -> None:
+        self.values = values
+        self.shared_strings = read_all_shared_strings(zf)
+        self.formats = read_cell_formats(zf)
+        # 一般數值與共用字串（最常見的儲存格）直接轉換，其他交給 _convert_value
+        self.date_styles = {str(style_id) for style_id in self.formats[0]}
+        self.columns: Dict[str, int] = {}
+        self.shared_formulas: Dict[str, Translator] = {}
+
+    def read(self, row: etree._Element, row_index: int) -> List[Any]:
+        """取得一列的值
+
+        Returns:
+            List[Any]: 值的索引 0 為 A 欄，不含列尾的空白儲存格
+        """
+        values = self.values
+        shared_strings = self.shared_strings
+        formats = self.formats
+        date_styles = self.date_styles
+        columns = self.columns
+        row_values: List[Any] = []
+        col_index = 0
+        for cell in row.iterchildren(CELL_TAG):
+            ref = cell.get('r')
+            if ref:
+                letters = ref.rstrip('0123456789')
+                col_index = columns.get(letters)
+                if col_index is None:
+                    col_index = columns[letters] = column_index_from_string(letters)
+            else:
+                col_index += 1
+            formula = cell.find(FORMULA_TAG) if values != 'cached' else None
+            if formula is not None:
+                coordinate = f'{get_column_letter(col_index)}{row_index}'
+                value = formula_value(formula, coordinate, self.shared_formulas)
+                if values == 'both':
+                    value = {
+                        'formula': formula_text(value),
+                        'value': _convert_value(cell, shared_strings, *formats),
+                    }
+            else:
+                cell_type = cell.get('t')
+                if cell_type == 's':
+                    text = cell.findtext(VALUE_TAG)
+                    value = shared_strings.get(int(text)) if text else None
+                elif cell_type in (None, 'n') and cell.get('s') not in date_styles:
+                    text = cell.findtext(VALUE_TAG)
+                    value = _number(text) if text else None
+                else:
+                    value = _convert_value(cell, shared_strings, *formats)
+            if value is None:
+                continue
+            if col_index > len(row_values):
+                row_values.extend([None] * (col_index - len(row_values)))
+            row_values[col_index - 1] = value
+        return row_values
+
+
+def iter_sheet_rows(
+    zf: zipfile.ZipFile,
+    sheet_path: str,
+    values: str = 'cached',
+    row_filter: Optional[set] = None
+) -> Iterator[Tuple[int, List[Any]]]:
+    """串流逐列讀取工作表的值
+
+    以整列區塊解析，記憶體用量只與一個區塊與共用字串表有關，與工作表大小無關。
+    公式儲存格的值依 values 而定（見 RowReader）。
+    指定 row_filter 時只解析這些行的儲存格，讀過最後一行即停止。
+
+    Yields:
+        Tuple[int, List[Any]]: (行號, 值)；值的索引 0 為 A 欄，只產出有值的列，
+            不含列尾的空白儲存格
+    """
+    reader = RowReader(zf, values)
+    last_row = max(row_filter, default=0) if row_filter is not None else None
+    row_index = 0
+    for namespaces, _, chunk in iter_row_chunks(zf, sheet_path):
+        rows = etree.fromstring(b'<rows ' + namespaces + b'>' + chunk + b'</rows>')
+        if row_filter is not None and values != 'cached':
+            # 略過的列可能含共用公式的主儲存格
+            _register_shared_formulas(rows, reader.shared_formulas)
+        for row in rows.iterchildren(ROW_TAG):
+            row_index = int(row.get('r', row_index + 1))
+            if row_filter is not None:
+                if row_index > last_row:
+                    return
+                if row_index not in row_filter:
+                    continue
+            row_values = reader.read(row, row_index)
+            if row_values:
+                yield row_index, row_values
+
+
+def _register_shared_formulas(rows: etree._Element, shared_formulas: Dict[str, Translator]) -> None:
+    """登記列中共用公式的主儲存格"""
+    row_index = 0
+    for row in rows.iterchildren(ROW_TAG):
+        row_index = int(row.get('r', row_index + 1))
+        col_index = 0
+        for cell in row.iterchildren(CELL_TAG):
+            ref = cell.get('r')
+            col_index = column_index_from_string(ref.rstrip('0123456789')) if ref else col_index + 1
+            formula = cell.find(FORMULA_TAG)
+            if formula is not None and formula.get('t') == 'shared' and formula.text:
+                formula_value(formula, f'{get_column_letter(col_index)}{row_index}', shared_formulas)
+
+
+def _convert_value(
+    cell: etree._Element,
+    shared_strings: Dict[int, str],
+    date_formats: set,
+    timedelta_formats: set,
+    epoch: Any
+) -> Any:
+    """將 <c> 元素的值轉換為 Python 值（與 openpyxl 的 parse_cell 相同，公式儲存格為快取值）"""
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        inline = cell.find(INLINE_STRING_TAG)
+        return shared_string_text(inline) if inline is not None else None
+
+    value = cell.findtext(VALUE_TAG) or None
+    if value is None:
+        return None
+    if cell_type == 'n':
+        value = _number(value)
+        style_id = int(cell.get('s', 0))
+        if style_id in date_formats:
+            try:
+                return from_excel(value, epoch, timedelta=style_id in timedelta_formats)
+            except (OverflowError, ValueError):
+                return '#VALUE!'
+        return value
+    if cell_type == 's':
+        return shared_strings.get(int(value))
+    if cell_type == 'b':
+        return bool(int(value))
+    if cell_type == 'd':
+        return from_ISO8601(value)
+    return value
+
+
+def copy_member_raw(
+    zin: zipfile.ZipFile,
+    zout: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    arcname: Optional[str] = None
+) -> None:
+    """不解壓縮，直接複製壓縮後的部件資料到另一個 zip
+
+    Args:
+        arcname: 在新 zip 中的部件路徑，None 表示與原本相同
+    """
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    zin.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+    new_info = copy.copy(info)
+    if arcname is not None:
+        new_info.filename = new_info.orig_filename = arcname
+    # CRC 與大小已知，寫在本地標頭中而不使用資料描述區
+    new_info.flag_bits &= ~0x08
+    new_info.header_offset = zout.fp.tell()
+    zout.fp.write(new_info.FileHeader())
+
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = zin.fp.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"部件資料不完整: {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    zout.filelist.append(new_info)
+    zout.NameToInfo[new_info.filename] = new_info
+    zout.start_dir = zout.fp.tell()
+
+
+def rewrite_package(source_path: str, output_path: str, parts: Dict[str, Optional[bytes]]) -> None:
+    """將 xlsx 封裝複製到新檔案，並以新內容取代指定部件
+
+    未變更的部件直接複製壓縮資料，不重新解壓縮或壓縮。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 輸出 xlsx 路徑
+        parts: {部件路徑: 新內容}，內容為 None 表示移除該部件
+    """
+    with zipfile.ZipFile(source_path) as zin, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for info in zin.infolist():
+            if info.filename in parts:
+                if parts[info.filename] is None:
+                    continue
+                new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                new_info.compress_type = zipfile.ZIP_DEFLATED
+                zout.writestr(new_info, parts[info.filename])
+            else:
+                copy_member_raw(zin, zout, info)
+        for name, data in parts.items():
+            if name not in zin.NameToInfo and data is not None:
+                zout.writestr(name, data)
+
+
+def can_append_raw(value: Any) -> bool:
+    """值是否能直接寫成 <c> 元素（不需要樣式，如日期就需要數字格式）"""
+    if value is None or isinstance(value, (bool, int)):
+        return True
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, str):
+        return not ILLEGAL_CHARACTERS_RE.search(value)
+    return False
+
+
+def _escape(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def rows_xml(rows: List[List[Any]], first_row: int, prefix: bytes = b'') -> bytes:
+    """將資料列轉為 <row> 元素（字串使用行內字串，與 openpyxl 存檔相同）
+
+    值的型別判斷與 openpyxl 相同："=" 開頭為公式，錯誤碼字串為錯誤值。
+    值須先以 can_append_raw 檢查。
+    """
+    p = prefix.decode()
+    parts = []
+    for row, values in enumerate(rows, first_row):
+        parts.append(f'<{p}row r="{row}">')
+        for col, value in enumerate(values, 1):
+            if value is None:
+                continue
+            ref = f'{get_column_letter(col)}{row}'
+            if isinstance(value, bool):
+                parts.append(f'<{p}c r="{ref}" t="b"><{p}v>{int(value)}</{p}v></{p}c>')
+            elif isinstance(value, (int, float)):
+                parts.append(f'<{p}c r="{ref}"><{p}v>{value}</{p}v></{p}c>')
+            elif len(value) > 1 and value.startswith('='):
+                parts.append(f'<{p}c r="{ref}"><{p}f>{_escape(value[1:])}</{p}f><{p}v></{p}v></{p}c>')
+            elif value in ERROR_CODES:
+                parts.append(f'<{p}c r="{ref}" t="e"><{p}v>{_escape(value)}</{p}v></{p}c>')
+            else:
+                parts.append(
+                    f'<{p}c r="{ref}" t="inlineStr"><{p}is>'
+                    f'<{p}t xml:space="preserve">{_escape(value)}</{p}t></{p}is></{p}c>'
+                )
+        parts.append(f'</{p}row>')
+    return ''.join(parts).encode('utf-8')
+
+
+def _last_row_number(data: bytes, prefix: bytes, last_row: int) -> int:
+    """找出資料區塊中最後一列的行號（列缺少 r 屬性時依序推算）"""
+    if _ROW_WITHOUT_NUMBER.search(data):
+        for match in _ROW_START.finditer(data):
+            number = _ROW_NUMBER.search(match.group(1))
+            last_row = int(number.group(1)) if number else last_row + 1
+        return last_row
+
+    tag = b'<' + prefix + b'row'
+    end = len(data)
+    while True:
+        start = data.rfind(tag, 0, end)
+        if start < 0:
+            return last_row
+        match = _ROW_START.match(data, start)
+        if match:
+            return int(_ROW_NUMBER.search(match.group(1)).group(1))
+        end = start
+
+
+def _append_to_part(
+    zin: zipfile.ZipFile,
+    zout: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    rows: List[List[Any]],
+    dimension_row: Optional[int]
+) -> int:
+    """串流複製工作表部件，並在 </sheetData> 前插入新列
+
+    dimension 紀錄依 dimension_row（預期的原最後行號）改寫。
+
+    Returns:
+        int: 實際的原最後行號（沒有資料時為 1，與 openpyxl 的 max_row 相同）
+    """
+    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    new_info.compress_type = zipfile.ZIP_DEFLATED
+    width = max((len(values) for values in rows), default=1)
+
+    def dimension(match):
+        min_col, min_row, max_col, _ = range_boundaries(match.group(2).decode())
+        ref = (
+            f'{get_column_letter(min_col or 1)}{min_row or 1}:'
+            f'{get_column_letter(max(max_col or 1, width))}{dimension_row + len(rows)}'
+        )
+        return match.group(1) + ref.encode() + match.group(3)
+
+    last_row = 0
+    with zin.open(info) as src, \
+            zout.open(new_info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT // 2) as dst:
+        for kind, data in iter_sheet_sections(src, info.filename):
+            if kind == 'head':
+                if dimension_row is not None:
+                    data = _DIMENSION_REF.sub(dimension, data, count=1)
+                dst.write(data)
+            elif kind == 'start':
+                prefix = _sheet_data_prefix(data)
+                # <sheetData/> 改為成對的標籤
+                dst.write(b'<' + prefix + b'sheetData>' if data.endswith(b'/>') else data)
+            elif kind == 'rows':
+                last_row = _last_row_number(data, prefix, last_row)
+                dst.write(data)
+            elif kind == 'end':
+                dst.write(rows_xml(rows, max(last_row, 1) + 1, prefix))
+                dst.write(b'</' + prefix + b'sheetData>')
+            else:
+                dst.write(data)
+
+    return max(last_row, 1)
+
+
+def append_rows(
+    source_path: str,
+    output_path: str,
+    sheet_path: str,
+    rows: List[List[Any]]
+) -> int:
+    """不建立 openpyxl 模型，直接在工作表最後新增資料列
+
+    只串流改寫該工作表部件，其他部件直接複製壓縮資料。
+    dimension 紀錄與實際最後一列不符時（紀錄過期），以正確的行號再改寫一次。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 輸出 xlsx 路徑
+        sheet_path: 工作表部件路徑
+        rows: 資料列，值須先以 can_append_raw 檢查
+
+    Returns:
+        int: 第一個新增列的行號
+    """
+    with zipfile.ZipFile(source_path) as zf:
+        dimension = read_dimension(zf, sheet_path)
+    dimension_row = dimension[0] if dimension else None
+
+    while True:
+        with zipfile.ZipFile(source_path) as zin, \
+                zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename == sheet_path:
+                    last_row = _append_to_part(zin, zout, info, rows, dimension_row)
+                else:
+                    copy_member_raw(zin, zout, info)
+        if dimension_row is None or dimension_row == last_row:
+            return last_row + 1
+        dimension_row = last_row
+
+
+def update_rows(
+    source_path: str,
+    output_path: str,
+    sheet_path: str,
+    update: Callable[[int, List[Any]], Optional[Dict[int, Any]]],
+    max_col: int
+) -> int:
+    """不建立 openpyxl 模型，依每一列的值改寫該列的儲存格
+
+    只串流改寫該工作表部件一次，沒有改變的列區塊原樣寫回，其他部件直接複製壓縮資料。
+    寫入的值一律為靜態值：文字使用行內字串（"=" 開頭也是文字），原儲存格的樣式保留。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 輸出 xlsx 路徑
+        sheet_path: 工作表部件路徑
+        update: (行號, 該列的值（快取值）) -> {欄號: 新值}，None 或空字典表示不改；
+            值須先以 can_append_raw 檢查，只有已存在的 <row> 會被呼叫
+        max_col: 寫入的最大欄號（用來更新 dimension 紀錄）
+
+    Returns:
+        int: 改寫的列數
+    """
+    updated = 0
+    with zipfile.ZipFile(source_path) as zin, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+        reader = RowReader(zin)
+
+        def transform(namespaces: bytes, chunk: bytes) -> bytes:
+            nonlocal updated
+            rows = etree.fromstring(b'<rows ' + namespaces + b'>' + chunk + b'</rows>')
+            changed = False
+            row_index = 0
+            for row in rows.iterchildren(ROW_TAG):
+                row_index = int(row.get('r', row_index + 1))
+                cells = update(row_index, reader.read(row, row_index))
+                if cells:
+                    _set_row_cells(row, row_index, cells)
+                    changed = True
+                    updated += 1
+            if not changed:
+                return chunk
+            data = etree.tostring(rows, encoding='UTF-8', xml_declaration=False)
+            return data[data.index(b'>') + 1:data.rindex(b'</')]
+
+        for info in zin.infolist():
+            if info.filename == sheet_path:
+                _rewrite_part_rows(zin, zout, info, transform, max_col)
+            else:
+                copy_member_raw(zin, zout, info)
+    return updated
+
+
+def _rewrite_part_rows(
+    zin: zipfile.ZipFile,
+    zout: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    transform: Callable[[bytes, bytes], bytes],
+    max_col: int
+) -> None:
+    """串流複製工作表部件，只包含完整 <row> 元素的區塊經 transform(命名空間宣告, 區塊) 改寫
+
+    dimension 紀錄的欄數至少改為 max_col。
+    """
+    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    new_info.compress_type = zipfile.ZIP_DEFLATED
+
+    def dimension(match):
+        try:
+            min_col, min_row, old_max_col, max_row = range_boundaries(match.group(2).decode())
+        except (ValueError, TypeError):
+            return match.group(0)
+        ref = (
+            f'{get_column_letter(min_col or 1)}{min_row or 1}:'
+            f'{get_column_letter(max(old_max_col or 1, max_col))}{max_row or 1}'
+        )
+        return match.group(1) + ref.encode() + match.group(3)
+
+    with zin.open(info) as src, \
+            zout.open(new_info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT // 2) as dst:
+        head = b''
+        for kind, data in iter_sheet_sections(src, info.filename):
+            if kind == 'head':
+                head = data
+                data = _DIMENSION_REF.sub(dimension, data, count=1)
+            elif kind == 'start':
+                namespaces = _namespace_declarations(head + data)
+            elif kind == 'rows' and data.strip():
+                data = transform(namespaces, data)
+            dst.write(data)
+
+
+def _set_row_cells(row: etree._Element, row_index: int, cells: Dict[int, Any]) -> None:
+    """在 <row> 中寫入靜態值，依欄號排序插入，取代同一欄的儲存格（保留樣式）"""
+    existing: Dict[int, etree._Element] = {}
+    col_index = 0
+    for cell in row.iterchildren(CELL_TAG):
+        ref = cell.get('r')
+        if ref:
+            col_index = column_index_from_string(ref.rstrip('0123456789'))
+        else:
+            # 插入儲存格後無法再依順序推算欄號
+            col_index += 1
+            cell.set('r', f'{get_column_letter(col_index)}{row_index}')
+        existing[col_index] = cell
+
+    for col, value in sorted(cells.items()):
+        new_cell = _static_cell(f'{get_column_letter(col)}{row_index}', value)
+        old_cell = existing.get(col)
+        if old_cell is not None:
+            if old_cell.get('s'):
+                new_cell.set('s', old_cell.get('s'))
+            row.replace(old_cell, new_cell)
+        else:
+            following = [index for index in existing if index > col]
+            if following:
+                existing[min(following)].addprevious(new_cell)
+            elif existing:
+                existing[max(existing)].addnext(new_cell)
+            else:
+                row.insert(0, new_cell)
+        existing[col] = new_cell
+    # spans 只是讀取時的提示，欄位範圍改變後移除
+    row.attrib.pop('spans', None)
+
+
+def _static_cell(ref: str, value: Any) -> etree._Element:
+    """建立靜態值的 <c> 元素（值須先以 can_append_raw 檢查）"""
+    cell = etree.Element(CELL_TAG, r=ref)
+    if isinstance(value, bool):
+        cell.set('t', 'b')
+        etree.SubElement(cell, VALUE_TAG).text = str(int(value))
+    elif isinstance(value, (int, float)):
+        etree.SubElement(cell, VALUE_TAG).text = f'{value}'
+    elif value in ERROR_CODES:
+        cell.set('t', 'e')
+        etree.SubElement(cell, VALUE_TAG).text = value
+    else:
+        cell.set('t', 'inlineStr')
+        text = etree.SubElement(etree.SubElement(cell, INLINE_STRING_TAG), TEXT_TAG)
+        text.text = value
+        text.set(XML_SPACE_ATTR, 'preserve')
+    return cell
+
+
+def add_worksheet(
+    source_path: str,
+    output_path: str,
+    sheet_name: str,
+    rows: Iterable[List[Any]]
+) -> int:
+    """不建立 openpyxl 模型，在活頁簿最後新增工作表並串流寫入資料列
+
+    資料列分批寫入新部件，不需要一次保留所有列；其他部件直接複製壓縮資料。
+    寫入的值一律為靜態值：文字使用行內字串（"=" 開頭也是文字），
+    日期時間寫成序列值並套用內建的日期格式。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 輸出 xlsx 路徑
+        sheet_name: 新工作表名稱
+        rows: 資料列（從第 1 行開始）
+
+    Returns:
+        int: 寫入的行數
+
+    Raises:
+        ValueError: 工作表名稱無效或已存在時
+    """
+    if not sheet_name or len(sheet_name) > 31 or _INVALID_SHEET_NAME.search(sheet_name) \
+            or sheet_name.startswith("'") or sheet_name.endswith("'"):
+        raise ValueError(f"無效的工作表名稱: {sheet_name}")
+
+    with zipfile.ZipFile(source_path) as zin, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+        workbook_path = find_workbook_path(zin)
+        workbook = etree.fromstring(zin.read(workbook_path))
+        sheets = workbook.find(SHEETS_TAG)
+        if any(sheet.get('name', '').casefold() == sheet_name.casefold() for sheet in sheets.iter(SHEET_TAG)):
+            raise ValueError(f"工作表「{sheet_name}」已存在")
+        workbook_rels_path = rels_path(workbook_path)
+        relationships = etree.fromstring(zin.read(workbook_rels_path))
+        content_types = etree.fromstring(zin.read(CONTENT_TYPES_PATH))
+        styles_path = find_workbook_part(zin, STYLES_RELTYPE)
+        styles = etree.fromstring(zin.read(styles_path)) if styles_path is not None else None
+        properties = workbook.find(WORKBOOK_PR_TAG)
+        epoch = CALENDAR_WINDOWS_1900
+        if properties is not None and properties.get('date1904') in ('1', 'true'):
+            epoch = CALENDAR_MAC_1904
+
+        for info in zin.infolist():
+            if info.filename not in (workbook_path, workbook_rels_path, CONTENT_TYPES_PATH, styles_path):
+                copy_member_raw(zin, zout, info)
+
+        base = posixpath.dirname(workbook_path)
+        used = set(zin.NameToInfo)
+        number = 1
+        while posixpath.join(base, 'worksheets', f'sheet{number}.xml') in used:
+            number += 1
+        sheet_path = posixpath.join(base, 'worksheets', f'sheet{number}.xml')
+
+        # 日期格式 -> 樣式索引，第一次用到時才加入樣式表
+        date_styles: Dict[int, int] = {}
+
+        def date_style(number_format: int) -> int:
+            nonlocal styles
+            if number_format not in date_styles:
+                if styles is None:
+                    styles = etree.fromstring(MINIMAL_STYLESHEET)
+                cell_xfs = styles.find(CELL_XFS_TAG)
+                date_styles[number_format] = len(cell_xfs.findall(XF_TAG))
+                etree.SubElement(
+                    cell_xfs, XF_TAG, numFmtId=str(number_format), fontId='0', fillId='0',
+                    borderId='0', xfId='0', applyNumberFormat='1'
+                )
+                cell_xfs.set('count', str(len(cell_xfs.findall(XF_TAG))))
+            return date_styles[number_format]
+
+        written = 0
+        new_info = zipfile.ZipInfo(sheet_path, date_time=datetime.datetime.now().timetuple()[:6])
+        new_info.compress_type = zipfile.ZIP_DEFLATED
+        with zout.open(new_info, 'w', force_zip64=True) as dst:
+            dst.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<worksheet xmlns="{SHEET_MAIN_NS}" xmlns:r="{REL_NS}"><sheetData>'.encode()
+            )
+            batch = []
+            for written, values in enumerate(rows, 1):
+                batch.append(_new_row_xml(written, values, epoch, date_style))
+                if len(batch) >= NEW_SHEET_BATCH_ROWS:
+                    dst.write(''.join(batch).encode('utf-8'))
+                    batch = []
+            dst.write(''.join(batch).encode('utf-8'))
+            dst.write(b'</sheetData></worksheet>')
+
+        ids = {element.get('Id') for element in relationships.iter(RELATIONSHIP_TAG)}
+        number = 1
+        while f'rId{number}' in ids:
+            number += 1
+        etree.SubElement(
+            relationships, RELATIONSHIP_TAG, Id=f'rId{number}', Type=WORKSHEET_RELTYPE,
+            Target=posixpath.relpath(sheet_path, base)
+        )
+        sheet_ids = [int(sheet.get('sheetId', 0)) for sheet in sheets.iter(SHEET_TAG)]
+        etree.SubElement(sheets, SHEET_TAG, {
+            'name': sheet_name,
+            'sheetId': str(max(sheet_ids, default=0) + 1),
+            R_ID_ATTR: f'rId{number}',
+        })
+        etree.SubElement(
+            content_types, OVERRIDE_TAG, PartName='/' + sheet_path, ContentType=WORKSHEET_CONTENT_TYPE
+        )
+        if styles is not None and styles_path is None:
+            styles_path = posixpath.join(base, 'styles.xml')
+            etree.SubElement(
+                relationships, RELATIONSHIP_TAG, Id=f'rId{number + 1}', Type=STYLES_RELTYPE,
+                Target=posixpath.relpath(styles_path, base)
+            )
+            etree.SubElement(
+                content_types, OVERRIDE_TAG, PartName='/' + styles_path, ContentType=STYLES_CONTENT_TYPE
+            )
+
+        zout.writestr(workbook_path, _to_xml(workbook))
+        zout.writestr(workbook_rels_path, _to_xml(relationships))
+        zout.writestr(CONTENT_TYPES_PATH, _to_xml(content_types))
+        if styles is not None:
+            zout.writestr(styles_path, _to_xml(styles))
+    return written
+
+
+def _new_row_xml(row: int, values: List[Any], epoch: Any, date_style: Callable[[int], int]) -> str:
+    """新工作表的一個 <row> 元素（靜態值，見 add_worksheet）"""
+    parts = [f'<row r="{row}">']
+    for col, value in enumerate(values, 1):
+        if value is None:
+            continue
+        ref = f'{get_column_letter(col)}{row}'
+        if isinstance(value, bool):
+            parts.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            if isinstance(value, float) and not math.isfinite(value):
+                parts.append(f'<c r="{ref}" t="e"><v>#NUM!</v></c>')
+            else:
+                parts.append(f'<c r="{ref}"><v>{value}</v></c>')
+        elif isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+            number_format = next(
+                number_format for kind, number_format in DATE_NUMBER_FORMATS.items() if isinstance(value, kind)
+            )
+            if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+                number_format = DATE_NUMBER_FORMATS[datetime.date]  # 讀回的日期都是 datetime
+            parts.append(f'<c r="{ref}" s="{date_style(number_format)}"><v>{to_excel(value, epoch)}</v></c>')
+        elif isinstance(value, str) and value in ERROR_CODES:
+            parts.append(f'<c r="{ref}" t="e"><v>{_escape(value)}</v></c>')
+        else:
+            text = _escape(ILLEGAL_CHARACTERS_RE.sub('', str(value)))
+            parts.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    parts.append('</row>')
+    return ''.join(parts)
+
+
+def iter_raw_rows(
+    zf: zipfile.ZipFile,
+    sheet_path: str,
+    shared_formulas: Optional[Dict[str, Translator]] = None
+) -> Iterator[Tuple[int, List[Any], bytes]]:
+    """串流逐列讀取工作表的值（快取值）與 <row> 元素的原始 XML
+
+    包含沒有值的 <row>（如只有列高或樣式的列），其值為空清單。
+
+    Args:
+        shared_formulas: 指定時登記共用公式的主儲存格（供 rewrite_sheet_rows 展開共用公式）
+
+    Yields:
+        Tuple[int, List[Any], bytes]: (行號, 值, <row> 元素的原始 XML)
+
+    Raises:
+        ValueError: 無法切分工作表的列時
+    """
+    reader = RowReader(zf)
+    row_index = 0
+    for namespaces, _, chunk in iter_row_chunks(zf, sheet_path):
+        rows = etree.fromstring(b'<rows ' + namespaces + b'>' + chunk + b'</rows>')
+        if shared_formulas is not None and b'si=' in chunk:
+            _register_shared_formulas(rows, shared_formulas)
+        starts = [match.start() for match in _ROW_START.finditer(chunk)]
+        elements = list(rows.iterchildren(ROW_TAG))
+        if len(starts) != len(elements):
+            raise ValueError(f"無法切分工作表的列: {sheet_path}")
+        starts.append(len(chunk))
+        for position, row in enumerate(elements):
+            row_index = int(row.get('r', row_index + 1))
+            yield row_index, reader.read(row, row_index), chunk[starts[position]:starts[position + 1]]
+
+
+def row_format_attributes(data: bytes) -> Dict[str, str]:
+    """<row> 原始 XML 中的格式屬性（見 ROW_FORMAT_ATTRIBUTES）"""
+    match = _ROW_START.match(data)
+    if match is None:
+        return {}
+    return {
+        name.decode(): value.decode()
+        for name, value in _ATTRIBUTE.findall(match.group(1))
+        if name.decode() in ROW_FORMAT_ATTRIBUTES
+    }
+
+
+def read_sheet_tail(zf: zipfile.ZipFile, sheet_path: str) -> bytes:
+    """讀取工作表部件中 </sheetData> 之後的 XML（合併儲存格、超連結、條件式格式等）"""
+    with zf.open(sheet_path) as stream:
+        try:
+            return b''.join(
+                data for kind, data in iter_sheet_sections(stream, sheet_path) if kind == 'tail'
+            )
+        except ValueError:
+            return b''
+
+
+def merged_ranges(tail: bytes) -> List[Tuple[int, int, int, int]]:
+    """工作表尾端 XML 中的合併儲存格範圍 [(min_col, min_row, max_col, max_row)]"""
+    return [range_boundaries(ref.decode()) for ref in _MERGE_CELL_REF.findall(tail)]
+
+
+def hyperlink_rows(tail: bytes) -> set:
+    """工作表尾端 XML 中超連結所在的行號"""
+    rows = set()
+    for match in _HYPERLINK.finditer(tail):
+        _, min_row, _, max_row = range_boundaries(match.group(3).decode())
+        rows.update(range(min_row, max_row + 1))
+    return rows
+
+
+def rewrite_sheet_rows(
+    source_path: str,
+    output_path: str,
+    sheet_path: str,
+    rows: Iterable[Tuple[int, int, bytes]],
+    shared_formulas: Dict[str, Translator],
+    row_attributes: Optional[Dict[int, Dict[str, str]]] = None,
+    tail_row_map: Optional[Callable[[int], Optional[int]]] = None,
+    last_row: Optional[int] = None
+) -> int:
+    """不建立 openpyxl 模型，以新的順序與行號重寫工作表的所有列
+
+    只串流改寫該工作表部件一次，其他部件直接複製壓縮資料。
+    搬移的公式與 Excel 排序相同，相對參照依新位置平移；共用公式展開為一般公式。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 輸出 xlsx 路徑
+        sheet_path: 工作表部件路徑
+        rows: 依輸出順序的 (原行號, 新行號, <row> 的原始 XML)，新行號須遞增；
+            沒有列出的列會被移除
+        shared_formulas: 共用公式的主儲存格（iter_raw_rows 登記）
+        row_attributes: 指定時列的格式屬性留在原位置：{新行號: 格式屬性}，
+            None 表示格式屬性跟著列搬移
+        tail_row_map: 原行號 -> 新行號（None 表示已移除），用來調整超連結的位置；
+            在所有列寫入後才呼叫
+        last_row: 最後一列的行號（用來更新 dimension 紀錄），None 表示不變
+
+    Returns:
+        int: 寫入的列數
+
+    Raises:
+        ValueError: 列含有無法搬移的公式（多列的陣列公式、資料表公式）時
+    """
+    written = 0
+    with zipfile.ZipFile(source_path) as zin, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for info in zin.infolist():
+            if info.filename != sheet_path:
+                copy_member_raw(zin, zout, info)
+                continue
+
+            new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            new_info.compress_type = zipfile.ZIP_DEFLATED
+            with zin.open(info) as src, \
+                    zout.open(new_info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT // 2) as dst:
+                head, tail = b'', []
+                for kind, data in iter_sheet_sections(src, info.filename):
+                    if kind == 'head':
+                        head = data
+                    elif kind == 'start':
+                        namespaces = _namespace_declarations(head + data)
+                        prefix = _sheet_data_prefix(data)
+                        if last_row is not None:
+                            head = _DIMENSION_REF.sub(
+                                lambda match: _dimension_rows(match, last_row), head, count=1
+                            )
+                        dst.write(head + b'<' + prefix + b'sheetData>')
+
+                        batch: List[Tuple[int, int, bytes]] = []
+                        for item in rows:
+                            batch.append(item)
+                            if len(batch) >= REWRITE_BATCH_ROWS:
+                                dst.write(_renumber_rows(namespaces, batch, shared_formulas, row_attributes))
+                                written += len(batch)
+                                batch = []
+                        if batch:
+                            dst.write(_renumber_rows(namespaces, batch, shared_formulas, row_attributes))
+                            written += len(batch)
+                        dst.write(b'</' + prefix + b'sheetData>')
+                    elif kind == 'tail':
+                        # 原本的列已略過，只保留 </sheetData> 之後的部分
+                        tail.append(data)
+                tail = b''.join(tail)
+                if tail_row_map is not None:
+                    tail = _remap_hyperlinks(tail, tail_row_map)
+                dst.write(tail)
+    return written
+
+
+def _dimension_rows(match: Any, last_row: int) -> bytes:
+    try:
+        min_col, min_row, max_col, _ = range_boundaries(match.group(2).decode())
+    except (ValueError, TypeError):
+        return match.group(0)
+    ref = f'{get_column_letter(min_col or 1)}{min_row or 1}:{get_column_letter(max_col or 1)}{max(last_row, 1)}'
+    return match.group(1) + ref.encode() + match.group(3)
+
+
+def _renumber_rows(
+    namespaces: bytes,
+    batch: List[Tuple[int, int, bytes]],
+    shared_formulas: Dict[str, Translator],
+    row_attributes: Optional[Dict[int, Dict[str, str]]]
+) -> bytes:
+    """改寫一批列的行號、儲存格參照與公式"""
+    rows = etree.fromstring(b'<rows ' + namespaces + b'>' + b''.join(data for _, _, data in batch) + b'</rows>')
+    for (old_row, new_row, _), row in zip(batch, rows.iterchildren(ROW_TAG)):
+        row.set('r', str(new_row))
+        if row_attributes is not None:
+            for name in ROW_FORMAT_ATTRIBUTES:
+                row.attrib.pop(name, None)
+            row.attrib.update(row_attributes.get(new_row, {}))
+        col_index = 0
+        for cell in row.iterchildren(CELL_TAG):
+            ref = cell.get('r')
+            letters = ref.rstrip('0123456789') if ref else get_column_letter(col_index + 1)
+            col_index = column_index_from_string(letters)
+            new_ref = f'{letters}{new_row}'
+            cell.set('r', new_ref)
+            formula = cell.find(FORMULA_TAG)
+            if formula is not None:
+                _move_formula(formula, f'{letters}{old_row}', new_ref, shared_formulas)
+    data = etree.tostring(rows, encoding='UTF-8', xml_declaration=False)
+    return data[data.index(b'>') + 1:data.rindex(b'</')]
+
+
+def _move_formula(
+    formula: etree._Element,
+    old_ref: str,
+    new_ref: str,
+    shared_formulas: Dict[str, Translator]
+) -> None:
+    """將 <f> 從 old_ref 搬到 new_ref：相對參照平移，共用公式展開為一般公式"""
+    formula_type = formula.get('t')
+    if formula_type == 'dataTable':
+        raise ValueError(f"{old_ref} 的資料表公式無法搬移")
+    if formula_type == 'array':
+        min_col, min_row, max_col, max_row = range_boundaries(formula.get('ref') or old_ref)
+        if min_row != max_row:
+            raise ValueError(f"{old_ref} 的陣列公式跨越多列，無法搬移")
+        row = new_ref.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+        formula.set('ref', f'{get_column_letter(min_col)}{row}:{get_column_letter(max_col)}{row}'
+                    if min_col != max_col else f'{get_column_letter(min_col)}{row}')
+        text = f'={formula.text or ""}'
+    elif formula_type == 'shared':
+        text = formula_value(formula, old_ref, shared_formulas)
+        if text == '=':
+            raise ValueError(f"找不到 {old_ref} 的共用公式")
+        for name in ('t', 'si', 'ref'):
+            formula.attrib.pop(name, None)
+    else:
+        text = f'={formula.text or ""}'
+    if old_ref != new_ref:
+        text = Translator(text, old_ref).translate_formula(new_ref)
+    formula.text = text[1:]
+
+
+def _remap_hyperlinks(tail: bytes, row_map: Callable[[int], Optional[int]]) -> bytes:
+    """依行號對應調整超連結的位置，所在的列被移除時刪除超連結"""
+    def replace(match: Any) -> bytes:
+        min_col, min_row, max_col, max_row = range_boundaries(match.group(3).decode())
+        new_min, new_max = row_map(min_row), row_map(max_row)
+        if new_min is None or new_max is None:
+            return b''
+        ref = f'{get_column_letter(min_col)}{new_min}'
+        if (min_col, new_min) != (max_col, new_max):
+            ref += f':{get_column_letter(max_col)}{new_max}'
+        return match.group(0).replace(match.group(2) + match.group(3) + match.group(2),
+                                      match.group(2) + ref.encode() + match.group(2), 1)
+
+    tail = _HYPERLINK.sub(replace, tail)
+    return _EMPTY_HYPERLINKS.sub(b'', tail)
+
+
+def _to_xml(root: etree._Element) -> bytes:
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def build_partial_package(source_path: str, output_path: str, sheet_names: set) -> Dict[str, str]:
+    """建立只包含指定工作表內容的精簡封裝，供 openpyxl 快速載入
+
+    其他工作表替換為空白工作表並移除其關聯；共用字串表只保留指定工作表用到的字串並重新編號。
+    含樞紐分析表的工作表依賴活頁簿層級的快取，一律載入。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 精簡封裝的輸出路徑
+        sheet_names: 要載入的工作表名稱
+
+    Returns:
+        Dict[str, str]: {未載入的工作表名稱: 原始部件路徑}
+    """
+    with zipfile.ZipFile(source_path) as zf:
+        sheets, _ = read_workbook_sheets(zf)
+        raw_sheets, kept = {}, []
+        for sheet in sheets:
+            if sheet['type'] != WORKSHEET_RELTYPE or sheet['path'] not in zf.NameToInfo:
+                continue
+            relations = read_relationships(zf, sheet['path']).values()
+            if sheet['name'] in sheet_names or any(
+                reltype == PIVOT_TABLE_RELTYPE for reltype, _ in relations
+            ):
+                kept.append(sheet['path'])
+            else:
+                raw_sheets[sheet['name']] = sheet['path']
+
+        parts: Dict[str, Optional[bytes]] = {}
+        for path in raw_sheets.values():
+            parts[path] = STUB_WORKSHEET
+            if rels_path(path) in zf.NameToInfo:
+                parts[rels_path(path)] = None
+
+        sst_path = find_workbook_part(zf, SHARED_STRINGS_RELTYPE)
+        if raw_sheets and sst_path is not None:
+            parts.update(_compact_shared_strings(zf, sst_path, kept))
+
+    rewrite_package(source_path, output_path, parts)
+    return raw_sheets
+
+
+def _compact_shared_strings(zf: zipfile.ZipFile, sst_path: str, sheet_paths: List[str]) -> Dict[str, bytes]:
+    """只保留指定工作表用到的共用字串，並改寫這些工作表的字串索引
+
+    Returns:
+        Dict[str, bytes]: {部件路徑: 新內容}（共用字串表與改寫後的工作表）
+    """
+    trees, used = {}, set()
+    for path in sheet_paths:
+        root = etree.fromstring(zf.read(path))
+        cells = [
+            cell.find(VALUE_TAG) for cell in root.iter(CELL_TAG) if cell.get('t') == 's'
+        ]
+        cells = [value for value in cells if value is not None and value.text]
+        used.update(int(value.text) for value in cells)
+        trees[path] = (root, cells)
+
+    mapping = {index: new_index for new_index, index in enumerate(sorted(used))}
+    entries = []
+    if used:
+        last = max(used)
+        with zf.open(sst_path) as stream:
+            for index, (_, si) in enumerate(etree.iterparse(stream, events=('end',), tag=SI_TAG)):
+                if index in mapping:
+                    entries.append(etree.tostring(si))
+                si.clear()
+                if index >= last:
+                    break
+
+    parts = {
+        sst_path: (
+            f'<sst xmlns="{SHEET_MAIN_NS}" count="{len(entries)}" uniqueCount="{len(entries)}">'
+        ).encode() + b''.join(entries) + b'</sst>'
+    }
+    for path, (root, cells) in trees.items():
+        for value in cells:
+            value.text = str(mapping[int(value.text)])
+        parts[path] = _to_xml(root)
+    return parts
+
+
+def merge_partial_package(
+    saved_path: str,
+    source_path: str,
+    output_path: str,
+    raw_sheets: Dict[str, str]
+) -> Dict[str, str]:
+    """將 openpyxl 存出的精簡封裝與未載入工作表的原始部件合併
+
+    未載入的工作表及其關聯部件（繪圖、圖表、註解、表格等）直接複製壓縮資料，
+    與 openpyxl 產生的部件同名時改名並更新關聯。openpyxl 依原順序寫出儲存格樣式
+    （新樣式附加在最後），因此原始工作表的樣式索引仍然有效；共用字串表使用原檔的版本，
+    openpyxl 寫出的共用字串（若有）附加在後並改寫已載入工作表的索引。
+
+    Args:
+        saved_path: openpyxl 存出的精簡封裝
+        source_path: 含未載入工作表原始內容的 xlsx
+        output_path: 合併後的輸出路徑
+        raw_sheets: {未載入的工作表名稱: source_path 中的部件路徑}
+
+    Returns:
+        Dict[str, str]: {未載入的工作表名稱: 輸出檔中的部件路徑}
+    """
+    with zipfile.ZipFile(saved_path) as saved, zipfile.ZipFile(source_path) as source:
+        saved_sheets, _ = read_workbook_sheets(saved)
+        targets = {
+            sheet['name']: sheet['path'] for sheet in saved_sheets if sheet['name'] in raw_sheets
+        }
+
+        used = set(saved.NameToInfo)
+        copies: Dict[str, str] = {}       # 輸出部件路徑 -> 原始部件路徑
+        mapped: Dict[str, str] = {}       # 原始部件路徑 -> 輸出部件路徑
+        new_parts: Dict[str, bytes] = {}
+        table_id = _max_table_id(saved)
+        for name, new_path in targets.items():
+            copies[new_path] = raw_sheets[name]
+            mapped[raw_sheets[name]] = new_path
+            table_id = _copy_related(
+                source, raw_sheets[name], new_path, used, copies, mapped, new_parts, table_id
+            )
+
+        content_types = etree.fromstring(saved.read(CONTENT_TYPES_PATH))
+        source_types = etree.fromstring(source.read(CONTENT_TYPES_PATH))
+        overrides = {
+            element.get('PartName'): element.get('ContentType')
+            for element in source_types.iter(OVERRIDE_TAG)
+        }
+        defaults = {
+            element.get('Extension').lower(): element
+            for element in source_types.iter(DEFAULT_TAG)
+        }
+        saved_defaults = {
+            element.get('Extension').lower() for element in content_types.iter(DEFAULT_TAG)
+        }
+        saved_overrides = {element.get('PartName') for element in content_types.iter(OVERRIDE_TAG)}
+        for new_path, original in copies.items():
+            content_type = overrides.get('/' + original)
+            if content_type is not None:
+                if '/' + new_path not in saved_overrides:
+                    etree.SubElement(
+                        content_types, OVERRIDE_TAG, PartName='/' + new_path, ContentType=content_type
+                    )
+                continue
+            extension = posixpath.splitext(original)[1].lstrip('.').lower()
+            if extension in defaults and extension not in saved_defaults:
+                content_types.insert(0, copy.copy(defaults[extension]))
+                saved_defaults.add(extension)
+
+        source_sst = find_workbook_part(source, SHARED_STRINGS_RELTYPE)
+        if source_sst is not None:
+            new_parts.update(_merge_shared_strings(saved, source, source_sst, content_types, used))
+            copies.update({
+                path: source_sst for path, data in list(new_parts.items()) if data is None
+            })
+            new_parts = {path: data for path, data in new_parts.items() if data is not None}
+        new_parts[CONTENT_TYPES_PATH] = _to_xml(content_types)
+
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for info in saved.infolist():
+                if info.filename in copies:
+                    continue
+                if info.filename in new_parts:
+                    zout.writestr(info.filename, new_parts.pop(info.filename))
+                else:
+                    copy_member_raw(saved, zout, info)
+            for new_path, original in copies.items():
+                if new_path in new_parts:
+                    zout.writestr(new_path, new_parts.pop(new_path))
+                else:
+                    copy_member_raw(source, zout, source.getinfo(original), new_path)
+            for path, data in new_parts.items():
+                zout.writestr(path, data)
+
+    return targets
+
+
+def _unique_part_name(path: str, used: set) -> str:
+    """產生封裝內未使用的部件名稱（如 drawing1.xml -> drawing1_1.xml）"""
+    if path not in used:
+        return path
+    stem, extension = posixpath.splitext(path)
+    number = 1
+    while f'{stem}_{number}{extension}' in used:
+        number += 1
+    return f'{stem}_{number}{extension}'
+
+
+def _max_table_id(zf: zipfile.ZipFile) -> int:
+    """封裝中表格部件使用的最大 id（表格 id 在活頁簿內必須唯一）"""
+    max_id = 0
+    for name in zf.namelist():
+        if name.startswith('xl/tables/') and name.endswith('.xml'):
+            max_id = max(max_id, int(etree.fromstring(zf.read(name)).get('id', 0)))
+    return max_id
+
+
+def _copy_related(
+    source: zipfile.ZipFile,
+    original: str,
+    new_path: str,
+    used: set,
+    copies: Dict[str, str],
+    mapped: Dict[str, str],
+    new_parts: Dict[str, bytes],
+    table_id: int
+) -> int:
+    """遞迴登記部件的關聯部件，並寫出更新目標路徑後的 .rels
+
+    Returns:
+        int: 目前使用到的最大表格 id
+    """
+    try:
+        root = etree.fromstring(source.read(rels_path(original)))
+    except KeyError:
+        return table_id
+
+    for rel in root.iter(RELATIONSHIP_TAG):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = resolve_target(original, rel.get('Target'))
+        if target not in source.NameToInfo:
+            continue
+        if target not in mapped:
+            new_target = _unique_part_name(target, used)
+            used.add(new_target)
+            copies[new_target] = target
+            mapped[target] = new_target
+            if rel.get('Type') == TABLE_RELTYPE:
+                # 表格 id 接在已載入工作表的表格之後
+                table = etree.fromstring(source.read(target))
+                table_id += 1
+                table.set('id', str(table_id))
+                new_parts[new_target] = _to_xml(table)
+            table_id = _copy_related(
+                source, target, new_target, used, copies, mapped, new_parts, table_id
+            )
+        rel.set('Target', posixpath.relpath(mapped[target], posixpath.dirname(new_path)))
+
+    new_parts[rels_path(new_path)] = _to_xml(root)
+    return table_id
+
+
+def _merge_shared_strings(
+    saved: zipfile.ZipFile,
+    source: zipfile.ZipFile,
+    source_sst: str,
+    content_types: etree._Element,
+    used: set
+) -> Dict[str, Optional[bytes]]:
+    """讓輸出使用原檔的共用字串表
+
+    Returns:
+        Dict[str, Optional[bytes]]: 要寫入的部件；值為 None 表示該路徑直接複製原檔的共用字串表
+    """
+    workbook_path = find_workbook_path(saved)
+    saved_sst = find_workbook_part(saved, SHARED_STRINGS_RELTYPE)
+    if saved_sst is None:
+        # openpyxl 以行內字串寫出：加入原本的共用字串表與其關聯
+        sst_path = _unique_part_name(posixpath.join(posixpath.dirname(workbook_path), 'sharedStrings.xml'), used)
+        used.add(sst_path)
+        rels = etree.fromstring(saved.read(rels_path(workbook_path)))
+        ids = {rel.get('Id') for rel in rels.iter(RELATIONSHIP_TAG)}
+        number = len(ids) + 1
+        while f'rId{number}' in ids:
+            number += 1
+        etree.SubElement(
+            rels, RELATIONSHIP_TAG, Id=f'rId{number}', Type=SHARED_STRINGS_RELTYPE,
+            Target=posixpath.relpath(sst_path, posixpath.dirname(workbook_path))
+        )
+        etree.SubElement(
+            content_types, OVERRIDE_TAG, PartName='/' + sst_path, ContentType=SHARED_STRINGS_CONTENT_TYPE
+        )
+        return {sst_path: None, rels_path(workbook_path): _to_xml(rels)}
+
+    # openpyxl 寫出了自己的共用字串表：附加在原表之後並改寫已載入工作表的索引
+    merged = etree.fromstring(source.read(source_sst))
+    offset = len(merged.findall(SI_TAG))
+    for si in etree.fromstring(saved.read(saved_sst)).iterfind(SI_TAG):
+        merged.append(si)
+    count = str(len(merged.findall(SI_TAG)))
+    merged.set('count', count)
+    merged.set('uniqueCount', count)
+
+    parts: Dict[str, Optional[bytes]] = {saved_sst: _to_xml(merged)}
+    sheets, _ = read_workbook_sheets(saved)
+    for sheet in sheets:
+        if sheet['type'] != WORKSHEET_RELTYPE or sheet['path'] not in saved.NameToInfo:
+            continue
+        root = etree.fromstring(saved.read(sheet['path']))
+        for cell in root.iter(CELL_TAG):
+            value = cell.find(VALUE_TAG)
+            if cell.get('t') == 's' and value is not None and value.text:
+                value.text = str(int(value.text) + offset)
+        parts[sheet['path']] = _to_xml(root)
+    return parts
+
+
+def write_formula_values(
+    source_path: str,
+    output_path: str,
+    values: Dict[str, Dict[Tuple[int, int], Any]]
+) -> int:
+    """將公式的計算結果寫入工作表 XML 的快取值（<v>），公式本身不變
+
+    openpyxl 只能寫出公式或值其中之一；寫入快取值後，以 data_only=True 載入
+    或不會重新計算的程式也能讀到結果。
+
+    Args:
+        source_path: 來源 xlsx 路徑
+        output_path: 輸出 xlsx 路徑
+        values: {工作表名稱: {(行, 列): 計算結果}}，錯誤為 FormulaError
+
+    Returns:
+        int: 寫入的快取值數量
+    """
+    parts: Dict[str, Optional[bytes]] = {}
+    written = 0
+    with zipfile.ZipFile(source_path) as zf:
+        sheets, _ = read_workbook_sheets(zf)
+        for sheet in sheets:
+            sheet_values = values.get(sheet['name'])
+            if not sheet_values or sheet['type'] != WORKSHEET_RELTYPE or sheet['path'] not in zf.NameToInfo:
+                continue
+            root = etree.fromstring(zf.read(sheet['path']))
+            for cell in root.iter(CELL_TAG):
+                formula = cell.find(FORMULA_TAG)
+                if formula is None or formula.get('t') in ('array', 'dataTable'):
+                    continue
+                match = _CELL_COORDINATE.match(cell.get('r', ''))
+                if not match:
+                    continue
+                key = (int(match.group(2)), column_index_from_string(match.group(1)))
+                if key not in sheet_values:
+                    continue
+                _set_cached_value(cell, sheet_values[key])
+                written += 1
+            parts[sheet['path']] = _to_xml(root)
+    rewrite_package(source_path, output_path, parts)
+    return written
+
+
+_CELL_COORDINATE = re.compile(r'\$?([A-Z]{1,3})\$?(\d+)$')
+
+
+def _set_cached_value(cell: etree._Element, value: Any) -> None:
+    """設定公式儲存格的快取值與型別"""
+    for child in cell.findall(VALUE_TAG):
+        cell.remove(child)
+    if value is None:
+        cell.attrib.pop('t', None)
+        return
+    if isinstance(value, FormulaError):
+        cell.set('t', 'e')
+        text = value.code
+    elif isinstance(value, bool):
+        cell.set('t', 'b')
+        text = '1' if value else '0'
+    elif isinstance(value, (int, float)):
+        cell.attrib.pop('t', None)
+        text = repr(value) if isinstance(value, float) else str(value)
+    else:
+        cell.set('t', 'str')
+        text = str(value)
+    etree.SubElement(cell, VALUE_TAG).text = text
@@ -1 +1,14 @@
 """Unit tests initialization"""
+
+import io
+import contextlib
+import unittest
+
+
+class QuietTestCase(unittest.TestCase):
+    """隱藏編輯器輸出訊息的測試基底類別"""
+
+    def _run(self, method, *args, **kwargs):
+        """呼叫方法並略過其印出的訊息"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            return method(*args, **kwargs)
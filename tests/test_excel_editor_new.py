@@ -2,20 +2,117 @@
 # -*- coding: utf-8 -*-
 """
 Unit Tests for Excel Editor New Features (v1.3.0)
-Testing: add_sheet, delete_sheet, set_cell_format, set_formula
+Testing: add_sheet, delete_sheet, set_cell_format, set_formula, read-only mode,
+         raw sheet metadata, shared-strings replace, streaming find, windowed view,
+         bulk range writes, raw row append, bulk row insert/delete, partial loading,
+         formula and cached value reads, lookup joins, duplicate row removal,
+         range formatting and cellXfs compaction
 """
 
 import unittest
 import os
 import tempfile
 import shutil
+import io
+import re
+import json
+import array
+import zipfile
+import contextlib
+from copy import copy
+from datetime import datetime
 from pathlib import Path
 
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.excel_editor import ExcelEditor
+from src.llm_api import execute_command
+from src.formula_engine import FormulaError
+from src.xlsx_package import write_formula_values
 from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+from openpyxl.styles import Font
+
+
+def write_shared_strings_workbook(path, sheets):
+    """建立使用共用字串表的 xlsx（與 Excel 存檔相同；openpyxl 存檔會改用行內字串）
+    
+    Args:
+        path: 輸出路徑
+        sheets: {工作表名稱: [[值, ...], ...]}，字串存入共用字串表，"=" 開頭為公式
+    """
+    main_ns = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    rel_ns = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    strings, index = [], {}
+    
+    def escape(text):
+        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    
+    def cell_xml(ref, value):
+        if isinstance(value, str) and value.startswith('='):
+            return f'<c r="{ref}"><f>{escape(value[1:])}</f></c>'
+        if isinstance(value, str):
+            if value not in index:
+                index[value] = len(strings)
+                strings.append(value)
+            return f'<c r="{ref}" t="s"><v>{index[value]}</v></c>'
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    
+    parts = {}
+    sheet_entries, sheet_rels, overrides = [], [], []
+    for number, (name, rows) in enumerate(sheets.items(), 1):
+        rows_xml = ''.join(
+            f'<row r="{r}">' + ''.join(
+                cell_xml(f'{get_column_letter(c)}{r}', value)
+                for c, value in enumerate(row, 1) if value is not None
+            ) + '</row>'
+            for r, row in enumerate(rows, 1)
+        )
+        parts[f'xl/worksheets/sheet{number}.xml'] = (
+            f'<worksheet xmlns="{main_ns}"><sheetData>{rows_xml}</sheetData></worksheet>'
+        )
+        sheet_entries.append(f'<sheet name="{name}" sheetId="{number}" r:id="rId{number}"/>')
+        sheet_rels.append(
+            f'<Relationship Id="rId{number}" Type="{rel_ns}/worksheet" '
+            f'Target="worksheets/sheet{number}.xml"/>'
+        )
+        overrides.append(
+            f'<Override PartName="/xl/worksheets/sheet{number}.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        )
+    
+    parts['xl/sharedStrings.xml'] = f'<sst xmlns="{main_ns}">' + ''.join(
+        f'<si><t xml:space="preserve">{escape(text)}</t></si>' for text in strings
+    ) + '</sst>'
+    parts['xl/workbook.xml'] = (
+        f'<workbook xmlns="{main_ns}" xmlns:r="{rel_ns}"><sheets>'
+        + ''.join(sheet_entries) + '</sheets></workbook>'
+    )
+    parts['xl/_rels/workbook.xml.rels'] = (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ''.join(sheet_rels)
+        + f'<Relationship Id="rIdSST" Type="{rel_ns}/sharedStrings" Target="sharedStrings.xml"/>'
+        + '</Relationships>'
+    )
+    parts['_rels/.rels'] = (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{rel_ns}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    parts['[Content_Types].xml'] = (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        + ''.join(overrides) + '</Types>'
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
 
 
 class TestExcelEditorNewFeatures(unittest.TestCase):
@@ -243,5 +340,1176 @@ class TestExcelEditorIntegration(unittest.TestCase):
         self.assertEqual(wb['Q1_Report']['B5'].value, "=B3-B4")
 
 
+class TestExcelEditorReadOnly(unittest.TestCase):
+    """測試唯讀串流模式"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """設置測試環境"""
+        cls.test_dir = tempfile.mkdtemp()
+        cls.test_xlsx = os.path.join(cls.test_dir, "readonly.xlsx")
+        
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "資料"
+        for row in range(1, 16):
+            ws.append([f"產品{row}", row * 10, None, "備註"])
+        other = wb.create_sheet("其他")
+        other["B2"] = "產品1 說明"
+        other.sheet_state = "hidden"
+        wb.save(cls.test_xlsx)
+    
+    @classmethod
+    def tearDownClass(cls):
+        """清理測試環境"""
+        shutil.rmtree(cls.test_dir)
+    
+    @staticmethod
+    def _capture(func, *args):
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            result = func(*args)
+        return buffer.getvalue(), result
+    
+    def test_read_commands_match_full_load(self):
+        """測試唯讀模式的輸出與完整載入一致"""
+        for method, args in [("list_sheets", ()), ("view_sheet", ("資料",)), ("find_cells", ("產品1",))]:
+            full = self._capture(getattr(ExcelEditor(self.test_xlsx), method), *args)
+            streamed = self._capture(getattr(ExcelEditor(self.test_xlsx, read_only=True), method), *args)
+            self.assertEqual(full, streamed, method)
+    
+    def test_read_only_defers_loading(self):
+        """測試唯讀模式延後載入工作簿"""
+        editor = ExcelEditor(self.test_xlsx, read_only=True)
+        self.assertIsNone(editor._wb)
+    
+    def test_list_sheets_without_loading(self):
+        """測試 list 直接讀取 dimension 紀錄而不載入工作簿"""
+        editor = ExcelEditor(self.test_xlsx, read_only=True)
+        output, _ = self._capture(editor.list_sheets)
+        self.assertIsNone(editor._wb)
+        self.assertIn("[工作表 1] 資料 [活動]", output)
+        self.assertIn("行數: 15, 列數: 4", output)
+        self.assertIn("[工作表 2] 其他 [隱藏]", output)
+    
+    def test_list_sheets_without_dimension(self):
+        """測試缺少 dimension 紀錄時改用串流掃描"""
+        path = os.path.join(self.test_dir, "no_dimension.xlsx")
+        with zipfile.ZipFile(self.test_xlsx) as zin, zipfile.ZipFile(path, 'w') as zout:
+            for info in zin.infolist():
+                data = zin.read(info.filename)
+                if info.filename.startswith("xl/worksheets/"):
+                    data = re.sub(rb'<dimension[^>]*/>', b'', data)
+                zout.writestr(info, data)
+        
+        streamed, _ = self._capture(ExcelEditor(path, read_only=True).list_sheets)
+        full, _ = self._capture(ExcelEditor(path).list_sheets)
+        self.assertEqual(streamed, full)
+        self.assertIn("行數: 2, 列數: 2", streamed)
+    
+    def test_upgrade_on_mutation(self):
+        """測試修改操作會升級為可寫入的工作簿"""
+        output = os.path.join(self.test_dir, "upgraded.xlsx")
+        editor = ExcelEditor(self.test_xlsx, read_only=True)
+        editor.find_cells("產品")
+        self.assertTrue(editor.update_cell("資料", "A1", "已更新"))
+        self.assertFalse(editor.read_only)
+        editor.save(output)
+        
+        wb = load_workbook(output)
+        self.assertEqual(wb["資料"]["A1"].value, "已更新")
+        self.assertEqual(wb["資料"]["B15"].value, 150)
+    
+    def test_save_without_changes_copies_file(self):
+        """測試未修改時儲存直接複製原檔"""
+        output = os.path.join(self.test_dir, "copy.xlsx")
+        editor = ExcelEditor(self.test_xlsx, read_only=True)
+        editor.save(output)
+        with open(self.test_xlsx, 'rb') as src, open(output, 'rb') as dst:
+            self.assertEqual(src.read(), dst.read())
+    
+    def test_read_only_invalid_file(self):
+        """測試唯讀模式開啟無效檔案"""
+        path = os.path.join(self.test_dir, "broken.xlsx")
+        with open(path, 'w') as f:
+            f.write("not a zip")
+        with self.assertRaises(RuntimeError):
+            ExcelEditor(path, read_only=True)
+
+
+class TestExcelEditorSharedStrings(unittest.TestCase):
+    """測試直接改寫共用字串表的替換"""
+    
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "shared.xlsx")
+        write_shared_strings_workbook(self.test_file, {
+            "產品": [["ACME 螺絲", 10], ["ACME 螺絲", 20], [" ACME ", 30], ["其他", 40]],
+            "備註": [["ACME 螺絲"], ["只在備註的 ACME"]],
+        })
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _sheet_xml(self, path):
+        with zipfile.ZipFile(path) as zf:
+            return {name: zf.read(name) for name in zf.namelist() if name.startswith("xl/worksheets/")}
+    
+    def test_replace_rewrites_shared_strings_only(self):
+        """測試替換只改寫共用字串表，不改動工作表 XML"""
+        output = os.path.join(self.test_dir, "replaced.xlsx")
+        editor = ExcelEditor(self.test_file, read_only=True)
+        count = editor.replace_text("ACME", "Globex")
+        self.assertEqual(count, 5)  # 儲存格數，不是不重複字串數
+        self.assertTrue(editor.read_only)
+        editor.save(output)
+        
+        self.assertEqual(self._sheet_xml(output), self._sheet_xml(self.test_file))
+        wb = load_workbook(output)
+        self.assertEqual([row[0] for row in wb["產品"].iter_rows(values_only=True)],
+                         ["Globex 螺絲", "Globex 螺絲", " Globex ", "其他"])
+        self.assertEqual(wb["備註"]["A2"].value, "只在備註的 Globex")
+    
+    def test_replace_matches_cell_scan(self):
+        """測試結果與逐格替換一致"""
+        fast = os.path.join(self.test_dir, "fast.xlsx")
+        slow = os.path.join(self.test_dir, "slow.xlsx")
+        
+        editor = ExcelEditor(self.test_file, read_only=True)
+        fast_count = editor.replace_text("螺絲", "螺帽")
+        editor.save(fast)
+        editor = ExcelEditor(self.test_file)
+        slow_count = editor.replace_text("螺絲", "螺帽")
+        editor.save(slow)
+        self.assertEqual(fast_count, slow_count)
+        
+        fast_wb, slow_wb = load_workbook(fast), load_workbook(slow)
+        for name in slow_wb.sheetnames:
+            self.assertEqual(list(fast_wb[name].values), list(slow_wb[name].values))
+    
+    def test_sheet_scoped_replace_unshared_string(self):
+        """測試指定工作表且字串未被其他工作表引用時仍直接改寫"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        self.assertEqual(editor.replace_text("只在備註", "僅在備註", sheet_name="備註"), 1)
+        self.assertTrue(editor.read_only)
+    
+    def test_sheet_scoped_replace_falls_back_when_shared(self):
+        """測試指定工作表但字串被其他工作表共用時改為逐格替換"""
+        output = os.path.join(self.test_dir, "scoped.xlsx")
+        editor = ExcelEditor(self.test_file, read_only=True)
+        count = editor.replace_text("ACME", "Globex", sheet_name="備註")
+        self.assertEqual(count, 2)
+        self.assertFalse(editor.read_only)
+        editor.save(output)
+        
+        wb = load_workbook(output)
+        self.assertEqual(wb["備註"]["A1"].value, "Globex 螺絲")
+        self.assertEqual(wb["產品"]["A1"].value, "ACME 螺絲")
+    
+    def test_replace_in_formulas_matches_loaded(self):
+        """測試公式含有要替換的文字時，唯讀模式與載入工作簿的結果相同"""
+        path = os.path.join(self.test_dir, "formula.xlsx")
+        write_shared_strings_workbook(path, {
+            "產品": [["ACME 螺絲", '="ACME"&"!"'], ["其他", "=SUM(1,2)"]],
+            "備註": [["ACME"]],
+        })
+        results = []
+        for read_only in (True, False):
+            output = os.path.join(self.test_dir, f"formula-{read_only}.xlsx")
+            editor = ExcelEditor(path, read_only=read_only)
+            count = editor.replace_text("ACME", "Globex")
+            editor.save(output)
+            wb = load_workbook(output)
+            results.append((count, [list(wb[name].values) for name in wb.sheetnames]))
+        
+        self.assertEqual(results[0], results[1])
+        count, values = results[0]
+        self.assertEqual(count, 3)
+        self.assertEqual(values[0][0], ("Globex 螺絲", '="Globex"&"!"'))
+    
+    def test_replace_inline_strings_falls_back(self):
+        """測試行內字串改為逐格替換"""
+        path = os.path.join(self.test_dir, "inline.xlsx")
+        wb = Workbook()
+        wb.active["A1"] = "ACME 螺絲"
+        wb.save(path)
+        
+        editor = ExcelEditor(path, read_only=True)
+        self.assertEqual(editor.replace_text("ACME", "Globex"), 1)
+        self.assertFalse(editor.read_only)
+    
+    def test_find_matches_loaded_workbook(self):
+        """測試串流搜尋結果與載入工作簿後搜尋一致"""
+        path = os.path.join(self.test_dir, "find.xlsx")
+        rows = [[f"項目{i}", i, "=SUM(B1:B2)" if i % 7 == 0 else None] for i in range(1, 60)]
+        write_shared_strings_workbook(path, {"資料": rows, "其他": [["項目1 複本"]]})
+        
+        for text in ("項目1", "SUM", "複本", "不存在"):
+            streamed = list(ExcelEditor(path, read_only=True).iter_find_cells(text))
+            loaded = list(ExcelEditor(path).iter_find_cells(text))
+            self.assertEqual(streamed, loaded, text)
+    
+    def test_iter_find_cells_paging(self):
+        """測試 offset/limit 分頁且不載入工作簿"""
+        path = os.path.join(self.test_dir, "paging.xlsx")
+        write_shared_strings_workbook(path, {"資料": [[f"項目{i}"] for i in range(1, 31)]})
+        
+        editor = ExcelEditor(path, read_only=True)
+        page = list(editor.iter_find_cells("項目", offset=10, limit=5))
+        self.assertEqual([ref for _, ref, _ in page], ["A11", "A12", "A13", "A14", "A15"])
+        self.assertIsNone(editor._wb)
+        
+        results = editor.find_cells("項目", sheet_name="資料", limit=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(list(editor.iter_find_cells("項目", sheet_name="不存在")), [])
+    
+    def test_replace_then_edit_keeps_changes(self):
+        """測試直接改寫後再修改儲存格會保留替換結果"""
+        output = os.path.join(self.test_dir, "chained.xlsx")
+        editor = ExcelEditor(self.test_file, read_only=True)
+        editor.replace_text("ACME", "Globex")
+        editor.update_cell("產品", "B1", 99)
+        editor.save(output)
+        
+        wb = load_workbook(output)
+        self.assertEqual(wb["產品"]["A1"].value, "Globex 螺絲")
+        self.assertEqual(wb["產品"]["B1"].value, 99)
+
+
+class TestExcelEditorViewWindow(unittest.TestCase):
+    """測試視窗化、分頁的 view_sheet"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """設置測試環境"""
+        cls.test_dir = tempfile.mkdtemp()
+        cls.test_file = os.path.join(cls.test_dir, "window.xlsx")
+        
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "資料"
+        for row in range(1, 301):
+            ws.append([f"列{row}"] + [row * col for col in range(1, 15)])
+        ws["C150"] = datetime(2024, 1, 2, 3, 4, 5)
+        ws["D150"] = "=B150+1"
+        wb.save(cls.test_file)
+        
+        # 共用公式的主儲存格位於視窗之前
+        cls.shared_file = os.path.join(cls.test_dir, "shared_formula.xlsx")
+        write_shared_strings_workbook(cls.shared_file, {
+            "公式": [[row, "=A1*2" if row == 1 else "=", "文字"] for row in range(1, 51)],
+        })
+        with zipfile.ZipFile(cls.shared_file) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+        sheet = parts['xl/worksheets/sheet1.xml'].decode()
+        sheet = sheet.replace('<f>A1*2</f>', '<f t="shared" ref="B1:B50" si="0">A1*2</f>')
+        sheet = sheet.replace('<f></f>', '<f t="shared" si="0"/>')
+        parts['xl/worksheets/sheet1.xml'] = sheet.encode()
+        with zipfile.ZipFile(cls.shared_file, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for name, data in parts.items():
+                zf.writestr(name, data)
+    
+    @classmethod
+    def tearDownClass(cls):
+        """清理測試環境"""
+        shutil.rmtree(cls.test_dir)
+    
+    @staticmethod
+    def _view(editor, **kwargs):
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            result = editor.view_sheet(**kwargs)
+        return result, buffer.getvalue()
+    
+    def test_window_matches_full_load(self):
+        """測試串流讀取與完整載入的視窗一致"""
+        cases = [
+            {},
+            {'cell_range': 'B140:E160'},
+            {'cell_range': 'M290:P400'},
+            {'offset': 145, 'limit': 10, 'max_cols': 20},
+            {'cell_range': 'C:D', 'offset': 100, 'limit': 5},
+            {'cell_range': '148:151'},
+        ]
+        for kwargs in cases:
+            with self.subTest(**kwargs):
+                raw = ExcelEditor(self.test_file, read_only=True)
+                self.assertEqual(
+                    self._view(raw, **kwargs),
+                    self._view(ExcelEditor(self.test_file), **kwargs)
+                )
+                self.assertIsNone(raw._wb)
+    
+    def test_window_bounds_and_footer(self):
+        """測試視窗範圍與剩餘行列提示"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        result, output = self._view(editor, cell_range='b150:d152', offset=1)
+        
+        self.assertEqual(result['range'], 'B151:D152')
+        self.assertEqual(result['columns'], ['B', 'C', 'D'])
+        self.assertEqual([row['row'] for row in result['rows']], [151, 152])
+        self.assertEqual(result['rows'][0]['values'], [151, 302, 453])
+        self.assertIn("還有 148 行未顯示", output)
+        self.assertIn("還有 11 列未顯示", output)
+    
+    def test_json_output(self):
+        """測試 JSON 輸出"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        result, output = self._view(editor, cell_range='A150:D150', as_json=True)
+        
+        self.assertEqual(json.loads(output), result)
+        self.assertEqual(
+            result['rows'][0]['values'],
+            ["列150", 150, "2024-01-02T03:04:05", "=B150+1"]
+        )
+        self.assertEqual((result['max_row'], result['max_column']), (300, 15))
+    
+    def test_shared_formula_before_window(self):
+        """測試共用公式的主儲存格在視窗之前時仍能轉換公式"""
+        kwargs = {'cell_range': 'A40:C42'}
+        raw, _ = self._view(ExcelEditor(self.shared_file, read_only=True), **kwargs)
+        loaded, _ = self._view(ExcelEditor(self.shared_file), **kwargs)
+        
+        self.assertEqual(raw, loaded)
+        self.assertEqual(raw['rows'][0]['values'], [40, "=A40*2", "文字"])
+    
+    def test_invalid_window(self):
+        """測試無效的範圍與分頁參數"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        self.assertIsNone(self._view(editor, cell_range='1:A')[0])
+        self.assertIsNone(self._view(editor, offset=-1)[0])
+        self.assertIsNone(self._view(editor, sheet_name='不存在')[0])
+
+
+class TestExcelEditorUpdateRange(unittest.TestCase):
+    """測試批次寫入範圍"""
+    
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "range.xlsx")
+        wb = Workbook()
+        wb.active.title = "資料"
+        wb.active["B2"] = "舊值"
+        wb.active["B2"].font = Font(bold=True)
+        wb.save(self.test_file)
+        self.editor = ExcelEditor(self.test_file)
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _values(self, cell_range):
+        ws = load_workbook(self.test_file)["資料"]
+        return [[cell.value for cell in row] for row in ws[cell_range]]
+    
+    def test_update_range_from_lists(self):
+        """測試寫入二維列表並保留既有格式"""
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            count = self.editor.update_range("資料", "b2", [[1, "文字"], [2.5, None, "=B2*2"]])
+        self.assertEqual(count, 5)
+        self.assertEqual(len(buffer.getvalue().splitlines()), 1)
+        self.editor.save()
+        
+        self.assertEqual(self._values("B2:D3"), [[1, "文字", None], [2.5, None, "=B2*2"]])
+        self.assertTrue(load_workbook(self.test_file)["資料"]["B2"].font.bold)
+    
+    def test_update_range_from_iterator(self):
+        """測試逐行產生的迭代器"""
+        rows = ((row, row * row) for row in range(1, 1001))
+        self.assertEqual(self.editor.update_range("資料", "A1", rows), 2000)
+        self.assertEqual(self.editor.wb["資料"].max_row, 1000)
+        
+        # append 從目前最後一行之後繼續
+        self.editor.wb["資料"].append(["下一行"])
+        self.editor.save()
+        self.assertEqual(self._values("A1000:B1001"), [[1000, 1000000], ["下一行", None]])
+    
+    def test_update_range_from_buffers(self):
+        """測試 array 與 memoryview 緩衝區"""
+        values = array.array('d', range(6))
+        self.assertEqual(self.editor.update_range("資料", "A1", values, columns=3), 6)
+        self.assertEqual(self.editor.update_range("資料", "A3", memoryview(values)), 6)
+        matrix = memoryview(array.array('i', range(4))).cast('B').cast('i', (2, 2))
+        self.assertEqual(self.editor.update_range("資料", "A4", matrix), 4)
+        self.editor.save()
+        
+        self.assertEqual(self._values("A1:C2"), [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+        self.assertEqual(self._values("A3:F3"), [[0.0, 1.0, 2.0, 3.0, 4.0, 5.0]])
+        self.assertEqual(self._values("A4:B5"), [[0, 1], [2, 3]])
+    
+    def test_update_range_invalid(self):
+        """測試無效的工作表、參照與超出範圍"""
+        self.assertEqual(self.editor.update_range("不存在", "A1", [[1]]), 0)
+        self.assertEqual(self.editor.update_range("資料", "A", [[1]]), 0)
+        self.assertEqual(self.editor.update_range("資料", "A1", [[1]], columns=0), 0)
+        self.assertEqual(self.editor.update_range("資料", "XFD1", [[1, 2]]), 1)
+        self.editor.save()
+        self.assertEqual(load_workbook(self.test_file)["資料"]["XFD1"].value, 1)
+    
+    def test_update_range_rejects_merged_cells_and_text_rows(self):
+        """測試合併儲存格與字串行回報錯誤與已寫入的數量"""
+        ws = self.editor.wb["資料"]
+        ws.merge_cells("B1:C1")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(self.editor.update_range("資料", "A1", [[1, 2, 3]]), 2)
+            self.assertEqual(self.editor.update_range("資料", "A10", [[1], "abc"]), 1)
+        self.assertIn("C1", output.getvalue())
+        self.assertEqual((ws["A1"].value, ws["B1"].value, ws["C1"].value), (1, 2, None))
+        self.assertEqual((ws["A11"].value, ws["B11"].value), (None, None))
+    
+    def test_execute_command_update_range(self):
+        """測試透過 execute_command 一次寫入"""
+        result = execute_command(
+            "update_range",
+            file_path=self.test_file,
+            sheet_name="資料",
+            top_left="A1",
+            rows=[["名稱", "數量"], ["A", 1]]
+        )
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"], {"cells": 4})
+        self.assertEqual(self._values("A1:B2"), [["名稱", "數量"], ["A", 1]])
+
+
+class TestExcelEditorRawAppend(unittest.TestCase):
+    """測試不載入工作簿的最後新增行"""
+    
+    ROWS = [[1, "文字 <&>", 2.5], [True, "=A1*2", "#N/A", None, "尾"]]
+    
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "append.xlsx")
+        wb = Workbook()
+        wb.active.title = "資料"
+        for row in range(1, 6):
+            wb.active.append([f"列{row}", row])
+        wb.create_sheet("其他")["A1"] = "不變"
+        wb.save(self.test_file)
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _append(self, path, rows):
+        output = os.path.join(self.test_dir, f"out_{os.path.basename(path)}")
+        editor = ExcelEditor(path, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            count = editor.append_rows(editor._sheet_names()[0], rows)
+            editor.save(output)
+        self.assertIsNone(editor._wb)
+        return count, output
+    
+    def _rewrite_sheet(self, path, old, new):
+        with zipfile.ZipFile(path) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+        parts['xl/worksheets/sheet1.xml'] = parts['xl/worksheets/sheet1.xml'].replace(old, new)
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for name, data in parts.items():
+                zf.writestr(name, data)
+    
+    def _sheet_xml(self):
+        with zipfile.ZipFile(self.test_file) as zf:
+            return zf.read('xl/worksheets/sheet1.xml')
+    
+    def test_append_matches_full_load(self):
+        """測試直接改寫與完整載入的結果一致"""
+        count, output = self._append(self.test_file, self.ROWS)
+        self.assertEqual(count, 2)
+        
+        expected = os.path.join(self.test_dir, "expected.xlsx")
+        editor = ExcelEditor(self.test_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.append_rows("資料", self.ROWS)
+            editor.save(expected)
+        
+        actual_wb, expected_wb = load_workbook(output), load_workbook(expected)
+        self.assertEqual(
+            list(actual_wb["資料"].values), list(expected_wb["資料"].values)
+        )
+        self.assertEqual(actual_wb["資料"]["B7"].data_type, "f")
+        self.assertEqual(actual_wb["資料"]["C7"].data_type, "e")
+        self.assertEqual(actual_wb["其他"]["A1"].value, "不變")
+        with zipfile.ZipFile(output) as zf:
+            self.assertIn(b'<dimension ref="A1:E7"/>', zf.read('xl/worksheets/sheet1.xml'))
+    
+    def test_append_message_row_numbers(self):
+        """測試訊息中的行號：多行顯示範圍，單行只顯示一個行號"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            editor.append_rows("資料", self.ROWS)
+            editor.append_rows("資料", self.ROWS[:1])
+        lines = output.getvalue().splitlines()
+        self.assertIn("（第 6-7 行）", lines[0])
+        self.assertIn("（第 8 行）", lines[1])
+    
+    def test_append_copies_other_parts(self):
+        """測試其他部件原樣複製"""
+        _, output = self._append(self.test_file, self.ROWS)
+        with zipfile.ZipFile(self.test_file) as source, zipfile.ZipFile(output) as result:
+            for info in source.infolist():
+                if info.filename != 'xl/worksheets/sheet1.xml':
+                    self.assertEqual(result.getinfo(info.filename).CRC, info.CRC)
+    
+    def test_append_with_stale_dimension(self):
+        """測試 dimension 紀錄過期時仍接在實際最後一列之後"""
+        self._rewrite_sheet(self.test_file, b'<dimension ref="A1:B5"/>', b'<dimension ref="A1:B2"/>')
+        _, output = self._append(self.test_file, [["新"]])
+        
+        ws = load_workbook(output)["資料"]
+        self.assertEqual(ws["A6"].value, "新")
+        with zipfile.ZipFile(output) as zf:
+            self.assertIn(b'<dimension ref="A1:B6"/>', zf.read('xl/worksheets/sheet1.xml'))
+    
+    def test_append_without_dimension_and_shared_strings(self):
+        """測試沒有 dimension 紀錄、使用共用字串表的工作表"""
+        path = os.path.join(self.test_dir, "shared.xlsx")
+        write_shared_strings_workbook(path, {"表": [["甲", 1], ["乙", 2]]})
+        _, output = self._append(path, [["丙", 3]])
+        self.assertEqual(
+            list(load_workbook(output)["表"].values), [("甲", 1), ("乙", 2), ("丙", 3)]
+        )
+    
+    def test_append_to_empty_sheet_data(self):
+        """測試空白工作表（<sheetData/>）與 openpyxl 相同接在第 2 行"""
+        self._rewrite_sheet(
+            self.test_file,
+            re.search(rb'<sheetData>.*</sheetData>', self._sheet_xml()).group(0),
+            b'<sheetData/>'
+        )
+        _, output = self._append(self.test_file, [["新"]])
+        self.assertEqual(load_workbook(output)["資料"]["A2"].value, "新")
+    
+    def test_add_row_falls_back_for_dates(self):
+        """測試需要樣式的值改為載入工作簿寫入"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(editor.add_row("資料", ["日期", datetime(2024, 5, 6)]))
+            editor.save()
+        self.assertIsNotNone(editor._wb)
+        self.assertEqual(load_workbook(self.test_file)["資料"]["B6"].value, datetime(2024, 5, 6))
+    
+    def test_add_row_raw_then_edit(self):
+        """測試直接新增行後再修改儲存格"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(editor.add_row("資料", ["新", 6]))
+            self.assertIsNone(editor._wb)
+            editor.update_cell("資料", "B6", 60)
+            editor.save()
+        ws = load_workbook(self.test_file)["資料"]
+        self.assertEqual((ws["A6"].value, ws["B6"].value), ("新", 60))
+
+
+class TestExcelEditorBulkRows(unittest.TestCase):
+    """測試一次插入、刪除多行"""
+    
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "rows.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "資料"
+        for row in range(1, 21):
+            ws.append([row, f"=A{row}*2"])
+        ws["C1"] = "=SUM(A2:A20)"
+        ws["C2"] = '=$A$6+A$8&"A6"'
+        ws.merge_cells("D2:D4")
+        ws["D2"] = "合併"
+        ws.merge_cells("E5:E6")
+        ws.row_dimensions[10].height = 30
+        wb.create_sheet("其他")["A1"] = "='資料'!A10+資料!A5+A5"
+        wb.save(self.test_file)
+        self.editor = ExcelEditor(self.test_file)
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _reload(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.editor.save()
+        return load_workbook(self.test_file)
+    
+    def test_delete_rows_list(self):
+        """測試刪除行號清單並調整公式、合併範圍與行高"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.editor.delete_rows_where("資料", [5, 3, 6, 7, 5]), 4)
+        wb = self._reload()
+        ws = wb["資料"]
+        
+        self.assertEqual(ws.max_row, 16)
+        self.assertEqual([ws.cell(row, 1).value for row in range(1, 6)], [1, 2, 4, 8, 9])
+        self.assertEqual(ws["B5"].value, "=A5*2")
+        self.assertEqual(ws["C1"].value, "=SUM(A2:A16)")
+        self.assertEqual(ws["C2"].value, '=#REF!+A$4&"A6"')
+        self.assertEqual(wb["其他"]["A1"].value, "='資料'!A6+資料!#REF!+A5")
+        self.assertEqual([str(r) for r in ws.merged_cells.ranges], ["D2:D3"])
+        self.assertEqual(ws.row_dimensions[6].height, 30)
+    
+    def test_delete_rows_predicate(self):
+        """測試以判斷函數刪除"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            count = self.editor.delete_rows_where("資料", lambda values: values[0] % 2 == 0)
+        self.assertEqual(count, 10)
+        ws = self._reload()["資料"]
+        self.assertEqual([ws.cell(row, 1).value for row in range(1, 11)], list(range(1, 21, 2)))
+    
+    def test_delete_rows_invalid(self):
+        """測試無效的行號與沒有符合的行"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.editor.delete_rows_where("資料", [0, 3]), 0)
+            self.assertEqual(self.editor.delete_rows_where("資料", [99]), 0)
+            self.assertEqual(self.editor.delete_rows_where("資料", lambda values: False), 0)
+            self.assertEqual(self.editor.delete_rows_where("不存在", [1]), 0)
+    
+    def test_insert_rows_bulk(self):
+        """測試一次插入多行並擴展範圍"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.editor.insert_rows_bulk("資料", 3, [["新1"], ["新2"]]), 2)
+        wb = self._reload()
+        ws = wb["資料"]
+        
+        self.assertEqual([ws.cell(row, 1).value for row in range(1, 6)], [1, 2, "新1", "新2", 3])
+        self.assertEqual(ws["B5"].value, "=A5*2")
+        self.assertEqual(ws["C1"].value, "=SUM(A2:A22)")
+        self.assertEqual(ws["C2"].value, '=$A$8+A$10&"A6"')
+        self.assertEqual(wb["其他"]["A1"].value, "='資料'!A12+資料!A7+A5")
+        self.assertEqual(
+            sorted(str(r) for r in ws.merged_cells.ranges), ["D2:D6", "E7:E8"]
+        )
+        self.assertEqual(ws.row_dimensions[12].height, 30)
+    
+    def test_single_row_operations_adjust_formulas(self):
+        """測試 add_row(position) 與 delete_row 也會調整公式"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.editor.add_row("資料", ["插入"], position=1)
+            self.editor.delete_row("資料", 7)
+        ws = self._reload()["資料"]
+        self.assertEqual(ws["A1"].value, "插入")
+        self.assertEqual(ws["C2"].value, "=SUM(A3:A20)")
+        self.assertEqual(ws["C3"].value, '=#REF!+A$8&"A6"')
+    
+    def test_parse_row_spec(self):
+        """測試行號清單解析"""
+        from src.excel_editor import _parse_row_spec
+        self.assertEqual(_parse_row_spec("3,5, 10-12,5"), [3, 5, 10, 11, 12])
+        with self.assertRaises(ValueError):
+            _parse_row_spec("5-3")
+
+
+
+class TestExcelEditorPartialLoad(unittest.TestCase):
+    """測試只載入要編輯的工作表"""
+    
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "partial.xlsx")
+        self.output = os.path.join(self.test_dir, "output.xlsx")
+        write_shared_strings_workbook(self.test_file, {
+            "編輯": [["共用", 1], ["只在編輯", 2]],
+            "原樣": [["共用", "=編輯!B1*2"], ["只在原樣", 3]],
+            "其他": [["其他字串"]],
+        })
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _part(self, path, name):
+        with zipfile.ZipFile(path) as zf:
+            return zf.read(name)
+    
+    def _save(self, editor, path=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.save(path or self.output)
+    
+    def test_only_requested_sheet_is_parsed(self):
+        """測試未載入的工作表原樣保留，共用字串仍然一致"""
+        editor = ExcelEditor(self.test_file, sheets=["編輯"])
+        self.assertEqual(sorted(editor._raw_sheet_parts()), ["其他", "原樣"])
+        self.assertIsNone(editor.wb["原樣"]["A1"].value)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(editor.update_cell("編輯", "A2", "新值"))
+            self.assertTrue(editor.set_cell_format("編輯", "A1", bold=True))
+        self._save(editor)
+        
+        for name in ("xl/worksheets/sheet2.xml", "xl/worksheets/sheet3.xml"):
+            self.assertEqual(self._part(self.output, name), self._part(self.test_file, name))
+        wb = load_workbook(self.output)
+        self.assertEqual([row for row in wb["編輯"].iter_rows(values_only=True)],
+                         [("共用", 1), ("新值", 2)])
+        self.assertTrue(wb["編輯"]["A1"].font.b)
+        self.assertEqual([row for row in wb["原樣"].iter_rows(values_only=True)],
+                         [("共用", "=編輯!B1*2"), ("只在原樣", 3)])
+        self.assertEqual(wb["其他"]["A1"].value, "其他字串")
+    
+    def test_sheet_is_loaded_on_access(self):
+        """測試操作未載入的工作表時才載入，並保留先前的修改"""
+        editor = ExcelEditor(self.test_file, sheets=["編輯"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.update_cell("編輯", "B1", 10)
+            editor.update_cell("原樣", "B2", 30)
+        self.assertEqual(sorted(editor._raw_sheet_parts()), ["其他"])
+        self.assertEqual(editor.wb["編輯"]["B1"].value, 10)
+        self._save(editor)
+        
+        wb = load_workbook(self.output)
+        self.assertEqual(wb["原樣"]["A2"].value, "只在原樣")
+        self.assertEqual(wb["原樣"]["B2"].value, 30)
+        self.assertEqual(wb["其他"]["A1"].value, "其他字串")
+    
+    def test_save_twice_and_view_unloaded_sheet(self):
+        """測試重複儲存與直接讀取未載入的工作表"""
+        editor = ExcelEditor(self.test_file, sheets=["編輯"])
+        self._save(editor)
+        self._save(editor)
+        self._save(editor, self.test_file)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            view = editor.view_sheet("其他", as_json=True)
+        self.assertEqual(view["rows"], [{"row": 1, "values": ["其他字串"]}])
+        self.assertEqual(sorted(editor._raw_sheet_parts()), ["其他", "原樣"])
+        
+        wb = load_workbook(self.test_file)
+        self.assertEqual(wb["原樣"]["A2"].value, "只在原樣")
+        metadata = {sheet["name"]: sheet["max_row"] for sheet in editor._sheet_metadata()}
+        self.assertEqual(metadata, {"編輯": 2, "原樣": 2, "其他": 1})
+    
+    def test_keeps_related_parts_of_unloaded_sheet(self):
+        """測試未載入工作表的註解與表格一併保留"""
+        from openpyxl.comments import Comment
+        from openpyxl.worksheet.table import Table
+        
+        wb = Workbook()
+        wb.active.title = "編輯"
+        wb.active["A1"] = "值"
+        ws = wb.create_sheet("表格")
+        ws.append(["名稱", "數量"])
+        ws.append(["A", 1])
+        ws["A1"].comment = Comment("註解", "作者")
+        ws.add_table(Table(displayName="清單", ref="A1:B2"))
+        wb.save(self.test_file)
+        
+        editor = ExcelEditor(self.test_file, sheets=["編輯"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.update_cell("編輯", "A1", "新值")
+            new_sheet = editor.wb.create_sheet("新表")
+            new_sheet["A1"] = "欄"
+            new_sheet.add_table(Table(displayName="新清單", ref="A1:A2"))
+        self._save(editor)
+        
+        wb = load_workbook(self.output)
+        ws = wb["表格"]
+        self.assertEqual(ws["A1"].comment.text, "註解")
+        self.assertEqual(list(ws.tables), ["清單"])
+        with zipfile.ZipFile(self.output) as zf:
+            table_ids = [
+                re.search(rb'\bid="(\d+)"', zf.read(name)).group(1)
+                for name in zf.namelist() if name.startswith("xl/tables/")
+            ]
+        self.assertEqual(len(set(table_ids)), 2)
+    
+    def test_cli_set_format_uses_partial_load(self):
+        """測試 set-format 命令只載入指定的工作表"""
+        from unittest import mock
+        from src import excel_editor
+        
+        original = self._part(self.test_file, "xl/worksheets/sheet2.xml")
+        argv = ["excel_editor.py", self.test_file, "set-format", "編輯", "A1", "--bold"]
+        with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(io.StringIO()):
+            excel_editor.main()
+        
+        self.assertEqual(self._part(self.test_file, "xl/worksheets/sheet2.xml"), original)
+        wb = load_workbook(self.test_file)
+        self.assertTrue(wb["編輯"]["A1"].font.b)
+        self.assertEqual(wb["原樣"]["A1"].value, "共用")
+
+
+class TestExcelEditorFormulaValues(unittest.TestCase):
+    """測試一次讀取公式與快取值"""
+    
+    def setUp(self):
+        """準備測試環境：公式儲存格帶有快取值"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "values.xlsx")
+        source = os.path.join(self.test_dir, "source.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "報表"
+        ws.append([2, "=A1*3", '="編號"&A1', "=1/0"])
+        ws.append([5, "=A2*3", "文字"])
+        wb.create_sheet("其他")["A1"] = "=報表!B1+1"
+        wb.save(source)
+        write_formula_values(source, self.test_file, {
+            "報表": {(1, 2): 6, (1, 3): "編號2", (1, 4): FormulaError("#DIV/0!"), (2, 2): 15},
+            "其他": {(1, 1): 7},
+        })
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _view(self, editor, values, sheet="報表"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            view = editor.view_sheet(sheet, as_json=True, values=values)
+        return [row["values"] for row in view["rows"]]
+    
+    def _find(self, editor, text, values):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return editor.find_cells(text, values=values)
+    
+    def test_view_modes_match_openpyxl(self):
+        """測試兩種載入方式讀到的公式與快取值和 openpyxl 相同"""
+        formulas = [list(row) for row in load_workbook(self.test_file)["報表"].values]
+        cached = [list(row) for row in load_workbook(self.test_file, data_only=True)["報表"].values]
+        both = [
+            [2, {"formula": "=A1*3", "value": 6}, {"formula": '="編號"&A1', "value": "編號2"},
+             {"formula": "=1/0", "value": "#DIV/0!"}],
+            [5, {"formula": "=A2*3", "value": 15}, "文字", None],
+        ]
+        for read_only in (True, False):
+            with self.subTest(read_only=read_only):
+                editor = ExcelEditor(self.test_file, read_only=read_only)
+                self.assertEqual(self._view(editor, "formula"), formulas)
+                self.assertEqual(self._view(editor, "cached"), cached)
+                self.assertEqual(self._view(editor, "both"), both)
+                self.assertEqual(self._view(editor, "cached", "其他"), [[7]])
+    
+    def test_edits_invalidate_cached_values(self):
+        """測試修改過的公式沒有快取值，插入行後快取值跟著移動"""
+        editor = ExcelEditor(self.test_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.set_formula("報表", "B1", "=A1*4")
+            editor.insert_rows_bulk("報表", 1, [["新行"]])
+        self.assertEqual(self._view(editor, "cached"), [
+            ["新行", None, None, None],
+            [2, None, "編號2", "#DIV/0!"],
+            [5, 15, "文字", None],
+        ])
+        self.assertEqual(self._view(editor, "both", "其他"), [
+            [{"formula": "=報表!B2+1", "value": 7}]
+        ])
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.recalculate()
+        self.assertEqual(self._view(editor, "cached")[1][1], 8)
+    
+    def test_cached_values_survive_save(self):
+        """測試覆蓋原檔後仍保有已載入工作表的快取值"""
+        editor = ExcelEditor(self.test_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.update_cell("報表", "C2", "新文字")
+            editor.save()
+        self.assertIsNone(load_workbook(self.test_file, data_only=True)["報表"]["B1"].value)
+        self.assertEqual(self._view(editor, "cached")[0][1], 6)
+        self.assertEqual(self._view(editor, "cached", "其他"), [[7]])
+    
+    def test_find_cached_values(self):
+        """測試搜尋公式的快取值"""
+        for read_only in (True, False):
+            with self.subTest(read_only=read_only):
+                editor = ExcelEditor(self.test_file, read_only=read_only)
+                self.assertEqual(self._find(editor, "編號", "formula"), [("報表", "C1", '="編號"&A1')])
+                self.assertEqual(self._find(editor, "編號2", "cached"), [("報表", "C1", "編號2")])
+                self.assertEqual(self._find(editor, "A2", "both"), [
+                    ("報表", "B2", {"formula": "=A2*3", "value": 15})
+                ])
+                self.assertEqual(self._find(editor, "x", "all"), [])
+    
+    def test_json_api(self):
+        """測試 JSON API 讀取與搜尋"""
+        result = execute_command("read_sheet", file_path=self.test_file,
+                                 cell_range="B1:B2", values="both")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["rows"][0]["values"], [{"formula": "=A1*3", "value": 6}])
+        
+        result = execute_command("find_cells", file_path=self.test_file,
+                                 search_text="#DIV", values="cached")
+        self.assertEqual(result["result"]["matches"], [{"sheet": "報表", "cell": "D1", "value": "#DIV/0!"}])
+        
+        result = execute_command("read_sheet", file_path=self.test_file, values="計算")
+        self.assertFalse(result["success"])
+
+
+
+class TestExcelEditorJoin(unittest.TestCase):
+    """測試查找並寫入靜態值"""
+    
+    def setUp(self):
+        """準備測試環境：訂單（共用字串）與另一個檔案的客戶表"""
+        self.test_dir = tempfile.mkdtemp()
+        self.orders = os.path.join(self.test_dir, "orders.xlsx")
+        self.customers = os.path.join(self.test_dir, "customers.xlsx")
+        write_shared_strings_workbook(self.orders, {
+            "訂單": [["訂單", "客戶編號", "金額"]] + [
+                [index, f"C{index % 4}" if index % 5 else "無", index * 10] for index in range(1, 11)
+            ] + [[None], [11, "c1", "=C11*2"]],
+        })
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "客戶"
+        ws.append(["編號", "名稱", "等級"])
+        ws.append(["c1", "甲", 1])
+        ws.append(["C2", "乙", None])
+        ws.append(["C3", "=丙", True])
+        ws.append(["C1", "重複", 9])
+        ws.append([None, "空白", 0])
+        ws["B4"].data_type = "s"  # "=" 開頭的文字，不是公式
+        wb.save(self.customers)
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _join(self, editor, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return editor.join(*args, **kwargs)
+    
+    def _values(self, path):
+        return [list(row) for row in load_workbook(path)["訂單"].iter_rows(min_col=4, values_only=True)]
+    
+    def test_raw_and_loaded_join_match(self):
+        """測試串流改寫與載入工作簿寫入的結果相同"""
+        results = {}
+        for read_only in (True, False):
+            path = os.path.join(self.test_dir, f"{read_only}.xlsx")
+            shutil.copy(self.orders, path)
+            editor = ExcelEditor(path, read_only=read_only)
+            result = self._join(editor, "訂單", "客戶編號", "客戶", "編號", ["名稱", "C"],
+                                lookup_file=self.customers)
+            with contextlib.redirect_stdout(io.StringIO()):
+                editor.save()
+            results[read_only] = (result, self._values(path))
+        self.assertEqual(results[True], results[False])
+        
+        result, values = results[True]
+        self.assertEqual(result["columns"], ["D", "E"])
+        self.assertEqual((result["rows"], result["matched"], result["unmatched"]), (11, 7, 4))
+        self.assertEqual(result["unmatched_keys"], ["C0", "無"])
+        self.assertEqual(values[0], ["名稱", "等級"])
+        self.assertEqual(values[1], ["甲", 1])
+        self.assertEqual(values[2], ["乙", None])
+        self.assertEqual(values[3], ["=丙", True])
+        self.assertEqual(values[12], ["甲", 1])
+        # 原本的公式不受影響
+        self.assertEqual(load_workbook(path)["訂單"]["C13"].value, "=C11*2")
+    
+    def test_raw_join_keeps_styles_and_target_column(self):
+        """測試寫入指定的欄位時取代原本的值並保留樣式"""
+        wb = load_workbook(self.orders)
+        wb["訂單"]["C2"].font = Font(bold=True)
+        wb.save(self.orders)
+        editor = ExcelEditor(self.orders, read_only=True)
+        result = self._join(editor, "訂單", "B", "客戶", "A", ["B"], lookup_file=self.customers,
+                            target_column="C")
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.save()
+        ws = load_workbook(self.orders)["訂單"]
+        self.assertEqual(result["columns"], ["C"])
+        self.assertEqual([ws["C1"].value, ws["C2"].value, ws["C6"].value], ["名稱", "甲", 50])
+        self.assertTrue(ws["C2"].font.b)
+        self.assertEqual(ws.max_column, 3)
+    
+    def test_join_with_dates_and_same_file(self):
+        """測試同一個檔案的查詢表，日期值改為載入工作簿寫入"""
+        wb = load_workbook(self.orders)
+        lookup = wb.create_sheet("客戶")
+        lookup.append(["編號", "生效日"])
+        lookup.append(["C1", datetime(2024, 5, 1)])
+        wb.save(self.orders)
+        
+        editor = ExcelEditor(self.orders, read_only=True)
+        result = self._join(editor, "訂單", "客戶編號", "客戶", "編號", ["生效日"])
+        self.assertFalse(editor.read_only)
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.save()
+        self.assertEqual(result["matched"], 3)
+        self.assertEqual(load_workbook(self.orders)["訂單"]["D2"].value, datetime(2024, 5, 1))
+    
+    def test_join_invalid_arguments(self):
+        """測試無效的欄位與工作表"""
+        editor = ExcelEditor(self.orders, read_only=True)
+        self.assertIsNone(self._join(editor, "訂單", "不存在", "客戶", "編號", ["名稱"],
+                                     lookup_file=self.customers))
+        self.assertIsNone(self._join(editor, "訂單", "B", "不存在", "編號", ["名稱"],
+                                     lookup_file=self.customers))
+        self.assertIsNone(self._join(editor, "訂單", "B", "客戶", "編號", [], lookup_file=self.customers))
+        self.assertIsNone(self._join(editor, "訂單", "B", "客戶", "編號", ["名稱"],
+                                     lookup_file=os.path.join(self.test_dir, "無.xlsx")))
+    
+    def test_json_api_join(self):
+        """測試 JSON API 的 join_sheets"""
+        result = execute_command("join_sheets", file_path=self.orders, sheet_name="訂單",
+                                 key_column="客戶編號", lookup_sheet="客戶", lookup_key="編號",
+                                 columns=["名稱"], lookup_file=self.customers)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["unmatched"], 4)
+        self.assertEqual(load_workbook(self.orders)["訂單"]["D2"].value, "甲")
+
+
+class TestExcelEditorDedupe(unittest.TestCase):
+    """測試移除重複列"""
+    
+    ROWS = [["客戶", "金額"], ["A", 1], ["a", 2], ["B", 3], [None, None], ["A ", 4], ["A", 5], ["b", 6]]
+    
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "dedupe.xlsx")
+        write_shared_strings_workbook(self.test_file, {"名單": self.ROWS, "其他": [["保留"]]})
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _dedupe(self, read_only, *args, **kwargs):
+        editor = ExcelEditor(self.test_file, read_only=read_only)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = editor.dedupe("名單", *args, **kwargs)
+            editor.save(os.path.join(self.test_dir, "out.xlsx"))
+        return editor, result, load_workbook(os.path.join(self.test_dir, "out.xlsx"))
+    
+    def test_raw_and_loaded_dedupe_match(self):
+        """測試串流重寫與載入工作簿刪除的結果相同（文字不分大小寫，空白列不處理）"""
+        for keep, expected in (
+            ("first", [("A", 1), ("B", 3), (None, None), ("A ", 4)]),
+            ("last", [(None, None), ("A ", 4), ("A", 5), ("b", 6)]),
+        ):
+            outputs = []
+            for read_only in (True, False):
+                with self.subTest(keep=keep, read_only=read_only):
+                    editor, result, wb = self._dedupe(read_only, "客戶", keep=keep)
+                    self.assertEqual(editor.read_only, read_only)
+                    self.assertEqual(result, {"sheet": "名單", "rows": 6, "removed": 3, "kept": 3})
+                    rows = list(wb["名單"].values)
+                    self.assertEqual(rows[0], ("客戶", "金額"))
+                    outputs.append(rows)
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual(outputs[0][1:], expected)
+            self.assertEqual(wb["其他"]["A1"].value, "保留")
+    
+    def test_whole_row_keys(self):
+        """測試不指定鍵欄位時比較整列"""
+        _, result, _ = self._dedupe(True)
+        self.assertEqual(result["removed"], 0)
+        
+        wb = load_workbook(self.test_file)
+        wb["名單"].append(["a", 1.0])
+        wb.save(self.test_file)
+        _, result, wb = self._dedupe(True, keep="last")
+        self.assertEqual(result["removed"], 1)
+        self.assertEqual(wb["名單"]["A2"].value, "a")
+    
+    def test_references_fall_back_to_loaded_delete(self):
+        """測試其他工作表參照此工作表時載入工作簿刪除並調整公式"""
+        wb = load_workbook(self.test_file)
+        wb["其他"]["B1"] = "=名單!B8"
+        wb["其他"]["B2"] = "=SUM(名單!B2:B8)"
+        wb.save(self.test_file)
+        editor, result, wb = self._dedupe(True, "A")
+        self.assertFalse(editor.read_only)
+        self.assertEqual(result["removed"], 3)
+        self.assertEqual(wb["其他"]["B1"].value, "=名單!#REF!")
+        self.assertEqual(wb["其他"]["B2"].value, "=SUM(名單!B2:B5)")
+    
+    def test_dedupe_invalid_arguments(self):
+        """測試無效的欄位、keep 與 JSON API"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(editor.dedupe("名單", "不存在"))
+            self.assertIsNone(editor.dedupe("名單", "A", keep="middle"))
+            self.assertIsNone(editor.dedupe("不存在", "A"))
+        
+        result = execute_command("dedupe_rows", file_path=self.test_file, sheet_name="名單",
+                                 key_columns=["客戶"], keep="last")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["removed"], 3)
+        self.assertEqual(load_workbook(self.test_file)["名單"].max_row, 5)
+
+
+
+class TestExcelEditorRangeFormat(unittest.TestCase):
+    """測試範圍格式與格式清單整理"""
+    
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "format.xlsx")
+        self.output_file = os.path.join(self.test_dir, "out.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        for row in range(1, 501):
+            ws.append([row, row * 1.5, f"文字{row}"])
+            if row % 2:
+                ws.cell(row, 1).font = Font(italic=True)
+        ws.column_dimensions.group("B", "E")
+        wb.save(self.test_file)
+    
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+    
+    def _format(self, *calls):
+        editor = ExcelEditor(self.test_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = [editor.set_cell_format("Sheet", *args, **kwargs) for args, kwargs in calls]
+            editor.save(self.output_file)
+        return results, load_workbook(self.output_file)
+    
+    def test_range_shares_styles(self):
+        """測試範圍內相同的原有格式共用一個新格式，原有的字型屬性保留"""
+        results, wb = self._format(((("A1:D500",), {"bold": True, "bg_color": "FFFF00",
+                                                      "number_format": "#,##0.00"})))
+        self.assertEqual(results, [True])
+        ws = wb["Sheet"]
+        # 預設格式加上斜體 / 非斜體兩種
+        self.assertEqual(len(wb._cell_styles), 3)
+        self.assertTrue(ws["D500"].font.b)
+        self.assertEqual((ws["A1"].font.i, ws["A2"].font.i), (True, False))
+        self.assertEqual(ws["B2"].number_format, "#,##0.00")
+        self.assertEqual(ws["C3"].fill.fill_type, "solid")
+        self.assertEqual(ws.max_column, 4)
+    
+    def test_whole_rows_and_columns(self):
+        """測試整列與整欄設定預設格式，欄寬群組只拆開需要的部分"""
+        _, wb = self._format((("C:C",), {"alignment": "center"}),
+                             (("2:3",), {"style": "Good"}))
+        ws = wb["Sheet"]
+        self.assertEqual(ws.max_column, 3)
+        self.assertEqual(ws["C100"].alignment.horizontal, "center")
+        self.assertEqual(ws.column_dimensions["C"].alignment.horizontal, "center")
+        self.assertEqual({key: (dim.min, dim.max) for key, dim in ws.column_dimensions.items()},
+                         {"B": (2, 2), "C": (3, 3), "D": (4, 5)})
+        self.assertEqual(ws["A2"].style, "Good")
+        self.assertEqual(ws.row_dimensions[3].s, ws["A3"].style_id)
+        self.assertEqual(ws["A4"].style, "Normal")
+    
+    def test_unused_styles_are_compacted(self):
+        """測試儲存時移除已經沒有儲存格使用的格式"""
+        wb = load_workbook(self.test_file)
+        wb["Sheet"]["A2"].number_format = "0%"
+        wb.save(self.test_file)
+        replaced = copy(load_workbook(self.test_file)["Sheet"]["A2"]._style)
+        
+        _, wb = self._format((("A2",), {"number_format": "General", "bold": True}))
+        self.assertNotIn(replaced, wb._cell_styles)
+        self.assertEqual(len(wb._cell_styles), 3)
+        self.assertTrue(wb["Sheet"]["A2"].font.b)
+        self.assertTrue(wb["Sheet"]["A3"].font.i)
+    
+    def test_invalid_range_and_style(self):
+        """測試無效的範圍與具名樣式"""
+        results, _ = self._format((("A1:",), {"bold": True}), (("A1",), {"style": "不存在"}))
+        self.assertEqual(results, [False, False])
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for Formula Engine
+Testing: parsing, functions, dependency graph, incremental recalculation,
+         ExcelEditor integration and cached value write-back
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import io
+import contextlib
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.formula_engine import FormulaEngine, FormulaError, parse_formula
+from src.excel_editor import ExcelEditor
+from openpyxl import Workbook, load_workbook
+
+
+class TestFormulaEngine(unittest.TestCase):
+    """測試公式計算"""
+
+    def setUp(self):
+        """準備測試資料"""
+        self.engine = FormulaEngine()
+        self.engine.add_sheet("資料")
+        self.engine.add_sheet("查詢表")
+        for row, (name, amount) in enumerate([("蘋果", 10), ("香蕉", 20), ("櫻桃", 30)], 1):
+            self.engine.set_value("資料", f"A{row}", name)
+            self.engine.set_value("資料", f"B{row}", amount)
+        self.engine.set_value("資料", "A4", "文字")
+        self.engine.set_value("查詢表", "A1", 15)
+
+    def _evaluate(self, formula):
+        self.engine.set_value("資料", "Z1", formula)
+        self.engine.recalculate()
+        return self.engine.get_value("資料", "Z1")
+
+    def test_operators_and_precedence(self):
+        """測試運算子優先順序與型別轉換"""
+        cases = {
+            "=1+2*3": 7,
+            "=(1+2)*3": 9,
+            "=-2^2": 4,
+            "=2^3^2": 64,
+            "=50%": 0.5,
+            '="a"&1.5&TRUE': "a1.5TRUE",
+            '="abc"="ABC"': True,
+            "=1<\"a\"": True,
+            "=B1+\"5\"": 15,
+            "=B2/B1": 2,
+        }
+        for formula, expected in cases.items():
+            with self.subTest(formula=formula):
+                self.assertEqual(self._evaluate(formula), expected)
+
+    def test_functions(self):
+        """測試常用函數"""
+        cases = {
+            "=SUM(B1:B3)": 60,
+            "=SUM(A4)": 0,
+            "=AVERAGE(B:B)": 20,
+            "=MAX(B1:B3)-MIN(B1:B3)": 20,
+            "=COUNT(A1:B4)": 3,
+            "=COUNTA(A1:A4)": 4,
+            '=COUNTIF(B1:B3,">15")': 2,
+            '=SUMIF(A1:A3,"?果",B1:B3)': 10,
+            '=SUMIFS(B1:B3,B1:B3,">=20",A1:A3,"<>櫻桃")': 20,
+            '=IF(B1>5,"大","小")': "大",
+            '=IFERROR(1/0,"錯誤")': "錯誤",
+            "=AND(B1>5,B2>25)": False,
+            "=ROUND(2.5,0)": 3,
+            "=ROUND(-1.234,2)": -1.23,
+            "=VLOOKUP(\"香蕉\",A1:B3,2,FALSE)": 20,
+            "=VLOOKUP(25,B1:B3,1)": 20,
+            "=INDEX(A1:B3,MATCH(30,B1:B3,0),1)": "櫻桃",
+            '=XLOOKUP("櫻桃",A1:A3,B1:B3)': 30,
+            '=XLOOKUP("無",A1:A3,B1:B3,"找不到")': "找不到",
+            "=B1+查詢表!A1": 25,
+            '=LEFT(A2,1)&MID("hello",2,3)&RIGHT("xyz",2)': "香ellyz",
+            '=SUBSTITUTE("a-b-c","-","+",2)': "a-b+c",
+            '=TEXTJOIN(",",TRUE,A1:A3)': "蘋果,香蕉,櫻桃",
+            '=TEXT(1234.5,"#,##0.00")': "1,234.50",
+            "=TEXT(DATE(2024,14,1),\"yyyy-mm-dd\")": "2025-02-01",
+            "=YEAR(EOMONTH(DATE(2024,1,31),1))*100+DAY(EOMONTH(DATE(2024,1,31),1))": 202429,
+        }
+        for formula, expected in cases.items():
+            with self.subTest(formula=formula):
+                self.assertEqual(self._evaluate(formula), expected)
+
+    def test_errors(self):
+        """測試錯誤值的產生與傳遞"""
+        cases = {
+            "=1/0": "#DIV/0!",
+            "=A4+1": "#VALUE!",
+            "=未知函數(1)": "#NAME?",
+            "=不存在!A1": "#REF!",
+            '=VLOOKUP("無",A1:B3,2,FALSE)': "#N/A",
+            "=SQRT(-1)": "#NUM!",
+        }
+        for formula, code in cases.items():
+            with self.subTest(formula=formula):
+                self.assertEqual(self._evaluate(formula), FormulaError(code))
+        self.assertTrue(self._evaluate("=ISERROR(1/0)"))
+        self.assertTrue(self._evaluate('=ISNA(MATCH("無",A1:A3,0))'))
+
+    def test_parse_errors(self):
+        """測試語法錯誤"""
+        for formula in ("=1+", "=SUM(1", "=(1))", "=1 ~ 2"):
+            with self.subTest(formula=formula):
+                with self.assertRaises(ValueError):
+                    parse_formula(formula)
+        self.assertEqual(self._evaluate("=SUM(1"), FormulaError("#NAME?"))
+
+    def test_incremental_recalculation_touches_only_dependents(self):
+        """測試修改一個輸入只重新計算其相依的公式"""
+        engine = FormulaEngine()
+        engine.add_sheet("S")
+        for row in range(1, 2001):
+            engine.set_cell("S", row, 1, row)
+            engine.set_cell("S", row, 2, f"=A{row}*2")
+            engine.set_cell("S", row, 3, f"=B{row}+1")
+        engine.set_cell("S", 1, 4, "=SUM(C1:C10)")
+        self.assertEqual(engine.recalculate(), 4001)
+
+        engine.set_value("S", "A5", 100)
+        self.assertEqual(engine.recalculate(), 3)
+        self.assertEqual(engine.get_value("S", "C5"), 201)
+        self.assertEqual(engine.get_value("S", "D1"), sum(row * 2 + 1 for row in range(1, 11)) + 190)
+
+        engine.set_value("S", "A500", 0)
+        self.assertEqual(engine.recalculate(), 2)
+        self.assertEqual(engine.recalculate(), 0)
+
+    def test_formula_change_updates_graph(self):
+        """測試改寫公式後相依關係隨之更新"""
+        self.engine.set_value("資料", "C1", "=B1*2")
+        self.engine.recalculate()
+        self.engine.set_value("資料", "C1", "=B2*2")
+        self.engine.recalculate()
+        self.assertEqual(self.engine.get_value("資料", "C1"), 40)
+
+        self.engine.set_value("資料", "B1", 99)
+        self.assertEqual(self.engine.recalculate(), 0)
+        self.engine.set_value("資料", "B2", 1)
+        self.assertEqual(self.engine.recalculate(), 1)
+        self.assertEqual(self.engine.get_value("資料", "C1"), 2)
+
+    def test_circular_reference(self):
+        """測試循環參照結果為 0，不影響其他公式"""
+        self.engine.set_value("資料", "C1", "=C2+1")
+        self.engine.set_value("資料", "C2", "=C1+1")
+        self.engine.set_value("資料", "C3", "=B1+1")
+        self.engine.recalculate()
+        self.assertEqual(self.engine.get_value("資料", "C1"), 0)
+        self.assertEqual(self.engine.get_value("資料", "C3"), 11)
+
+
+class TestExcelEditorRecalculate(unittest.TestCase):
+    """測試 ExcelEditor 的公式計算"""
+
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "calc.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "報表"
+        ws.append(["單價", "數量", "小計"])
+        ws.append([100, 3, "=A2*B2"])
+        ws.append([50, 4, "=A3*B3"])
+        ws["C4"] = "=SUM(C2:C3)+參數!A1"
+        wb.create_sheet("參數")["A1"] = 10
+        wb.save(self.test_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.editor = ExcelEditor(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def test_recalculate_after_edits(self):
+        """測試透過編輯器修改後只重新計算受影響的公式"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.editor.recalculate(), 3)
+            self.assertEqual(self.editor.get_calculated_value("報表", "C4"), 510)
+
+            self.editor.update_cell("報表", "B3", 10)
+            self.editor.update_range("參數", "A1", [[0]])
+            self.assertEqual(self.editor.recalculate(), 2)
+            self.assertEqual(self.editor.get_calculated_value("報表", "C4"), 800)
+
+            self.editor.set_formula("報表", "D2", "=C2/C4")
+            self.assertEqual(self.editor.get_calculated_value("報表", "D2"), 0.375)
+
+    def test_write_values_on_save(self):
+        """測試儲存時寫入公式的快取值，公式本身不變"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.editor.recalculate(write_values=True)
+            self.editor.update_cell("報表", "A2", 200)
+            self.editor.save()
+
+        values = load_workbook(self.test_file, data_only=True)["報表"]
+        self.assertEqual([values[f"C{row}"].value for row in range(2, 5)], [600, 200, 810])
+        self.assertEqual(load_workbook(self.test_file)["報表"]["C4"].value, "=SUM(C2:C3)+參數!A1")
+
+    def test_row_changes_rebuild_engine(self):
+        """測試插入行後重新建立相依圖"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.editor.recalculate()
+            self.editor.insert_rows_bulk("報表", 3, [[1, 1, "=A3*B3"]])
+            self.editor.recalculate()
+            self.assertEqual(self.editor.get_calculated_value("報表", "C5"), 511)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for PPT Editor New Features
+Testing: duplicate_slide, collect_garbage, add_slides, PPTReader, normalize_fonts
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import zipfile
+import json
+import io
+import contextlib
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ppt_editor import PPTEditor, PPTReader, iter_jsonl, parse_slide_range
+from pptx import Presentation
+from pptx.util import Cm
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+
+class TestPPTEditorNewFeatures(unittest.TestCase):
+    """測試 PPT Editor 新功能"""
+
+    @classmethod
+    def setUpClass(cls):
+        """設置測試環境"""
+        cls.test_dir = tempfile.mkdtemp()
+        cls.test_pptx = os.path.join(cls.test_dir, "test.pptx")
+        cls.test_image = os.path.join(cls.test_dir, "test.png")
+
+        from PIL import Image
+        Image.new('RGB', (200, 200), color='red').save(cls.test_image)
+
+        # 創建測試簡報
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = "模板投影片"
+        slide.placeholders[1].text = "第一行\n第二行"
+        slide.shapes.add_picture(cls.test_image, Cm(1), Cm(1), width=Cm(3))
+        slide.notes_slide.notes_text_frame.text = "備忘稿"
+
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = "第二張"
+        prs.save(cls.test_pptx)
+
+    @classmethod
+    def tearDownClass(cls):
+        """清理測試環境"""
+        shutil.rmtree(cls.test_dir)
+
+    def setUp(self):
+        """每個測試前的準備"""
+        self.output_file = os.path.join(self.test_dir, f"output_{self._testMethodName}.pptx")
+        shutil.copy(self.test_pptx, self.output_file)
+        self.editor = PPTEditor(self.output_file)
+
+    def test_duplicate_slide_basic(self):
+        """測試複製投影片"""
+        result = self.editor.duplicate_slide(1)
+        self.assertTrue(result)
+
+        self.editor.save()
+        prs = Presentation(self.output_file)
+        self.assertEqual(len(prs.slides), 3)
+        self.assertEqual(prs.slides[2].shapes.title.text, "模板投影片")
+        self.assertEqual(prs.slides[2].placeholders[1].text, "第一行\n第二行")
+
+    def test_duplicate_slide_multiple_copies(self):
+        """測試一次複製多份"""
+        result = self.editor.duplicate_slide(1, count=20)
+        self.assertTrue(result)
+
+        self.editor.save()
+        prs = Presentation(self.output_file)
+        self.assertEqual(len(prs.slides), 22)
+
+        # 每份複本的圖片都應可讀取
+        for slide in list(prs.slides)[2:]:
+            pictures = [shape for shape in slide.shapes if shape.shape_type == 13]
+            self.assertEqual(len(pictures), 1)
+            self.assertEqual(pictures[0].image.size, (200, 200))
+
+    def test_duplicate_slide_shares_media(self):
+        """測試複本共用圖片 part 而不重複儲存"""
+        self.editor.duplicate_slide(1, count=5)
+        self.editor.save()
+
+        with zipfile.ZipFile(self.output_file) as zf:
+            media = [name for name in zf.namelist() if name.startswith('ppt/media/')]
+        self.assertEqual(len(media), 1)
+
+    def test_duplicate_slide_keeps_source_notes(self):
+        """測試備忘稿不會被複本共用"""
+        self.editor.duplicate_slide(1)
+        self.editor.save()
+
+        prs = Presentation(self.output_file)
+        self.assertTrue(prs.slides[0].has_notes_slide)
+        self.assertFalse(prs.slides[2].has_notes_slide)
+
+    def test_duplicate_slide_invalid_number(self):
+        """測試無效的投影片編號"""
+        self.assertFalse(self.editor.duplicate_slide(10))
+        self.assertFalse(self.editor.duplicate_slide(1, count=0))
+
+    def test_collect_garbage_after_delete_slide(self):
+        """測試刪除投影片後回收其圖片與備忘稿"""
+        self.editor.delete_slide(1)
+        reclaimed = self.editor.collect_garbage()
+        self.assertGreater(reclaimed, 0)
+
+        self.editor.save()
+        with zipfile.ZipFile(self.output_file) as zf:
+            names = zf.namelist()
+        self.assertFalse([name for name in names if name.startswith('ppt/media/')])
+        self.assertFalse([name for name in names if name.startswith('ppt/notesSlides/')])
+
+    def test_collect_garbage_keeps_notes_slide_relationship(self):
+        """測試儲存後備忘稿仍保留指向投影片的隱含關聯"""
+        self.editor.save()
+
+        prs = Presentation(self.output_file)
+        notes_part = prs.slides[0].notes_slide.part
+        reltypes = {rel.reltype for rel in notes_part.rels.values()}
+        self.assertIn(RT.SLIDE, reltypes)
+        self.assertIn(RT.NOTES_MASTER, reltypes)
+        self.assertIs(notes_part.part_related_by(RT.SLIDE), prs.slides[0].part)
+
+    def test_collect_garbage_drops_unreferenced_image(self):
+        """測試移除圖片形狀後不再寫出圖片"""
+        slide = self.editor.prs.slides[0]
+        picture = [shape for shape in slide.shapes if shape.shape_type == 13][0]
+        picture.element.getparent().remove(picture.element)
+
+        self.editor.save()
+        with zipfile.ZipFile(self.output_file) as zf:
+            media = [name for name in zf.namelist() if name.startswith('ppt/media/')]
+        self.assertEqual(media, [])
+        self.assertEqual(len(Presentation(self.output_file).slides), 2)
+
+    def test_collect_garbage_keeps_shared_image(self):
+        """測試仍被其他投影片使用的圖片不會被移除"""
+        self.editor.duplicate_slide(1)
+        self.editor.delete_slide(1)
+        self.editor.save()
+
+        prs = Presentation(self.output_file)
+        pictures = [shape for shape in prs.slides[1].shapes if shape.shape_type == 13]
+        self.assertEqual(pictures[0].image.size, (200, 200))
+
+    def test_add_slides_from_specs(self):
+        """測試批次新增投影片"""
+        specs = [
+            {"title": "項目", "bullets": ["第一點", ["子項目", 1]]},
+            {"title": "表格", "table": [["名稱", "數量"], ["A", 1]]},
+            {"title": "圖片", "image": self.test_image},
+            {"title": "圖片二", "image": {"path": self.test_image, "width_cm": 4}},
+        ]
+        added = self.editor.add_slides(iter(specs))
+        self.assertEqual(added, 4)
+
+        self.editor.save()
+        prs = Presentation(self.output_file)
+        self.assertEqual(len(prs.slides), 6)
+
+        bullets = prs.slides[2].placeholders[1].text_frame.paragraphs
+        self.assertEqual([(p.text, p.level) for p in bullets], [("第一點", 0), ("子項目", 1)])
+
+        tables = [shape for shape in prs.slides[3].shapes if shape.has_table]
+        self.assertEqual(tables[0].table.cell(1, 0).text, "A")
+
+        self.assertEqual(prs.slides[5].shapes.title.text, "圖片二")
+        with zipfile.ZipFile(self.output_file) as zf:
+            media = [name for name in zf.namelist() if name.startswith('ppt/media/')]
+        self.assertEqual(len(media), 1)
+
+    def test_add_slides_skips_invalid_spec(self):
+        """測試無效規格會被略過"""
+        specs = [
+            {"title": "正常"}, {"title": "壞圖", "image": "missing.png"},
+            ["不是物件"], {"title": "壞版面", "layout": "一"}, {"title": "文字版面", "layout": "0"},
+        ]
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            added = self.editor.add_slides(iter(specs))
+        self.assertEqual(added, 2)
+        self.assertIn("略過 3 筆無效規格", output.getvalue())
+        self.assertEqual(len(self.editor.prs.slides), 4)
+        self.assertEqual(self.editor.prs.slides[3].slide_layout, self.editor.prs.slide_layouts[0])
+
+        self.editor.save()
+        prs = Presentation(self.output_file)
+        self.assertEqual([slide.shapes.title.text for slide in list(prs.slides)[2:]], ["正常", "文字版面"])
+
+    def test_iter_jsonl(self):
+        """測試讀取 JSONL 規格檔"""
+        path = os.path.join(self.test_dir, "specs.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"title": "一"}, ensure_ascii=False) + "\n\n")
+            f.write(json.dumps({"title": "二"}, ensure_ascii=False) + "\n")
+        self.assertEqual([spec["title"] for spec in iter_jsonl(path)], ["一", "二"])
+
+    def test_add_slides_skips_malformed_jsonl_line(self):
+        """測試 JSONL 中無法解析的行被略過並回報行號，其他行照常新增"""
+        path = os.path.join(self.test_dir, "broken.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"title": "一"}\n{"title": 壞}\n{"title": "三"}\n')
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            added = self.editor.add_slides(iter_jsonl(path))
+        self.assertEqual(added, 2)
+        self.assertIn("第 2 行", output.getvalue())
+        self.assertIn("略過 1 筆無效規格", output.getvalue())
+
+    def test_normalize_fonts_rewrites_theme_and_strips_runs(self):
+        """測試統一字體會改寫佈景主題並移除逐段覆寫"""
+        self.editor.set_font(1, "Arial", 30)
+        self.editor.set_font(2, "Arial", 30)
+
+        result = self.editor.normalize_fonts("Calibri", 20, slides="1")
+        self.assertTrue(result)
+        self.editor.save()
+
+        from lxml import etree
+        from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+        prs = Presentation(self.output_file)
+        master = prs.slide_masters[0]
+        theme = etree.fromstring(master.part.part_related_by(RT.THEME).blob)
+        typefaces = theme.xpath(
+            '//a:fontScheme/*/a:latin/@typeface',
+            namespaces={'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'}
+        )
+        self.assertEqual(typefaces, ["Calibri", "Calibri"])
+
+        body_sizes = master.element.xpath('./p:txStyles/p:bodyStyle/*/a:defRPr/@sz')
+        self.assertTrue(body_sizes)
+        self.assertTrue(all(sz == "2000" for sz in body_sizes))
+
+        # 範圍內的覆寫被移除，範圍外保持不變
+        run = prs.slides[0].shapes.title.text_frame.paragraphs[0].runs[0]
+        self.assertIsNone(run.font.name)
+        self.assertIsNone(run.font.size)
+        run = prs.slides[1].shapes.title.text_frame.paragraphs[0].runs[0]
+        self.assertEqual(run.font.name, "Arial")
+
+    def test_normalize_fonts_invalid_range(self):
+        """測試無效的投影片範圍"""
+        self.assertFalse(self.editor.normalize_fonts("Calibri", slides="2-1"))
+        self.assertFalse(self.editor.normalize_fonts("Calibri", slides="1-9"))
+
+    def test_normalize_fonts_master_without_theme(self):
+        """測試母片缺少佈景主題時回報失敗，且不修改任何母片"""
+        master_part = self.editor.prs.slide_masters[0].part
+        rId = next(rId for rId, rel in master_part.rels.items() if rel.reltype == RT.THEME)
+        master_part.rels.pop(rId)
+        before = master_part.blob
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertFalse(self.editor.normalize_fonts("Calibri"))
+        self.assertIn("佈景主題", output.getvalue())
+        self.assertEqual(master_part.blob, before)
+
+    def test_parse_slide_range(self):
+        """測試投影片範圍解析"""
+        self.assertEqual(parse_slide_range(None, 3), [1, 2, 3])
+        self.assertEqual(parse_slide_range("1-3,5, 3", 6), [1, 2, 3, 5])
+        with self.assertRaises(ValueError):
+            parse_slide_range("a-b", 3)
+
+
+class TestPPTReader(unittest.TestCase):
+    """測試唯讀快速檢視器與 PPTEditor 輸出一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        """設置測試環境"""
+        from pptx.enum.shapes import MSO_SHAPE
+
+        cls.test_dir = tempfile.mkdtemp()
+        cls.test_pptx = os.path.join(cls.test_dir, "reader.pptx")
+
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[0])
+        slide.shapes.title.text = "標題\v第二行"
+        slide.placeholders[1].text = "副標題"
+
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        textbox = slide.shapes.add_textbox(Cm(1), Cm(1), Cm(5), Cm(2))
+        textbox.text_frame.text = "長" * 300 + "\n第二段\n\n第三段"
+        slide.shapes.add_shape(MSO_SHAPE.OVAL, Cm(1), Cm(4), Cm(2), Cm(2)).text = "橢圓"
+        slide.shapes.add_table(2, 2, Cm(1), Cm(8), Cm(4), Cm(2)).table.cell(0, 0).text = "表格"
+
+        prs.slides.add_slide(prs.slide_layouts[1])
+        prs.save(cls.test_pptx)
+
+    @classmethod
+    def tearDownClass(cls):
+        """清理測試環境"""
+        shutil.rmtree(cls.test_dir)
+
+    @staticmethod
+    def _capture(func, *args):
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            func(*args)
+        return buffer.getvalue()
+
+    def test_list_matches_editor(self):
+        """測試 list 輸出一致"""
+        editor = PPTEditor(self.test_pptx)
+        with PPTReader(self.test_pptx) as reader:
+            self.assertEqual(
+                self._capture(reader.list_slides),
+                self._capture(editor.list_slides)
+            )
+
+    def test_info_matches_editor(self):
+        """測試 info 輸出一致（含無效編號）"""
+        editor = PPTEditor(self.test_pptx)
+        with PPTReader(self.test_pptx) as reader:
+            for number in (0, 1, 2, 3, 4):
+                self.assertEqual(
+                    self._capture(reader.get_slide_info, number),
+                    self._capture(editor.get_slide_info, number)
+                )
+
+    def test_reader_invalid_file(self):
+        """測試無效的檔案"""
+        with self.assertRaises(FileNotFoundError):
+            PPTReader("nonexistent.pptx")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for Sheet Aggregate
+Testing: aggregate parsing, grouping rules, spill-to-disk merging, distinct estimates,
+         ExcelEditor.aggregate and the llm_api operation
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import datetime
+from unittest import mock
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import spill_runs
+from src.sheet_aggregate import GroupAggregator, parse_aggregates
+from src.sheet_query import Condition
+from src.excel_editor import ExcelEditor
+from src.llm_api import execute_command
+from tests import QuietTestCase
+from openpyxl import Workbook, load_workbook
+
+
+ROWS = [
+    ["APAC", "甲", 500, datetime.datetime(2024, 1, 5)],
+    ["apac", "乙", 1500.5, datetime.date(2024, 3, 1)],
+    ["EMEA", "甲", "無", None],
+    [None, "丙", 200, datetime.datetime(2023, 12, 31)],
+    ["EMEA", "甲", 100],
+    ["APAC", "甲", True, datetime.datetime(2024, 2, 1)],
+]
+
+
+class TestParseAggregates(unittest.TestCase):
+    """測試彙總欄位的解析"""
+
+    def test_forms(self):
+        """測試字串、清單與字典形式"""
+        self.assertEqual(
+            parse_aggregates("SUM(單位 價格), count, count(*), distinct( 客戶 )"),
+            [("sum", "單位 價格"), ("count", None), ("count", None), ("distinct", "客戶")]
+        )
+        self.assertEqual(parse_aggregates(["mean(金額)", ["max", "金額"], ["count"]]),
+                         [("mean", "金額"), ("max", "金額"), ("count", None)])
+        self.assertEqual(parse_aggregates({"金額": ["sum", "min"], "客戶": "distinct"}),
+                         [("sum", "金額"), ("min", "金額"), ("distinct", "客戶")])
+        self.assertEqual(parse_aggregates(None), [("count", None)])
+
+    def test_invalid(self):
+        """測試不支援的函數與缺少欄位"""
+        for aggregates in ("median(金額)", "sum", "sum(金額", [["sum", "金額", 1]]):
+            with self.subTest(aggregates=aggregates):
+                with self.assertRaises(ValueError):
+                    parse_aggregates(aggregates)
+
+
+class TestGroupAggregator(unittest.TestCase):
+    """測試分組彙總"""
+
+    METRICS = [("count", None), ("count", 2), ("sum", 2), ("mean", 2),
+               ("min", 3), ("max", 2), ("distinct", 1)]
+
+    def _aggregate(self, rows, max_groups=1000, **kwargs):
+        aggregator = GroupAggregator([0], self.METRICS, max_groups=max_groups, **kwargs)
+        for values in rows:
+            aggregator.add(values)
+        return aggregator, list(aggregator.results())
+
+    def test_grouping_rules(self):
+        """測試文字不分大小寫、空白自成一組、只加總數字"""
+        aggregator, results = self._aggregate(ROWS)
+        self.assertEqual(aggregator.rows, 6)
+        self.assertEqual(results, [
+            ["APAC", 3, 3, 2000.5, 1000.25, datetime.datetime(2024, 1, 5), 1500.5, 2],
+            ["EMEA", 2, 2, 100, 100.0, None, 100, 1],
+            [None, 1, 1, 200, 200.0, datetime.datetime(2023, 12, 31), 200, 1],
+        ])
+
+    def test_conditions_and_single_group(self):
+        """測試條件篩選，沒有分組欄位時即使沒有資料也產出一列"""
+        aggregator = GroupAggregator([], [("count", None), ("sum", 2)],
+                                     [Condition("地區", 0, "=", "apac")])
+        for values in ROWS:
+            aggregator.add(values)
+        self.assertEqual(list(aggregator.results()), [[3, 2000.5]])
+        self.assertEqual(list(GroupAggregator([], [("count", None), ("sum", 2)]).results()), [[0, None]])
+
+    def test_spill_matches_in_memory(self):
+        """測試分組寫入暫存檔後合併的結果與全部在記憶體中相同"""
+        rows = [[f"客戶{index % 37}", f"P{index % 5}", index, None] for index in range(2000)]
+        expected = self._aggregate(rows)[1]
+        with mock.patch.object(spill_runs, "MERGE_FAN_IN", 4):
+            aggregator, results = self._aggregate(rows, max_groups=5)
+        self.assertEqual(results, expected)
+        self.assertGreater(aggregator.spilled, 4)
+        self.assertIsNone(aggregator._runs._directory)
+
+    def test_distinct_estimate_is_bounded(self):
+        """測試不重複值超過上限後改為估計值"""
+        rows = [["全部", None, None, None] for _ in range(5000)]
+        for index, values in enumerate(rows):
+            values[1] = f"值{index % 3000}"
+        aggregator = GroupAggregator([0], [("distinct", 1)], max_groups=1)
+        for values in rows:
+            aggregator.add(values)
+        (_, distinct), = aggregator.results()
+        self.assertLessEqual(abs(distinct - 3000), 3000 * 0.1)
+
+
+class TestExcelEditorAggregate(QuietTestCase):
+    """測試 ExcelEditor 的分組彙總"""
+
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "aggregate.xlsx")
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "銷售"
+        ws.append(["地區", "產品", "金額", "日期"])
+        for index in range(300):
+            ws.append([["APAC", "EMEA", "AMER"][index % 3], f"P{index % 2}", index,
+                       datetime.date(2024, 1, 1 + index % 28)])
+        wb.create_sheet("其他")["A1"] = "保留"
+        wb.save(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def test_raw_and_loaded_results_match(self):
+        """測試唯讀模式直接寫入新工作表，結果與載入工作簿寫入相同"""
+        arguments = dict(group_by=["地區", "B"], aggregates="sum(金額), max(日期), count",
+                         where="金額 >= 30", output_sheet="彙總")
+        raw_editor = ExcelEditor(self.test_file, read_only=True)
+        raw = self._run(raw_editor.aggregate, "銷售", **arguments)
+        loaded_editor = ExcelEditor(self.test_file)
+        loaded = self._run(loaded_editor.aggregate, "銷售", **arguments)
+        self.assertEqual(raw, loaded)
+        self.assertEqual(raw["columns"], ["地區", "產品", "sum(金額)", "max(日期)", "count"])
+        self.assertEqual((raw["groups"], raw["source_rows"]), (6, 270))
+        self.assertEqual(raw["rows"][0], ["AMER", "P0", 7380, datetime.datetime(2024, 1, 27), 45])
+
+        raw_path = os.path.join(self.test_dir, "raw.xlsx")
+        loaded_path = os.path.join(self.test_dir, "loaded.xlsx")
+        self._run(raw_editor.save, raw_path)
+        self._run(loaded_editor.save, loaded_path)
+        raw_wb, loaded_wb = load_workbook(raw_path), load_workbook(loaded_path)
+        self.assertEqual(raw_wb.sheetnames, ["銷售", "其他", "彙總"])
+        self.assertEqual(list(raw_wb["彙總"].values), list(loaded_wb["彙總"].values))
+        self.assertTrue(raw_wb["彙總"]["D2"].is_date)
+        self.assertEqual(raw_wb["其他"]["A1"].value, "保留")
+
+    def test_invalid_arguments(self):
+        """測試無效的欄位、彙總與工作表名稱"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        self.assertIsNone(self._run(editor.aggregate, "銷售", "不存在"))
+        self.assertIsNone(self._run(editor.aggregate, "銷售", "地區", "median(金額)"))
+        self.assertIsNone(self._run(editor.aggregate, "銷售", "地區", output_sheet="其他"))
+        self.assertIsNone(self._run(editor.aggregate, "銷售", "地區", output_sheet="a/b"))
+        self.assertIsNone(self._run(editor.aggregate, "銷售", max_groups=0))
+        self.assertEqual(self._run(editor.aggregate, "銷售")["rows"], [[300]])
+
+    def test_llm_api_aggregate(self):
+        """測試 llm_api 的 aggregate_sheet"""
+        result = execute_command("aggregate_sheet", file_path=self.test_file, group_by="地區",
+                                 aggregates={"金額": ["min", "mean"]}, output_sheet="彙總")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["rows"][0], ["AMER", 2, 150.5])
+        ws = load_workbook(self.test_file)["彙總"]
+        self.assertEqual([cell.value for cell in ws[1]], ["地區", "min(金額)", "mean(金額)"])
+        self.assertEqual(ws.max_row, 4)
+
+        result = execute_command("aggregate_sheet", file_path=self.test_file, aggregates="sum")
+        self.assertFalse(result["success"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for Sheet Analytics
+Testing: HyperLogLog, SpaceSaving, column profiles, ExcelEditor.profile_sheet and result caching
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import io
+import random
+import datetime
+import contextlib
+from unittest import mock
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import constants
+from src.sheet_analytics import HyperLogLog, SpaceSaving, profile_rows, value_hash, value_key
+from src.excel_editor import ExcelEditor
+from src.llm_api import execute_command
+from openpyxl import Workbook
+
+
+class TestSketches(unittest.TestCase):
+    """測試基數估計與熱門值估計"""
+
+    def test_hyperloglog_estimate(self):
+        """測試不重複值估計的誤差"""
+        for size in (0, 10, 1000, 50000):
+            with self.subTest(size=size):
+                sketch = HyperLogLog()
+                for value in range(size):
+                    sketch.add(value_hash(value_key(f"值{value}")))
+                    sketch.add(value_hash(value_key(f"值{value}")))
+                self.assertLessEqual(abs(sketch.count() - size), max(1, size * 0.05))
+
+    def test_value_key_distinguishes_types(self):
+        """測試 True 與 1 不同，1.0 與 1 相同"""
+        self.assertNotEqual(value_key(True), value_key(1))
+        self.assertEqual(value_key(1.0), value_key(1))
+        self.assertEqual(value_hash(value_key(1.0)), value_hash(value_key(1)))
+
+    def test_space_saving_keeps_heavy_hitters(self):
+        """測試候選值數量固定時仍保留出現頻繁的值"""
+        rng = random.Random(7)
+        stream = ["甲"] * 3000 + ["乙"] * 2000 + [f"雜{index}" for index in range(20000)]
+        rng.shuffle(stream)
+        sketch = SpaceSaving(50)
+        for item in stream:
+            sketch.add(item)
+        self.assertEqual(len(sketch.counts), 50)
+        top = sketch.top(2)
+        self.assertEqual([item for item, _ in top], ["甲", "乙"])
+        self.assertLessEqual(top[0][1], 3000)
+        self.assertGreater(top[0][1], 2000)
+
+    def test_space_saving_exact_when_not_full(self):
+        """測試候選值未滿時為確切次數"""
+        sketch = SpaceSaving(10)
+        for item in "aabbbc":
+            sketch.add(item)
+        self.assertEqual(sketch.top(5), [("b", 3), ("a", 2), ("c", 1)])
+
+
+class TestProfileRows(unittest.TestCase):
+    """測試欄位統計"""
+
+    def test_profile_rows(self):
+        """測試類型、空白、數值與日期範圍"""
+        rows = [
+            (1, ["名稱", "數量", "日期"]),
+            (2, ["甲", 3, datetime.datetime(2024, 1, 5)]),
+            (3, ["乙", 1.5, datetime.datetime(2023, 12, 31)]),
+            (5, ["甲", "#N/A"]),
+            (6, ["", True, None, "多"]),
+        ]
+        profile = profile_rows(rows, header=True, top_k=1)
+        self.assertEqual(profile["rows"], 4)
+        self.assertEqual(profile["header_row"], 1)
+        name, amount, date, extra = profile["columns"]
+
+        self.assertEqual((name["name"], name["count"], name["nulls"], name["distinct"]), ("名稱", 3, 1, 2))
+        self.assertEqual(name["top"], [{"value": "甲", "count": 2}])
+        self.assertEqual(amount["types"], {"number": 2, "bool": 1, "error": 1})
+        self.assertEqual((amount["min"], amount["max"], amount["sum"], amount["mean"]), (1.5, 3, 4.5, 2.25))
+        self.assertEqual((date["first_date"], date["last_date"]), ("2023-12-31T00:00:00", "2024-01-05T00:00:00"))
+        self.assertIsNone(date["sum"])
+        self.assertEqual((extra["column"], extra["name"], extra["count"]), ("D", None, 1))
+
+    def test_profile_without_header(self):
+        """測試沒有標題列"""
+        profile = profile_rows([(1, [1]), (2, [2])], header=False)
+        self.assertEqual((profile["rows"], profile["columns"][0]["sum"]), (2, 3))
+
+
+class TestExcelEditorProfile(unittest.TestCase):
+    """測試 ExcelEditor 的欄位統計"""
+
+    def setUp(self):
+        """準備測試環境（快取寫入暫存目錄）"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "profile.xlsx")
+        patcher = mock.patch.object(constants, "CACHE_DIR", os.path.join(self.test_dir, "cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "銷售"
+        ws.append(["地區", "金額", "日期"])
+        for index in range(300):
+            ws.append([["APAC", "EMEA", "AMER"][index % 3], index, datetime.date(2024, 1, 1 + index % 28)])
+        ws["D1"] = "加倍"
+        ws["D2"] = "=B2*2"
+        wb.create_sheet("空白")
+        wb.save(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def _profile(self, editor, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return editor.profile_sheet(*args, **kwargs)
+
+    def test_raw_and_loaded_profiles_match(self):
+        """測試串流讀取與已載入的工作簿結果相同"""
+        raw = self._profile(ExcelEditor(self.test_file, read_only=True), "銷售", use_cache=False)
+        loaded = self._profile(ExcelEditor(self.test_file), "銷售")
+        self.assertEqual(raw, loaded)
+
+        self.assertEqual(raw["rows"], 300)
+        region, amount, date, formula = raw["columns"]
+        self.assertEqual(sorted(item["value"] for item in region["top"]), ["AMER", "APAC", "EMEA"])
+        self.assertEqual([item["count"] for item in region["top"]], [100, 100, 100])
+        self.assertEqual((amount["sum"], amount["min"], amount["max"]), (sum(range(300)), 0, 299))
+        self.assertEqual(date["types"], {"date": 300})
+        # 公式以快取值統計，openpyxl 存檔沒有快取值
+        self.assertEqual((formula["count"], formula["nulls"]), (0, 300))
+
+    def test_results_are_cached_by_content(self):
+        """測試相同內容使用快取，內容改變後重新計算"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        first = self._profile(editor, "銷售")
+        self.assertTrue(os.listdir(os.path.join(self.test_dir, "cache", "profile")))
+
+        with mock.patch("src.excel_editor.profile_rows") as compute:
+            self.assertEqual(self._profile(ExcelEditor(self.test_file, read_only=True), "銷售"), first)
+            compute.assert_not_called()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            editor.add_row("銷售", ["APAC", 1000])
+            editor.save()
+        self.assertEqual(self._profile(ExcelEditor(self.test_file, read_only=True), "銷售")["rows"], 301)
+
+    def test_invalid_arguments(self):
+        """測試無效的工作表與參數"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        self.assertIsNone(self._profile(editor, "不存在"))
+        self.assertIsNone(self._profile(editor, "銷售", top_k=-1))
+        self.assertEqual(self._profile(editor, "空白")["columns"], [])
+
+    def test_llm_api_profile(self):
+        """測試 llm_api 的 profile_sheet"""
+        result = execute_command("profile_sheet", file_path=self.test_file, top_k=2)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["sheet"], "銷售")
+        self.assertEqual(result["result"]["columns"][0]["name"], "地區")
+        self.assertEqual(len(result["result"]["columns"][0]["top"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
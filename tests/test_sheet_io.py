@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for Sheet IO
+Testing: CSV type inference, CSV / Parquet round trips, ExcelEditor.export_sheet and
+         import_sheet (raw and loaded), new workbooks and the llm_api operations
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import datetime
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.sheet_io import HAS_PYARROW, infer_value, iter_data_rows, write_data_rows, create_workbook
+from src.excel_editor import ExcelEditor
+from src.llm_api import execute_command
+from tests import QuietTestCase
+from openpyxl import Workbook, load_workbook
+
+
+class TestInferValue(unittest.TestCase):
+    """測試 CSV 文字的型別推斷"""
+
+    def test_rules(self):
+        """測試數字、布林值與日期，編號維持文字"""
+        cases = [
+            ("42", 42), ("-3", -3), ("1.5", 1.5), ("1e3", 1000.0), ("true", True), ("FALSE", False),
+            ("2024-03-01", datetime.datetime(2024, 3, 1)),
+            ("2024-03-01 08:30:00", datetime.datetime(2024, 3, 1, 8, 30)),
+            ("007", "007"), ("0", 0), ("1234567890123456", "1234567890123456"),
+            ("2024-13-01", "2024-13-01"), ("=1+1", "=1+1"), ("", None), ("文字", "文字"),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                value = infer_value(text)
+                self.assertEqual(value, expected)
+                self.assertIs(type(value), type(expected))
+
+
+class TestDataFiles(unittest.TestCase):
+    """測試資料檔的讀寫"""
+
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def test_csv_round_trip(self):
+        """測試 CSV 寫出後讀回，日期為 ISO 格式，空白為 None"""
+        path = os.path.join(self.test_dir, "data.csv")
+        rows = [["名稱", "數量", "日期"], ["甲", 3, datetime.datetime(2024, 1, 2)], ["乙", None, True]]
+        self.assertEqual(write_data_rows(path, rows, batch_rows=1), 2)
+        self.assertEqual(list(iter_data_rows(path)), [
+            ["名稱", "數量", "日期"], ["甲", "3", "2024-01-02"], ["乙", None, "TRUE"],
+        ])
+        self.assertEqual(list(iter_data_rows(path, infer_types=True))[1],
+                         ["甲", 3, datetime.datetime(2024, 1, 2)])
+
+    def test_unsupported_format(self):
+        """測試不支援的格式"""
+        with self.assertRaises(ValueError):
+            list(iter_data_rows(os.path.join(self.test_dir, "data.json")))
+        with self.assertRaises(ValueError):
+            list(iter_data_rows(os.path.join(self.test_dir, "data.csv"), fmt="xml"))
+
+    @unittest.skipIf(HAS_PYARROW, "已安裝 pyarrow")
+    def test_parquet_requires_pyarrow(self):
+        """測試沒有 pyarrow 時 Parquet 回報錯誤"""
+        with self.assertRaises(ValueError):
+            write_data_rows(os.path.join(self.test_dir, "data.parquet"), [["a"], [1]])
+
+    @unittest.skipUnless(HAS_PYARROW, "需要 pyarrow")
+    def test_parquet_round_trip(self):
+        """測試 Parquet 寫出後讀回，數字為 double，型別混合的欄位為文字"""
+        path = os.path.join(self.test_dir, "data.parquet")
+        rows = [["名稱", "數量", "混合"], ["甲", 3, 1], ["乙", None, "x"], ["丙", 2.5, None]]
+        self.assertEqual(write_data_rows(path, rows, batch_rows=2), 3)
+        self.assertEqual(list(iter_data_rows(path)), [
+            ["名稱", "數量", "混合"], ["甲", 3.0, "1"], ["乙", None, "x"], ["丙", 2.5, None],
+        ])
+
+    def test_create_workbook_keeps_text(self):
+        """測試新活頁簿中以 = 開頭的文字不會變成公式，日期使用日期格式"""
+        path = os.path.join(self.test_dir, "new.xlsx")
+        rows = [["公式", "日期"], ["=1+1", datetime.datetime(2024, 5, 6)]]
+        self.assertEqual(create_workbook(path, "資料", iter(rows)), 2)
+        ws = load_workbook(path)["資料"]
+        self.assertEqual(ws["A2"].data_type, "s")
+        self.assertEqual(ws["A2"].value, "=1+1")
+        self.assertTrue(ws["B2"].is_date)
+
+
+class TestExcelEditorImportExport(QuietTestCase):
+    """測試 ExcelEditor 的匯入匯出"""
+
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "data.xlsx")
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "銷售"
+        ws.append(["編號", "金額", "日期", "公式"])
+        for index in range(1, 201):
+            ws.append([f"00{index}", index * 1.5, datetime.date(2024, 1, 1 + index % 28), f"=B{index + 1}*2"])
+        ws["A210"] = "尾端"
+        wb.save(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def test_export_pads_gap_rows(self):
+        """測試匯出時空白列與缺少的欄位補為空白"""
+        path = os.path.join(self.test_dir, "out.csv")
+        editor = ExcelEditor(self.test_file, read_only=True)
+        result = self._run(editor.export_sheet, "銷售", path, batch_rows=7)
+        self.assertEqual(result, {"sheet": "銷售", "path": path, "format": "csv", "rows": 209, "columns": 4})
+        rows = list(iter_data_rows(path))
+        self.assertEqual(len(rows), 210)
+        self.assertEqual(rows[1][:3], ["001", "1.5", "2024-01-02"])
+        self.assertEqual(rows[201:], [[None] * 4] * 8 + [["尾端", None, None, None]])
+
+    def test_round_trip_raw_and_loaded(self):
+        """測試匯出後再匯入，唯讀模式與載入工作簿的結果相同"""
+        path = os.path.join(self.test_dir, "out.csv")
+        self._run(ExcelEditor(self.test_file, read_only=True).export_sheet, "銷售", path)
+
+        results = []
+        for read_only in (True, False):
+            editor = ExcelEditor(self.test_file, read_only=read_only)
+            result = self._run(editor.import_sheet, path, "匯入", infer_types=True, batch_rows=50)
+            self.assertEqual(result["rows"], 210)
+            output = os.path.join(self.test_dir, f"imported-{read_only}.xlsx")
+            self._run(editor.save, output)
+            results.append(load_workbook(output)["匯入"])
+
+        raw_ws, loaded_ws = results
+        self.assertEqual(list(raw_ws.values), list(loaded_ws.values))
+        self.assertEqual([cell.value for cell in raw_ws[2]], ["001", 1.5, datetime.datetime(2024, 1, 2), None])
+        self.assertTrue(raw_ws["C2"].is_date)
+        self.assertEqual(raw_ws["A210"].value, "尾端")
+
+    def test_invalid_import(self):
+        """測試已存在的工作表名稱與不支援的格式"""
+        path = os.path.join(self.test_dir, "銷售.csv")
+        write_data_rows(path, [["a"], ["=SUM(A1)"]])
+        editor = ExcelEditor(self.test_file, read_only=True)
+        self.assertIsNone(self._run(editor.import_sheet, path))
+        self.assertIsNone(self._run(editor.import_sheet, path, "新", fmt="xml"))
+        self.assertIsNone(self._run(editor.import_sheet, os.path.join(self.test_dir, "不存在.csv"), "新"))
+        self.assertEqual(self._run(editor.import_sheet, path, "新")["rows"], 2)
+        self._run(editor.save)
+        self.assertEqual(load_workbook(self.test_file)["新"]["A2"].data_type, "s")
+
+    def test_llm_api_export_and_import(self):
+        """測試 llm_api 的 export_sheet 與 import_data"""
+        path = os.path.join(self.test_dir, "out.csv")
+        result = execute_command("export_sheet", file_path=self.test_file, sheet_name="銷售", output_path=path)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["rows"], 209)
+
+        new_file = os.path.join(self.test_dir, "new.xlsx")
+        result = execute_command("import_data", file_path=new_file, input_path=path, infer_types=True)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["sheet"], "out")
+        self.assertEqual(load_workbook(new_file)["out"]["B3"].value, 3)
+
+        result = execute_command("import_data", file_path=self.test_file, input_path=path, sheet_name="副本")
+        self.assertTrue(result["success"])
+        self.assertEqual(load_workbook(self.test_file)["副本"]["B3"].value, "3")
+
+        result = execute_command("export_sheet", file_path=self.test_file, sheet_name="不存在", output_path=path)
+        self.assertFalse(result["success"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for Sheet Query
+Testing: condition parsing, comparison rules, ordering, hash / sorted indexes,
+         ExcelEditor.query, create_index and the llm_api operations
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import datetime
+from unittest import mock
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import constants
+from src.sheet_query import (
+    Condition, parse_where, parse_order, run_query, build_index, index_lookup
+)
+from src.excel_editor import ExcelEditor
+from src.xlsx_package import iter_sheet_rows
+from src.llm_api import execute_command
+from tests import QuietTestCase
+from openpyxl import Workbook, load_workbook
+
+
+ROWS = [
+    (2, ["APAC", 500, datetime.datetime(2024, 1, 5)]),
+    (3, ["emea", 20000, datetime.datetime(2024, 3, 1)]),
+    (4, ["Apac", 15000, None]),
+    (5, ["AMER", "無", datetime.datetime(2023, 12, 31)]),
+    (6, [None, 15000.0, datetime.datetime(2024, 2, 1)]),
+]
+
+
+class TestConditions(unittest.TestCase):
+    """測試條件解析與比較"""
+
+    def test_parse_where_forms(self):
+        """測試字串、清單與字典形式的條件"""
+        self.assertEqual(
+            parse_where('地區 = APAC and 單位 價格 >= 1.5 AND 狀態 in (待辦, "進行 中") and 名稱 contains "a=b"'),
+            [("地區", "=", "APAC"), ("單位 價格", ">=", 1.5),
+             ("狀態", "in", ["待辦", "進行 中"]), ("名稱", "contains", "a=b")]
+        )
+        self.assertEqual(parse_where("啟用 <> TRUE"), [("啟用", "!=", True)])
+        self.assertEqual(parse_where([["金額", ">", 10]]), [("金額", ">", 10)])
+        self.assertEqual(parse_where({"地區": "APAC"}), [("地區", "=", "APAC")])
+        for where in ("金額 >", "> 10", "金額 ~ 10", [["金額", ">"]], "狀態 in 待辦"):
+            with self.subTest(where=where):
+                with self.assertRaises(ValueError):
+                    parse_where(where)
+
+    def test_comparison_rules(self):
+        """測試文字不分大小寫、只比較相同類型、空白只符合 !="""
+        cases = [
+            (0, "=", "apac", [2, 4]),
+            (0, "!=", "APAC", [3, 5, 6]),
+            (0, "in", ["amer", "EMEA"], [3, 5]),
+            (0, "contains", "PA", [2, 4]),
+            (1, ">", 10000, [3, 4, 6]),
+            (1, "=", "15000", [4, 6]),
+            (1, "<", "無", []),
+            (2, ">=", "2024-02-01", [3, 6]),
+            (2, "<", datetime.date(2024, 1, 1), [5]),
+        ]
+        for index, op, value, expected in cases:
+            with self.subTest(op=op, value=value):
+                condition = Condition("欄", index, op, value)
+                self.assertEqual([row for row, values in ROWS if condition.matches(values)], expected)
+
+    def test_order_and_limit(self):
+        """測試多欄位排序、遞減、空白在最後與分頁"""
+        order = [(2, True)]
+        results, more = run_query(iter(ROWS), [], None, order)
+        self.assertEqual([row for row, _ in results], [3, 6, 2, 5, 4])
+        self.assertFalse(more)
+
+        self.assertEqual(parse_order(["-金額", "地區 asc", "日期 DESC"]),
+                         [("金額", True), ("地區", False), ("日期", True)])
+        results, more = run_query(iter(ROWS), [], [1, 0], [(1, False), (0, False)], limit=2, offset=1)
+        self.assertEqual(results, [(4, [15000, "Apac"]), (6, [15000.0, None])])
+        self.assertTrue(more)
+
+        results, more = run_query(iter(ROWS), [Condition("金額", 1, ">", 0)], None, None, limit=3)
+        self.assertEqual([row for row, _ in results], [2, 3, 4])
+        self.assertTrue(more)
+
+
+class TestIndexes(unittest.TestCase):
+    """測試索引查詢結果與逐列比較相同"""
+
+    def test_index_matches_scan(self):
+        """測試 hash 與 sorted 索引"""
+        cases = [
+            (0, "=", "apac"), (0, "in", ["AMER", "emea"]),
+            (1, "=", 15000), (1, ">", 10000), (1, "<=", 500), (1, "<", "無"),
+            (2, ">=", "2024-02-01"), (2, "<", datetime.datetime(2024, 1, 1)),
+        ]
+        for column, op, value in cases:
+            expected = {row for row, values in ROWS if Condition("欄", column, op, value).matches(values)}
+            for kind in ("hash", "sorted"):
+                with self.subTest(kind=kind, op=op, value=value):
+                    rows = index_lookup(build_index(iter(ROWS), column, kind), op, value)
+                    if kind == "hash" and op not in ("=", "in"):
+                        self.assertIsNone(rows)
+                    else:
+                        self.assertEqual(rows, expected)
+        self.assertIsNone(index_lookup(build_index(iter(ROWS), 0, "sorted"), "contains", "a"))
+
+
+class TestExcelEditorQuery(QuietTestCase):
+    """測試 ExcelEditor 的查詢與索引"""
+
+    def setUp(self):
+        """準備測試環境（索引寫入暫存目錄）"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "query.xlsx")
+        patcher = mock.patch.object(constants, "CACHE_DIR", os.path.join(self.test_dir, "cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "銷售"
+        ws.append(["地區", "金額", "日期"])
+        for index in range(600):
+            ws.append([["APAC", "EMEA", "AMER"][index % 3], index * 100, datetime.date(2024, 1, 1 + index % 28)])
+        wb.save(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def test_raw_and_loaded_results_match(self):
+        """測試串流讀取與已載入的工作簿結果相同"""
+        arguments = dict(where="地區 = apac and 金額 >= 50000", select=["金額", "C"],
+                         order_by="金額 desc", limit=3)
+        raw = self._run(ExcelEditor(self.test_file, read_only=True).query, "銷售", **arguments)
+        loaded = self._run(ExcelEditor(self.test_file).query, "銷售", **arguments)
+        self.assertEqual(raw, loaded)
+        self.assertEqual(raw["columns"], ["金額", "日期"])
+        self.assertEqual(raw["rows"][0], [59700, datetime.datetime(2024, 1, 10)])
+        self.assertEqual(raw["row_numbers"], [599, 596, 593])
+        self.assertTrue(raw["truncated"])
+        self.assertEqual(raw["indexes"], [])
+
+    def test_index_limits_rows_read(self):
+        """測試使用索引時只解析索引找到的列"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        self.assertTrue(self._run(editor.create_index, "銷售", "地區"))
+        self.assertTrue(self._run(editor.create_index, "銷售", "B", kind="sorted"))
+
+        expected = self._run(editor.query, "銷售", where="地區 = EMEA and 金額 < 1000", use_index=False)
+        with mock.patch("src.excel_editor.iter_sheet_rows", wraps=iter_sheet_rows) as reader:
+            result = self._run(editor.query, "銷售", where="地區 = EMEA and 金額 < 1000")
+        self.assertEqual(reader.call_args[0][3], {1, 3, 6, 9})
+        self.assertEqual(result["indexes"], ["地區", "金額"])
+        self.assertEqual(result["rows"], expected["rows"])
+        self.assertEqual(result["row_numbers"], [3, 6, 9])
+
+    def test_index_invalidated_by_changes(self):
+        """測試檔案內容改變後不使用舊的索引"""
+        self._run(ExcelEditor(self.test_file, read_only=True).create_index, "銷售", "地區")
+        editor = ExcelEditor(self.test_file)
+        self._run(editor.update_cell, "銷售", "A2", "EMEA")
+        self.assertEqual(self._run(editor.query, "銷售", where={"地區": "APAC"})["indexes"], [])
+        self._run(editor.save)
+
+        result = self._run(ExcelEditor(self.test_file, read_only=True).query, "銷售", where={"地區": "APAC"})
+        self.assertEqual((result["count"], result["indexes"]), (199, []))
+
+    def test_output_sheet(self):
+        """測試將結果寫入新工作表"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        result = self._run(editor.query, "銷售", where="金額 > 59000", select=["地區", "金額"],
+                           output_sheet="結果")
+        self.assertEqual(result["count"], 9)
+        self.assertIsNone(editor._wb)  # 唯讀模式直接寫入封裝，不載入工作簿
+        self._run(editor.save)
+
+        ws = load_workbook(self.test_file)["結果"]
+        self.assertEqual([cell.value for cell in ws[1]], ["地區", "金額"])
+        self.assertEqual(ws.max_row, 10)
+        self.assertIsNone(self._run(editor.query, "銷售", output_sheet="結果"))
+
+    def test_output_sheet_keeps_text_values(self):
+        """測試以 = 開頭的文字寫入新工作表後仍是文字（直接寫入封裝與寫入已載入的工作簿）"""
+        wb = load_workbook(self.test_file)
+        wb["銷售"]["A2"].value = "=SUM(1)"
+        wb["銷售"]["A2"].data_type = "s"
+        wb.create_sheet("其他")
+        wb.save(self.test_file)
+
+        for read_only in (True, False):
+            # 部分載入：來源工作表串流讀取，結果寫入已載入的工作簿
+            editor = ExcelEditor(self.test_file, read_only=read_only, sheets=None if read_only else ["其他"])
+            self._run(editor.query, "銷售", where="金額 = 0", select=["地區"], output_sheet="結果")
+            path = os.path.join(self.test_dir, f"output-{read_only}.xlsx")
+            self._run(editor.save, path)
+            cell = load_workbook(path)["結果"]["A2"]
+            self.assertEqual((cell.value, cell.data_type), ("=SUM(1)", "s"))
+
+    def test_invalid_arguments(self):
+        """測試無效的欄位、工作表與參數"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        self.assertIsNone(self._run(editor.query, "銷售", where="不存在 = 1"))
+        self.assertIsNone(self._run(editor.query, "不存在"))
+        self.assertIsNone(self._run(editor.query, "銷售", limit=-1))
+        self.assertFalse(self._run(editor.create_index, "銷售", "地區", kind="btree"))
+        result = self._run(editor.query, "銷售", where="A = 地區", header=False, limit=1)
+        self.assertEqual((result["columns"], result["row_numbers"]), (["A", "B", "C"], [1]))
+
+    def test_llm_api_query(self):
+        """測試 llm_api 的 create_index 與 query_sheet"""
+        result = execute_command("create_index", file_path=self.test_file, sheet_name="銷售",
+                                 column="金額", kind="sorted")
+        self.assertTrue(result["success"])
+
+        result = execute_command("query_sheet", file_path=self.test_file, sheet_name="銷售",
+                                 where=[["金額", ">", 59500]], order_by=["-金額"])
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["rows"], [["AMER", 59900, "2024-01-12T00:00:00"],
+                                                    ["EMEA", 59800, "2024-01-11T00:00:00"],
+                                                    ["APAC", 59700, "2024-01-10T00:00:00"],
+                                                    ["AMER", 59600, "2024-01-09T00:00:00"]])
+        self.assertEqual(result["result"]["indexes"], ["金額"])
+
+        result = execute_command("query_sheet", file_path=self.test_file, where="金額 >")
+        self.assertFalse(result["success"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for Sheet Sort
+Testing: external sort stability and spilling, ExcelEditor.sort_sheet (raw and loaded),
+         formula translation, row styles and the llm_api operation
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import zipfile
+from unittest import mock
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import spill_runs
+from src.sheet_sort import ExternalSorter
+from src.sheet_query import row_sort_key
+from src.excel_editor import ExcelEditor
+from src.llm_api import execute_command
+from tests import QuietTestCase
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+
+class TestExternalSorter(unittest.TestCase):
+    """測試外部排序"""
+
+    def _sort(self, rows, memory_limit):
+        sorter = ExternalSorter(row_sort_key([(0, True), (1, False)]), memory_limit)
+        for position, values in enumerate(rows):
+            sorter.add(values, position, 10)
+        return sorter, list(sorter)
+
+    def test_spill_is_stable_and_matches_in_memory(self):
+        """測試寫入暫存檔後合併的結果與全部在記憶體中相同，鍵相同時維持原順序"""
+        rows = [[index % 7 or None, f"名稱{index % 3}"] for index in range(1000)]
+        expected = self._sort(rows, 10 ** 9)[1]
+        with mock.patch.object(spill_runs, "MERGE_FAN_IN", 4):
+            sorter, result = self._sort(rows, 500)
+        self.assertEqual(result, expected)
+        self.assertGreater(sorter.spilled, 4)
+        self.assertIsNone(sorter._runs._directory)
+        self.assertEqual(sorter.count, 1000)
+
+        # 遞減排序，空白在最後；相同的鍵依加入順序
+        self.assertEqual([rows[position][0] for position in result[:1]], [6])
+        self.assertIsNone(rows[result[-1]][0])
+        ties = [position for position in result if rows[position] == [6, "名稱0"]]
+        self.assertEqual(ties, sorted(ties))
+
+
+class TestExcelEditorSort(QuietTestCase):
+    """測試 ExcelEditor 的排序"""
+
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "sort.xlsx")
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "資料"
+        ws.append(["名稱", "金額", "兩倍"])
+        amounts = [5, 3, None, "x", 1.5, 3]
+        for row in range(2, 302):
+            ws.append([f"項目{row}", amounts[row % len(amounts)], f"=B{row}*2+$B$1"])
+            ws.cell(row, 1).font = Font(bold=row % 2 == 0)
+        ws.row_dimensions[2].height = 30
+        ws["A4"].hyperlink = "https://example.com"
+        wb.create_sheet("其他")["A1"] = "=資料!B2"
+        wb.save(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def _sorted(self, read_only, **kwargs):
+        editor = ExcelEditor(self.test_file, read_only=read_only)
+        result = self._run(editor.sort_sheet, "資料", ["金額 desc", "名稱"], **kwargs)
+        path = os.path.join(self.test_dir, f"sorted-{read_only}.xlsx")
+        self._run(editor.save, path)
+        return result, load_workbook(path)
+
+    def test_raw_and_loaded_results_match(self):
+        """測試外部排序重寫 XML 與載入工作簿排序的結果相同"""
+        with mock.patch.object(spill_runs, "MERGE_FAN_IN", 3):
+            raw, raw_wb = self._sorted(True, memory_limit=5000)
+        loaded, loaded_wb = self._sorted(False)
+        self.assertEqual(raw["rows"], 300)
+        self.assertGreater(raw["spilled"], 3)
+        self.assertEqual(loaded, {"sheet": "資料", "rows": 300, "spilled": 0})
+
+        raw_ws, loaded_ws = raw_wb["資料"], loaded_wb["資料"]
+        self.assertEqual(list(raw_ws.values), list(loaded_ws.values))
+        self.assertEqual([[cell.font.b for cell in row] for row in raw_ws.iter_rows()],
+                         [[cell.font.b for cell in row] for row in loaded_ws.iter_rows()])
+        self.assertEqual([cell.value for cell in raw_ws[1]], ["名稱", "金額", "兩倍"])
+        self.assertEqual([raw_ws.cell(row, 2).value for row in (2, 101, 201, 230, 301)],
+                         ["x", 5, 3, 1.5, None])
+        # 相同金額依名稱排序
+        self.assertEqual(raw_ws["A2"].value, "項目105")
+        # 公式的相對參照依新位置平移，絕對參照不變；其他工作表的參照不變
+        self.assertEqual(raw_ws["C2"].value, "=B2*2+$B$1")
+        self.assertEqual(raw_wb["其他"]["A1"].value, "=資料!B2")
+
+        # 超連結跟著列搬移，列高留在原位置
+        for ws in (raw_ws, loaded_ws):
+            links = [cell.coordinate for row in ws.iter_rows() for cell in row if cell.hyperlink]
+            self.assertEqual(len(links), 1)
+            self.assertEqual(ws[links[0]].value, "項目4")
+            self.assertEqual(ws.row_dimensions[2].height, 30)
+
+    def test_keep_row_styles(self):
+        """測試列格式跟著列搬移"""
+        for read_only in (True, False):
+            with self.subTest(read_only=read_only):
+                _, wb = self._sorted(read_only, keep_row_styles=True)
+                ws = wb["資料"]
+                rows = [row for row in range(2, 302) if ws.row_dimensions[row].height == 30]
+                self.assertEqual(len(rows), 1)
+                self.assertEqual(ws.cell(rows[0], 1).value, "項目2")
+
+    def test_shared_formulas_are_expanded(self):
+        """測試共用公式展開後依新位置平移"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["鍵", "值", "合計"])
+        for row, key in enumerate([3, 1, 2], 2):
+            ws.append([key, row * 10, f"=A{row}+B{row}"])
+        wb.save(self.test_file)
+        shared = os.path.join(self.test_dir, "shared.xlsx")
+        with zipfile.ZipFile(self.test_file) as zin, zipfile.ZipFile(shared, "w") as zout:
+            for info in zin.infolist():
+                data = zin.read(info)
+                if info.filename == "xl/worksheets/sheet1.xml":
+                    data = data.replace(b"<f>A2+B2</f>", b'<f t="shared" ref="C2:C4" si="0">A2+B2</f>')
+                    data = data.replace(b"<f>A3+B3</f>", b'<f t="shared" si="0"/>')
+                    data = data.replace(b"<f>A4+B4</f>", b'<f t="shared" si="0"/>')
+                zout.writestr(info, data)
+
+        editor = ExcelEditor(shared, read_only=True)
+        self.assertEqual(self._run(editor.sort_sheet, "Sheet", "鍵")["rows"], 3)
+        self._run(editor.save)
+        ws = load_workbook(shared)["Sheet"]
+        self.assertEqual([[cell.value for cell in row] for row in ws.iter_rows(min_row=2)], [
+            [1, 30, "=A2+B2"], [2, 40, "=A3+B3"], [3, 20, "=A4+B4"],
+        ])
+
+    def test_refuses_merged_data_rows(self):
+        """測試資料列中有合併儲存格時不排序"""
+        wb = load_workbook(self.test_file)
+        wb["資料"].merge_cells("A1:C1")
+        wb.save(self.test_file)
+        self.assertEqual(self._run(ExcelEditor(self.test_file, read_only=True).sort_sheet, "資料", "B")["rows"], 300)
+
+        wb = load_workbook(self.test_file)
+        wb["資料"].merge_cells("A5:B6")
+        wb.save(self.test_file)
+        for read_only in (True, False):
+            editor = ExcelEditor(self.test_file, read_only=read_only)
+            self.assertIsNone(self._run(editor.sort_sheet, "資料", "B"))
+        self.assertIsNone(self._run(editor.sort_sheet, "資料", "不存在"))
+
+    def test_llm_api_sort(self):
+        """測試 llm_api 的 sort_sheet"""
+        result = execute_command("sort_sheet", file_path=self.test_file, sheet_name="資料", keys="-A")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["rows"], 300)
+        ws = load_workbook(self.test_file)["資料"]
+        self.assertEqual([ws.cell(row, 1).value for row in (1, 2, 301)], ["名稱", "項目99", "項目10"])
+
+        result = execute_command("sort_sheet", file_path=self.test_file, sheet_name="資料", keys=[])
+        self.assertFalse(result["success"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for Spill Runs
+Testing: stable merging, the fixed fan-in merge tree, combining equal keys and cleanup
+"""
+
+import unittest
+import os
+import random
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.spill_runs import SpillRuns
+
+
+class TestSpillRuns(unittest.TestCase):
+    """測試排序段暫存檔"""
+
+    def _write(self, runs, count, size=20):
+        rng = random.Random(7)
+        written = []
+        for run in range(count):
+            entries = sorted(((rng.randrange(10), (run, index)) for index in range(size)),
+                             key=lambda entry: entry[0])
+            runs.write(entries)
+            written.extend(entries)
+        return written
+
+    def test_merge_tree_is_stable(self):
+        """測試分層合併：每層滿了才合併，結果與穩定排序相同"""
+        runs = SpillRuns('test-')
+        runs.fan_in = 4
+        written = self._write(runs, 16)
+        # 16 個排序段合併兩層後只剩一個，其間每筆資料只重寫兩次
+        self.assertEqual([len(level) for level in runs._levels], [0, 0, 1])
+        self.assertEqual(len(os.listdir(runs._directory)), 1)
+
+        self._write(runs, 3)
+        self.assertEqual([len(level) for level in runs._levels], [3, 0, 1])
+        self.assertEqual(len(runs), 4)
+
+        runs2 = SpillRuns('test-')
+        expected = sorted(written + self._write(runs2, 3), key=lambda entry: entry[0])
+        runs2.close()
+        self.assertEqual(list(runs.merged()), expected)
+        directory = runs._directory
+        runs.close()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_final_merge_respects_fan_in(self):
+        """測試各層剩餘的排序段超過扇入數時，先合併最後的幾個"""
+        runs = SpillRuns('test-')
+        runs.fan_in = 3
+        written = self._write(runs, 8)
+        self.assertEqual([len(level) for level in runs._levels], [2, 2])
+        merged = list(runs.merged())
+        self.assertEqual(len(runs), 3)
+        self.assertEqual(merged, sorted(written, key=lambda entry: entry[0]))
+        runs.close()
+
+    def test_combine_equal_keys(self):
+        """測試鍵相同的值在每次合併時合併為一個"""
+        runs = SpillRuns('test-', combine=lambda total, value: total + value)
+        runs.fan_in = 2
+        for _ in range(5):
+            runs.write([(key, 1) for key in range(4)])
+        self.assertEqual(list(runs.merged()), [(key, 5) for key in range(4)])
+        runs.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for XLSX Compact
+Testing: shared-strings and cellXfs garbage collection and deduplication, streaming index
+         remapping, ExcelEditor.save(compact=True), ExcelEditor.compact and the llm_api operation
+"""
+
+import unittest
+import os
+import tempfile
+import shutil
+import io
+import zipfile
+from unittest import mock
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import xlsx_compact, xlsx_package
+from src.xlsx_compact import compact_package
+from src.xlsx_package import iter_sheet_sections
+from src.excel_editor import ExcelEditor
+from src.llm_api import execute_command
+from tests import QuietTestCase
+from openpyxl import load_workbook
+
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# 共用字串：2 沒有使用，3 與 0 重複
+STRINGS = ['甲', '乙', '未使用', '甲', '丙']
+
+# 儲存格格式：2 沒有使用，3 與 1 相同（屬性順序不同），4 只用於欄格式
+CELL_XFS = [
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>',
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>',
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>',
+    '<xf applyFont="1" xfId="0" borderId="0" fillId="0" fontId="1" numFmtId="0"/>',
+    '<xf numFmtId="10" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>',
+]
+
+SHEET1 = (
+    '<cols><col min="2" max="2" width="12" style="4" customWidth="1"/></cols>'
+    '<sheetData>'
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" s="1"><v>10</v></c></row>'
+    '<row r="2" s="3" customFormat="1"><c r="A2" s="3" t="s"><v>3</v></c><c r="B2" t="s"><v>4</v></c></row>'
+    '<row r="3"><c r="A3" t="s" s="1"><v>1</v></c><c r="B3" s="4"><v>0.5</v></c></row>'
+    '</sheetData><mergeCells count="1"><mergeCell ref="C1:D1"/></mergeCells>'
+)
+SHEET2 = '<sheetData><row r="1"><c r="A1" t="s"><v>4</v></c></row></sheetData>'
+
+
+def write_bloated_workbook(path):
+    """建立含有沒有使用與重複的共用字串及格式的 xlsx"""
+    parts = {
+        'xl/worksheets/sheet1.xml': f'<worksheet xmlns="{MAIN_NS}">{SHEET1}</worksheet>',
+        'xl/worksheets/sheet2.xml': f'<worksheet xmlns="{MAIN_NS}">{SHEET2}</worksheet>',
+        'xl/sharedStrings.xml': (
+            f'<sst xmlns="{MAIN_NS}" count="9" uniqueCount="{len(STRINGS)}">'
+            + ''.join(f'<si><t>{text}</t></si>' for text in STRINGS) + '</sst>'
+        ),
+        'xl/styles.xml': (
+            f'<styleSheet xmlns="{MAIN_NS}">'
+            '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+            '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+            '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill></fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="{len(CELL_XFS)}">' + ''.join(CELL_XFS) + '</cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            '</styleSheet>'
+        ),
+        'xl/workbook.xml': (
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}"><sheets>'
+            '<sheet name="資料" sheetId="1" r:id="rId1"/><sheet name="其他" sheetId="2" r:id="rId2"/>'
+            '</sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+            f'<Relationship Id="rId2" Type="{REL_NS}/worksheet" Target="worksheets/sheet2.xml"/>'
+            f'<Relationship Id="rId3" Type="{REL_NS}/sharedStrings" Target="sharedStrings.xml"/>'
+            f'<Relationship Id="rId4" Type="{REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ),
+        '_rels/.rels': (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ),
+        '[Content_Types].xml': (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            '<Override PartName="/xl/styles.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet2.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'
+        ),
+    }
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+
+
+def snapshot(path):
+    """工作表的值與格式（與索引無關的比較）"""
+    wb = load_workbook(path)
+    result = {}
+    for ws in wb.worksheets:
+        result[ws.title] = [
+            [(cell.value, cell.font.b, cell.number_format) for cell in row] for row in ws.iter_rows()
+        ]
+    ws = wb["資料"]
+    result["dimensions"] = (ws.column_dimensions["B"].number_format, ws.row_dimensions[2].font.b,
+                            ws.column_dimensions["B"].width, list(map(str, ws.merged_cells.ranges)))
+    return result
+
+
+class TestCompactPackage(unittest.TestCase):
+    """測試共用字串與格式的整理"""
+
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "bloated.xlsx")
+        self.output_file = os.path.join(self.test_dir, "compact.xlsx")
+        write_bloated_workbook(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def test_unused_and_duplicates_are_removed(self):
+        """測試移除沒有使用的項目、合併重複項目，內容不變"""
+        with mock.patch.object(xlsx_compact, "COPY_CHUNK_SIZE", 16), \
+                mock.patch.object(xlsx_package, "COPY_CHUNK_SIZE", 16):
+            report = compact_package(self.test_file, self.output_file)
+        self.assertEqual({key: report[key] for key in
+                          ("strings_before", "strings_after", "styles_before", "styles_after")},
+                         {"strings_before": 5, "strings_after": 3, "styles_before": 5, "styles_after": 3})
+        self.assertNotIn("load_seconds_before", report)
+        self.assertEqual(snapshot(self.output_file), snapshot(self.test_file))
+
+        with zipfile.ZipFile(self.output_file) as zf:
+            sst = zf.read("xl/sharedStrings.xml").decode()
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn('count="5" uniqueCount="3"', sst)
+        self.assertNotIn("未使用", sst)
+        # 只改寫索引，其他內容原樣保留
+        self.assertIn('<row r="2" s="1" customFormat="1"><c r="A2" s="1" t="s"><v>0</v></c>', sheet)
+        self.assertIn('<col min="2" max="2" width="12" style="2" customWidth="1"/>', sheet)
+        self.assertIn('<mergeCells count="1"><mergeCell ref="C1:D1"/></mergeCells>', sheet)
+
+    def test_sheet_sections(self):
+        """測試工作表切成 sheetData 之前、完整的列區塊與之後，串接後與原本相同"""
+        rows = ''.join(f'<x:row r="{row}"><x:c r="A{row}"><x:v>{row}</x:v></x:c></x:row>' for row in range(1, 6))
+        cases = {
+            "prefixed": f'<x:worksheet xmlns:x="{MAIN_NS}"><x:sheetData>{rows}</x:sheetData>'
+                        '<x:mergeCells count="0"/></x:worksheet>',
+            "empty": f'<worksheet xmlns="{MAIN_NS}"><sheetData/><pageMargins/></worksheet>',
+        }
+        for name, xml in cases.items():
+            with self.subTest(name=name), mock.patch.object(xlsx_package, "COPY_CHUNK_SIZE", 16):
+                data = xml.encode()
+                sections = list(iter_sheet_sections(io.BytesIO(data), name))
+                self.assertEqual(b''.join(piece for _, piece in sections), data)
+                kinds = [kind for kind, _ in sections]
+                self.assertEqual(kinds[:2], ['head', 'start'])
+                self.assertEqual(kinds[-1], 'tail')
+                for kind, piece in sections:
+                    if kind == 'rows':
+                        self.assertTrue(piece.endswith(b'</x:row>'))
+                tail = b''.join(piece for kind, piece in sections if kind == 'tail')
+                self.assertTrue(tail.endswith(b'</x:worksheet>' if name == "prefixed" else b'</worksheet>'))
+                self.assertEqual(tail.startswith(b'<x:mergeCells'), name == "prefixed")
+        for broken in (b'<worksheet/>', f'<worksheet xmlns="{MAIN_NS}"><sheetData><row r="1">'.encode()):
+            with self.assertRaises(ValueError):
+                list(iter_sheet_sections(io.BytesIO(broken), "broken"))
+
+    def test_compacted_package_is_stable(self):
+        """測試已整理的檔案再整理一次時不變，並可記錄載入時間"""
+        compact_package(self.test_file, self.output_file)
+        again = os.path.join(self.test_dir, "again.xlsx")
+        report = compact_package(self.output_file, again, measure_load=True)
+        self.assertEqual((report["strings_before"], report["strings_after"]), (3, 3))
+        self.assertEqual((report["styles_before"], report["styles_after"]), (3, 3))
+        self.assertGreater(report["load_seconds_before"], 0)
+        with zipfile.ZipFile(self.output_file) as first, zipfile.ZipFile(again) as second:
+            for name in ("xl/worksheets/sheet1.xml", "xl/styles.xml"):
+                self.assertEqual(first.read(name), second.read(name))
+
+    def test_invalid_references(self):
+        """測試儲存格參照不存在的字串或格式時不整理"""
+        with zipfile.ZipFile(self.test_file) as zf:
+            parts = {info.filename: zf.read(info) for info in zf.infolist()}
+        for old, new in ((b"<v>4</v></c></row></sheetData>", b"<v>9</v></c></row></sheetData>"),
+                         (b'<c r="B1" s="1">', b'<c r="B1" s="7">')):
+            with self.subTest(new=new):
+                broken = os.path.join(self.test_dir, "broken.xlsx")
+                with zipfile.ZipFile(broken, "w") as zf:
+                    for name, data in parts.items():
+                        if name.startswith("xl/worksheets/"):
+                            data = data.replace(old, new)
+                        zf.writestr(name, data)
+                with self.assertRaises(ValueError):
+                    compact_package(broken, self.output_file)
+
+
+class TestExcelEditorCompact(QuietTestCase):
+    """測試 ExcelEditor 的整理"""
+
+    def setUp(self):
+        """準備測試環境"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "bloated.xlsx")
+        self.output_file = os.path.join(self.test_dir, "out.xlsx")
+        write_bloated_workbook(self.test_file)
+        self.expected = snapshot(self.test_file)
+
+    def tearDown(self):
+        """清理"""
+        shutil.rmtree(self.test_dir)
+
+    def test_save_with_compact(self):
+        """測試各種載入模式下儲存時整理"""
+        for kwargs in ({"read_only": True}, {}, {"sheets": ["其他"]}):
+            with self.subTest(**kwargs):
+                editor = ExcelEditor(self.test_file, **kwargs)
+                report = self._run(editor.save, self.output_file, compact=True)
+                self.assertLess(report["styles_after"], report["styles_before"])
+                self.assertLessEqual(report["strings_after"], 3)
+                self.assertEqual(snapshot(self.output_file), self.expected)
+
+    def test_partial_editor_keeps_working_after_compact(self):
+        """測試部分載入時整理後繼續編輯，未載入的工作表格式仍正確"""
+        editor = ExcelEditor(self.test_file, sheets=["其他"])
+        self._run(editor.update_cell, "其他", "B1", "新值")
+        self._run(editor.save, self.output_file, compact=True)
+        self._run(editor.update_cell, "其他", "C1", "再一次")
+        self._run(editor.save, self.output_file)
+
+        result = snapshot(self.output_file)
+        self.assertEqual(result["資料"], self.expected["資料"])
+        self.assertEqual(result["dimensions"], self.expected["dimensions"])
+        self.assertEqual([value for value, _, _ in result["其他"][0]], ["丙", "新值", "再一次"])
+
+    def test_compact_method_and_llm_api(self):
+        """測試 compact() 與 llm_api 的 compact_workbook"""
+        editor = ExcelEditor(self.test_file, read_only=True)
+        report = self._run(editor.compact)
+        self.assertEqual(report["styles_after"], 3)
+        self.assertTrue(editor.read_only)
+        self._run(editor.save, self.output_file)
+        self.assertEqual(snapshot(self.output_file), self.expected)
+
+        result = execute_command("compact_workbook", file_path=self.test_file)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["result"]["strings_before"], 5)
+        self.assertEqual(snapshot(self.test_file), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)